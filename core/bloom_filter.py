@@ -0,0 +1,274 @@
+# core/bloom_filter.py
+#
+# Semi-join antes do merge. Com join inner ou left, as linhas de B cuja chave não existe em
+# A são descartadas pelo pd.merge de qualquer forma; um filtro das chaves de A permite
+# descartá-las já na leitura de B, bloco a bloco, e só as linhas que podem casar ficam em
+# memória. As chaves viram hashes de 64 bits calculados de forma vetorizada; até
+# LIMITE_CONJUNTO_EXATO chaves distintas o filtro é o conjunto exato desses hashes e, acima
+# disso, um filtro de Bloom (~1,2 byte por chave com 1% de falsos positivos).
+#
+# O filtro pode manter linhas que o merge depois descarta (falso positivo), mas nunca
+# descarta uma linha que casaria: valores que o merge considera iguais (1 e 1.0, NaN e None)
+# têm sempre o mesmo hash, e colunas de tipos que não se comparam (número em A, texto em
+# um bloco de B) não são filtradas.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+TAXA_FALSOS_POSITIVOS = 0.01
+# Até quantas chaves distintas o conjunto exato (8 bytes por chave) é usado no lugar do Bloom
+LIMITE_CONJUNTO_EXATO = 1_000_000
+# Linhas por fatia no hash de textos (a memória temporária é proporcional aos bytes da fatia)
+LINHAS_POR_FATIA = 262_144
+
+_PRIMO_TEXTO = np.uint64(0x100000001b3)
+_PRIMO_COMBINACAO = np.uint64(0x9E3779B97F4A7C15)
+_HASH_NULO = np.uint64(0x5bd1e9955bd1e995)  # nulos (NaN, None, NaT) casam entre si no pd.merge
+_TIPOS_NUMERICOS_OBJETO = ['integer', 'floating', 'mixed-integer-float', 'decimal']
+_TIPOS_DATA_OBJETO = ['datetime', 'datetime64', 'date']
+
+
+def _misturar(h: np.ndarray) -> np.ndarray:
+    """Finalizador do MurmurHash3: espalha os bits para que qualquer fatia do hash sirva de índice."""
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xff51afd7ed558ccd)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xc4ceb9fe1a85ec53)
+    h ^= h >> np.uint64(33)
+    return h
+
+
+def _hash_numeros(valores: np.ndarray) -> np.ndarray:
+    # float64 para todos: 1, 1.0 e True casam no merge; + 0.0 iguala -0.0 a 0.0
+    valores = np.asarray(valores, dtype=np.float64) + 0.0
+    nulos = np.isnan(valores)
+    hashes = _misturar(valores.view(np.uint64))
+    hashes[nulos] = _HASH_NULO
+    return hashes
+
+
+def _hash_datas(serie: pd.Series) -> np.ndarray:
+    if getattr(serie.dt, 'tz', None) is not None:
+        serie = serie.dt.tz_convert(None)
+    valores = serie.to_numpy(dtype='datetime64[us]')
+    hashes = _misturar(valores.view(np.int64).astype(np.uint64))
+    hashes[np.isnat(valores)] = _HASH_NULO
+    return hashes
+
+
+def _hash_fatia_texto(arr) -> np.ndarray:
+    """Hash polinomial de cada texto de um array Arrow, a partir dos buffers (sem objetos Python)."""
+    n = len(arr)
+    _, buffer_offsets, buffer_dados = arr.buffers()
+    offsets = np.frombuffer(buffer_offsets, dtype=np.int64)[arr.offset:arr.offset + n + 1]
+    dados = (np.frombuffer(buffer_dados, dtype=np.uint8)[offsets[0]:offsets[-1]]
+             if buffer_dados is not None else np.zeros(0, dtype=np.uint8))
+    inicios = offsets[:-1] - offsets[0]
+    tamanhos = np.diff(offsets)
+    hashes = np.zeros(n, dtype=np.uint64)
+    if len(dados):
+        # Cada byte multiplicado pela potência do primo na sua posição dentro do texto
+        potencias = np.cumprod(np.full(int(tamanhos.max()), _PRIMO_TEXTO, dtype=np.uint64))
+        posicoes = np.arange(len(dados), dtype=np.int64) - np.repeat(inicios, tamanhos)
+        contribuicoes = dados.astype(np.uint64) * potencias[posicoes]
+        preenchidos = tamanhos > 0
+        hashes[preenchidos] = np.add.reduceat(contribuicoes, inicios[preenchidos])
+    hashes = _misturar(hashes ^ tamanhos.astype(np.uint64))
+    hashes[arr.is_null().to_numpy(zero_copy_only=False)] = _HASH_NULO
+    return hashes
+
+
+def _hash_textos(serie: pd.Series) -> np.ndarray:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        # Sem pyarrow: hash do pandas (mais lento, mas igual para os dois lados)
+        valores = serie.to_numpy(dtype=object, na_value=None)
+        hashes = pd.util.hash_array(valores)
+        hashes[pd.isna(valores)] = _HASH_NULO
+        return hashes
+    # Texto com tipo Arrow (padrão no pandas 3) é usado sem cópia; object é convertido
+    arr = pa.array(serie.array, from_pandas=True).cast(pa.large_string())
+    return np.concatenate([_hash_fatia_texto(arr.slice(inicio, LINHAS_POR_FATIA))
+                           for inicio in range(0, len(arr), LINHAS_POR_FATIA)] or [np.zeros(0, dtype=np.uint64)])
+
+
+def _textos_de_objetos_mistos(serie: pd.Series) -> pd.Series:
+    # Números viram o texto do float (1, 1.0 e True casam no merge); textos ficam como estão
+    def canonico(valor):
+        if valor is None or isinstance(valor, str): return valor
+        if pd.isna(valor): return None
+        try:
+            return repr(float(valor))
+        except (TypeError, ValueError):
+            return str(valor)
+    return serie.map(canonico).astype(object)
+
+
+def _tipo_e_hash_coluna(serie: pd.Series) -> tuple[str | None, np.ndarray | None]:
+    """
+    Hash de cada valor da coluna e o tipo de comparação ('numero', 'data', 'texto' ou
+    'vazio'). Retorna (None, None) para tipos que o filtro não sabe comparar.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = pd.Series(np.asarray(serie, dtype=object), index=serie.index)
+    if pd.api.types.is_bool_dtype(serie.dtype) or pd.api.types.is_numeric_dtype(serie.dtype):
+        return 'numero', _hash_numeros(serie.to_numpy(dtype=np.float64, na_value=np.nan))
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return 'data', _hash_datas(serie)
+    if pd.api.types.is_string_dtype(serie.dtype) and serie.dtype != object:
+        return 'texto', _hash_textos(serie)
+    if serie.dtype != object:
+        return None, None
+
+    # Coluna object (comum no Excel): o tipo vem dos valores
+    tipo = pd.api.types.infer_dtype(serie, skipna=True)
+    if tipo == 'empty':
+        return 'vazio', np.full(len(serie), _HASH_NULO, dtype=np.uint64)
+    if tipo == 'string':
+        return 'texto', _hash_textos(serie)
+    if tipo in _TIPOS_NUMERICOS_OBJETO:
+        return 'numero', _hash_numeros(pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan))
+    if tipo == 'boolean':
+        return 'numero', _hash_numeros(serie.map({True: 1.0, False: 0.0}).to_numpy(dtype=np.float64, na_value=np.nan))
+    if tipo in _TIPOS_DATA_OBJETO:
+        datas = pd.to_datetime(serie, errors='coerce')
+        if datas.notna().sum() == serie.notna().sum():
+            return 'data', _hash_datas(datas)
+    return 'texto', _hash_textos(_textos_de_objetos_mistos(serie))
+
+
+def hash_chaves(df: pd.DataFrame, colunas_chave: list[str]) -> tuple[tuple | None, np.ndarray | None]:
+    """
+    Hash de 64 bits da chave (simples ou composta) de cada linha.
+
+    Returns:
+        tuple: (tipos de cada coluna, array uint64 com um hash por linha), ou (None, None)
+            se alguma coluna tiver um tipo que o filtro não sabe comparar.
+    """
+    tipos, combinado = [], None
+    for coluna in colunas_chave:
+        tipo, hashes = _tipo_e_hash_coluna(df[coluna])
+        if tipo is None:
+            return None, None
+        tipos.append(tipo)
+        combinado = hashes if combinado is None else _misturar(combinado * _PRIMO_COMBINACAO ^ hashes)
+    return tuple(tipos), combinado
+
+
+def _tipos_compativeis(tipos_filtro: tuple, tipos_bloco: tuple) -> bool:
+    # Uma coluna só de nulos ('vazio') tem o mesmo hash em qualquer tipo
+    return all(a == b or 'vazio' in (a, b) for a, b in zip(tipos_filtro, tipos_bloco))
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre hashes de 64 bits: 'contem' nunca erra para um hash adicionado e
+    erra para os demais com probabilidade ~'taxa_falsos_positivos'. As k posições de cada
+    hash vêm de duas metades de 32 bits (h1 + i*h2), sem calcular k hashes.
+    """
+
+    def __init__(self, capacidade: int, taxa_falsos_positivos: float = TAXA_FALSOS_POSITIVOS):
+        capacidade = max(int(capacidade), 1)
+        self.num_bits = max(int(math.ceil(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2)), 64)
+        self.num_hashes = max(int(round(self.num_bits / capacidade * math.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _posicoes(self, hashes: np.ndarray):
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        num_bits = np.uint64(self.num_bits)
+        for i in range(self.num_hashes):
+            yield (h1 + np.uint64(i) * h2) % num_bits
+
+    def adicionar(self, hashes: np.ndarray) -> None:
+        # Um byte por bit durante a montagem (atribuição vetorizada), compactado no fim
+        ligados = np.unpackbits(self.bits, count=self.num_bits, bitorder='little').view(bool)
+        for posicoes in self._posicoes(hashes):
+            ligados[posicoes] = True
+        self.bits = np.packbits(ligados, bitorder='little')
+
+    def contem(self, hashes: np.ndarray) -> np.ndarray:
+        resultado = np.ones(len(hashes), dtype=bool)
+        for posicoes in self._posicoes(hashes):
+            resultado &= ((self.bits[posicoes >> np.uint64(3)] >> (posicoes & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+        return resultado
+
+
+class FiltroChaves:
+    """
+    Chaves de um lado do confronto, consultadas com as linhas do outro lado (ver
+    construir_filtro_chaves). Conta as linhas consultadas e mantidas, para o console.
+    """
+
+    def __init__(self, colunas_consulta: list[str], tipos: tuple, hashes_distintos: np.ndarray,
+                 taxa_falsos_positivos: float = TAXA_FALSOS_POSITIVOS,
+                 limite_exato: int = LIMITE_CONJUNTO_EXATO):
+        self.colunas = list(colunas_consulta)
+        self.tipos = tipos
+        self.chaves_distintas = len(hashes_distintos)
+        self.hashes, self.bloom = None, None
+        if self.chaves_distintas <= limite_exato:
+            self.hashes = hashes_distintos  # ordenados, para o np.searchsorted
+            self.metodo = "conjunto exato"
+        else:
+            self.bloom = FiltroBloom(self.chaves_distintas, taxa_falsos_positivos)
+            self.bloom.adicionar(hashes_distintos)
+            self.metodo = f"filtro de Bloom, {taxa_falsos_positivos:.0%} de falsos positivos"
+        self.linhas_consultadas = 0
+        self.linhas_mantidas = 0
+
+    @property
+    def tamanho_bytes(self) -> int:
+        return self.hashes.nbytes if self.bloom is None else self.bloom.bits.nbytes
+
+    def _contem(self, hashes: np.ndarray) -> np.ndarray:
+        if self.bloom is not None:
+            return self.bloom.contem(hashes)
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        posicoes = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return self.hashes[posicoes] == hashes
+
+    def mascara(self, df: pd.DataFrame) -> np.ndarray:
+        """True nas linhas de 'df' cuja chave pode existir no filtro (todas, se os tipos não se comparam)."""
+        tipos, hashes = hash_chaves(df, self.colunas)
+        if tipos is None or not _tipos_compativeis(self.tipos, tipos):
+            mascara = np.ones(len(df), dtype=bool)
+        else:
+            mascara = self._contem(hashes)
+        self.linhas_consultadas += len(df)
+        self.linhas_mantidas += int(mascara.sum())
+        return mascara
+
+    def descricao(self) -> str:
+        return f"{self.chaves_distintas:,} chaves ({self.metodo}, {self.tamanho_bytes / 1024 ** 2:,.1f} MB)"
+
+
+def construir_filtro_chaves(df: pd.DataFrame, colunas_chave: list[str], colunas_consulta: list[str],
+                            taxa_falsos_positivos: float = TAXA_FALSOS_POSITIVOS,
+                            limite_exato: int = LIMITE_CONJUNTO_EXATO) -> FiltroChaves | None:
+    """
+    Monta o filtro com as chaves de 'df' para o semi-join na leitura do outro lado.
+
+    Args:
+        df (pd.DataFrame): O lado já carregado (ex: A, com os filtros aplicados).
+        colunas_chave (list[str]): Colunas chave de 'df'.
+        colunas_consulta (list[str]): Colunas chave do outro lado, na mesma ordem.
+        taxa_falsos_positivos (float, optional): Do filtro de Bloom. Defaults to TAXA_FALSOS_POSITIVOS.
+        limite_exato (int, optional): Até quantas chaves distintas usar o conjunto exato.
+            Defaults to LIMITE_CONJUNTO_EXATO.
+
+    Returns:
+        FiltroChaves | None: O filtro, ou None se alguma coluna chave tiver um tipo que o
+            filtro não sabe comparar.
+    """
+    tipos, hashes = hash_chaves(df, colunas_chave)
+    if tipos is None:
+        return None
+    # Ordenar e tirar repetidos (np.sort é bem mais rápido que np.unique para uint64)
+    hashes = np.sort(hashes)
+    distintos = hashes[np.concatenate(([True], hashes[1:] != hashes[:-1]))] if len(hashes) else hashes
+    return FiltroChaves(colunas_consulta, tipos, distintos, taxa_falsos_positivos, limite_exato)
@@ -0,0 +1,506 @@
+# core/compute_backends.py
+#
+# Motores de cálculo do confronto. O pandas (comparar_dataframes) é o motor de referência;
+# DuckDB e Polars executam o mesmo trabalho (chaves, pares, tipo de join, filtros e
+# tolerância) lendo o CSV direto do disco, com todos os núcleos e sem materializar os
+# intermediários em DataFrames do pandas (o DuckDB ainda descarrega em disco o que não
+# couber na memória). Só as linhas do resultado (as divergentes, por padrão) e os totais
+# voltam, no mesmo formato de comparar_dataframes: mesmas colunas, mesmos nomes e a mesma
+# ordem de linhas do pd.merge. testes/conformidade_backends.py confere essa equivalência.
+#
+# Recursos que só o motor pandas tem (casamento aproximado, resumo por dimensão, modo
+# monetário exato, esquema de colunas, planilhas Excel, filtros de data e com expressão regular)
+# fazem o confronto voltar para o pandas: ver motivo_incompativel.
+#
+# Só a biblioteca padrão é importada no topo: a janela consulta motores_disponiveis ao abrir.
+
+import importlib.util
+import os
+import re
+import tempfile
+
+MOTORES_CALCULO = ['pandas', 'duckdb', 'polars']
+
+# Textos lidos como nulos no CSV: os mesmos do pd.read_csv
+VALORES_NULOS_CSV = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                     '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Linhas usadas pelos motores para inferir os tipos das colunas do CSV
+LINHAS_AMOSTRA_TIPOS = 20_480
+
+OPERADORES_TEXTO = ['=', '!=', 'contém', 'não contém', 'começa com', 'termina com']
+OPERADORES_INTERVALO = ['>', '<', '>=', '<=', 'entre']
+# '=', '!=', 'contém' e 'não contém' são expressões regulares no pandas; só valores literais são traduzidos
+_METACARACTERES_REGEX = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+def motores_disponiveis() -> list[str]:
+    """Motores de MOTORES_CALCULO com o pacote instalado (o pandas sempre está)."""
+    return [motor for motor in MOTORES_CALCULO
+            if motor == 'pandas' or importlib.util.find_spec(motor) is not None]
+
+
+def _filtro_traduzivel(filtro_info: dict | None) -> bool:
+    if not filtro_info or not filtro_info.get('coluna'):
+        return True
+    operador, valor = filtro_info['operador'], str(filtro_info.get('valor') or '')
+    if operador in ['é nulo', 'não é nulo'] or not valor.strip():
+        return True
+    if operador in OPERADORES_INTERVALO:
+        # Valores não numéricos são datas no pandas (_mascara_comparacao)
+        valores = [v.strip() for v in valor.split(';')] if operador == 'entre' else [valor]
+        try:
+            return all(float(v) == float(v) for v in valores) and (operador != 'entre' or len(valores) == 2)
+        except ValueError:
+            return False
+    if operador in ['começa com', 'termina com']:
+        return True
+    return operador in OPERADORES_TEXTO and not _METACARACTERES_REGEX.search(valor)
+
+
+def motivo_incompativel(config: dict) -> str | None:
+    """
+    Motivo pelo qual o confronto não pode rodar em DuckDB/Polars, ou None se pode.
+
+    Args:
+        config (dict): A configuração do ConfrontoWorker.
+    """
+    if config.get('casamento_aproximado'):
+        return "casamento aproximado"
+    if config.get('dimensoes_agrupamento'):
+        return "resumo por dimensão"
+    if config.get('casas_decimais') is not None:
+        return "valores monetários exatos"
+    if config.get('formato_numeros') or any((config.get('esquema_colunas') or {}).values()):
+        return "esquema de colunas (números 1.234,56, datas, textos)"
+    for lado in ['a', 'b']:
+        if os.path.splitext(config[f'caminho_{lado}'].lower())[1] != '.csv':
+            return f"o Arquivo {lado.upper()} não é CSV"
+        if not _filtro_traduzivel(config.get(f'filtro_{lado}')):
+            return f"o filtro do Arquivo {lado.upper()} (datas, períodos ou expressão regular)"
+    return None
+
+
+def _colunas_resultado(colunas_a: list[str], colunas_b: list[str], colunas_chave_a: list[str],
+                       colunas_chave_b: list[str], pares_mapeados: list[tuple[str, str]]) -> dict:
+    """
+    Nomes das colunas do resultado pelas mesmas regras de comparar_dataframes: colunas dos
+    pares com sufixo _A/_B, chaves de mesmo nome nos dois lados unidas em uma coluna e
+    demais colunas repetidas com sufixo _dfA/_dfB (como no pd.merge).
+
+    Returns:
+        dict: 'a' e 'b' (listas de (coluna no arquivo, coluna no resultado), na ordem do
+            resultado; chaves unidas só em 'a'), 'chaves_unidas' e os mapas dos pares
+            (nome original -> nome no resultado) para _calcular_diferencas_por_par.
+    """
+    import pandas as pd
+    try:
+        from .data_comparator import _renomear_colunas_dos_pares
+    except ImportError:
+        from core.data_comparator import _renomear_colunas_dos_pares
+
+    _, mapa_a = _renomear_colunas_dos_pares(pd.DataFrame(columns=colunas_a), [p[0] for p in pares_mapeados], colunas_chave_a, "_A")
+    _, mapa_b = _renomear_colunas_dos_pares(pd.DataFrame(columns=colunas_b), [p[1] for p in pares_mapeados], colunas_chave_b, "_B")
+    renomeadas_a = [mapa_a.get(c, c) for c in colunas_a]
+    renomeadas_b = [mapa_b.get(c, c) for c in colunas_b]
+    chaves_unidas = [ka for ka, kb in zip(colunas_chave_a, colunas_chave_b) if ka == kb]
+    repetidas = (set(renomeadas_a) & set(renomeadas_b)) - set(chaves_unidas)
+    saida_a = [(orig, f"{nome}_dfA" if nome in repetidas else nome) for orig, nome in zip(colunas_a, renomeadas_a)]
+    saida_b = [(orig, f"{nome}_dfB" if nome in repetidas else nome)
+               for orig, nome in zip(colunas_b, renomeadas_b) if nome not in chaves_unidas]
+    return {'a': saida_a, 'b': saida_b, 'chaves_unidas': chaves_unidas, 'mapa_a': mapa_a, 'mapa_b': mapa_b}
+
+
+def _pares_no_resultado(colunas: dict, pares_mapeados: list[tuple[str, str]]) -> list[tuple[str, str, str, str]]:
+    """Pares cujas colunas existem no resultado: (original A, original B, coluna A, coluna B)."""
+    nomes = {nome for _, nome in colunas['a'] + colunas['b']}
+    pares = []
+    for col_a, col_b in pares_mapeados:
+        nome_a, nome_b = colunas['mapa_a'].get(col_a), colunas['mapa_b'].get(col_b)
+        if nome_a in nomes and nome_b in nomes:
+            pares.append((col_a, col_b, nome_a, nome_b))
+    return pares
+
+
+def _resumo_dos_totais(pares: list, totais: dict, apenas_divergencias: bool) -> list[dict]:
+    """Monta 'resumo_por_par' (formato de comparar_dataframes) a partir dos totais do motor."""
+    try:
+        from .data_comparator import _diferenca_percentual
+    except ImportError:
+        from core.data_comparator import _diferenca_percentual
+
+    resumo = []
+    for indice, (col_a, col_b, _, _) in enumerate(pares):
+        total_a, total_b = float(totais[f'a{indice}'] or 0), float(totais[f'b{indice}'] or 0)
+        item = {
+            'par_comparado': f"{col_a} (A) vs {col_b} (B)", 'total_lado_a': total_a,
+            'total_lado_b': total_b, 'diferenca_absoluta_total': total_a - total_b,
+            'diferenca_percentual_total': _diferenca_percentual(total_a, total_b)
+        }
+        if apenas_divergencias:
+            item['linhas_divergentes'] = int(totais[f'd{indice}'] or 0)
+            item['linhas_conciliadas'] = int(totais['linhas']) - item['linhas_divergentes']
+            item['total_conciliado_a'] = float(totais[f'ca{indice}'] or 0)
+            item['total_conciliado_b'] = float(totais[f'cb{indice}'] or 0)
+        resumo.append(item)
+    return resumo
+
+
+# --- DuckDB ---
+
+def _ident(nome: str) -> str:
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _texto_sql(valor: str) -> str:
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _fonte_duckdb(caminho: str) -> str:
+    try:
+        from .excel_parser import _detectar_separador
+    except ImportError:
+        from core.excel_parser import _detectar_separador
+    separador = _detectar_separador(caminho)
+    opcoes = [f"delim={_texto_sql(separador)}"] if separador else []
+    # Só número/texto, como a inferência de tipos do pd.read_csv. Os tipos vêm de uma amostra:
+    # se uma linha posterior não couber no tipo, a leitura falha (e o confronto volta ao pandas)
+    opcoes += ["header=true", f"sample_size={LINHAS_AMOSTRA_TIPOS}", "auto_type_candidates=['BIGINT', 'DOUBLE', 'VARCHAR']",
+               "nullstr=[" + ", ".join(_texto_sql(v) for v in VALORES_NULOS_CSV) + "]"]
+    return f"read_csv({_texto_sql(caminho)}, {', '.join(opcoes)})"
+
+
+def _condicao_duckdb(filtro_info: dict | None, colunas: list[str]) -> str | None:
+    """Filtro no formato de _aplicar_filtro_df como condição SQL (None: sem filtro)."""
+    if not filtro_info or filtro_info.get('coluna') not in colunas:
+        return None
+    coluna, operador, valor = _ident(filtro_info['coluna']), filtro_info['operador'], str(filtro_info.get('valor') or '')
+    if operador == 'é nulo': return f"{coluna} IS NULL"
+    if operador == 'não é nulo': return f"{coluna} IS NOT NULL"
+    if not valor.strip(): return None
+    if operador in OPERADORES_INTERVALO:
+        numero = f"TRY_CAST({coluna} AS DOUBLE)"
+        if operador == 'entre':
+            inicio, fim = [float(v) for v in valor.split(';')]
+            return f"COALESCE({numero} BETWEEN {inicio!r} AND {fim!r}, false)"
+        return f"COALESCE({numero} {operador} {float(valor)!r}, false)"
+    texto = f"CAST({coluna} AS VARCHAR)"
+    if operador in ['=', '!=']:
+        condicao = f"COALESCE(lower({texto}) = lower({_texto_sql(valor)}), false)"
+    elif operador in ['contém', 'não contém']:
+        condicao = f"COALESCE(contains(lower({texto}), lower({_texto_sql(valor)})), false)"
+    elif operador == 'começa com':
+        return f"COALESCE(starts_with({texto}, {_texto_sql(valor)}), false)"
+    else:
+        return f"COALESCE(ends_with({texto}, {_texto_sql(valor)}), false)"
+    return f"NOT {condicao}" if operador in ['!=', 'não contém'] else condicao
+
+
+def _comparar_duckdb(trabalho: dict, monitor=None):
+    import duckdb
+    try:
+        from .performance_monitor import etapa_monitorada
+    except ImportError:
+        from core.performance_monitor import etapa_monitorada
+
+    conexao = duckdb.connect()
+    try:
+        conexao.execute(f"SET temp_directory = {_texto_sql(os.path.join(tempfile.gettempdir(), 'dataanalyzer_duckdb'))}")
+        if trabalho['memoria_mb']:
+            conexao.execute(f"SET memory_limit = '{int(trabalho['memoria_mb'])}MB'")
+
+        # Leitura e filtros: cada lado vira uma tabela temporária, na ordem do arquivo (rowid)
+        colunas_arquivo = {}
+        for lado in ['a', 'b']:
+            with etapa_monitorada(monitor, f"Carregar e filtrar Arquivo {lado.upper()} (duckdb)") as registro:
+                fonte = _fonte_duckdb(trabalho[f'caminho_{lado}'])
+                existentes = [d[0] for d in conexao.sql(f"SELECT * FROM {fonte} LIMIT 0").description]
+                pedidas = trabalho[f'colunas_{lado}']
+                colunas_arquivo[lado] = [c for c in existentes if pedidas is None or c in pedidas]
+                condicao = _condicao_duckdb(trabalho[f'filtro_{lado}'], existentes)
+                conexao.execute(
+                    f"CREATE TEMP TABLE lado_{lado} AS SELECT {', '.join(map(_ident, colunas_arquivo[lado]))} "
+                    f"FROM {fonte}" + (f" WHERE {condicao}" if condicao else ""))
+                registro['linhas_saida'] = conexao.sql(f"SELECT count(*) FROM lado_{lado}").fetchone()[0]
+
+        colunas = _colunas_resultado(colunas_arquivo['a'], colunas_arquivo['b'], trabalho['colunas_chave_a'],
+                                     trabalho['colunas_chave_b'], trabalho['pares_mapeados'])
+        pares = _pares_no_resultado(colunas, trabalho['pares_mapeados'])
+        chaves_a, chaves_b, tipo_join = trabalho['colunas_chave_a'], trabalho['colunas_chave_b'], trabalho['tipo_join']
+
+        with etapa_monitorada(monitor, "Merge e totais (duckdb)") as registro:
+            # Junção estreita: só as posições das linhas, as chaves (para a ordem) e os valores
+            # dos pares. As demais colunas são buscadas depois, só para as linhas do resultado.
+            selecao = ["a.rowid AS _linha_a", "b.rowid AS _linha_b"]
+            selecao += [f"COALESCE(a.{_ident(ka)}, b.{_ident(kb)}) AS _ordem_{i}" for i, (ka, kb) in enumerate(zip(chaves_a, chaves_b))]
+            for indice, (col_a, col_b, _, _) in enumerate(pares):
+                selecao += [f"TRY_CAST(a.{_ident(col_a)} AS DOUBLE) AS _valor_a_{indice}",
+                            f"TRY_CAST(b.{_ident(col_b)} AS DOUBLE) AS _valor_b_{indice}"]
+            # Chaves nulas casam entre si, como no pd.merge
+            condicao_join = " AND ".join(f"a.{_ident(ka)} IS NOT DISTINCT FROM b.{_ident(kb)}"
+                                         for ka, kb in zip(chaves_a, chaves_b))
+            divergencias = []
+            for indice in range(len(pares)):
+                diferenca = f"COALESCE(_valor_a_{indice}, 0) - COALESCE(_valor_b_{indice}, 0)"
+                divergencias.append(f"_linha_a IS NULL OR _linha_b IS NULL OR NOT (abs({diferenca}) <= "
+                                    f"{float(trabalho['tolerancia'])!r}) AS _divergente_{indice}")
+            juncao = {'inner': 'INNER', 'left': 'LEFT', 'right': 'RIGHT', 'outer': 'FULL OUTER'}[tipo_join]
+            conexao.execute(f"CREATE TEMP TABLE juncao AS SELECT {', '.join(['*'] + divergencias)} FROM "
+                            f"(SELECT {', '.join(selecao)} FROM lado_a a {juncao} JOIN lado_b b ON {condicao_join})")
+
+            agregados = ["count(*) AS linhas"]
+            for indice in range(len(pares)):
+                agregados += [f"fsum(_valor_a_{indice}) AS a{indice}", f"fsum(_valor_b_{indice}) AS b{indice}",
+                              f"count(*) FILTER (WHERE _divergente_{indice}) AS d{indice}",
+                              f"fsum(_valor_a_{indice}) FILTER (WHERE NOT _divergente_{indice}) AS ca{indice}",
+                              f"fsum(_valor_b_{indice}) FILTER (WHERE NOT _divergente_{indice}) AS cb{indice}"]
+            cursor = conexao.execute(f"SELECT {', '.join(agregados)} FROM juncao")
+            totais = dict(zip([d[0] for d in cursor.description], cursor.fetchone()))
+            registro['linhas_saida'] = totais['linhas']
+
+        with etapa_monitorada(monitor, "Linhas do resultado (duckdb)", totais['linhas']) as registro:
+            saida = [f"COALESCE(a.{_ident(orig)}, b.{_ident(orig)}) AS {_ident(nome)}" if orig in colunas['chaves_unidas']
+                     else f"a.{_ident(orig)} AS {_ident(nome)}" for orig, nome in colunas['a']]
+            saida += [f"b.{_ident(orig)} AS {_ident(nome)}" for orig, nome in colunas['b']]
+            filtro = ""
+            if trabalho['apenas_divergencias'] and pares:
+                filtro = " WHERE " + " OR ".join(f"j._divergente_{i}" for i in range(len(pares)))
+            tabela = conexao.execute(
+                f"SELECT {', '.join(saida)} FROM juncao j "
+                f"LEFT JOIN lado_a a ON a.rowid = j._linha_a LEFT JOIN lado_b b ON b.rowid = j._linha_b{filtro} "
+                f"ORDER BY {_ordem_do_join(tipo_join, len(chaves_a))}").fetch_arrow_table()
+            registro['linhas_saida'] = tabela.num_rows
+        return tabela, colunas, pares, totais
+    finally:
+        conexao.close()
+
+
+def _ordem_do_join(tipo_join: str, quantidade_chaves: int) -> str:
+    """ORDER BY que reproduz a ordem de linhas do pd.merge para cada tipo de join."""
+    if tipo_join == 'right':
+        return "j._linha_b, j._linha_a NULLS LAST"
+    if tipo_join == 'outer':
+        # pd.merge(how='outer') ordena pelas chaves (nulas por último)
+        chaves = ", ".join(f"j._ordem_{i} ASC NULLS LAST" for i in range(quantidade_chaves))
+        return f"{chaves}, j._linha_a NULLS LAST, j._linha_b NULLS LAST"
+    return "j._linha_a, j._linha_b NULLS LAST"
+
+
+# --- Polars ---
+
+def _condicao_polars(filtro_info: dict | None, colunas: list[str]):
+    """Filtro no formato de _aplicar_filtro_df como expressão Polars (None: sem filtro)."""
+    import polars as pl
+    if not filtro_info or filtro_info.get('coluna') not in colunas:
+        return None
+    coluna, operador, valor = pl.col(filtro_info['coluna']), filtro_info['operador'], str(filtro_info.get('valor') or '')
+    if operador == 'é nulo': return coluna.is_null()
+    if operador == 'não é nulo': return coluna.is_not_null()
+    if not valor.strip(): return None
+    if operador in OPERADORES_INTERVALO:
+        numero = coluna.cast(pl.Float64, strict=False)
+        if operador == 'entre':
+            inicio, fim = [float(v) for v in valor.split(';')]
+            return numero.is_between(inicio, fim).fill_null(False)
+        comparacoes = {'>': numero > float(valor), '<': numero < float(valor),
+                       '>=': numero >= float(valor), '<=': numero <= float(valor)}
+        return comparacoes[operador].fill_null(False)
+    texto = coluna.cast(pl.String)
+    if operador in ['=', '!=']:
+        condicao = (texto.str.to_lowercase() == valor.lower()).fill_null(False)
+    elif operador in ['contém', 'não contém']:
+        condicao = texto.str.to_lowercase().str.contains(valor.lower(), literal=True).fill_null(False)
+    elif operador == 'começa com':
+        return texto.str.starts_with(valor).fill_null(False)
+    else:
+        return texto.str.ends_with(valor).fill_null(False)
+    return ~condicao if operador in ['!=', 'não contém'] else condicao
+
+
+def _comparar_polars(trabalho: dict, monitor=None):
+    import polars as pl
+    try:
+        from .excel_parser import _detectar_separador
+        from .performance_monitor import etapa_monitorada
+    except ImportError:
+        from core.excel_parser import _detectar_separador
+        from core.performance_monitor import etapa_monitorada
+
+    lados, colunas_arquivo = {}, {}
+    for lado in ['a', 'b']:
+        caminho = trabalho[f'caminho_{lado}']
+        # Tipos por amostra, como no DuckDB: um valor fora do tipo faz a leitura falhar
+        fonte = pl.scan_csv(caminho, separator=_detectar_separador(caminho) or ',', infer_schema_length=LINHAS_AMOSTRA_TIPOS,
+                            null_values=VALORES_NULOS_CSV, encoding='utf8-lossy')
+        existentes = fonte.collect_schema().names()
+        pedidas = trabalho[f'colunas_{lado}']
+        colunas_arquivo[lado] = [c for c in existentes if pedidas is None or c in pedidas]
+        fonte = fonte.select(colunas_arquivo[lado]).with_row_index(f'_linha_{lado}')
+        condicao = _condicao_polars(trabalho[f'filtro_{lado}'], existentes)
+        lados[lado] = fonte.filter(condicao) if condicao is not None else fonte
+
+    colunas = _colunas_resultado(colunas_arquivo['a'], colunas_arquivo['b'], trabalho['colunas_chave_a'],
+                                 trabalho['colunas_chave_b'], trabalho['pares_mapeados'])
+    pares = _pares_no_resultado(colunas, trabalho['pares_mapeados'])
+    chaves_a, chaves_b, tipo_join = trabalho['colunas_chave_a'], trabalho['colunas_chave_b'], trabalho['tipo_join']
+
+    # Cada lado já com os nomes do resultado; as chaves de B ganham nomes próprios para o join
+    nomes_a = dict(colunas['a'])
+    nomes_b = dict(colunas['b'])
+    chaves_join_b = [f"_chave_b_{i}" for i in range(len(chaves_b))]
+    lado_a = lados['a'].rename(nomes_a)
+    lado_b = lados['b'].with_columns([pl.col(kb).alias(nome) for kb, nome in zip(chaves_b, chaves_join_b)])
+    lado_b = lado_b.drop([c for c in colunas_arquivo['b'] if c not in nomes_b]).rename(nomes_b)
+    juncao = lado_a.join(lado_b, left_on=[nomes_a[ka] for ka in chaves_a], right_on=chaves_join_b,
+                         how='full' if tipo_join == 'outer' else tipo_join, nulls_equal=True, coalesce=False)
+    ordem = [pl.coalesce(pl.col(nomes_a[ka]), pl.col(kb)).alias(f"_ordem_{i}")
+             for i, (ka, kb) in enumerate(zip(chaves_a, chaves_join_b))]
+    # Chaves de mesmo nome nos dois lados viram uma coluna só, com o valor do lado presente
+    unidas = [pl.coalesce(pl.col(nomes_a[k]), pl.col(chaves_join_b[chaves_a.index(k)])).alias(nomes_a[k])
+              for k in colunas['chaves_unidas']]
+    juncao = juncao.with_columns(ordem + unidas)
+
+    sem_par = pl.col('_linha_a').is_null() | pl.col('_linha_b').is_null()
+    divergencias = []
+    for indice, (_, _, nome_a, nome_b) in enumerate(pares):
+        numero_a, numero_b = pl.col(nome_a).cast(pl.Float64, strict=False), pl.col(nome_b).cast(pl.Float64, strict=False)
+        diferenca = numero_a.fill_null(0) - numero_b.fill_null(0)
+        divergencias.append((sem_par | ~(diferenca.abs() <= float(trabalho['tolerancia']))).alias(f"_divergente_{indice}"))
+    juncao = juncao.with_columns(divergencias)
+
+    agregados = [pl.len().alias('linhas')]
+    for indice, (_, _, nome_a, nome_b) in enumerate(pares):
+        numero_a, numero_b = pl.col(nome_a).cast(pl.Float64, strict=False), pl.col(nome_b).cast(pl.Float64, strict=False)
+        conciliado = ~pl.col(f"_divergente_{indice}")
+        agregados += [numero_a.sum().alias(f"a{indice}"), numero_b.sum().alias(f"b{indice}"),
+                      pl.col(f"_divergente_{indice}").sum().alias(f"d{indice}"),
+                      numero_a.filter(conciliado).sum().alias(f"ca{indice}"),
+                      numero_b.filter(conciliado).sum().alias(f"cb{indice}")]
+
+    nomes = [nome for _, nome in colunas['a'] + colunas['b']]
+    resultado = juncao
+    if trabalho['apenas_divergencias'] and pares:
+        resultado = resultado.filter(pl.any_horizontal([f"_divergente_{i}" for i in range(len(pares))]))
+    if tipo_join == 'right':
+        ordenacao = ['_linha_b', '_linha_a']
+    elif tipo_join == 'outer':
+        ordenacao = [f"_ordem_{i}" for i in range(len(chaves_a))] + ['_linha_a', '_linha_b']
+    else:
+        ordenacao = ['_linha_a', '_linha_b']
+    resultado = resultado.sort(ordenacao, nulls_last=True, maintain_order=True).select(nomes)
+
+    with etapa_monitorada(monitor, "Ler, filtrar, merge e totais (polars)") as registro:
+        # O plano comum (leitura, filtros e join) é executado uma só vez para as duas consultas
+        df_totais, df_resultado = pl.collect_all([juncao.select(agregados), resultado])
+        totais = df_totais.row(0, named=True)
+        registro['linhas_saida'] = df_resultado.height
+    return df_resultado.to_arrow(), colunas, pares, totais
+
+
+def _tabela_para_pandas(tabela, dtype_backend: str | None = None):
+    """Tabela Arrow do motor como DataFrame, com os tipos que o pd.read_csv produziria."""
+    import pandas as pd
+    import pyarrow as pa
+    # O Polars usa large_string; o pandas (e o DuckDB) usam string
+    esquema = pa.schema([campo.with_type(pa.string()) if pa.types.is_large_string(campo.type) else campo
+                         for campo in tabela.schema])
+    return tabela.cast(esquema).to_pandas(types_mapper=pd.ArrowDtype if dtype_backend == 'pyarrow' else None)
+
+
+def comparar_arquivos(motor: str, caminho_a: str, caminho_b: str,
+                      colunas_chave_a: list[str], colunas_chave_b: list[str],
+                      pares_mapeados: list[tuple[str, str]], tipo_join: str = 'inner',
+                      filtro_a: dict | None = None, filtro_b: dict | None = None,
+                      colunas_a: list[str] | None = None, colunas_b: list[str] | None = None,
+                      apenas_divergencias: bool = True, tolerancia_divergencia: float = 0.0,
+                      dtype_backend: str | None = None, memoria_mb: int | None = None,
+                      monitor=None, maiores_divergencias: int | None = None) -> dict | None:
+    """
+    Confronta dois arquivos CSV com o motor escolhido.
+
+    Args:
+        motor (str): 'pandas' (carregar_dados_excel + comparar_dataframes), 'duckdb' ou 'polars'.
+        caminho_a, caminho_b (str): Os arquivos (CSV para DuckDB/Polars).
+        colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join: Como em comparar_dataframes.
+        filtro_a, filtro_b (dict, optional): Filtros no formato de _aplicar_filtro_df. Para
+            DuckDB/Polars, só os aceitos por motivo_incompativel.
+        colunas_a, colunas_b (list, optional): Colunas lidas de cada arquivo (None: todas).
+        apenas_divergencias, tolerancia_divergencia: Como em comparar_dataframes.
+        dtype_backend (str, optional): 'pyarrow' para devolver o detalhe com tipos Arrow.
+        memoria_mb (int, optional): Limite de memória do DuckDB (acima dele, usa o disco).
+        monitor (MonitorDesempenho, optional): Registra as etapas do motor.
+        maiores_divergencias (int, optional): Como em comparar_dataframes (None: o padrão);
+            escolhidas nas linhas devolvidas pelo motor.
+
+    Returns:
+        dict | None: O mesmo formato de comparar_dataframes (sem 'resumo_por_dimensao'
+            preenchido), ou None em caso de erro. Os totais podem diferir do pandas só na
+            ordem da soma em ponto flutuante.
+    """
+    try:
+        from .data_comparator import (_calcular_diferencas_por_par, _maiores_divergencias, comparar_dataframes,
+                                      MAIORES_DIVERGENCIAS_POR_PAR)
+        from .excel_parser import carregar_dados_excel
+    except ImportError:
+        from core.data_comparator import (_calcular_diferencas_por_par, _maiores_divergencias, comparar_dataframes,
+                                          MAIORES_DIVERGENCIAS_POR_PAR)
+        from core.excel_parser import carregar_dados_excel
+    if maiores_divergencias is None: maiores_divergencias = MAIORES_DIVERGENCIAS_POR_PAR
+
+    if motor == 'pandas':
+        df_a = carregar_dados_excel(caminho_a, colunas_a, dtype_backend=dtype_backend,
+                                    filtros=[filtro_a] if filtro_a else None)
+        df_b = carregar_dados_excel(caminho_b, colunas_b, dtype_backend=dtype_backend,
+                                    filtros=[filtro_b] if filtro_b else None)
+        if df_a is None or df_b is None:
+            return None
+        return comparar_dataframes(df_a, df_b, colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join,
+                                   monitor=monitor, apenas_divergencias=apenas_divergencias,
+                                   tolerancia_divergencia=tolerancia_divergencia,
+                                   maiores_divergencias=maiores_divergencias)
+
+    trabalho = {
+        'caminho_a': caminho_a, 'caminho_b': caminho_b,
+        'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b),
+        'pares_mapeados': list(pares_mapeados), 'tipo_join': tipo_join,
+        'filtro_a': filtro_a, 'filtro_b': filtro_b, 'colunas_a': colunas_a, 'colunas_b': colunas_b,
+        'apenas_divergencias': apenas_divergencias, 'tolerancia': tolerancia_divergencia or 0.0,
+        'memoria_mb': memoria_mb,
+    }
+    try:
+        import pandas as pd
+        executar = {'duckdb': _comparar_duckdb, 'polars': _comparar_polars}[motor]
+        tabela, colunas, pares, totais = executar(trabalho, monitor)
+        df_merged = _tabela_para_pandas(tabela, dtype_backend)
+
+        if not totais['linhas']:
+            print(f"Aviso DataComparator: O merge (tipo '{tipo_join}') resultou em um DataFrame vazio.")
+            return {'resumo_por_par': [], 'dataframe_merged': df_merged,
+                    'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b)}
+
+        # Totais vieram do motor; as diferenças por linha são calculadas só nas linhas retornadas
+        resumo_por_par = _resumo_dos_totais(pares, totais, apenas_divergencias)
+        maiores = pd.DataFrame()
+        if pares:
+            _calcular_diferencas_por_par(df_merged, pares_mapeados, colunas['mapa_a'], colunas['mapa_b'])
+            # Toda linha acima da tolerância está entre as devolvidas pelo motor
+            if maiores_divergencias:
+                maiores = _maiores_divergencias(df_merged, pares_mapeados, colunas['mapa_a'], colunas['mapa_b'],
+                                                list(colunas_chave_a) + list(colunas_chave_b),
+                                                (tolerancia_divergencia or 0.0) if apenas_divergencias else 0.0,
+                                                maiores_divergencias)
+        return {
+            'resumo_por_par': resumo_por_par,
+            'resumo_por_dimensao': {},
+            'maiores_divergencias': maiores,
+            'dataframe_merged': df_merged,
+            'total_linhas_merge': int(totais['linhas']),
+            'colunas_chave_a': list(colunas_chave_a),
+            'colunas_chave_b': list(colunas_chave_b)
+        }
+    except MemoryError:
+        raise # Sem memória: quem chamou decide como avisar (ver ConfrontoWorker)
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        return None
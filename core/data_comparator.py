@@ -1,8 +1,123 @@
 # core/data_comparator.py
 
+import math
+import re
+from decimal import Decimal
 import pandas as pd
 import numpy as np
 
+try:
+    from .fuzzy_matcher import casar_registros_aproximados
+    from .performance_monitor import etapa_monitorada
+    from .sorted_join import chaves_ordenadas, juntar_ordenado, juntar_ordenado_em_fluxo
+except ImportError:
+    from fuzzy_matcher import casar_registros_aproximados
+    from performance_monitor import etapa_monitorada
+    from sorted_join import chaves_ordenadas, juntar_ordenado, juntar_ordenado_em_fluxo
+
+# Linhas de maior diferença guardadas por par e critério (aba Maiores_Divergencias do relatório)
+MAIORES_DIVERGENCIAS_POR_PAR = 100
+CRITERIOS_MAIORES_DIVERGENCIAS = ['Diferença absoluta', 'Diferença percentual']
+
+def _serie_como_texto(serie: pd.Series) -> pd.Series:
+    """
+    Retorna a série como texto para os filtros de string. Colunas que já são de
+    texto (inclusive string[pyarrow]) são usadas diretamente, sem cópia para object.
+    """
+    if pd.api.types.is_string_dtype(serie.dtype) and serie.dtype != object:
+        return serie
+    return serie.astype(str)
+
+
+def _eh_numero(valor_str: str) -> bool:
+    try:
+        float(valor_str)
+        return True
+    except ValueError:
+        return False
+
+
+def _como_numero(serie: pd.Series) -> pd.Series:
+    """
+    A série como número. Colunas já numéricas (ex: convertidas na carga pelo esquema de
+    colunas, ver carregar_dados_excel) são usadas como estão, sem nova conversão.
+    """
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def _serie_como_data(serie: pd.Series) -> pd.Series:
+    """
+    Converte a série para datetime64 (vetorizado). Colunas que já são de data são usadas
+    diretamente; texto é lido como ISO (2024-03-10) ou, em seguida, como dd/mm/aaaa.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie
+    datas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    faltantes = datas.isna() & serie.notna()
+    if faltantes.any():
+        datas_br = pd.to_datetime(serie[faltantes], errors='coerce', format='%d/%m/%Y')
+        datas = datas.where(~faltantes, datas_br)
+    return datas
+
+
+def _limites_data(valor_str: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Interpreta o valor do filtro como data e retorna (início, fim exclusivo).
+    Para uma data sem hora, o intervalo cobre o dia inteiro. Lança ValueError se inválido.
+    """
+    valor_str = valor_str.strip()
+    eh_iso = bool(re.match(r'^\d{4}-', valor_str))
+    inicio = pd.to_datetime(valor_str, dayfirst=not eh_iso)
+    if pd.isna(inicio): raise ValueError(f"Data inválida: '{valor_str}'")
+    so_data = not re.search(r'\d{1,2}:\d{2}', valor_str)
+    fim = inicio + (pd.Timedelta(days=1) if so_data else pd.Timedelta(1, unit='ns'))
+    return inicio, fim
+
+
+def _mascara_comparacao(serie: pd.Series, operador: str, valor_str: str) -> pd.Series:
+    """
+    Máscara para '>', '<', '>=', '<=' e 'entre' (valor 'início;fim', inclusivo).
+    Compara como data se a coluna for de data ou se o valor não for numérico;
+    caso contrário, compara como número (comportamento original).
+    """
+    valores = [v.strip() for v in valor_str.split(';')] if operador == 'entre' else [valor_str]
+    if operador == 'entre' and len(valores) != 2: raise ValueError("Use 'início;fim' no operador 'entre'.")
+
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype) or not all(_eh_numero(v) for v in valores):
+        serie_data = _serie_como_data(serie)
+        limites = [_limites_data(v) for v in valores]
+        if operador == '>': mask = serie_data >= limites[0][1]
+        elif operador == '>=': mask = serie_data >= limites[0][0]
+        elif operador == '<': mask = serie_data < limites[0][0]
+        elif operador == '<=': mask = serie_data < limites[0][1]
+        else: mask = (serie_data >= limites[0][0]) & (serie_data < limites[1][1])
+    else:
+        serie_numerica = _como_numero(serie)
+        numeros = [float(v) for v in valores]
+        if operador == '>': mask = serie_numerica > numeros[0]
+        elif operador == '<': mask = serie_numerica < numeros[0]
+        elif operador == '>=': mask = serie_numerica >= numeros[0]
+        elif operador == '<=': mask = serie_numerica <= numeros[0]
+        else: mask = (serie_numerica >= numeros[0]) & (serie_numerica <= numeros[1])
+    return mask.fillna(False) # NaNs/NaTs na coluna não satisfazem o filtro
+
+
+def _mascara_periodo(serie: pd.Series, operador: str, valor_str: str) -> pd.Series:
+    """Máscara para 'mês =' (valor '2024-03', '03/2024' ou só o mês '3') e 'ano =' (valor '2024')."""
+    serie_data = _serie_como_data(serie)
+    valor_str = valor_str.strip()
+    if operador == 'ano =':
+        return (serie_data.dt.year == int(valor_str)).fillna(False)
+    if re.fullmatch(r'\d{1,2}', valor_str):
+        return (serie_data.dt.month == int(valor_str)).fillna(False)
+    ano_mes = re.fullmatch(r'(\d{4})-(\d{1,2})', valor_str) or re.fullmatch(r'(\d{1,2})/(\d{4})', valor_str)
+    if not ano_mes: raise ValueError(f"Mês inválido: '{valor_str}'")
+    ano, mes = (ano_mes.group(1), ano_mes.group(2)) if '-' in valor_str else (ano_mes.group(2), ano_mes.group(1))
+    return ((serie_data.dt.year == int(ano)) & (serie_data.dt.month == int(mes))).fillna(False)
+
+
 # Helper function to apply a single filter to a DataFrame
 def _aplicar_filtro_df(df: pd.DataFrame, filtro_info: dict) -> pd.DataFrame:
     """
@@ -11,6 +126,9 @@ def _aplicar_filtro_df(df: pd.DataFrame, filtro_info: dict) -> pd.DataFrame:
     Args:
         df (pd.DataFrame): O DataFrame a ser filtrado.
         filtro_info (dict): Um dicionário contendo {'coluna': str, 'operador': str, 'valor': str}.
+            Operadores de intervalo ('>', '<', '>=', '<=', 'entre') comparam como data quando a
+            coluna é de data ou o valor não é numérico; 'entre' recebe 'início;fim'.
+            'mês =' e 'ano =' filtram por período de uma coluna de data.
 
     Returns:
         pd.DataFrame: O DataFrame filtrado. Pode retornar o DataFrame original se o filtro
@@ -46,39 +164,35 @@ def _aplicar_filtro_df(df: pd.DataFrame, filtro_info: dict) -> pd.DataFrame:
             # print(f"Aviso de Filtro: Valor para o operador '{operador}' na coluna '{coluna}' está vazio. Filtro não aplicado.")
             return df # Retorna original se valor é necessário mas não fornecido
         
-        elif operador in ['>', '<', '>=', '<=']:
-            # Tenta converter a coluna e o valor para numérico para comparação
-            serie_numerica_coluna = pd.to_numeric(serie_coluna, errors='coerce')
-            valor_numerico_filtro = float(valor_filtro_str) # Tenta converter, pode dar ValueError
+        elif operador in ['>', '<', '>=', '<=', 'entre']:
+            # Comparação numérica ou de data (datas vetorizadas em datetime64)
+            df_filtrado = df[_mascara_comparacao(serie_coluna, operador, valor_filtro_str)]
 
-            if operador == '>': mask = serie_numerica_coluna > valor_numerico_filtro
-            elif operador == '<': mask = serie_numerica_coluna < valor_numerico_filtro
-            elif operador == '>=': mask = serie_numerica_coluna >= valor_numerico_filtro
-            elif operador == '<=': mask = serie_numerica_coluna <= valor_numerico_filtro
-            df_filtrado = df[mask.fillna(False)] # NaNs na coluna não satisfazem o filtro numérico
+        elif operador in ['mês =', 'ano =']:
+            df_filtrado = df[_mascara_periodo(serie_coluna, operador, valor_filtro_str)]
 
         elif operador in ['=', '!=']:
             # Para igualdade/desigualdade, comparamos como string para robustez geral,
             # a menos que uma conversão numérica mútua seja bem-sucedida.
             # Isso evita problemas com "10" vs 10.0 vs "10.0"
             # Uma abordagem simples: converter a coluna para string e comparar com o valor do filtro (string).
-            serie_str_coluna = serie_coluna.astype(str)
+            serie_str_coluna = _serie_como_texto(serie_coluna)
             # valor_filtro_str já é string
             if operador == '=': mask = serie_str_coluna.str.fullmatch(valor_filtro_str, case=False, na=False) # fullmatch para igualdade exata
             else: mask = ~serie_str_coluna.str.fullmatch(valor_filtro_str, case=False, na=False) # !=
             df_filtrado = df[mask]
 
         elif operador == 'contém':
-            mask = serie_coluna.astype(str).str.contains(valor_filtro_str, case=False, na=False)
+            mask = _serie_como_texto(serie_coluna).str.contains(valor_filtro_str, case=False, na=False)
             df_filtrado = df[mask]
         elif operador == 'não contém':
-            mask = ~serie_coluna.astype(str).str.contains(valor_filtro_str, case=False, na=False)
+            mask = ~_serie_como_texto(serie_coluna).str.contains(valor_filtro_str, case=False, na=False)
             df_filtrado = df[mask]
         elif operador == 'começa com':
-            mask = serie_coluna.astype(str).str.startswith(valor_filtro_str, na=False)
+            mask = _serie_como_texto(serie_coluna).str.startswith(valor_filtro_str, na=False)
             df_filtrado = df[mask]
         elif operador == 'termina com':
-            mask = serie_coluna.astype(str).str.endswith(valor_filtro_str, na=False)
+            mask = _serie_como_texto(serie_coluna).str.endswith(valor_filtro_str, na=False)
             df_filtrado = df[mask]
         else:
             # print(f"Aviso de Filtro: Operador '{operador}' desconhecido. Filtro não aplicado.")
@@ -87,7 +201,7 @@ def _aplicar_filtro_df(df: pd.DataFrame, filtro_info: dict) -> pd.DataFrame:
         # print(f"Filtro aplicado: Coluna='{coluna}', Operador='{operador}', Valor='{valor_filtro_str}'. Linhas restantes: {len(df_filtrado)}")
         return df_filtrado
 
-    except ValueError: # Captura erro de conversão de valor_filtro_str para float/int
+    except ValueError: # Captura erro de conversão de valor_filtro_str para float/int/data
         # print(f"Aviso de Filtro: Valor '{valor_filtro_str}' inválido para operador numérico '{operador}' na coluna '{coluna}'. Filtro não aplicado.")
         return df # Retorna original se o valor for inválido para o operador
     except Exception as e:
@@ -96,16 +210,500 @@ def _aplicar_filtro_df(df: pd.DataFrame, filtro_info: dict) -> pd.DataFrame:
         return df # Retorna original em caso de outro erro
 
 
+def _juntar_com_casamento_aproximado(df_a: pd.DataFrame, df_b: pd.DataFrame,
+                                     colunas_chave_a: list[str], colunas_chave_b: list[str],
+                                     tipo_join: str, coluna_a: str, coluna_b: str,
+                                     config_casamento: dict) -> pd.DataFrame:
+    """
+    Faz o merge exato e, em seguida, tenta casar de forma aproximada os registros
+    que sobraram sem par em ambos os lados. O tipo de join é aplicado no final.
+
+    Returns:
+        pd.DataFrame: Resultado do merge com as colunas 'Tipo_Casamento' e 'Similaridade_Casamento'
+                      e a coluna auxiliar '_origem_merge' (como no indicator do pd.merge).
+    """
+    df_merged = pd.merge(df_a, df_b, left_on=colunas_chave_a, right_on=colunas_chave_b,
+                         how='outer', suffixes=('_dfA', '_dfB'), indicator='_origem_merge')
+    ordem_colunas = [c for c in df_merged.columns if c != '_origem_merge']
+
+    # Registros sem par exato de cada lado (chave não encontrada no outro lado)
+    chaves_b = pd.MultiIndex.from_frame(df_b[colunas_chave_b])
+    chaves_a = pd.MultiIndex.from_frame(df_a[colunas_chave_a])
+    sobras_a = df_a[~chaves_a.isin(chaves_b)].reset_index(drop=True)
+    sobras_b = df_b[~chaves_b.isin(chaves_a)].reset_index(drop=True)
+
+    pares = casar_registros_aproximados(sobras_a, sobras_b, coluna_a, coluna_b, config_casamento)
+
+    df_exatos = df_merged[df_merged['_origem_merge'] == 'both'].copy()
+    df_exatos['_origem_merge'] = 'both'
+    df_exatos['Tipo_Casamento'] = 'Exato'
+    df_exatos['Similaridade_Casamento'] = 1.0
+    partes = [df_exatos]
+
+    if not pares.empty:
+        pares_a = sobras_a.iloc[pares['pos_a'].to_numpy()].reset_index(drop=True)
+        pares_b = sobras_b.iloc[pares['pos_b'].to_numpy()].reset_index(drop=True)
+        pares_a['_par_aproximado'] = range(len(pares_a))
+        pares_b['_par_aproximado'] = range(len(pares_b))
+        df_aproximados = pd.merge(pares_a, pares_b, on='_par_aproximado', suffixes=('_dfA', '_dfB'))
+        # Chaves com o mesmo nome nos dois lados viram uma única coluna (como no merge exato)
+        for chave_a, chave_b in zip(colunas_chave_a, colunas_chave_b):
+            if chave_a == chave_b and f"{chave_a}_dfA" in df_aproximados.columns:
+                df_aproximados[chave_a] = df_aproximados[f"{chave_a}_dfA"]
+        df_aproximados = df_aproximados.reindex(columns=ordem_colunas)
+        df_aproximados['_origem_merge'] = 'both'
+        df_aproximados['Tipo_Casamento'] = 'Aproximado'
+        df_aproximados['Similaridade_Casamento'] = pares['similaridade'].round(4).to_numpy()
+        partes.append(df_aproximados)
+
+    # Sobras que continuaram sem par entram conforme o tipo de join
+    casados_a = set(pares['pos_a'].astype(int)) if not pares.empty else set()
+    casados_b = set(pares['pos_b'].astype(int)) if not pares.empty else set()
+    def _alinhar_colunas(df_sobras: pd.DataFrame, sufixo: str) -> pd.DataFrame:
+        # Colunas presentes nos dois lados recebem o mesmo sufixo que o merge exato aplicou
+        renomear = {c: f"{c}{sufixo}" for c in df_sobras.columns if f"{c}{sufixo}" in ordem_colunas}
+        return df_sobras.rename(columns=renomear).reindex(columns=ordem_colunas)
+
+    if tipo_join in ['left', 'outer']:
+        restantes_a = _alinhar_colunas(sobras_a.drop(index=list(casados_a)), '_dfA')
+        restantes_a['_origem_merge'] = 'left_only'
+        restantes_a['Tipo_Casamento'] = 'Sem Par'
+        partes.append(restantes_a)
+    if tipo_join in ['right', 'outer']:
+        restantes_b = _alinhar_colunas(sobras_b.drop(index=list(casados_b)), '_dfB')
+        restantes_b['_origem_merge'] = 'right_only'
+        restantes_b['Tipo_Casamento'] = 'Sem Par'
+        partes.append(restantes_b)
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return df_exatos.iloc[0:0]
+    return pd.concat(partes, ignore_index=True)
+
+
+def _diferenca_percentual(total_a: float, total_b: float) -> float:
+    """Diferença (A - B) em % de B; 100% se só A tiver valor."""
+    diferenca = total_a - total_b
+    if total_b != 0: return (diferenca / total_b) * 100
+    elif total_a != 0: return 100.0 if diferenca != 0 else 0.0
+    else: return 0.0
+
+
+# Modo monetário exato (casas_decimais): os valores viram inteiros na menor unidade
+# (centavos com 2 casas) e somas e diferenças são feitas em int64, sem ruído de float.
+# Resíduo tolerado ao escalar (fração da menor unidade): ruído da leitura em float64
+TOLERANCIA_ESCALA = 0.01
+# Acima disso o float64 já não representa a menor unidade com segurança
+LIMITE_ESCALADO = 2**50
+
+
+def _escalar_para_inteiros(valores: np.ndarray, casas_decimais: int) -> np.ndarray | None:
+    """
+    Converte valores float (NaN = 0) para inteiros na escala de 'casas_decimais'.
+    Retorna None se algum valor tiver mais casas que a escala ou for grande demais.
+    """
+    # Operações in-place e reduções que ignoram NaN: poucas passadas sobre o array
+    escalados = valores * 10**casas_decimais
+    inteiros = np.rint(escalados)
+    with np.errstate(invalid='ignore'): # inf - inf; o limite abaixo recusa o infinito
+        np.subtract(escalados, inteiros, out=escalados)
+    np.abs(escalados, out=escalados)
+    if np.fmax.reduce(escalados, initial=0) > TOLERANCIA_ESCALA:
+        return None
+    vazios = np.isnan(inteiros)
+    if vazios.any(): inteiros[vazios] = 0
+    if max(inteiros.max(initial=0), -inteiros.min(initial=0)) > LIMITE_ESCALADO:
+        return None
+    return inteiros.astype(np.int64)
+
+
+def _inteiros_do_par(valores_a: np.ndarray, valores_b: np.ndarray, casas_decimais: int | None,
+                     cache: dict | None = None, par: tuple[str, str] | None = None) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Os dois lados de um par na escala inteira, ou None (modo float ou valores fora da escala).
+    Com 'cache', a conversão de cada par é feita uma vez só para o mesmo DataFrame.
+    """
+    if casas_decimais is None: return None
+    if cache is not None and par in cache: return cache[par]
+    inteiros_a = _escalar_para_inteiros(valores_a, casas_decimais)
+    inteiros_b = _escalar_para_inteiros(valores_b, casas_decimais) if inteiros_a is not None else None
+    inteiros = (inteiros_a, inteiros_b) if inteiros_b is not None else None
+    if cache is not None: cache[par] = inteiros
+    return inteiros
+
+
+def _total_exato(valores: np.ndarray, inteiros: np.ndarray | None, casas_decimais: int | None):
+    """
+    Soma de uma coluna do par: float (modo padrão), Decimal exato a partir dos inteiros
+    escalados ou, para valores fora da escala, Decimal da soma corretamente arredondada (math.fsum).
+    """
+    if casas_decimais is None: return np.nansum(valores)
+    if inteiros is not None: return Decimal(int(inteiros.sum())).scaleb(-casas_decimais)
+    return Decimal(math.fsum(valores[~np.isnan(valores)]))
+
+
+def _totais_para_float(resumo_pares: list[dict]) -> list[dict]:
+    """Converte os totais exatos (Decimal) do modo monetário para float, o tipo do relatório."""
+    for item in resumo_pares:
+        for campo, valor in item.items():
+            if isinstance(valor, Decimal): item[campo] = float(valor)
+    return resumo_pares
+
+
+def _calcular_diferencas_por_par(df_merged: pd.DataFrame,
+                                 pares_mapeados: list[tuple[str, str]],
+                                 renamed_cols_a_map: dict, renamed_cols_b_map: dict,
+                                 casas_decimais: int | None = None, inteiros_por_par: dict | None = None) -> list[dict]:
+    """
+    Calcula os totais de cada par mapeado e adiciona ao df_merged (in-place)
+    as colunas de diferença absoluta e percentual por linha.
+
+    Com 'casas_decimais', os totais saem como Decimal exatos (ver _totais_para_float) e as
+    diferenças por linha são calculadas em inteiros na escala; pares com valores de mais
+    casas que a escala são somados com math.fsum. 'inteiros_por_par' (dict) guarda os
+    valores convertidos, reaproveitados pelo resumo por dimensão e pelo filtro de divergências.
+
+    Returns:
+        list[dict]: Resumo de cada par comparado.
+    """
+    lista_resultados_resumo_pares = []
+    for nome_col_a_original, nome_col_b_original in pares_mapeados:
+        col_a_no_merge = renamed_cols_a_map.get(nome_col_a_original)
+        col_b_no_merge = renamed_cols_b_map.get(nome_col_b_original)
+        if not col_a_no_merge or col_a_no_merge not in df_merged.columns: continue
+        if not col_b_no_merge or col_b_no_merge not in df_merged.columns: continue
+        val_a_numeric_par = _como_numero(df_merged[col_a_no_merge])
+        val_b_numeric_par = _como_numero(df_merged[col_b_no_merge])
+        soma_col_a = val_a_numeric_par.fillna(0); soma_col_b = val_b_numeric_par.fillna(0)
+        valores_a = soma_col_a.to_numpy(dtype=float, na_value=np.nan)
+        valores_b = soma_col_b.to_numpy(dtype=float, na_value=np.nan)
+        inteiros = _inteiros_do_par(valores_a, valores_b, casas_decimais, inteiros_por_par,
+                                    (nome_col_a_original, nome_col_b_original))
+        if casas_decimais is not None and inteiros is None:
+            print(f"Aviso DataComparator: '{nome_col_a_original}' vs '{nome_col_b_original}' tem valores com mais de "
+                  f"{casas_decimais} casas decimais; totais somados em ponto flutuante (math.fsum).")
+        inteiros_a, inteiros_b = inteiros or (None, None)
+        total_lado_a_par = _total_exato(valores_a, inteiros_a, casas_decimais)
+        total_lado_b_par = _total_exato(valores_b, inteiros_b, casas_decimais)
+        diferenca_absoluta_total_par = total_lado_a_par - total_lado_b_par
+        diferenca_percentual_total_par = _diferenca_percentual(total_lado_a_par, total_lado_b_par)
+        nome_descritivo_par = f"{nome_col_a_original} (A) vs {nome_col_b_original} (B)"
+        lista_resultados_resumo_pares.append({
+            'par_comparado': nome_descritivo_par, 'total_lado_a': total_lado_a_par,
+            'total_lado_b': total_lado_b_par, 'diferenca_absoluta_total': diferenca_absoluta_total_par,
+            'diferenca_percentual_total': diferenca_percentual_total_par
+        })
+        base_nome_diff = f"{nome_col_a_original}_vs_{nome_col_b_original}"
+        nome_diff_abs_linha = f'{base_nome_diff}_DiffAbs_Linha'
+        nome_diff_perc_linha = f'{base_nome_diff}_DiffPerc_Linha(%)'
+        if inteiros is not None:
+            # Diferença exata em inteiros; a divisão pela escala dá o float mais próximo do valor decimal
+            diferenca_unidades = inteiros_a - inteiros_b
+            df_merged[nome_diff_abs_linha] = diferenca_unidades / 10**casas_decimais
+            with np.errstate(divide='ignore', invalid='ignore'):
+                df_merged[nome_diff_perc_linha] = np.where(
+                    inteiros_b != 0, diferenca_unidades / np.where(inteiros_b != 0, inteiros_b, 1) * 100,
+                    np.where(inteiros_a != 0, np.inf * np.sign(inteiros_a), 0)
+                )
+        else:
+            df_merged[nome_diff_abs_linha] = soma_col_a - soma_col_b
+            denominador_perc = val_b_numeric_par.copy(); denominador_perc.replace(0, np.nan, inplace=True)
+            df_merged[nome_diff_perc_linha] = np.where(
+                denominador_perc.notna(), (df_merged[nome_diff_abs_linha] / denominador_perc) * 100,
+                np.where(soma_col_a != 0, np.inf * np.sign(soma_col_a), 0)
+            )
+        # np.round preserva inf/-inf/NaN, então o arredondamento pode ser vetorizado
+        df_merged[nome_diff_perc_linha] = np.round(df_merged[nome_diff_perc_linha].to_numpy(dtype=float), 2)
+    return lista_resultados_resumo_pares
+
+
+def _serie_dimensao(df_merged: pd.DataFrame, dimensao: str) -> pd.Series:
+    """
+    Série usada para agrupar o resumo. 'dimensao' é o nome de uma coluna de A ou B,
+    opcionalmente com período: 'Data:mes' (2024-03) ou 'Data:ano'. Se a coluna existir
+    nos dois lados, os valores de B completam as linhas sem par em A.
+
+    Raises:
+        KeyError: Se a coluna não existir no resultado do merge.
+        ValueError: Se o período for desconhecido.
+    """
+    nome, _, periodo = dimensao.partition(':')
+    candidatos = [nome, f"{nome}_dfA", f"{nome}_A", f"{nome}_dfB", f"{nome}_B"]
+    presentes = [c for c in candidatos if c in df_merged.columns]
+    if not presentes: raise KeyError(f"Coluna de dimensão '{nome}' não encontrada.")
+    serie = df_merged[presentes[0]]
+    if presentes[0] == f"{nome}_dfA" and f"{nome}_dfB" in df_merged.columns:
+        serie = serie.fillna(df_merged[f"{nome}_dfB"])
+
+    periodo = periodo.strip().lower()
+    if periodo in ['mes', 'mês']: serie = _serie_como_data(serie).dt.strftime('%Y-%m')
+    elif periodo == 'ano': serie = _serie_como_data(serie).dt.year.astype('Int64')
+    elif periodo: raise ValueError(f"Período '{periodo}' desconhecido (use 'mes' ou 'ano').")
+    return serie.rename(dimensao)
+
+
+def _somas_por_dimensao(df_merged: pd.DataFrame, dimensao: str,
+                        pares_mapeados: list[tuple[str, str]],
+                        renamed_cols_a_map: dict, renamed_cols_b_map: dict,
+                        casas_decimais: int | None = None, inteiros_por_par: dict | None = None) -> pd.DataFrame:
+    """
+    Totais de A e B de todos os pares por valor da dimensão, em um único groupby.
+    As somas podem ser acumuladas entre blocos (ver _finalizar_resumo_dimensao).
+    Com 'casas_decimais', as somas ficam na menor unidade (inteiros, se os valores
+    couberem na escala) até _finalizar_resumo_dimensao.
+    """
+    valores = {}
+    for nome_col_a_original, nome_col_b_original in pares_mapeados:
+        col_a, col_b = renamed_cols_a_map.get(nome_col_a_original), renamed_cols_b_map.get(nome_col_b_original)
+        if col_a not in df_merged.columns or col_b not in df_merged.columns: continue
+        nome_par = f"{nome_col_a_original} vs {nome_col_b_original}"
+        valores_a = _como_numero(df_merged[col_a])
+        valores_b = _como_numero(df_merged[col_b])
+        if casas_decimais is not None:
+            numeros_a = valores_a.to_numpy(dtype=float, na_value=np.nan)
+            numeros_b = valores_b.to_numpy(dtype=float, na_value=np.nan)
+            # Fora da escala: float também na menor unidade, para somar com os blocos exatos
+            valores_a, valores_b = _inteiros_do_par(numeros_a, numeros_b, casas_decimais, inteiros_por_par,
+                                                    (nome_col_a_original, nome_col_b_original)) or (
+                np.nan_to_num(numeros_a) * 10**casas_decimais, np.nan_to_num(numeros_b) * 10**casas_decimais)
+        valores[f"{nome_par} - Total A"] = valores_a
+        valores[f"{nome_par} - Total B"] = valores_b
+    grupos = pd.DataFrame(valores, index=df_merged.index).groupby(
+        _serie_dimensao(df_merged, dimensao), dropna=False, sort=True)
+    somas = grupos.sum()
+    somas.insert(0, 'Linhas', grupos.size())
+    return somas
+
+
+def _finalizar_resumo_dimensao(somas: pd.DataFrame, casas_decimais: int | None = None) -> pd.DataFrame:
+    """
+    Adiciona a diferença absoluta e percentual de cada par às somas por dimensão.
+    Com 'casas_decimais', as somas (na menor unidade) voltam para a unidade original
+    depois de calculada a diferença.
+    """
+    resumo = somas.copy()
+    for coluna_a in [c for c in somas.columns if c.endswith(" - Total A")]:
+        nome_par = coluna_a[:-len(" - Total A")]
+        total_a, total_b = somas[coluna_a], somas[f"{nome_par} - Total B"]
+        diferenca = total_a - total_b
+        posicao = resumo.columns.get_loc(f"{nome_par} - Total B") + 1
+        resumo.insert(posicao, f"{nome_par} - Diferença", diferenca)
+        # Mesma regra de _diferenca_percentual: 100% quando só A tem valor
+        percentual = np.where(total_b != 0, diferenca / total_b.where(total_b != 0) * 100,
+                              np.where(diferenca != 0, 100.0, 0.0))
+        resumo.insert(posicao + 1, f"{nome_par} - Diferença %", percentual)
+        if casas_decimais is not None:
+            for coluna in [coluna_a, f"{nome_par} - Total B", f"{nome_par} - Diferença"]:
+                resumo[coluna] = resumo[coluna] / 10**casas_decimais
+    return resumo.reset_index()
+
+
+def _resumir_por_dimensoes(df_merged: pd.DataFrame, dimensoes: list[str],
+                           pares_mapeados: list[tuple[str, str]],
+                           renamed_cols_a_map: dict, renamed_cols_b_map: dict,
+                           casas_decimais: int | None = None,
+                           inteiros_por_par: dict | None = None) -> dict[str, pd.DataFrame]:
+    """Somas por dimensão (ainda sem as diferenças); dimensões inválidas são ignoradas com aviso."""
+    somas_por_dimensao = {}
+    for dimensao in dimensoes:
+        try:
+            somas_por_dimensao[dimensao] = _somas_por_dimensao(
+                df_merged, dimensao, pares_mapeados, renamed_cols_a_map, renamed_cols_b_map,
+                casas_decimais, inteiros_por_par)
+        except (KeyError, ValueError) as e:
+            print(f"Aviso DataComparator: dimensão '{dimensao}' ignorada: {e}")
+    return somas_por_dimensao
+
+
+def _filtrar_divergencias(df_merged: pd.DataFrame, resumo_pares: list[dict],
+                          pares_mapeados: list[tuple[str, str]],
+                          renamed_cols_a_map: dict, renamed_cols_b_map: dict,
+                          tolerancia: float = 0.0, casas_decimais: int | None = None,
+                          inteiros_por_par: dict | None = None) -> pd.DataFrame:
+    """
+    Mantém só as linhas divergentes: sem par em um dos lados ou com diferença absoluta
+    acima da tolerância em algum par. As linhas conciliadas são resumidas (contagem e
+    totais) em cada item de 'resumo_pares', que é atualizado in-place. Com 'casas_decimais',
+    a tolerância é comparada em inteiros na escala (uma diferença de 0,01 com tolerância
+    0,01 é conciliada) e os totais conciliados são exatos.
+
+    Returns:
+        pd.DataFrame: Apenas as linhas divergentes.
+    """
+    sem_par = (df_merged['_origem_merge'] != 'both').to_numpy()
+    divergente_linha = sem_par.copy()
+    resumo_por_nome = {item['par_comparado']: item for item in resumo_pares}
+
+    for nome_col_a_original, nome_col_b_original in pares_mapeados:
+        item = resumo_por_nome.get(f"{nome_col_a_original} (A) vs {nome_col_b_original} (B)")
+        nome_diff_abs = f"{nome_col_a_original}_vs_{nome_col_b_original}_DiffAbs_Linha"
+        if item is None or nome_diff_abs not in df_merged.columns: continue
+        valores_a = _como_numero(df_merged[renamed_cols_a_map[nome_col_a_original]]).to_numpy(dtype=float, na_value=np.nan)
+        valores_b = _como_numero(df_merged[renamed_cols_b_map[nome_col_b_original]]).to_numpy(dtype=float, na_value=np.nan)
+        inteiros = _inteiros_do_par(valores_a, valores_b, casas_decimais, inteiros_por_par,
+                                    (nome_col_a_original, nome_col_b_original))
+        if inteiros is not None:
+            tolerancia_unidades = round(tolerancia * 10**casas_decimais)
+            divergente_par = sem_par | (np.abs(inteiros[0] - inteiros[1]) > tolerancia_unidades)
+        else:
+            diferenca = df_merged[nome_diff_abs].to_numpy(dtype=float, na_value=np.nan)
+            divergente_par = sem_par | ~(np.abs(diferenca) <= tolerancia)
+        divergente_linha |= divergente_par
+
+        conciliado = ~divergente_par
+        inteiros_a, inteiros_b = (inteiros[0][conciliado], inteiros[1][conciliado]) if inteiros else (None, None)
+        item['linhas_divergentes'] = int(divergente_par.sum())
+        item['linhas_conciliadas'] = int(conciliado.sum())
+        item['total_conciliado_a'] = _total_exato(valores_a[conciliado], inteiros_a, casas_decimais)
+        item['total_conciliado_b'] = _total_exato(valores_b[conciliado], inteiros_b, casas_decimais)
+
+    return df_merged[divergente_linha]
+
+
+def _posicoes_maiores(magnitudes: np.ndarray, quantidade: int) -> np.ndarray:
+    """
+    Posições dos 'quantidade' maiores valores (NaN ignorados), do maior para o menor, com
+    empates na ordem original. Seleção parcial (np.partition): só os escolhidos são ordenados.
+    """
+    posicoes = np.flatnonzero(~np.isnan(magnitudes)) if quantidade > 0 else np.zeros(0, dtype=np.intp)
+    if len(posicoes) > quantidade:
+        valores = magnitudes[posicoes]
+        corte = np.partition(valores, len(valores) - quantidade)[len(valores) - quantidade]
+        acima = posicoes[valores > corte]
+        posicoes = np.sort(np.concatenate([acima, posicoes[valores == corte][:quantidade - len(acima)]]))
+    return posicoes[np.argsort(-magnitudes[posicoes], kind='stable')]
+
+
+def _maiores_divergencias(df_merged: pd.DataFrame, pares_mapeados: list[tuple[str, str]],
+                          renamed_cols_a_map: dict, renamed_cols_b_map: dict,
+                          colunas_chave: list[str], tolerancia: float = 0.0,
+                          quantidade: int = MAIORES_DIVERGENCIAS_POR_PAR) -> pd.DataFrame:
+    """
+    As 'quantidade' linhas de maior diferença absoluta e as de maior diferença percentual
+    (em módulo) de cada par, entre as que passam da tolerância. Linhas com B zerado ou sem
+    par em B (diferença percentual infinita) entram só na ordem absoluta. Empates seguem a
+    ordem do merge. Usa as colunas _DiffAbs_Linha/_DiffPerc_Linha(%) de _calcular_diferencas_por_par.
+
+    Returns:
+        pd.DataFrame: Uma linha por divergência, com 'Par Comparado', 'Ordenado por',
+            'Posição', as colunas chave, 'Valor A', 'Valor B', 'Diferença Absoluta' e
+            'Diferença %' (vazio se nenhum par tiver linhas acima da tolerância).
+    """
+    colunas_chave = [coluna for coluna in dict.fromkeys(colunas_chave) if coluna in df_merged.columns]
+    partes = []
+    for nome_col_a_original, nome_col_b_original in pares_mapeados:
+        base_nome_diff = f"{nome_col_a_original}_vs_{nome_col_b_original}"
+        nome_diff_abs, nome_diff_perc = f"{base_nome_diff}_DiffAbs_Linha", f"{base_nome_diff}_DiffPerc_Linha(%)"
+        if nome_diff_abs not in df_merged.columns or nome_diff_perc not in df_merged.columns: continue
+        diferencas = np.abs(df_merged[nome_diff_abs].to_numpy(dtype=float, na_value=np.nan))
+        percentuais = np.abs(df_merged[nome_diff_perc].to_numpy(dtype=float, na_value=np.nan))
+        percentuais[np.isinf(percentuais)] = np.nan
+        divergente = diferencas > tolerancia
+        for criterio, magnitudes in [(CRITERIOS_MAIORES_DIVERGENCIAS[0], diferencas),
+                                     (CRITERIOS_MAIORES_DIVERGENCIAS[1], percentuais)]:
+            posicoes = _posicoes_maiores(np.where(divergente, magnitudes, np.nan), quantidade)
+            if not len(posicoes): continue
+            linhas = df_merged.iloc[posicoes]
+            parte = linhas[colunas_chave].reset_index(drop=True)
+            parte.insert(0, 'Par Comparado', f"{nome_col_a_original} (A) vs {nome_col_b_original} (B)")
+            parte.insert(1, 'Ordenado por', criterio)
+            parte.insert(2, 'Posição', np.arange(1, len(posicoes) + 1))
+            parte['Valor A'] = linhas[renamed_cols_a_map[nome_col_a_original]].to_numpy()
+            parte['Valor B'] = linhas[renamed_cols_b_map[nome_col_b_original]].to_numpy()
+            parte['Diferença Absoluta'] = linhas[nome_diff_abs].to_numpy(dtype=float, na_value=np.nan)
+            parte['Diferença %'] = linhas[nome_diff_perc].to_numpy(dtype=float, na_value=np.nan)
+            partes.append(parte)
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+def _combinar_maiores_divergencias(partes: list[pd.DataFrame],
+                                   quantidade: int = MAIORES_DIVERGENCIAS_POR_PAR) -> pd.DataFrame:
+    """
+    Junta as maiores divergências de partes consecutivas do merge (na ordem do merge),
+    mantendo as 'quantidade' maiores de cada par e critério.
+    """
+    partes = [parte for parte in partes if not parte.empty]
+    if len(partes) < 2:
+        return partes[0] if partes else pd.DataFrame()
+    candidatas = pd.concat(partes, ignore_index=True)
+    selecionadas = []
+    for (_, criterio), grupo in candidatas.groupby(['Par Comparado', 'Ordenado por'], sort=False):
+        coluna = 'Diferença Absoluta' if criterio == CRITERIOS_MAIORES_DIVERGENCIAS[0] else 'Diferença %'
+        magnitudes = np.abs(grupo[coluna].to_numpy(dtype=float))
+        grupo = grupo.iloc[_posicoes_maiores(np.where(np.isinf(magnitudes), np.nan, magnitudes), quantidade)]
+        selecionadas.append(grupo.assign(**{'Posição': np.arange(1, len(grupo) + 1)}))
+    return pd.concat(selecionadas, ignore_index=True)
+
+
+def _renomear_colunas_dos_pares(df: pd.DataFrame, colunas_dos_pares: list[str],
+                                colunas_chave: list[str], sufixo: str) -> tuple[pd.DataFrame, dict]:
+    """
+    Adiciona o sufixo do lado (_A/_B) às colunas de valor dos pares, para não colidirem
+    no merge. Colunas chave mantêm o nome.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: O DataFrame renomeado e o mapa {nome original: nome no merge}.
+    """
+    renamed_cols_map = {}
+    for col_orig in set(colunas_dos_pares):
+        # checar se a coluna está na LISTA de chaves
+        if col_orig in colunas_chave:
+            renamed_cols_map[col_orig] = col_orig
+            continue
+        if col_orig in df.columns:
+            renamed_cols_map[col_orig] = f"{col_orig}{sufixo}"
+    df = df.rename(columns={orig: novo for orig, novo in renamed_cols_map.items() if orig != novo})
+    return df, renamed_cols_map
+
+
 def comparar_dataframes(df_lado_a: pd.DataFrame,
                         df_lado_b: pd.DataFrame,
                         colunas_chave_a: list[str],
                         colunas_chave_b: list[str], 
                         pares_mapeados: list[tuple[str, str]],
-                        tipo_join: str = 'inner'
+                        tipo_join: str = 'inner',
+                        casamento_aproximado: dict | None = None,
+                        monitor=None,
+                        apenas_divergencias: bool = True,
+                        tolerancia_divergencia: float = 0.0,
+                        entradas_ordenadas: bool | None = False,
+                        dimensoes_agrupamento: list[str] | None = None,
+                        casas_decimais: int | None = None,
+                        maiores_divergencias: int = MAIORES_DIVERGENCIAS_POR_PAR
                         # Parâmetros de filtro removidos daqui, pois já são aplicados na GUI
                         ) -> dict | None:
     """
     Compara pares de colunas de valor, usando uma ou mais colunas chave para o join.
+
+    Se 'casamento_aproximado' for informado (ex: {'coluna_a': 'Cliente', 'coluna_b': 'Nome_Cliente_Fat',
+    'limiar': 0.8}), os registros que não casaram pela chave exata passam por uma etapa de
+    casamento aproximado (ver core/fuzzy_matcher.py). Sem 'coluna_a'/'coluna_b', usa a primeira chave.
+
+    Se 'monitor' (MonitorDesempenho) for informado, as etapas de merge e de cálculo
+    das diferenças são cronometradas separadamente.
+
+    Com 'apenas_divergencias' (padrão), o 'dataframe_merged' retornado contém só as linhas
+    sem par ou com diferença acima de 'tolerancia_divergencia' em algum par; as linhas
+    conciliadas entram apenas como contagens/totais no resumo. No modo cruzamento
+    (sem pares mapeados) todas as linhas são mantidas.
+
+    Com 'entradas_ordenadas' True (ou None, para detectar), se os dois lados estiverem
+    ordenados pelas chaves o join é feito por intercalação (core/sorted_join.py), sem as
+    tabelas hash do pd.merge. A ordem é sempre conferida antes; fora de ordem, usa o pd.merge.
+    Para arquivos grandes já ordenados, veja comparar_blocos_ordenados.
+
+    Com 'dimensoes_agrupamento' (ex: ['Regiao', 'Data:mes']), os totais de A e B e as
+    diferenças de todos os pares também são calculados por valor de cada dimensão e
+    retornados em 'resumo_por_dimensao' ({dimensão: DataFrame}).
+
+    Com 'casas_decimais' (ex: 2 para centavos), os valores dos pares são convertidos para
+    inteiros nessa escala e totais, diferenças e tolerância são calculados sem o ruído de
+    arredondamento do float (modo monetário exato). Pares com valores de mais casas que a
+    escala são somados com math.fsum.
+
+    Em 'maiores_divergencias' (DataFrame, ver _maiores_divergencias) vêm as linhas de maior
+    diferença absoluta e percentual de cada par, até 'maiores_divergencias' por critério
+    (0 desativa), escolhidas por seleção parcial em vez de ordenar todo o resultado.
     """
     try:
         df_a_processado = df_lado_a.copy()
@@ -113,84 +711,95 @@ def comparar_dataframes(df_lado_a: pd.DataFrame,
 
         # A lógica de filtro agora é feita na GUI antes de chamar esta função
 
-        cols_a_originais_dos_pares = list(set([par[0] for par in pares_mapeados]))
-        cols_b_originais_dos_pares = list(set([par[1] for par in pares_mapeados]))
-
-        renamed_cols_a_map = {}
-        for col_orig_a in cols_a_originais_dos_pares:
-            # checar se a coluna está na LISTA de chaves
-            if col_orig_a in colunas_chave_a: 
-                renamed_cols_a_map[col_orig_a] = col_orig_a
-                continue
-            if col_orig_a in df_a_processado.columns:
-                suffixed_name = f"{col_orig_a}_A"
-                df_a_processado.rename(columns={col_orig_a: suffixed_name}, inplace=True)
-                renamed_cols_a_map[col_orig_a] = suffixed_name
-            
-        renamed_cols_b_map = {}
-        for col_orig_b in cols_b_originais_dos_pares:
-            # checar se a coluna está na LISTA de chaves
-            if col_orig_b in colunas_chave_b: 
-                renamed_cols_b_map[col_orig_b] = col_orig_b
-                continue
-            if col_orig_b in df_b_processado.columns:
-                suffixed_name = f"{col_orig_b}_B"
-                df_b_processado.rename(columns={col_orig_b: suffixed_name}, inplace=True)
-                renamed_cols_b_map[col_orig_b] = suffixed_name
-
-        # --- MUDANÇA PRINCIPAL NA CHAMADA DO MERGE ---
-        df_merged = pd.merge(
-            df_a_processado,
-            df_b_processado,
-            left_on=colunas_chave_a,  # Passando a lista
-            right_on=colunas_chave_b, # Passando a lista
-            how=tipo_join,
-            suffixes=('_dfA', '_dfB')
-        )
-        # -----------------------------------------------
+        df_a_processado, renamed_cols_a_map = _renomear_colunas_dos_pares(
+            df_a_processado, [par[0] for par in pares_mapeados], colunas_chave_a, "_A")
+        df_b_processado, renamed_cols_b_map = _renomear_colunas_dos_pares(
+            df_b_processado, [par[1] for par in pares_mapeados], colunas_chave_b, "_B")
+
+        with etapa_monitorada(monitor, "Merge (join)", len(df_a_processado) + len(df_b_processado)) as registro:
+            if casamento_aproximado:
+                # As colunas de casamento podem ter sido renomeadas com sufixo _A/_B acima
+                coluna_casamento_a = casamento_aproximado.get('coluna_a') or colunas_chave_a[0]
+                coluna_casamento_b = casamento_aproximado.get('coluna_b') or colunas_chave_b[0]
+                df_merged = _juntar_com_casamento_aproximado(
+                    df_a_processado, df_b_processado, colunas_chave_a, colunas_chave_b, tipo_join,
+                    renamed_cols_a_map.get(coluna_casamento_a, coluna_casamento_a),
+                    renamed_cols_b_map.get(coluna_casamento_b, coluna_casamento_b),
+                    casamento_aproximado
+                )
+            elif entradas_ordenadas is not False and chaves_ordenadas(df_a_processado, colunas_chave_a) \
+                    and chaves_ordenadas(df_b_processado, colunas_chave_b):
+                df_merged = juntar_ordenado(df_a_processado, df_b_processado, colunas_chave_a, colunas_chave_b, tipo_join)
+                registro['metodo'] = 'intercalação (entradas ordenadas)'
+            else:
+                # --- MUDANÇA PRINCIPAL NA CHAMADA DO MERGE ---
+                df_merged = pd.merge(
+                    df_a_processado,
+                    df_b_processado,
+                    left_on=colunas_chave_a,  # Passando a lista
+                    right_on=colunas_chave_b, # Passando a lista
+                    how=tipo_join,
+                    suffixes=('_dfA', '_dfB'),
+                    indicator='_origem_merge' # Indica registros sem par (usado no filtro de divergências)
+                )
+                # -----------------------------------------------
+            registro['linhas_saida'] = len(df_merged)
 
         if df_merged.empty:
              print(f"Aviso DataComparator: O merge (tipo '{tipo_join}') resultou em um DataFrame vazio.")
-             return {'resumo_por_par': [], 'dataframe_merged': df_merged}
-
-        lista_resultados_resumo_pares = []
-        for nome_col_a_original, nome_col_b_original in pares_mapeados:
-            col_a_no_merge = renamed_cols_a_map.get(nome_col_a_original)
-            col_b_no_merge = renamed_cols_b_map.get(nome_col_b_original)
-            if not col_a_no_merge or col_a_no_merge not in df_merged.columns: continue
-            if not col_b_no_merge or col_b_no_merge not in df_merged.columns: continue
-            val_a_numeric_par = pd.to_numeric(df_merged[col_a_no_merge], errors='coerce')
-            val_b_numeric_par = pd.to_numeric(df_merged[col_b_no_merge], errors='coerce')
-            soma_col_a = val_a_numeric_par.fillna(0); soma_col_b = val_b_numeric_par.fillna(0)
-            total_lado_a_par = soma_col_a.sum(); total_lado_b_par = soma_col_b.sum()
-            diferenca_absoluta_total_par = total_lado_a_par - total_lado_b_par
-            if total_lado_b_par != 0: diferenca_percentual_total_par = (diferenca_absoluta_total_par / total_lado_b_par) * 100
-            elif total_lado_a_par != 0: diferenca_percentual_total_par = 100.0 if diferenca_absoluta_total_par != 0 else 0.0
-            else: diferenca_percentual_total_par = 0.0
-            nome_descritivo_par = f"{nome_col_a_original} (A) vs {nome_col_b_original} (B)"
-            lista_resultados_resumo_pares.append({
-                'par_comparado': nome_descritivo_par, 'total_lado_a': total_lado_a_par,
-                'total_lado_b': total_lado_b_par, 'diferenca_absoluta_total': diferenca_absoluta_total_par,
-                'diferenca_percentual_total': diferenca_percentual_total_par
-            })
-            base_nome_diff = f"{nome_col_a_original}_vs_{nome_col_b_original}"
-            nome_diff_abs_linha = f'{base_nome_diff}_DiffAbs_Linha'
-            nome_diff_perc_linha = f'{base_nome_diff}_DiffPerc_Linha(%)'
-            df_merged[nome_diff_abs_linha] = soma_col_a - soma_col_b
-            denominador_perc = val_b_numeric_par.copy(); denominador_perc.replace(0, np.nan, inplace=True)
-            df_merged[nome_diff_perc_linha] = np.where(
-                denominador_perc.notna(), (df_merged[nome_diff_abs_linha] / denominador_perc) * 100,
-                np.where(soma_col_a != 0, np.inf * np.sign(soma_col_a), 0)
-            )
-            df_merged[nome_diff_perc_linha] = df_merged[nome_diff_perc_linha].apply(
-                lambda x: round(x, 2) if pd.notna(x) and x not in [np.inf, -np.inf] else x
+             df_merged = df_merged.drop(columns='_origem_merge')
+             return {'resumo_por_par': [], 'dataframe_merged': df_merged,
+                     'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b)}
+
+        inteiros_por_par = {}  # valores na escala inteira, convertidos uma vez por par
+        with etapa_monitorada(monitor, "Cálculo de diferenças", len(df_merged)) as registro:
+            lista_resultados_resumo_pares = _calcular_diferencas_por_par(
+                df_merged, pares_mapeados, renamed_cols_a_map, renamed_cols_b_map,
+                casas_decimais, inteiros_por_par
             )
+            registro['linhas_saida'] = len(df_merged)
+
+        resumo_por_dimensao = {}
+        if dimensoes_agrupamento and lista_resultados_resumo_pares:
+            with etapa_monitorada(monitor, "Resumo por dimensão", len(df_merged)):
+                somas = _resumir_por_dimensoes(df_merged, dimensoes_agrupamento, pares_mapeados,
+                                               renamed_cols_a_map, renamed_cols_b_map,
+                                               casas_decimais, inteiros_por_par)
+                resumo_por_dimensao = {dimensao: _finalizar_resumo_dimensao(df, casas_decimais)
+                                       for dimensao, df in somas.items()}
+
+        total_linhas_merge = len(df_merged)
+        if apenas_divergencias and lista_resultados_resumo_pares:
+            with etapa_monitorada(monitor, "Filtro de divergências", total_linhas_merge) as registro:
+                df_merged = _filtrar_divergencias(
+                    df_merged, lista_resultados_resumo_pares, pares_mapeados,
+                    renamed_cols_a_map, renamed_cols_b_map, tolerancia_divergencia,
+                    casas_decimais, inteiros_por_par
+                )
+                registro['linhas_saida'] = len(df_merged)
+        df_merged = df_merged.drop(columns='_origem_merge')
+
+        maiores = pd.DataFrame()
+        if maiores_divergencias and lista_resultados_resumo_pares:
+            with etapa_monitorada(monitor, "Maiores divergências", len(df_merged)) as registro:
+                maiores = _maiores_divergencias(
+                    df_merged, pares_mapeados, renamed_cols_a_map, renamed_cols_b_map,
+                    colunas_chave_a + colunas_chave_b, tolerancia_divergencia if apenas_divergencias else 0.0,
+                    maiores_divergencias)
+                registro['linhas_saida'] = len(maiores)
 
         return {
-            'resumo_por_par': lista_resultados_resumo_pares,
-            'dataframe_merged': df_merged
+            'resumo_por_par': _totais_para_float(lista_resultados_resumo_pares),
+            'resumo_por_dimensao': resumo_por_dimensao,
+            'maiores_divergencias': maiores,
+            'dataframe_merged': df_merged,
+            'total_linhas_merge': total_linhas_merge,
+            'colunas_chave_a': list(colunas_chave_a),
+            'colunas_chave_b': list(colunas_chave_b)
         }
 
+    except MemoryError:
+        raise # Sem memória: quem chamou decide como avisar (ver ConfrontoWorker)
     except KeyError as ke:
         # print(f"Erro de Chave (KeyError) durante a comparação: {ke}.")
         return None
@@ -199,6 +808,161 @@ def comparar_dataframes(df_lado_a: pd.DataFrame,
         import traceback; traceback.print_exc()
         return None
 
+
+def _processar_parte(parte: pd.DataFrame, pares_mapeados: list[tuple[str, str]],
+                     mapa_a: dict, mapa_b: dict, apenas_divergencias: bool, tolerancia_divergencia: float,
+                     dimensoes_agrupamento: list[str] | None, casas_decimais: int | None):
+    """
+    Diferenças, somas por dimensão e filtro de divergências de uma parte do merge (um bloco
+    da junção em fluxo ou uma fatia do confronto paralelo).
+
+    Returns:
+        tuple: (parte sem '_origem_merge', resumo por par da parte, {dimensão: somas}).
+    """
+    inteiros_por_par = {}
+    resumo_parte = _calcular_diferencas_por_par(parte, pares_mapeados, mapa_a, mapa_b,
+                                                casas_decimais, inteiros_por_par)
+    somas_parte = {}
+    if dimensoes_agrupamento and resumo_parte:
+        somas_parte = _resumir_por_dimensoes(parte, dimensoes_agrupamento, pares_mapeados,
+                                             mapa_a, mapa_b, casas_decimais, inteiros_por_par)
+    if apenas_divergencias and resumo_parte:
+        parte = _filtrar_divergencias(parte, resumo_parte, pares_mapeados, mapa_a, mapa_b,
+                                      tolerancia_divergencia, casas_decimais, inteiros_por_par)
+    return parte.drop(columns='_origem_merge'), resumo_parte, somas_parte
+
+
+def _somar_exato(valores: list):
+    """Soma sem depender da ordem: Decimal e inteiros somam exato; floats com math.fsum."""
+    if any(isinstance(valor, Decimal) for valor in valores):
+        return sum((Decimal(valor) for valor in valores), Decimal(0))
+    if all(isinstance(valor, (int, np.integer)) for valor in valores):
+        return int(sum(valores))
+    return math.fsum(valores)
+
+
+def _combinar_resumos(resumos_partes: list[list[dict]]) -> list[dict]:
+    """
+    Combina os resumos por par das partes: contagens e totais somados (ver _somar_exato) e
+    diferenças recalculadas a partir dos totais combinados.
+    """
+    valores_por_par = {}  # par_comparado -> campo -> valores das partes
+    for resumo_parte in resumos_partes:
+        for item in resumo_parte:
+            campos = valores_por_par.setdefault(item['par_comparado'], {})
+            for campo, valor in item.items():
+                if campo != 'par_comparado': campos.setdefault(campo, []).append(valor)
+    lista_resultados_resumo_pares = []
+    for par_comparado, campos in valores_por_par.items():
+        item = {'par_comparado': par_comparado}
+        item.update({campo: _somar_exato(valores) for campo, valores in campos.items()})
+        item['diferenca_absoluta_total'] = item['total_lado_a'] - item['total_lado_b']
+        item['diferenca_percentual_total'] = _diferenca_percentual(item['total_lado_a'], item['total_lado_b'])
+        lista_resultados_resumo_pares.append(item)
+    return _totais_para_float(lista_resultados_resumo_pares)
+
+
+def _combinar_somas_dimensoes(somas_dimensoes: dict[str, list[pd.DataFrame]],
+                              casas_decimais: int | None = None) -> dict[str, pd.DataFrame]:
+    # As somas por dimensão são aditivas: basta somar as das partes pelo valor da dimensão
+    return {
+        dimensao: _finalizar_resumo_dimensao(pd.concat(lista).groupby(level=0, dropna=False, sort=True).sum(),
+                                             casas_decimais)
+        for dimensao, lista in somas_dimensoes.items()
+    }
+
+
+def _renomear_blocos(blocos, colunas_dos_pares: list[str], colunas_chave: list[str], sufixo: str, mapa: dict):
+    """Aplica _renomear_colunas_dos_pares a cada bloco, guardando o mapa em 'mapa'."""
+    for bloco in blocos:
+        bloco, mapa_bloco = _renomear_colunas_dos_pares(bloco, colunas_dos_pares, colunas_chave, sufixo)
+        mapa.update(mapa_bloco)
+        yield bloco
+
+
+def comparar_blocos_ordenados(blocos_a, blocos_b,
+                              colunas_chave_a: list[str],
+                              colunas_chave_b: list[str],
+                              pares_mapeados: list[tuple[str, str]],
+                              tipo_join: str = 'inner',
+                              monitor=None,
+                              apenas_divergencias: bool = True,
+                              tolerancia_divergencia: float = 0.0,
+                              dimensoes_agrupamento: list[str] | None = None,
+                              casas_decimais: int | None = None,
+                              maiores_divergencias: int = MAIORES_DIVERGENCIAS_POR_PAR) -> dict | None:
+    """
+    Versão em fluxo de comparar_dataframes para entradas já ordenadas pelas chaves.
+
+    'blocos_a' e 'blocos_b' são sequências de DataFrames (ex: carregar_dados_em_blocos)
+    lidas uma única vez: cada parte do join por intercalação tem as diferenças calculadas
+    e as linhas conciliadas descartadas na hora, e o resumo é acumulado bloco a bloco.
+    Assim, só as linhas divergentes (e um bloco de cada lado) ficam em memória. As maiores
+    divergências também são mantidas bloco a bloco: cada parte só concorre com as já escolhidas.
+
+    Returns:
+        dict | None: Mesmo formato de comparar_dataframes.
+
+    Raises:
+        ValueError: Se algum dos lados não estiver ordenado pelas colunas chave.
+    """
+    try:
+        mapa_a, mapa_b = {}, {}
+        partes = juntar_ordenado_em_fluxo(
+            _renomear_blocos(blocos_a, [par[0] for par in pares_mapeados], colunas_chave_a, "_A", mapa_a),
+            _renomear_blocos(blocos_b, [par[1] for par in pares_mapeados], colunas_chave_b, "_B", mapa_b),
+            colunas_chave_a, colunas_chave_b, tipo_join
+        )
+
+        resumos_partes = []   # resumo por par de cada parte (combinados no final)
+        somas_dimensoes = {}  # dimensão -> somas por valor de cada parte (combinadas no final)
+        partes_resultado = []
+        maiores = pd.DataFrame()
+        total_linhas_merge = 0
+        with etapa_monitorada(monitor, "Junção ordenada em fluxo") as registro:
+            for parte in partes:
+                total_linhas_merge += len(parte)
+                parte, resumo_parte, somas_parte = _processar_parte(
+                    parte, pares_mapeados, mapa_a, mapa_b, apenas_divergencias, tolerancia_divergencia,
+                    dimensoes_agrupamento, casas_decimais)
+                if dimensoes_agrupamento and resumo_parte:
+                    dimensoes_agrupamento = list(somas_parte)  # dimensões inválidas: avisa uma vez só
+                for dimensao, somas in somas_parte.items():
+                    somas_dimensoes.setdefault(dimensao, []).append(somas)
+                resumos_partes.append(resumo_parte)
+                partes_resultado.append(parte)
+                if maiores_divergencias and resumo_parte:
+                    maiores = _combinar_maiores_divergencias([maiores, _maiores_divergencias(
+                        parte, pares_mapeados, mapa_a, mapa_b, colunas_chave_a + colunas_chave_b,
+                        tolerancia_divergencia if apenas_divergencias else 0.0, maiores_divergencias)],
+                        maiores_divergencias)
+            registro['linhas_saida'] = total_linhas_merge
+
+        # Diferenças totais recalculadas a partir dos totais somados (exatos no modo monetário)
+        lista_resultados_resumo_pares = _combinar_resumos(resumos_partes)
+        resumo_por_dimensao = _combinar_somas_dimensoes(somas_dimensoes, casas_decimais)
+
+        df_merged = pd.concat(partes_resultado, ignore_index=True) if partes_resultado else pd.DataFrame()
+        if not total_linhas_merge:
+            print(f"Aviso DataComparator: O merge (tipo '{tipo_join}') resultou em um DataFrame vazio.")
+        return {
+            'resumo_por_par': lista_resultados_resumo_pares,
+            'resumo_por_dimensao': resumo_por_dimensao,
+            'maiores_divergencias': maiores,
+            'dataframe_merged': df_merged,
+            'total_linhas_merge': total_linhas_merge,
+            'colunas_chave_a': list(colunas_chave_a),
+            'colunas_chave_b': list(colunas_chave_b)
+        }
+
+    except (ValueError, MemoryError):
+        raise # Entrada fora de ordem ou sem memória: o chamador precisa avisar o usuário
+    except Exception as e:
+        # print(f"Ocorreu um erro inesperado durante a comparação em fluxo: {e}")
+        import traceback; traceback.print_exc()
+        return None
+
+
 if __name__ == '__main__':
     from excel_parser import carregar_dados_excel 
     import os
@@ -0,0 +1,364 @@
+# core/data_profiler.py
+#
+# Perfil das colunas de um arquivo em uma única passada, em blocos (serve também para
+# arquivos maiores que a memória): linhas, nulos, valores distintos, valores repetidos e
+# quantis. Cada coluna guarda só resumos de tamanho limitado (sketches), atualizados bloco
+# a bloco:
+#   - HyperLogLog para o número de distintos (~0,8% de erro com 2^14 registradores), com a
+#     contagem exata enquanto a coluna tiver poucos valores distintos;
+#   - Misra-Gries (heavy hitters) para os valores mais repetidos;
+#   - t-digest para os quantis das colunas numéricas e de data.
+# Usado pela janela para ajudar a escolher as colunas chave antes do confronto.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .bloom_filter import hash_chaves, _misturar, _tipo_e_hash_coluna, _TIPOS_NUMERICOS_OBJETO
+    from .excel_parser import carregar_dados_em_blocos
+except ImportError:
+    from core.bloom_filter import hash_chaves, _misturar, _tipo_e_hash_coluna, _TIPOS_NUMERICOS_OBJETO
+    from core.excel_parser import carregar_dados_em_blocos
+
+PRECISAO_HLL = 14
+# Até esse número de distintos a coluna guarda os hashes (8 bytes cada) e a contagem é exata
+LIMITE_DISTINTOS_EXATOS = 100_000
+CAPACIDADE_FREQUENTES = 1_000
+COMPRESSAO_TDIGEST = 200
+QUANTIS_PERFIL = [0.01, 0.25, 0.5, 0.75, 0.99]
+MAIS_FREQUENTES_EXIBIDOS = 10
+
+
+def _contar_hashes(hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hashes distintos, quantas vezes aparecem e a posição da primeira ocorrência de cada um."""
+    # Ordenação estável em vez de np.unique, bem mais lento para uint64
+    ordem = np.argsort(hashes, kind='stable')
+    ordenados = hashes[ordem]
+    inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]]) if len(ordenados) else np.zeros(0, int)
+    contagens = np.diff(np.r_[inicios, len(ordenados)])
+    return ordenados[inicios], contagens, ordem[inicios]
+
+
+class HyperLogLog:
+    """
+    Estimador de valores distintos sobre hashes de 64 bits, em 2^precisao registradores de
+    um byte. Dois HyperLogLog de mesma precisão podem ser juntados (máximo dos registradores).
+    """
+
+    def __init__(self, precisao: int = PRECISAO_HLL):
+        self.precisao = precisao
+        self.registradores = np.zeros(1 << precisao, dtype=np.uint8)
+
+    def adicionar(self, hashes: np.ndarray) -> None:
+        if not len(hashes): return
+        hashes = _misturar(np.asarray(hashes, dtype=np.uint64))
+        indices = (hashes >> np.uint64(64 - self.precisao)).astype(np.intp)
+        bits_restantes = 64 - self.precisao
+        restantes = hashes & np.uint64((1 << bits_restantes) - 1)
+        # Posição do primeiro bit 1 nos bits restantes (frexp é exato até 2^53)
+        posicoes = (bits_restantes + 1 - np.frexp(restantes.astype(np.float64))[1]).astype(np.uint8)
+        # Atribuição em ordem crescente: para índices repetidos fica o maior valor
+        ordem = np.argsort(posicoes, kind='stable')
+        novos = np.zeros_like(self.registradores)
+        novos[indices[ordem]] = posicoes[ordem]
+        np.maximum(self.registradores, novos, out=self.registradores)
+
+    def juntar(self, outro: 'HyperLogLog') -> None:
+        np.maximum(self.registradores, outro.registradores, out=self.registradores)
+
+    def estimativa(self) -> float:
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimativa = alfa * m * m / np.sum(np.ldexp(1.0, -self.registradores.astype(np.int64)))
+        zerados = int(np.count_nonzero(self.registradores == 0))
+        if estimativa <= 2.5 * m and zerados:
+            return m * math.log(m / zerados) # Contagem linear: mais precisa com poucos distintos
+        return float(estimativa)
+
+
+class ContadorFrequentes:
+    """
+    Valores mais frequentes pelo algoritmo de Misra-Gries, com no máximo 'capacidade'
+    contadores. A contagem guardada é um limite inferior da real; a real é no máximo
+    'contagem + desconto'. Valores que aparecem em mais de N/(capacidade + 1) linhas
+    nunca são perdidos.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE_FREQUENTES):
+        self.capacidade = capacidade
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.contagens = np.zeros(0, dtype=np.int64)
+        self.valores = np.zeros(0, dtype=object)
+        self.desconto = 0
+
+    def adicionar(self, hashes: np.ndarray, valores: pd.Series | pd.DataFrame) -> None:
+        """Soma as ocorrências de um bloco ('valores' só é lido para os hashes que ficarem)."""
+        if not len(hashes): return
+        unicos, contagens, primeiros = _contar_hashes(hashes)
+        todos_hashes = np.concatenate([self.hashes, unicos])
+        todas_contagens = np.concatenate([self.contagens, contagens])
+        # Posição do valor de exemplo: < 0 para os já guardados, senão a linha do bloco
+        origens = np.concatenate([-1 - np.arange(len(self.hashes)), primeiros])
+        hashes_juntos, _, primeiros_juntos = _contar_hashes(todos_hashes)
+        grupos = np.searchsorted(hashes_juntos, todos_hashes)
+        contagens_juntas = np.bincount(grupos, weights=todas_contagens).astype(np.int64)
+        origens_juntas = origens[primeiros_juntos]
+
+        if len(hashes_juntos) > self.capacidade:
+            limiar = np.partition(contagens_juntas, len(contagens_juntas) - self.capacidade - 1)[
+                len(contagens_juntas) - self.capacidade - 1]
+            contagens_juntas = contagens_juntas - limiar
+            mantidos = contagens_juntas > 0
+            hashes_juntos, contagens_juntas = hashes_juntos[mantidos], contagens_juntas[mantidos]
+            origens_juntas = origens_juntas[mantidos]
+            self.desconto += int(limiar)
+
+        valores_juntos = np.empty(len(hashes_juntos), dtype=object)
+        antigos = origens_juntas < 0
+        valores_juntos[antigos] = self.valores[-1 - origens_juntas[antigos]]
+        novos = np.flatnonzero(~antigos)
+        if len(novos):
+            linhas = valores.iloc[origens_juntas[novos]]
+            # Chave composta: uma tupla por linha (só das linhas que ficaram no resumo)
+            exemplos = (list(linhas.itertuples(index=False, name=None)) if isinstance(linhas, pd.DataFrame)
+                        else linhas.tolist())
+            for posicao, exemplo in zip(novos, exemplos): valores_juntos[posicao] = exemplo
+        self.hashes, self.contagens, self.valores = hashes_juntos, contagens_juntas, valores_juntos
+
+    def mais_frequentes(self, quantidade: int = MAIS_FREQUENTES_EXIBIDOS) -> list[dict]:
+        """Os valores com certeza repetidos (contagem mínima >= 2), do mais para o menos frequente."""
+        ordem = np.argsort(-self.contagens, kind='stable')[:quantidade]
+        return [{'valor': self.valores[i], 'contagem': int(self.contagens[i]),
+                 'contagem_maxima': int(self.contagens[i]) + self.desconto}
+                for i in ordem if self.contagens[i] >= 2]
+
+
+class TDigest:
+    """
+    Quantis aproximados de um fluxo de números (t-digest com a função de escala k1): os
+    valores são resumidos em centroides (média, peso), mais finos perto das caudas, onde
+    o erro relativo dos quantis extremos precisa ser menor.
+    """
+
+    def __init__(self, compressao: float = COMPRESSAO_TDIGEST):
+        self.compressao = compressao
+        self.medias = np.zeros(0)
+        self.pesos = np.zeros(0)
+        self.minimo, self.maximo = math.inf, -math.inf
+
+    def adicionar(self, valores: np.ndarray) -> None:
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[np.isfinite(valores)]
+        if not len(valores): return
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        medias = np.concatenate([self.medias, valores])
+        pesos = np.concatenate([self.pesos, np.ones(len(valores))])
+        ordem = np.argsort(medias, kind='stable')
+        medias, pesos = medias[ordem], pesos[ordem]
+        acumulado = np.cumsum(pesos)
+        quantil_esquerdo = (acumulado - pesos) / acumulado[-1]
+        # Cada centroide cobre no máximo uma unidade da escala k1(q) = d/(2*pi) * asin(2q - 1)
+        escala = self.compressao / (2 * math.pi) * np.arcsin(np.clip(2 * quantil_esquerdo - 1, -1, 1))
+        grupos = np.floor(escala - escala[0]).astype(np.int64)
+        inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+        self.pesos = np.add.reduceat(pesos, inicios)
+        self.medias = np.add.reduceat(medias * pesos, inicios) / self.pesos
+
+    def quantis(self, qs: list[float]) -> list[float]:
+        if not len(self.pesos): return [math.nan] * len(qs)
+        total = self.pesos.sum()
+        centros = np.cumsum(self.pesos) - self.pesos / 2
+        posicoes = np.r_[0.0, centros, total]
+        valores = np.r_[self.minimo, self.medias, self.maximo]
+        return [float(v) for v in np.interp(np.asarray(qs) * total, posicoes, valores)]
+
+
+class PerfilColuna:
+    """Estatísticas de uma coluna (ou de uma chave composta), acumuladas bloco a bloco."""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.tipo = None
+        self.linhas = 0
+        self.nulos = 0
+        self.distintos_exatos = np.zeros(0, dtype=np.uint64)  # None depois de LIMITE_DISTINTOS_EXATOS
+        self.hll = HyperLogLog()
+        self.frequentes = ContadorFrequentes()
+        self.tdigest = None
+        self.eh_data = False
+
+    def adicionar(self, hashes: np.ndarray, nulos: np.ndarray, valores: pd.Series | pd.DataFrame,
+                  numeros: np.ndarray | None = None) -> None:
+        """
+        Soma um bloco: 'hashes' e 'nulos' de cada linha, 'valores' para exibir os mais
+        frequentes e 'numeros' (float64, ou datas em ns) para os quantis.
+        """
+        self.linhas += len(hashes)
+        self.nulos += int(nulos.sum())
+        preenchidos = ~nulos
+        hashes = hashes[preenchidos]
+        self.hll.adicionar(hashes)
+        self.frequentes.adicionar(hashes, valores[preenchidos])
+        if self.distintos_exatos is not None:
+            juntos = np.sort(np.concatenate([self.distintos_exatos, hashes]))
+            juntos = juntos[np.r_[True, juntos[1:] != juntos[:-1]]] if len(juntos) else juntos
+            self.distintos_exatos = juntos if len(juntos) <= LIMITE_DISTINTOS_EXATOS else None
+        if numeros is not None:
+            if self.tdigest is None: self.tdigest = TDigest()
+            self.tdigest.adicionar(numeros[preenchidos])
+
+    def resultado(self) -> dict:
+        preenchidos = self.linhas - self.nulos
+        exato = self.distintos_exatos is not None
+        # Repetições garantidas: as contagens do Misra-Gries são limites inferiores
+        repetidas_confirmadas = int(np.maximum(self.frequentes.contagens - 1, 0).sum())
+        if exato:
+            distintos = len(self.distintos_exatos)
+        else:
+            distintos = min(round(self.hll.estimativa()), preenchidos)
+            # Dentro da margem de erro do HyperLogLog (3 desvios), "quase todos distintos" não
+            # distingue uma coluna única de uma com poucas repetições: ficam só as confirmadas
+            if preenchidos - distintos <= 3 * 1.04 / math.sqrt(len(self.hll.registradores)) * preenchidos:
+                distintos = preenchidos - repetidas_confirmadas
+        perfil = {
+            'coluna': self.nome, 'tipo': self.tipo, 'linhas': self.linhas, 'nulos': self.nulos,
+            'percentual_nulos': self.nulos / self.linhas * 100 if self.linhas else 0.0,
+            'distintos': distintos, 'distintos_exatos': exato,
+            'linhas_repetidas': max(preenchidos - distintos, repetidas_confirmadas, 0),
+            'mais_frequentes': self.frequentes.mais_frequentes(),
+        }
+        if self.tdigest is not None and len(self.tdigest.pesos):
+            converter = (lambda v: pd.Timestamp(int(v)).round('s')) if self.eh_data else (lambda v: v)
+            perfil['minimo'] = converter(self.tdigest.minimo)
+            perfil['maximo'] = converter(self.tdigest.maximo)
+            perfil['quantis'] = {q: converter(v) for q, v in zip(QUANTIS_PERFIL, self.tdigest.quantis(QUANTIS_PERFIL))}
+        return perfil
+
+
+def _hash_coluna(serie: pd.Series) -> np.ndarray:
+    """Hash de 64 bits de cada valor (o mesmo do semi-join), com texto como último recurso."""
+    tipo, hashes = _tipo_e_hash_coluna(serie)
+    if tipo is None:
+        hashes = pd.util.hash_pandas_object(serie.astype(str), index=False).to_numpy(dtype=np.uint64)
+    return hashes
+
+
+def _numeros_para_quantis(serie: pd.Series) -> tuple[np.ndarray | None, bool]:
+    """Valores float64 para o t-digest (datas em nanossegundos) ou None se a coluna não for numérica."""
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return None, False
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan), False
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        datas = serie.dt.tz_localize(None) if getattr(serie.dt, 'tz', None) is not None else serie
+        return datas.astype('datetime64[ns]').to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64), True
+    if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) in _TIPOS_NUMERICOS_OBJETO:
+        return pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan), False
+    return None, False
+
+
+def perfilar_blocos(blocos, colunas_chave: list[str] | None = None, callback_linhas=None, cancelado=None) -> dict | None:
+    """
+    Perfil das colunas a partir de uma sequência de DataFrames (ex: carregar_dados_em_blocos).
+
+    Args:
+        blocos: Os blocos do arquivo, todos com as mesmas colunas.
+        colunas_chave (list[str], optional): Colunas da chave (simples ou composta) a perfilar
+            também em conjunto; uma linha com alguma coluna da chave vazia conta como nula.
+        callback_linhas (callable, optional): Recebe o total de linhas processadas a cada bloco.
+        cancelado (callable, optional): Consultado a cada bloco; True interrompe (retorna None).
+
+    Returns:
+        dict | None: {'linhas', 'colunas' ({coluna: perfil}), 'chave' (perfil da chave ou
+            None)}. Cada perfil tem 'tipo', 'linhas', 'nulos', 'percentual_nulos',
+            'distintos' (exato se 'distintos_exatos', senão estimado pelo HyperLogLog),
+            'linhas_repetidas', 'mais_frequentes' ([{'valor', 'contagem', 'contagem_maxima'}])
+            e, em colunas numéricas e de data, 'minimo', 'maximo' e 'quantis' ({q: valor}).
+    """
+    perfis, perfil_chave, linhas = {}, None, 0
+    for bloco in blocos:
+        if cancelado is not None and cancelado(): return None
+        for coluna in bloco.columns:
+            perfil = perfis.get(coluna)
+            if perfil is None:
+                perfil = perfis[coluna] = PerfilColuna(str(coluna))
+            serie = bloco[coluna]
+            if perfil.tipo is None and serie.notna().any(): perfil.tipo = str(serie.dtype)
+            numeros, eh_data = _numeros_para_quantis(serie)
+            perfil.eh_data = perfil.eh_data or eh_data
+            perfil.adicionar(_hash_coluna(serie), serie.isna().to_numpy(), serie, numeros)
+        if colunas_chave:
+            if perfil_chave is None: perfil_chave = PerfilColuna(" + ".join(colunas_chave))
+            _, hashes = hash_chaves(bloco, colunas_chave)
+            if hashes is None:
+                hashes = pd.util.hash_pandas_object(bloco[colunas_chave].astype(str), index=False).to_numpy(dtype=np.uint64)
+            if perfil_chave.tipo is None: perfil_chave.tipo = 'chave' if len(colunas_chave) == 1 else 'chave composta'
+            valores = bloco[colunas_chave[0]] if len(colunas_chave) == 1 else bloco[colunas_chave]
+            perfil_chave.adicionar(hashes, bloco[colunas_chave].isna().any(axis=1).to_numpy(), valores)
+        linhas += len(bloco)
+        if callback_linhas: callback_linhas(linhas)
+    return {'linhas': linhas, 'colunas': {coluna: perfil.resultado() for coluna, perfil in perfis.items()},
+            'chave': perfil_chave.resultado() if perfil_chave is not None else None}
+
+
+def perfilar_arquivo(caminho_arquivo: str, colunas: list[str] | None = None, colunas_chave: list[str] | None = None,
+                     tamanho_bloco: int | None = None, esquema_colunas: dict | None = None,
+                     callback_linhas=None, cancelado=None) -> dict | None:
+    """
+    Perfil das colunas de um arquivo CSV ou Excel em uma passada, lido em blocos: a memória
+    usada não depende do tamanho do arquivo. 'esquema_colunas' como em carregar_dados_excel;
+    os demais argumentos e o retorno como em perfilar_blocos, mais 'caminho'. Retorna None
+    em caso de erro ou cancelamento.
+    """
+    try:
+        blocos = carregar_dados_em_blocos(caminho_arquivo, colunas, tamanho_bloco=tamanho_bloco,
+                                          esquema_colunas=esquema_colunas)
+        perfil = perfilar_blocos(blocos, colunas_chave, callback_linhas, cancelado)
+        if perfil is not None: perfil['caminho'] = caminho_arquivo
+        return perfil
+    except MemoryError:
+        raise
+    except Exception:
+        import traceback; traceback.print_exc()
+        return None
+
+
+def _numero(valor: float, casas: int = 0) -> str:
+    """Número no formato brasileiro (1.234,5)."""
+    return f"{valor:,.{casas}f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _exibir_valor(valor) -> str:
+    if isinstance(valor, tuple): return " | ".join(_exibir_valor(v) for v in valor)
+    if isinstance(valor, float): return f"{valor:.6g}".replace(".", ",")
+    return repr(valor) if isinstance(valor, str) else str(valor)
+
+
+def resumir_perfil(perfil: dict) -> str:
+    """Uma linha com o essencial para escolher chaves: distintos, repetidas e nulos."""
+    aproximado = "" if perfil['distintos_exatos'] else "~"
+    texto = (f"{perfil['coluna']}: {aproximado}{_numero(perfil['distintos'])} distintos, "
+             f"{aproximado}{_numero(perfil['linhas_repetidas'])} repetidas, "
+             f"{_numero(perfil['percentual_nulos'], 1)}% nulos")
+    if perfil['linhas_repetidas'] == 0 and perfil['nulos'] == 0:
+        texto += " (pode ser chave)" if perfil['distintos_exatos'] else " (provável chave)"
+    return texto
+
+
+def descrever_perfil(perfil: dict) -> str:
+    """Descrição em várias linhas (dica da coluna na janela)."""
+    linhas = [resumir_perfil(perfil), f"Tipo: {perfil['tipo']} | {_numero(perfil['linhas'])} linhas, "
+                                      f"{_numero(perfil['nulos'])} nulas"]
+    if 'quantis' in perfil:
+        quantis = ", ".join(f"p{round(q * 100)}={_exibir_valor(v)}" for q, v in perfil['quantis'].items())
+        linhas.append(f"Mín={_exibir_valor(perfil['minimo'])}, máx={_exibir_valor(perfil['maximo'])}; {quantis}")
+    if perfil['mais_frequentes']:
+        linhas.append("Mais repetidos:")
+        for item in perfil['mais_frequentes']:
+            contagem = _numero(item['contagem'])
+            if item['contagem_maxima'] != item['contagem']: contagem += f" a {_numero(item['contagem_maxima'])}"
+            linhas.append(f"  {_exibir_valor(item['valor'])}: {contagem}")
+    return "\n".join(linhas)
@@ -0,0 +1,395 @@
+# core/distributed.py
+#
+# Confronto repartido entre várias máquinas. O coordenador lê os dois arquivos em blocos,
+# reparte cada bloco pelo hash da chave (o mesmo do confronto paralelo,
+# core/parallel_compare.py) e manda cada fatia ao trabalhador dono dela: linhas com a mesma
+# chave chegam sempre ao mesmo trabalhador, nos dois lados. Os trabalhadores guardam os
+# pedaços das fatias em disco (Arrow IPC) e, no fim, cruzam cada par de fatias com a lógica
+# de comparar_dataframes (parallel_compare._cruzar_fatia). O coordenador combina os resumos
+# de forma exata e devolve o detalhe na ordem do pd.merge. Ninguém precisa dos arquivos
+# inteiros em memória: o coordenador guarda um bloco (e o detalhe já filtrado) e cada
+# trabalhador, uma fatia por vez.
+#
+# Protocolo: multiprocessing.connection sobre TCP. A conexão é autenticada por HMAC com a
+# chave da variável VARIAVEL_CHAVE, a mesma em todos os nós; as mensagens de controle vão
+# por pickle e os dados em Arrow IPC (send_bytes). O pickle executa o que recebe: exponha
+# os trabalhadores só em uma rede confiável e mantenha a chave em segredo.
+#
+#   ('ping',)                       -> ('pronto', {'pid', 'nucleos'})
+#   ('bloco', lado, fatia) + bytes  -> (sem resposta) guarda um pedaço da fatia
+#   ('comparar', fatia, tarefa)     -> ('resultado', retorno) + bytes do detalhe, ou ('erro', texto)
+#   ('fim',)                        -> encerra a conexão e apaga as fatias
+#
+# Exemplos (em cada nó, com a mesma chave):
+#   export DATAANALYZER_CHAVE_CLUSTER=<segredo>
+#   python -m core.distributed trabalhador --host 0.0.0.0 --porta 8766
+#   python -m core.distributed testar 10.0.0.5:8766 10.0.0.6:8766
+
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .bloom_filter import hash_chaves, _tipos_compativeis
+    from .data_comparator import MAIORES_DIVERGENCIAS_POR_PAR
+    from .parallel_compare import _POSICAO_A, _POSICAO_B, _cruzar_fatia, _combinar_fatias, _tabela_para_pandas
+    from .performance_monitor import etapa_monitorada
+except ImportError:
+    from core.bloom_filter import hash_chaves, _tipos_compativeis
+    from core.data_comparator import MAIORES_DIVERGENCIAS_POR_PAR
+    from core.parallel_compare import _POSICAO_A, _POSICAO_B, _cruzar_fatia, _combinar_fatias, _tabela_para_pandas
+    from core.performance_monitor import etapa_monitorada
+
+PORTA_PADRAO = 8766
+VARIAVEL_CHAVE = 'DATAANALYZER_CHAVE_CLUSTER'
+# Mais fatias que trabalhadores: cada fatia precisa caber na memória do trabalhador
+FATIAS_POR_TRABALHADOR = 4
+
+
+class ErroDistribuido(RuntimeError):
+    """Trabalhador inacessível ou com erro, chave do cluster ausente ou chaves que não podem ser repartidas."""
+
+
+def _endereco(texto: str) -> tuple[str, int]:
+    """'host:porta' (ou só 'host', na PORTA_PADRAO) em (host, porta)."""
+    host, separador, porta = texto.strip().rpartition(':')
+    return (host, int(porta)) if separador else (texto.strip(), PORTA_PADRAO)
+
+
+def _chave_cluster(chave: str | bytes | None = None) -> bytes:
+    chave = chave or os.environ.get(VARIAVEL_CHAVE)
+    if not chave:
+        raise ErroDistribuido(f"Defina a chave do cluster na variável de ambiente {VARIAVEL_CHAVE} "
+                              "(a mesma no coordenador e em todos os trabalhadores).")
+    return chave.encode('utf-8') if isinstance(chave, str) else chave
+
+
+def _tabela_em_bytes(tabela):
+    import pyarrow as pa
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue()
+
+
+def _ler_stream(origem):
+    """Lê um stream Arrow IPC; sem linhas, devolve uma tabela com um bloco vazio por coluna
+    (o stream de uma tabela vazia não tem lotes, e o merge do pandas falha em colunas sem blocos)."""
+    import pyarrow as pa
+    tabela = pa.ipc.open_stream(origem).read_all()
+    return tabela if tabela.num_rows else tabela.schema.empty_table()
+
+
+def _bytes_em_tabela(dados: bytes):
+    import pyarrow as pa
+    return _ler_stream(pa.py_buffer(dados))
+
+
+def _ler_pedacos(caminhos: list[str]) -> pd.DataFrame:
+    """Junta os pedaços de uma fatia recebidos do coordenador e apaga os arquivos."""
+    import pyarrow as pa
+    if not caminhos:
+        raise ValueError("Fatia sem nenhum pedaço recebido.")
+    partes = []
+    for caminho in caminhos:
+        with pa.memory_map(caminho, 'r') as origem:
+            partes.append(_tabela_para_pandas(_ler_stream(origem)))
+        os.remove(caminho)
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+def _atender_coordenador(conexao, pasta_base: str | None) -> None:
+    """Atende um coordenador até ('fim',) ou a conexão cair; as fatias ficam em uma pasta própria."""
+    import pyarrow as pa
+
+    pasta = tempfile.mkdtemp(prefix='trabalhador_confronto_', dir=pasta_base)
+    pedacos = {} # (lado, fatia) -> caminhos dos pedaços recebidos
+    try:
+        while True:
+            try:
+                mensagem = conexao.recv()
+            except (EOFError, OSError):
+                return
+            if mensagem[0] == 'ping':
+                conexao.send(('pronto', {'pid': os.getpid(), 'nucleos': os.cpu_count()}))
+            elif mensagem[0] == 'bloco':
+                _, lado, fatia = mensagem
+                caminhos = pedacos.setdefault((lado, fatia), [])
+                caminho = os.path.join(pasta, f"{lado}_{fatia:04d}_{len(caminhos):06d}.arrow")
+                with open(caminho, 'wb') as destino:
+                    destino.write(conexao.recv_bytes())
+                caminhos.append(caminho)
+            elif mensagem[0] == 'comparar':
+                _, fatia, tarefa = mensagem
+                try:
+                    parte, retorno = _cruzar_fatia(_ler_pedacos(pedacos.pop(('A', fatia), [])),
+                                                   _ler_pedacos(pedacos.pop(('B', fatia), [])), tarefa)
+                    dados = _tabela_em_bytes(pa.Table.from_pandas(parte, preserve_index=False))
+                    del parte
+                except MemoryError:
+                    conexao.send(('erro', "memória insuficiente no trabalhador; use mais fatias por trabalhador."))
+                    continue
+                except Exception:
+                    import traceback
+                    conexao.send(('erro', traceback.format_exc()))
+                    continue
+                conexao.send(('resultado', retorno))
+                conexao.send_bytes(dados)
+            elif mensagem[0] == 'fim':
+                return
+    finally:
+        conexao.close()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def servir_trabalhador(host: str = '127.0.0.1', porta: int = PORTA_PADRAO, chave: str | bytes | None = None,
+                       pasta: str | None = None, callback_pronto=None) -> None:
+    """
+    Atende coordenadores até Ctrl+C, cada conexão em uma thread.
+
+    Args:
+        host (str, optional): Interface de escuta; '0.0.0.0' para aceitar outras máquinas.
+        porta (int, optional): Porta TCP; 0 escolhe uma livre. Defaults to PORTA_PADRAO.
+        chave (str | bytes, optional): Chave do cluster. Defaults to a de VARIAVEL_CHAVE.
+        pasta (str, optional): Onde guardar as fatias recebidas. Defaults to o temporário do sistema.
+        callback_pronto (callable, optional): Chamado com (host, porta) quando começa a atender.
+    """
+    from multiprocessing.connection import Listener, AuthenticationError
+
+    with Listener((host, porta), authkey=_chave_cluster(chave)) as ouvinte:
+        host, porta = ouvinte.address
+        print(f"[Trabalhador] Atendendo em {host}:{porta} ({os.cpu_count()} núcleo(s)).")
+        if callback_pronto: callback_pronto(host, porta)
+        try:
+            while True:
+                try:
+                    conexao = ouvinte.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    print(f"[Trabalhador] Conexão recusada: {e}")
+                    continue
+                threading.Thread(target=_atender_coordenador, args=(conexao, pasta), daemon=True).start()
+        except KeyboardInterrupt:
+            print("[Trabalhador] Encerrado.")
+
+
+def _conectar(endereco: str, chave: bytes):
+    """Abre a conexão com um trabalhador e confere se ele responde."""
+    from multiprocessing.connection import Client, AuthenticationError
+    try:
+        conexao = Client(_endereco(endereco), authkey=chave)
+        conexao.send(('ping',))
+        resposta = conexao.recv()
+    except AuthenticationError:
+        raise ErroDistribuido(f"Trabalhador {endereco} recusou a chave do cluster ({VARIAVEL_CHAVE}).")
+    except (EOFError, OSError, ValueError) as e:
+        raise ErroDistribuido(f"Trabalhador {endereco} inacessível: {e}")
+    return conexao, resposta[1]
+
+
+def testar_trabalhadores(trabalhadores: list[str], chave: str | bytes | None = None) -> dict:
+    """
+    Confere se cada trabalhador responde com a chave do cluster.
+
+    Returns:
+        dict: {endereço: {'pid', 'nucleos'} ou o texto do erro}.
+    """
+    chave = _chave_cluster(chave)
+    situacao = {}
+    for endereco in trabalhadores:
+        try:
+            conexao, situacao[endereco] = _conectar(endereco, chave)
+            conexao.send(('fim',))
+            conexao.close()
+        except ErroDistribuido as e:
+            situacao[endereco] = str(e)
+    return situacao
+
+
+def _distribuir_lado(blocos, lado: str, colunas_chave: list[str], coluna_posicao: str, conexoes: list,
+                     nomes: list[str], num_fatias: int, tipos_outro_lado: tuple | None):
+    """
+    Reparte os blocos de um lado pelo hash da chave e manda cada pedaço ao dono da fatia
+    (fatia % trabalhadores). O primeiro bloco vai para todas as fatias, mesmo vazio, para
+    que cada trabalhador conheça as colunas do lado.
+
+    Returns:
+        tuple: (linhas enviadas, DataFrame vazio com as colunas, tipos das colunas chave).
+    """
+    import pyarrow as pa
+
+    linhas, vazio, tipos_lado = 0, None, None
+    for bloco in blocos:
+        tipos, hashes = hash_chaves(bloco, colunas_chave)
+        if tipos is None:
+            raise ErroDistribuido(f"Arquivo {lado}: as colunas chave têm um tipo que não pode ser repartido.")
+        # Os hashes só batem entre blocos e lados com os mesmos tipos de chave (1 e '1' não casam)
+        for referencia in [tipos_lado, tipos_outro_lado]:
+            if referencia is not None and not _tipos_compativeis(referencia, tipos):
+                raise ErroDistribuido(f"Arquivo {lado}: colunas chave com tipos {tipos}, diferentes de {referencia}; "
+                                      "defina o tipo da chave no esquema de colunas (ex: 'texto').")
+        tipos_lado = tipos if tipos_lado is None else tuple(b if a == 'vazio' else a for a, b in zip(tipos_lado, tipos))
+        try:
+            tabela = pa.Table.from_pandas(bloco.assign(**{coluna_posicao: np.arange(linhas, linhas + len(bloco))}),
+                                          preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ErroDistribuido(f"Arquivo {lado}: coluna com tipos misturados não pode ser enviada ({e}); "
+                                  "defina o tipo dela no esquema de colunas.")
+        fatias = (hashes % np.uint64(num_fatias)).astype(np.int64)
+        ordem = np.argsort(fatias, kind='stable')
+        limites = np.searchsorted(fatias[ordem], np.arange(num_fatias + 1))
+        for fatia in range(num_fatias):
+            if vazio is not None and limites[fatia] == limites[fatia + 1]:
+                continue
+            indice = fatia % len(conexoes)
+            try:
+                conexoes[indice].send(('bloco', lado, fatia))
+                conexoes[indice].send_bytes(_tabela_em_bytes(tabela.take(ordem[limites[fatia]:limites[fatia + 1]])))
+            except (EOFError, OSError) as e:
+                raise ErroDistribuido(f"Trabalhador {nomes[indice]} desconectou durante o envio: {e}")
+        if vazio is None: vazio = bloco.head(0)
+        linhas += len(bloco)
+    if vazio is None:
+        raise ErroDistribuido(f"Arquivo {lado} não gerou nenhum bloco para repartir.")
+    return linhas, vazio, tipos_lado
+
+
+def comparar_distribuido(blocos_a, blocos_b,
+                         colunas_chave_a: list[str],
+                         colunas_chave_b: list[str],
+                         pares_mapeados: list[tuple[str, str]],
+                         trabalhadores: list[str],
+                         tipo_join: str = 'inner',
+                         monitor=None,
+                         apenas_divergencias: bool = True,
+                         tolerancia_divergencia: float = 0.0,
+                         dimensoes_agrupamento: list[str] | None = None,
+                         casas_decimais: int | None = None,
+                         maiores_divergencias: int = MAIORES_DIVERGENCIAS_POR_PAR,
+                         fatias_por_trabalhador: int = FATIAS_POR_TRABALHADOR,
+                         chave: str | bytes | None = None) -> dict | None:
+    """
+    comparar_dataframes repartido por chave entre trabalhadores (servir_trabalhador).
+
+    O resultado é o mesmo de comparar_em_paralelo: mesmos resumos e o detalhe com as mesmas
+    linhas, valores e ordem de comparar_dataframes. Com blocos de arquivo (em que cada bloco
+    tem os tipos que o leitor inferiu nele), o tipo de uma coluna do detalhe pode variar
+    como na leitura em blocos. Casamento aproximado não é suportado.
+
+    Args:
+        blocos_a, blocos_b (iterable[pd.DataFrame]): Os blocos de cada lado, na ordem do
+            arquivo (ex: carregar_dados_em_blocos); um DataFrame em memória vai como [df].
+        trabalhadores (list[str]): Endereços 'host:porta' dos trabalhadores.
+        fatias_por_trabalhador (int, optional): Fatias de cada trabalhador; aumente se uma
+            fatia não couber na memória de um trabalhador. Defaults to FATIAS_POR_TRABALHADOR.
+        chave (str | bytes, optional): Chave do cluster. Defaults to a de VARIAVEL_CHAVE.
+        Os demais, como em comparar_dataframes.
+
+    Returns:
+        dict | None: Mesmo formato de comparar_dataframes; None em erro inesperado.
+
+    Raises:
+        ErroDistribuido: Trabalhador inacessível ou com erro, chave do cluster ausente ou
+            colunas chave com tipos que não podem ser repartidos.
+        MemoryError: Se faltar memória no coordenador.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    chave = _chave_cluster(chave)
+    conexoes = []
+    try:
+        with etapa_monitorada(monitor, f"Conectar aos trabalhadores ({len(trabalhadores)})") as registro:
+            for endereco in trabalhadores:
+                conexoes.append(_conectar(endereco, chave)[0])
+            registro['linhas_saida'] = len(conexoes)
+        num_fatias = len(conexoes) * fatias_por_trabalhador
+
+        with etapa_monitorada(monitor, f"Ler e repartir por chave ({num_fatias} fatias)") as registro:
+            linhas_a, vazio_a, tipos_a = _distribuir_lado(blocos_a, 'A', colunas_chave_a, _POSICAO_A, conexoes,
+                                                          trabalhadores, num_fatias, None)
+            linhas_b, vazio_b, _ = _distribuir_lado(blocos_b, 'B', colunas_chave_b, _POSICAO_B, conexoes,
+                                                    trabalhadores, num_fatias, tipos_a)
+            registro['linhas_saida'] = linhas_a + linhas_b
+
+        tarefa = {'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b),
+                  'pares_mapeados': list(pares_mapeados), 'tipo_join': tipo_join,
+                  'apenas_divergencias': apenas_divergencias, 'tolerancia_divergencia': tolerancia_divergencia,
+                  'dimensoes_agrupamento': dimensoes_agrupamento, 'casas_decimais': casas_decimais}
+
+        def comparar_fatias(indice: int) -> list[tuple]:
+            # Cada trabalhador cruza as suas fatias uma por vez; os trabalhadores rodam juntos
+            conexao, saida = conexoes[indice], []
+            for fatia in range(indice, num_fatias, len(conexoes)):
+                try:
+                    conexao.send(('comparar', fatia, tarefa))
+                    resposta = conexao.recv()
+                    if resposta[0] == 'erro':
+                        raise ErroDistribuido(f"Trabalhador {trabalhadores[indice]}, fatia {fatia}: {resposta[1]}")
+                    parte = _tabela_para_pandas(_bytes_em_tabela(conexao.recv_bytes()))
+                except (EOFError, OSError) as e:
+                    raise ErroDistribuido(f"Trabalhador {trabalhadores[indice]} desconectou na fatia {fatia}: {e}")
+                saida.append((fatia, resposta[1], parte))
+            return saida
+
+        with etapa_monitorada(monitor, f"Merge e diferenças nos trabalhadores ({len(conexoes)})",
+                              linhas_a + linhas_b) as registro:
+            with ThreadPoolExecutor(max_workers=len(conexoes)) as pool:
+                fatias = sorted((item for lista in pool.map(comparar_fatias, range(len(conexoes))) for item in lista),
+                                key=lambda item: item[0])
+            registro['linhas_saida'] = sum(retorno['linhas_merge'] for _, retorno, _ in fatias)
+
+        return _combinar_fatias([retorno for _, retorno, _ in fatias], [parte for _, _, parte in fatias],
+                                vazio_a, vazio_b, colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join,
+                                apenas_divergencias, tolerancia_divergencia, casas_decimais, maiores_divergencias,
+                                monitor)
+
+    except (ErroDistribuido, MemoryError):
+        raise # Quem chamou decide como avisar (ver ConfrontoWorker)
+    except Exception as e:
+        # print(f"Ocorreu um erro inesperado durante a comparação distribuída: {e}")
+        import traceback; traceback.print_exc()
+        return None
+    finally:
+        for conexao in conexoes:
+            try:
+                conexao.send(('fim',))
+                conexao.close()
+            except (EOFError, OSError):
+                pass
+
+
+def main(argumentos: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m core.distributed', description="Trabalhadores do confronto distribuído.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    trabalhador = comandos.add_parser('trabalhador', help="Atende coordenadores até Ctrl+C.")
+    trabalhador.add_argument('--host', default='127.0.0.1', help="Interface de escuta ('0.0.0.0' para a rede).")
+    trabalhador.add_argument('--porta', type=int, default=PORTA_PADRAO, help=f"Porta TCP (padrão: {PORTA_PADRAO}).")
+    trabalhador.add_argument('--pasta', default=None, help="Onde guardar as fatias recebidas (padrão: temporário).")
+    testar = comandos.add_parser('testar', help="Confere se os trabalhadores respondem.")
+    testar.add_argument('trabalhadores', nargs='+', help="Endereços host:porta.")
+    args = parser.parse_args(argumentos)
+
+    try:
+        if args.comando == 'trabalhador':
+            servir_trabalhador(args.host, args.porta, pasta=args.pasta)
+            return 0
+        falhas = 0
+        for endereco, situacao in testar_trabalhadores(args.trabalhadores).items():
+            if isinstance(situacao, dict):
+                print(f"ok      {endereco} (pid {situacao['pid']}, {situacao['nucleos']} núcleo(s))")
+            else:
+                falhas += 1
+                print(f"FALHOU  {situacao}")
+        return 1 if falhas else 0
+    except ErroDistribuido as e:
+        print(e)
+        return 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
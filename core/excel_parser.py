@@ -1,15 +1,316 @@
 # core/excel_parser.py
 
+import csv
 import pandas as pd
 import os
 
-def carregar_dados_excel(caminho_arquivo: str, colunas_para_ler: list = None) -> pd.DataFrame | None:
+# Linhas lidas por bloco quando há filtro a aplicar durante a leitura do CSV
+TAMANHO_BLOCO_PADRAO = 250_000
+# No xlsx cada linha passa por objetos Python (openpyxl): blocos menores limitam a memória
+# e dão um progresso mais frequente
+TAMANHO_BLOCO_XLSX = 50_000
+
+# Dicas de tipo por coluna (esquema_colunas): {'tipo': 'numero' | 'data' | 'texto' | 'categoria'},
+# com 'decimal'/'milhar' para números e 'formato' (ex: '%d/%m/%Y') para datas
+TIPOS_COLUNA = ['numero', 'data', 'texto', 'categoria']
+FORMATO_NUMERO_BR = {'tipo': 'numero', 'decimal': ',', 'milhar': '.'}  # 1.234,56
+EXEMPLOS_FALHA = 3
+
+def pyarrow_disponivel() -> bool:
+    """Indica se o pyarrow está instalado (necessário para dtype_backend='pyarrow')."""
+    import importlib.util
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _detectar_separador(caminho_arquivo: str) -> str | None:
+    """
+    Detecta o separador do CSV por uma amostra do início do arquivo, para que a leitura
+    possa usar o motor C do pandas. Retorna None se não for possível decidir.
+    """
+    try:
+        with open(caminho_arquivo, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            amostra = f.read(64 * 1024)
+        return csv.Sniffer().sniff(amostra, delimiters=',;\t|').delimiter
+    except (csv.Error, OSError):
+        return None
+
+
+def _opcoes_separador(caminho_arquivo: str) -> dict:
+    # Com o separador detectado, o motor C (bem mais rápido) faz a leitura;
+    # senão, o motor 'python' tenta detectar o separador sozinho.
+    separador = _detectar_separador(caminho_arquivo)
+    return {'sep': separador} if separador else {'sep': None, 'engine': 'python'}
+
+
+def _normalizar_esquema(esquema_colunas: dict | None) -> dict:
+    """Aceita a dica como dict ou só o nome do tipo ('texto'); tipos desconhecidos são ignorados com aviso."""
+    esquema = {}
+    for coluna, dica in (esquema_colunas or {}).items():
+        dica = {'tipo': dica} if isinstance(dica, str) else dict(dica)
+        if dica.get('tipo') not in TIPOS_COLUNA:
+            print(f"Aviso ExcelParser: tipo '{dica.get('tipo')}' da coluna '{coluna}' desconhecido; coluna lida sem dica.")
+            continue
+        esquema[coluna] = dica
+    return esquema
+
+
+def _dtypes_leitura(esquema: dict, eh_csv: bool) -> dict:
+    """
+    Colunas lidas como texto para a conversão na carga: textos (preserva zeros à esquerda) e,
+    no CSV, números e datas com formato próprio ("1.234" viraria 1.234 na inferência do pandas).
+    No Excel, células numéricas já chegam como número e só as de texto são convertidas.
+    """
+    dtypes = {}
+    for coluna, dica in esquema.items():
+        if dica['tipo'] in ['texto', 'categoria'] or (eh_csv and dica['tipo'] in ['numero', 'data']):
+            dtypes[coluna] = str
+    return dtypes
+
+
+def _falha(originais: pd.Series, falhou: pd.Series) -> dict | None:
+    quantidade = int(falhou.sum())
+    if not quantidade: return None
+    return {'quantidade': quantidade, 'exemplos': [str(v) for v in originais[falhou].unique()[:EXEMPLOS_FALHA]]}
+
+
+def _converter_numero(serie: pd.Series, decimal: str = '.', milhar: str | None = None) -> tuple[pd.Series, dict | None]:
+    """Converte texto com os separadores informados para número; colunas já numéricas não são tocadas."""
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        return serie, None
+    numeros_prontos = None
+    textos = serie
+    if serie.dtype == object:
+        # Excel: células numéricas mantêm o valor; só as de texto passam pelos separadores
+        eh_texto = serie.map(type).eq(str)
+        if not eh_texto.all():
+            numeros_prontos = pd.to_numeric(serie.where(~eh_texto), errors='coerce')
+            textos = serie.where(eh_texto)
+    limpos = textos.astype('string').str.strip()
+    if milhar: limpos = limpos.str.replace(milhar, '', regex=False)
+    if decimal != '.': limpos = limpos.str.replace(decimal, '.', regex=False)
+    numeros = pd.to_numeric(limpos, errors='coerce').astype(float)
+    falha = _falha(textos, limpos.fillna('').ne('').to_numpy(dtype=bool) & numeros.isna().to_numpy())
+    if numeros_prontos is not None:
+        numeros = numeros.fillna(numeros_prontos)
+    return numeros, falha
+
+
+def _converter_data(serie: pd.Series, formato: str | None = None) -> tuple[pd.Series, dict | None]:
+    """Converte texto para data (formato informado ou ISO/dd/mm/aaaa); colunas de data não são tocadas."""
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie, None
+    if formato:
+        datas = pd.to_datetime(serie, format=formato, errors='coerce')
+    else:
+        try:
+            from .data_comparator import _serie_como_data
+        except ImportError:
+            from core.data_comparator import _serie_como_data
+        datas = _serie_como_data(serie)
+    preenchidos = serie.notna() & serie.astype('string').str.strip().fillna('').ne('')
+    return datas, _falha(serie, (preenchidos & datas.isna()).to_numpy(dtype=bool))
+
+
+def _aplicar_esquema(df: pd.DataFrame, esquema: dict) -> tuple[pd.DataFrame, dict]:
+    """
+    Converte as colunas do esquema uma única vez, vetorizado.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: O DataFrame convertido e {coluna: {'quantidade', 'exemplos'}}
+            dos valores que não puderam ser convertidos (viram nulos).
+    """
+    falhas = {}
+    for coluna, dica in esquema.items():
+        if coluna not in df.columns: continue
+        if dica['tipo'] == 'numero':
+            df[coluna], falha = _converter_numero(df[coluna], dica.get('decimal') or '.', dica.get('milhar'))
+        elif dica['tipo'] == 'data':
+            df[coluna], falha = _converter_data(df[coluna], dica.get('formato'))
+        else:
+            falha = None
+            if dica['tipo'] == 'categoria': df[coluna] = df[coluna].astype('category')
+        if falha: falhas[coluna] = falha
+    return df, falhas
+
+
+def _somar_falhas(total: dict, falhas: dict) -> dict:
+    for coluna, falha in falhas.items():
+        acumulado = total.setdefault(coluna, {'quantidade': 0, 'exemplos': []})
+        acumulado['quantidade'] += falha['quantidade']
+        acumulado['exemplos'] = list(dict.fromkeys(acumulado['exemplos'] + falha['exemplos']))[:EXEMPLOS_FALHA]
+    return total
+
+
+def _preparar_bloco(bloco: pd.DataFrame, esquema: dict | None, filtros: list[dict] | None,
+                    filtro_chaves) -> pd.DataFrame:
+    # Cada bloco é convertido antes dos filtros (um filtro numérico enxerga o valor já convertido)
+    falhas = {}
+    if esquema: bloco, falhas = _aplicar_esquema(bloco, esquema)
+    if filtros: bloco = _aplicar_filtros(bloco, filtros)
+    if filtro_chaves is not None: bloco = bloco[filtro_chaves.mascara(bloco)]
+    bloco.attrs['falhas_conversao'] = falhas
+    return bloco
+
+
+def _ler_csv_em_blocos(caminho_arquivo: str, colunas_para_ler: list | None, opcoes_tipos: dict,
+                       filtros: list[dict] | None, tamanho_bloco: int | None, esquema: dict | None = None,
+                       filtro_chaves=None, callback_linhas=None):
+    dtypes = _dtypes_leitura(esquema, eh_csv=True) if esquema else {}
+    blocos = pd.read_csv(caminho_arquivo, usecols=colunas_para_ler, encoding_errors='replace',
+                         chunksize=tamanho_bloco or TAMANHO_BLOCO_PADRAO, dtype=dtypes or None,
+                         **_opcoes_separador(caminho_arquivo), **opcoes_tipos)
+    linhas_lidas = 0
+    with blocos:
+        for bloco in blocos:
+            linhas_lidas += len(bloco)
+            if callback_linhas: callback_linhas(linhas_lidas)
+            yield _preparar_bloco(bloco, esquema, filtros, filtro_chaves)
+
+
+def _valor_celula(valor):
+    """Valor de uma célula como o leitor openpyxl do pandas.read_excel o entrega ao TextParser."""
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _ler_xlsx_em_blocos(caminho_arquivo: str, colunas_para_ler: list | None, opcoes_tipos: dict,
+                        filtros: list[dict] | None, tamanho_bloco: int | None, esquema: dict | None = None,
+                        filtro_chaves=None, callback_linhas=None):
+    """
+    Lê a primeira planilha de um xlsx em blocos, linha a linha (openpyxl em modo read_only),
+    com só as colunas pedidas em memória. Cada bloco passa pelo mesmo TextParser do
+    pandas.read_excel, então os tipos inferidos são os mesmos da leitura inteira (exceto
+    quando só parte dos blocos tem textos numa coluna numérica, como no CSV em blocos).
+
+    Raises:
+        ValueError: Se alguma coluna de 'colunas_para_ler' não existir na planilha.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+    from pandas.io.parsers import TextParser
+
+    dtypes = _dtypes_leitura(esquema, eh_csv=False) if esquema else {}
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO_XLSX
+    # Mesmas opções do pandas.read_excel (data_only: valor calculado das fórmulas)
+    pasta = load_workbook(caminho_arquivo, read_only=True, data_only=True, keep_links=False)
+    try:
+        planilha = pasta.worksheets[0]
+        planilha.reset_dimensions() # A dimensão gravada por alguns programas está errada
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = [_valor_celula(valor) for valor in next(linhas, ())]
+        while cabecalho and cabecalho[-1] == "": cabecalho.pop()
+        if not cabecalho:
+            return
+        # Nomes como o read_excel os dá (colunas sem nome e repetidas: 'Unnamed: 3', 'Valor.1')
+        nomes = list(TextParser([cabecalho], header=0).read().columns)
+        if colunas_para_ler is None:
+            indices = list(range(len(nomes)))
+        else:
+            faltando = [coluna for coluna in colunas_para_ler if coluna not in nomes]
+            if faltando:
+                raise ValueError(f"Colunas não encontradas na planilha: {faltando}")
+            indices = [i for i, nome in enumerate(nomes) if nome in colunas_para_ler]
+        nomes_lidos = [nomes[i] for i in indices]
+        largura = len(nomes)
+
+        def montar_bloco(linhas_bloco: list) -> pd.DataFrame:
+            parser = TextParser(linhas_bloco, names=nomes_lidos, header=None, dtype=dtypes or None,
+                                skip_blank_lines=False, **opcoes_tipos)
+            return _preparar_bloco(parser.read(), esquema, filtros, filtro_chaves)
+
+        bloco, vazias_pendentes, linhas_lidas = [], [], 0
+        for linha in linhas:
+            if len(linha) < largura: linha = linha + (None,) * (largura - len(linha))
+            valores = [_valor_celula(linha[i]) for i in indices]
+            # Erros de fórmula (#DIV/0!) viram nulos, como no read_excel
+            valores = [float('nan') if isinstance(v, str) and v in ERROR_CODES else v for v in valores]
+            if all(valor is None or valor == "" for valor in linha):
+                # Linhas vazias no fim da planilha são descartadas (só entram se vier algo depois)
+                vazias_pendentes.append(valores)
+                continue
+            if vazias_pendentes:
+                bloco.extend(vazias_pendentes); vazias_pendentes = []
+            bloco.append(valores)
+            if len(bloco) >= tamanho_bloco:
+                linhas_lidas += len(bloco)
+                if callback_linhas: callback_linhas(linhas_lidas)
+                yield montar_bloco(bloco)
+                bloco = []
+        if bloco or not linhas_lidas:
+            linhas_lidas += len(bloco)
+            if callback_linhas: callback_linhas(linhas_lidas)
+            yield montar_bloco(bloco) if bloco else _preparar_bloco(pd.DataFrame(columns=nomes_lidos), esquema,
+                                                                   filtros, filtro_chaves)
+    finally:
+        pasta.close()
+
+
+def _aplicar_filtros(df: pd.DataFrame, filtros: list[dict]) -> pd.DataFrame:
+    # Importação tardia: data_comparator é o dono da semântica dos filtros
+    try:
+        from .data_comparator import _aplicar_filtro_df
+    except ImportError:
+        from core.data_comparator import _aplicar_filtro_df
+    for filtro_info in filtros:
+        df = _aplicar_filtro_df(df, filtro_info)
+    return df
+
+
+def _juntar_blocos(blocos, colunas_para_ler: list | None) -> pd.DataFrame:
+    """Concatena os blocos já filtrados, somando as falhas de conversão de cada um."""
+    partes = list(blocos)
+    falhas = {}
+    for parte in partes: _somar_falhas(falhas, parte.attrs.pop('falhas_conversao', {}))
+    if len(partes) > 1:
+        # Um bloco em que a coluna veio toda vazia é inferido como float: sem o ajuste, uma
+        # coluna de texto esparsa viraria object na concatenação, e não texto como na leitura inteira
+        for coluna in partes[0].columns:
+            tipos = {parte[coluna].dtype for parte in partes if parte[coluna].notna().any()}
+            if len(tipos) != 1: continue
+            tipo = tipos.pop()
+            if pd.api.types.is_integer_dtype(tipo) or pd.api.types.is_bool_dtype(tipo): continue
+            for parte in partes:
+                if parte[coluna].dtype != tipo and len(parte) and parte[coluna].isna().all():
+                    parte[coluna] = parte[coluna].astype(tipo)
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=colunas_para_ler)
+    df.attrs['falhas_conversao'] = falhas
+    return df
+
+
+def carregar_dados_excel(caminho_arquivo: str, colunas_para_ler: list = None,
+                         dtype_backend: str | None = None, filtros: list[dict] | None = None,
+                         tamanho_bloco: int | None = None,
+                         esquema_colunas: dict | None = None,
+                         filtro_chaves=None, callback_linhas=None) -> pd.DataFrame | None:
     """
     Carrega dados de um arquivo Excel ou CSV, selecionando colunas específicas.
 
     Args:
         caminho_arquivo (str): O caminho para o arquivo.
         colunas_para_ler (list, optional): Colunas a serem lidas. Defaults to None (ler todas).
+        dtype_backend (str, optional): 'pyarrow' para colunas com tipos Arrow (texto ocupa bem
+            menos memória que objetos Python). Se o pyarrow não estiver instalado, usa os
+            tipos NumPy padrão. Defaults to None.
+        filtros (list[dict], optional): Filtros no formato de _aplicar_filtro_df, aplicados
+            durante a leitura. Em CSV o arquivo é lido em blocos e só as linhas que passam
+            nos filtros ficam em memória. Defaults to None.
+        tamanho_bloco (int, optional): Linhas por bloco na leitura filtrada de CSV e na
+            leitura de xlsx. Defaults to TAMANHO_BLOCO_PADRAO (CSV) e TAMANHO_BLOCO_XLSX.
+        esquema_colunas (dict, optional): Dicas de tipo por coluna, ex:
+            {'Valor': {'tipo': 'numero', 'decimal': ',', 'milhar': '.'}, 'Emissao':
+            {'tipo': 'data', 'formato': '%d/%m/%Y'}, 'Codigo': 'texto', 'UF': 'categoria'}.
+            As colunas são convertidas uma vez, na carga e antes dos filtros; valores que não
+            puderem ser convertidos viram nulos e são contados em
+            df.attrs['falhas_conversao'] ({coluna: {'quantidade', 'exemplos'}}).
+        filtro_chaves (FiltroChaves, optional): Semi-join com as chaves do outro lado (ver
+            core/bloom_filter.py): só as linhas cuja chave pode existir lá são mantidas, depois
+            dos filtros. Em CSV isso é feito bloco a bloco, como os filtros. Defaults to None.
+        callback_linhas (callable, optional): Chamado a cada bloco lido com o total de linhas
+            do arquivo lidas até ali (antes dos filtros), para exibir o progresso da carga.
+            Só nas leituras em blocos (xlsx e CSV filtrado). Defaults to None.
 
     Returns:
         pd.DataFrame | None: Um DataFrame do Pandas ou None em caso de erro.
@@ -17,23 +318,47 @@ def carregar_dados_excel(caminho_arquivo: str, colunas_para_ler: list = None) ->
     # Obter a extensão do arquivo em minúsculas
     _, extensao = os.path.splitext(caminho_arquivo.lower())
 
+    opcoes_tipos = {}
+    if dtype_backend == 'pyarrow' and pyarrow_disponivel():
+        opcoes_tipos['dtype_backend'] = 'pyarrow'
+    esquema = _normalizar_esquema(esquema_colunas)
+    dtypes = _dtypes_leitura(esquema, eh_csv=extensao == '.csv')
+
     try:
-        if extensao in ['.xlsx', '.xls']:
+        if extensao == '.xlsx':
+            # Lida em fluxo: a planilha inteira (todas as colunas, como objetos Python) nunca
+            # fica em memória, só um bloco das colunas pedidas por vez
+            return _juntar_blocos(_ler_xlsx_em_blocos(caminho_arquivo, colunas_para_ler, opcoes_tipos, filtros,
+                                                      tamanho_bloco, esquema, filtro_chaves, callback_linhas),
+                                  colunas_para_ler)
+        elif extensao == '.xls':
             # Para Excel, não precisamos passar sheet_name se quisermos a primeira
-            df = pd.read_excel(caminho_arquivo, usecols=colunas_para_ler)
+            df = pd.read_excel(caminho_arquivo, usecols=colunas_para_ler, dtype=dtypes or None, **opcoes_tipos)
         elif extensao == '.csv':
-            # pd.read_csv é muito rápido. Tenta detectar separador e lida com erros de encoding.
-            df = pd.read_csv(caminho_arquivo, usecols=colunas_para_ler, 
-                             sep=None, # Tenta detectar o separador automaticamente
-                             engine='python', # 'python' é mais lento mas melhor na detecção de sep
-                             encoding_errors='replace') # Lida com erros de encoding
+            if filtros or filtro_chaves is not None:
+                # Lê em blocos e filtra cada um: o arquivo inteiro nunca fica em memória
+                return _juntar_blocos(_ler_csv_em_blocos(caminho_arquivo, colunas_para_ler, opcoes_tipos, filtros,
+                                                         tamanho_bloco, esquema, filtro_chaves, callback_linhas),
+                                      colunas_para_ler)
+            df = pd.read_csv(caminho_arquivo, usecols=colunas_para_ler,
+                             encoding_errors='replace', # Lida com erros de encoding
+                             dtype=dtypes or None,
+                             **_opcoes_separador(caminho_arquivo), **opcoes_tipos)
         else:
             # print(f"Erro: Formato de arquivo não suportado: '{extensao}'")
             return None
 
         # print(f"Arquivo '{os.path.basename(caminho_arquivo)}' lido com sucesso.")
+        df, falhas = _aplicar_esquema(df, esquema)
+        if filtros:
+            df = _aplicar_filtros(df, filtros)
+        if filtro_chaves is not None:
+            df = df[filtro_chaves.mascara(df)]
+        df.attrs['falhas_conversao'] = falhas
         return df
 
+    except MemoryError:
+        raise # Sem memória: quem chamou decide como avisar (ver ConfrontoWorker)
     except FileNotFoundError:
         # print(f"Erro: O arquivo '{caminho_arquivo}' não foi encontrado.")
         return None
@@ -44,6 +369,81 @@ def carregar_dados_excel(caminho_arquivo: str, colunas_para_ler: list = None) ->
         # print(f"Ocorreu um erro inesperado ao ler o arquivo '{caminho_arquivo}': {e}")
         return None
 
+
+def ler_esquema(caminho_arquivo: str, linhas_amostra: int = 100) -> dict | None:
+    """
+    Lê só o cabeçalho e as primeiras linhas do arquivo para descobrir as colunas e seus
+    tipos, sem carregar o arquivo inteiro. Usado para preencher a interface e pelos
+    perfis de trabalho (core/job_profiles.py).
+
+    Args:
+        caminho_arquivo (str): O caminho para o arquivo.
+        linhas_amostra (int, optional): Linhas lidas para inferir os tipos. Defaults to 100.
+
+    Returns:
+        dict | None: {'caminho', 'colunas', 'tipos' (coluna -> dtype), 'tamanho_bytes',
+            'modificado_em' (mtime)} ou None em caso de erro.
+    """
+    _, extensao = os.path.splitext(caminho_arquivo.lower())
+    try:
+        if extensao in ['.xlsx', '.xls']:
+            amostra = pd.read_excel(caminho_arquivo, nrows=linhas_amostra)
+        elif extensao == '.csv':
+            amostra = pd.read_csv(caminho_arquivo, nrows=linhas_amostra, encoding_errors='replace',
+                                  **_opcoes_separador(caminho_arquivo))
+        else:
+            return None
+        informacoes = os.stat(caminho_arquivo)
+        return {
+            'caminho': caminho_arquivo,
+            'colunas': [str(col) for col in amostra.columns],
+            'tipos': {str(col): str(tipo) for col, tipo in amostra.dtypes.items()},
+            'tamanho_bytes': informacoes.st_size,
+            'modificado_em': informacoes.st_mtime,
+        }
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def carregar_dados_em_blocos(caminho_arquivo: str, colunas_para_ler: list = None,
+                             dtype_backend: str | None = None, filtros: list[dict] | None = None,
+                             tamanho_bloco: int | None = None, esquema_colunas: dict | None = None,
+                             callback_linhas=None):
+    """
+    Lê o arquivo em blocos de 'tamanho_bloco' linhas, já filtrados, sem carregá-lo inteiro.
+    Usado pela comparação em fluxo de arquivos ordenados (comparar_blocos_ordenados).
+    Planilhas .xls (formato antigo) são entregues em um único bloco. 'esquema_colunas' e
+    'callback_linhas' como em carregar_dados_excel (as falhas de conversão ficam nos attrs
+    de cada bloco).
+
+    Yields:
+        pd.DataFrame: Os blocos do arquivo, na ordem do arquivo.
+
+    Raises:
+        ValueError: Se o formato do arquivo não for suportado.
+    """
+    _, extensao = os.path.splitext(caminho_arquivo.lower())
+    opcoes_tipos = {'dtype_backend': 'pyarrow'} if dtype_backend == 'pyarrow' and pyarrow_disponivel() else {}
+    esquema = _normalizar_esquema(esquema_colunas)
+    if extensao == '.csv':
+        yield from _ler_csv_em_blocos(caminho_arquivo, colunas_para_ler, opcoes_tipos, filtros, tamanho_bloco, esquema,
+                                      callback_linhas=callback_linhas)
+    elif extensao == '.xlsx':
+        yield from _ler_xlsx_em_blocos(caminho_arquivo, colunas_para_ler, opcoes_tipos, filtros, tamanho_bloco, esquema,
+                                       callback_linhas=callback_linhas)
+    elif extensao == '.xls':
+        df = pd.read_excel(caminho_arquivo, usecols=colunas_para_ler,
+                           dtype=_dtypes_leitura(esquema, eh_csv=False) or None, **opcoes_tipos)
+        df, falhas = _aplicar_esquema(df, esquema)
+        df = _aplicar_filtros(df, filtros) if filtros else df
+        df.attrs['falhas_conversao'] = falhas
+        yield df
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: '{extensao}'")
+
+
 if __name__ == '__main__':
     # Exemplo de como usar a função (para testes rápidos)
     # Crie um arquivo 'exemplo.xlsx' na pasta 'exemplos_excel' para testar
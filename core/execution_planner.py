@@ -0,0 +1,211 @@
+# core/execution_planner.py
+#
+# Estima a memória que um confronto vai precisar antes de carregar os arquivos
+# e escolhe a estratégia de execução dentro de um orçamento de memória:
+#   em_memoria - carrega os arquivos inteiros (caminho padrão)
+#   projetado  - carrega só as colunas usadas (chaves, pares, filtros, dimensões); só com a
+#                opção 'projetar_colunas', pois as demais colunas ficam fora do detalhe
+#   em_blocos  - lê em blocos e junta por intercalação (exige arquivos ordenados pela chave)
+
+import os
+
+import pandas as pd
+
+try:
+    from .excel_parser import _opcoes_separador
+    from .sorted_join import chaves_ordenadas
+except ImportError:
+    from core.excel_parser import _opcoes_separador
+    from core.sorted_join import chaves_ordenadas
+
+LINHAS_AMOSTRA = 2000
+# Pico do caminho em memória em relação aos dados carregados: cópias feitas na
+# comparação, resultado do merge e colunas de diferença calculadas
+FATOR_PICO_MERGE = 3.0
+TAMANHO_BLOCO_PLANO = 250_000
+BLOCO_MINIMO = 10_000
+
+
+def memoria_disponivel_mb() -> float | None:
+    """Memória física disponível no sistema, em MB."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024**2
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for linha in f:
+                if linha.startswith('MemAvailable:'):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def estimar_arquivo(caminho_arquivo: str, linhas_amostra: int = LINHAS_AMOSTRA) -> dict:
+    """
+    Estima linhas e memória de um arquivo lendo só uma amostra do início.
+
+    Em CSV, o número de linhas vem do tamanho do arquivo dividido pelos bytes médios
+    por linha da amostra; em Excel, da dimensão da planilha (sem ler as células).
+
+    Returns:
+        dict: {'caminho', 'tamanho_mb', 'linhas_estimadas', 'bytes_por_linha' (memória,
+            por coluna), 'colunas', 'amostra' (DataFrame)}.
+    """
+    tamanho_bytes = os.path.getsize(caminho_arquivo)
+    _, extensao = os.path.splitext(caminho_arquivo.lower())
+
+    if extensao == '.csv':
+        amostra = pd.read_csv(caminho_arquivo, nrows=linhas_amostra, encoding_errors='replace',
+                              **_opcoes_separador(caminho_arquivo))
+        with open(caminho_arquivo, 'rb') as f:
+            linhas_lidas = [f.readline() for _ in range(len(amostra) + 1)]
+        bytes_texto = sum(len(linha) for linha in linhas_lidas[1:])
+        if len(amostra) < linhas_amostra or not bytes_texto:
+            linhas_estimadas = len(amostra)  # o arquivo inteiro coube na amostra
+        else:
+            linhas_estimadas = int((tamanho_bytes - len(linhas_lidas[0])) / (bytes_texto / len(amostra)))
+    elif extensao in ['.xlsx', '.xls']:
+        amostra = pd.read_excel(caminho_arquivo, nrows=linhas_amostra)
+        linhas_estimadas = len(amostra)
+        if extensao == '.xlsx' and len(amostra) == linhas_amostra:
+            from openpyxl import load_workbook
+            # Em modo somente leitura o openpyxl mantém o arquivo aberto até o close()
+            pasta_trabalho = load_workbook(caminho_arquivo, read_only=True)
+            try:
+                linhas_estimadas = max((pasta_trabalho.worksheets[0].max_row or 1) - 1, len(amostra))
+            finally:
+                pasta_trabalho.close()
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: '{extensao}'")
+
+    memoria_amostra = amostra.memory_usage(deep=True, index=False)
+    bytes_por_linha = (memoria_amostra / max(len(amostra), 1)).to_dict()
+    return {
+        'caminho': caminho_arquivo,
+        'tamanho_mb': tamanho_bytes / 1024**2,
+        'linhas_estimadas': linhas_estimadas,
+        'bytes_por_linha': bytes_por_linha,
+        'colunas': list(amostra.columns),
+        'amostra': amostra,
+    }
+
+
+def _memoria_mb(estimativa: dict, colunas: list[str] | None = None) -> float:
+    """Memória estimada para carregar o arquivo (só 'colunas', se informadas)."""
+    bytes_por_linha = estimativa['bytes_por_linha']
+    colunas = bytes_por_linha.keys() if colunas is None else [c for c in colunas if c in bytes_por_linha]
+    return estimativa['linhas_estimadas'] * sum(bytes_por_linha[c] for c in colunas) / 1024**2
+
+
+def colunas_necessarias(colunas_arquivo: list[str], colunas_chave: list[str], colunas_pares: list[str],
+                        filtro_info: dict | None = None, dimensoes: list[str] | None = None,
+                        coluna_casamento: str | None = None) -> list[str]:
+    """Colunas de um lado usadas pela comparação, na ordem do arquivo."""
+    usadas = set(colunas_chave) | set(colunas_pares)
+    if filtro_info: usadas.add(filtro_info['coluna'])
+    if coluna_casamento: usadas.add(coluna_casamento)
+    usadas |= {dimensao.partition(':')[0] for dimensao in dimensoes or []}
+    return [c for c in colunas_arquivo if c in usadas]
+
+
+def planejar_execucao(config: dict, orcamento_mb: float | None = None) -> dict:
+    """
+    Escolhe a estratégia de execução de um confronto dentro do orçamento de memória.
+
+    Args:
+        config (dict): A configuração do ConfrontoWorker (caminhos, chaves, pares, filtros...).
+        orcamento_mb (float, optional): Memória máxima em MB. Defaults to None
+            (toda a memória disponível no momento).
+
+    Returns:
+        dict: {'estrategia', 'orcamento_mb', 'memoria_estimada_mb', 'colunas_a', 'colunas_b'
+            (None = todas), 'colunas_omitidas' ({'A': [...], 'B': [...]}, as colunas dos
+            arquivos que não serão carregadas), 'tamanho_bloco', 'motivo', 'arquivos'}.
+
+    Sem config['projetar_colunas'] todas as colunas são carregadas: acima do orçamento, os
+    arquivos são lidos em blocos se estiverem ordenados, senão inteiros, com um aviso.
+    """
+    if not orcamento_mb:
+        disponivel = memoria_disponivel_mb()
+        orcamento_mb = disponivel if disponivel else float('inf')
+
+    estimativa_a = estimar_arquivo(config['caminho_a'])
+    estimativa_b = estimar_arquivo(config['caminho_b'])
+    plano = {'orcamento_mb': orcamento_mb, 'colunas_a': None, 'colunas_b': None, 'tamanho_bloco': None,
+             'colunas_omitidas': {'A': [], 'B': []},
+             'arquivos': [{k: v for k, v in e.items() if k not in ['amostra', 'bytes_por_linha']}
+                          for e in [estimativa_a, estimativa_b]]}
+
+    pico_completo = (_memoria_mb(estimativa_a) + _memoria_mb(estimativa_b)) * FATOR_PICO_MERGE
+    if pico_completo <= orcamento_mb:
+        plano.update(estrategia='em_memoria', memoria_estimada_mb=pico_completo,
+                     motivo="Os arquivos cabem inteiros no orçamento.")
+        return plano
+
+    casamento = config.get('casamento_aproximado') or {}
+    dimensoes = config.get('dimensoes_agrupamento')
+    pares = config['pares_mapeados']
+    pico_projetado = pico_completo
+    # No modo cruzamento (sem pares) todas as colunas vão para o resultado: não há o que projetar
+    if pares and config.get('projetar_colunas'):
+        plano['colunas_a'] = colunas_necessarias(estimativa_a['colunas'], config['colunas_chave_a'],
+                                                 [p[0] for p in pares], config.get('filtro_a'), dimensoes,
+                                                 casamento.get('coluna_a'))
+        plano['colunas_b'] = colunas_necessarias(estimativa_b['colunas'], config['colunas_chave_b'],
+                                                 [p[1] for p in pares], config.get('filtro_b'), dimensoes,
+                                                 casamento.get('coluna_b'))
+        plano['colunas_omitidas'] = {
+            'A': [c for c in estimativa_a['colunas'] if c not in plano['colunas_a']],
+            'B': [c for c in estimativa_b['colunas'] if c not in plano['colunas_b']],
+        }
+        pico_projetado = (_memoria_mb(estimativa_a, plano['colunas_a'])
+                          + _memoria_mb(estimativa_b, plano['colunas_b'])) * FATOR_PICO_MERGE
+        if pico_projetado <= orcamento_mb:
+            plano.update(estrategia='projetado', memoria_estimada_mb=pico_projetado,
+                         motivo=f"Arquivos inteiros precisariam de ~{pico_completo:,.0f} MB; "
+                                f"carregando só as colunas usadas.")
+            return plano
+
+    # Em blocos só é possível com as chaves ordenadas; a amostra é só o início do arquivo, então a
+    # ordem é conferida de novo durante a leitura e, fora de ordem, os arquivos são lidos inteiros
+    amostras_ordenadas = (chaves_ordenadas(estimativa_a['amostra'], config['colunas_chave_a'])
+                          and chaves_ordenadas(estimativa_b['amostra'], config['colunas_chave_b']))
+    if amostras_ordenadas and not casamento:
+        # Bloco do tamanho que cabe no orçamento (um bloco de cada lado em memória por vez)
+        mb_por_linha = pico_projetado / max(estimativa_a['linhas_estimadas'] + estimativa_b['linhas_estimadas'], 1)
+        tamanho_bloco = int(min(max(orcamento_mb / (2 * mb_por_linha), BLOCO_MINIMO), TAMANHO_BLOCO_PLANO))
+        plano.update(estrategia='em_blocos', tamanho_bloco=tamanho_bloco,
+                     memoria_estimada_mb=2 * tamanho_bloco * mb_por_linha,
+                     motivo=f"{'Mesmo projetado' if plano['colunas_a'] is not None else 'Em memória'} seriam "
+                            f"~{pico_projetado:,.0f} MB; os arquivos parecem ordenados "
+                            f"pela chave, então serão lidos em blocos de {tamanho_bloco:,} linhas.")
+    elif config.get('projetar_colunas') and pares:
+        plano.update(estrategia='projetado', memoria_estimada_mb=pico_projetado,
+                     motivo=f"ATENÇÃO: ~{pico_projetado:,.0f} MB estimados, acima do orçamento, e os arquivos "
+                            f"não estão ordenados pela chave (necessário para ler em blocos). "
+                            f"Ordene os arquivos pela chave ou aumente o orçamento.")
+    else:
+        plano.update(estrategia='em_memoria', memoria_estimada_mb=pico_completo,
+                     motivo=f"ATENÇÃO: ~{pico_completo:,.0f} MB estimados, acima do orçamento, e os arquivos "
+                            f"não estão ordenados pela chave (necessário para ler em blocos). Ordene os "
+                            f"arquivos pela chave, aumente o orçamento ou marque \"Só as colunas usadas\".")
+    return plano
+
+
+def formatar_plano(plano: dict) -> str:
+    """Descrição do plano para o console."""
+    nomes = {'em_memoria': "em memória", 'projetado': "projetado (só colunas usadas)", 'em_blocos': "em blocos"}
+    linhas = [f"[Plano] Estratégia: {nomes[plano['estrategia']]} | memória estimada "
+              f"~{plano['memoria_estimada_mb']:,.0f} MB | orçamento {plano['orcamento_mb']:,.0f} MB"]
+    for lado, arquivo in zip("AB", plano['arquivos']):
+        linhas.append(f"[Plano] Arquivo {lado}: {arquivo['tamanho_mb']:,.1f} MB em disco, "
+                      f"~{arquivo['linhas_estimadas']:,} linhas, {len(arquivo['colunas'])} colunas")
+    linhas.append(f"[Plano] {plano['motivo']}")
+    for lado, colunas in plano['colunas_omitidas'].items():
+        if colunas:
+            linhas.append(f"[Plano] ATENÇÃO: colunas do Arquivo {lado} fora do relatório (não carregadas): "
+                          + ", ".join(colunas))
+    return "\n".join(linhas)
@@ -0,0 +1,221 @@
+# core/fuzzy_matcher.py
+
+import numpy as np
+import pandas as pd
+
+# Valores padrão da etapa de casamento aproximado (podem ser sobrescritos pela configuração)
+CONFIG_PADRAO_CASAMENTO = {
+    'limiar': 0.8,            # Similaridade mínima (0 a 1) para aceitar um par de textos
+    'limiar_ngrama': 0.3,     # Similaridade mínima de n-gramas para um candidato ser verificado
+    'tamanho_ngrama': 3,      # Tamanho dos n-gramas usados no índice invertido
+    'tamanho_prefixo': 1,     # Caracteres iniciais usados no bloqueio (0 desativa o bloqueio)
+    'max_candidatos': 10,     # Candidatos verificados por registro de A
+    'max_postagens': 1000,    # N-gramas mais frequentes que isso são ignorados (muito comuns)
+    'tolerancia_chave': None, # Janela para chaves numéricas ou de data (número ou dias)
+    'restricoes': [],         # Lista de (coluna_a, coluna_b, tolerancia) que o par também deve respeitar
+}
+
+
+def normalizar_texto_chave(serie: pd.Series) -> pd.Series:
+    """
+    Normaliza uma série de textos para comparação aproximada (vetorizado).
+
+    Remove acentos, converte para minúsculas e troca pontuação por espaços,
+    de forma que 'Teclado Mecânico' e 'teclado mecanico.' fiquem iguais.
+    """
+    return (serie.astype(str)
+            .str.normalize('NFKD')
+            .str.encode('ascii', errors='ignore')
+            .str.decode('ascii')
+            .str.lower()
+            .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+            .str.strip())
+
+
+def _ngramas(texto: str, n: int) -> set:
+    """Retorna o conjunto de n-gramas de um texto, com espaços nas bordas."""
+    texto_borda = f" {texto} "
+    if len(texto_borda) <= n:
+        return {texto_borda}
+    return {texto_borda[i:i + n] for i in range(len(texto_borda) - n + 1)}
+
+
+def _similaridade_texto(texto_a: str, texto_b: str) -> float:
+    """Similaridade de edição entre dois textos já normalizados (0 a 1)."""
+    from difflib import SequenceMatcher
+    return SequenceMatcher(None, texto_a, texto_b).ratio()
+
+
+def _construir_indice(textos_b: list[str], n: int, tamanho_prefixo: int) -> dict:
+    """
+    Constrói um índice invertido de n-gramas por bloco (prefixo do texto).
+
+    Returns:
+        dict: {bloco: {ngrama: np.ndarray de posições em B}}
+    """
+    indice_por_bloco = {}
+    for pos_b, texto_b in enumerate(textos_b):
+        if not texto_b:
+            continue
+        bloco = texto_b[:tamanho_prefixo]
+        indice = indice_por_bloco.setdefault(bloco, {})
+        for grama in _ngramas(texto_b, n):
+            indice.setdefault(grama, []).append(pos_b)
+    for indice in indice_por_bloco.values():
+        for grama, posicoes in indice.items():
+            indice[grama] = np.asarray(posicoes, dtype=np.int64)
+    return indice_por_bloco
+
+
+def _candidatos_texto(textos_a: list[str], textos_b: list[str], cfg: dict) -> pd.DataFrame:
+    """
+    Gera pares candidatos (pos_a, pos_b, similaridade) para textos, usando
+    bloqueio por prefixo e índice de n-gramas para evitar comparar todos contra todos.
+    """
+    n = cfg['tamanho_ngrama']
+    indice_por_bloco = _construir_indice(textos_b, n, cfg['tamanho_prefixo'])
+    qtd_gramas_b = np.array([len(_ngramas(t, n)) if t else 0 for t in textos_b], dtype=np.int64)
+
+    # Textos idênticos após a normalização casam direto, sem passar pelo índice
+    primeira_pos_b = {}
+    for pos_b, texto_b in enumerate(textos_b):
+        if texto_b:
+            primeira_pos_b.setdefault(texto_b, pos_b)
+
+    lista_pos_a, lista_pos_b, lista_sim = [], [], []
+    for pos_a, texto_a in enumerate(textos_a):
+        if not texto_a:
+            continue
+        if texto_a in primeira_pos_b:
+            lista_pos_a.append(pos_a); lista_pos_b.append(primeira_pos_b[texto_a]); lista_sim.append(1.0)
+            continue
+        indice = indice_por_bloco.get(texto_a[:cfg['tamanho_prefixo']])
+        if not indice:
+            continue
+        gramas_a = _ngramas(texto_a, n)
+        postagens = [indice[g] for g in gramas_a if g in indice and len(indice[g]) <= cfg['max_postagens']]
+        if not postagens:
+            continue
+
+        # Contagem de n-gramas em comum e filtro Dice (vetorizado)
+        ids_b, em_comum = np.unique(np.concatenate(postagens), return_counts=True)
+        dice = 2.0 * em_comum / (len(gramas_a) + qtd_gramas_b[ids_b])
+        selecao = dice >= cfg['limiar_ngrama']
+        ids_b, dice = ids_b[selecao], dice[selecao]
+        if len(ids_b) > cfg['max_candidatos']:
+            melhores = np.argpartition(-dice, cfg['max_candidatos'] - 1)[:cfg['max_candidatos']]
+            ids_b = ids_b[melhores]
+
+        # Verificação final apenas nos poucos candidatos restantes
+        for pos_b in ids_b:
+            similaridade = _similaridade_texto(texto_a, textos_b[pos_b])
+            if similaridade >= cfg['limiar']:
+                lista_pos_a.append(pos_a); lista_pos_b.append(int(pos_b)); lista_sim.append(similaridade)
+
+    return pd.DataFrame({'pos_a': lista_pos_a, 'pos_b': lista_pos_b, 'similaridade': lista_sim})
+
+
+def _candidatos_tolerancia(serie_a: pd.Series, serie_b: pd.Series, tolerancia) -> pd.DataFrame:
+    """
+    Gera pares (pos_a, pos_b, similaridade) para chaves numéricas ou de data,
+    com os valores de B mais próximos (abaixo e acima) dentro da janela.
+    """
+    eh_data = pd.api.types.is_datetime64_any_dtype(serie_a) or pd.api.types.is_datetime64_any_dtype(serie_b)
+    if eh_data:
+        valores_a, valores_b = pd.to_datetime(serie_a, errors='coerce'), pd.to_datetime(serie_b, errors='coerce')
+        tolerancia = pd.Timedelta(days=float(tolerancia))
+    else:
+        valores_a = pd.to_numeric(serie_a, errors='coerce').astype('float64')
+        valores_b = pd.to_numeric(serie_b, errors='coerce').astype('float64')
+        tolerancia = float(tolerancia)
+
+    df_a = pd.DataFrame({'valor': valores_a.to_numpy(), 'pos_a': np.arange(len(serie_a))}).dropna().sort_values('valor')
+    df_b = pd.DataFrame({'valor': valores_b.to_numpy(), 'pos_b': np.arange(len(serie_b))}).dropna().sort_values('valor')
+    df_b['valor_b'] = df_b['valor']
+    if df_a.empty or df_b.empty:
+        return pd.DataFrame({'pos_a': [], 'pos_b': [], 'similaridade': []})
+
+    # Vizinho imediatamente abaixo e acima de cada valor de A: dois candidatos por registro
+    pares = pd.concat([
+        pd.merge_asof(df_a, df_b, on='valor', direction=direcao, tolerance=tolerancia)
+        for direcao in ('backward', 'forward')
+    ]).dropna(subset=['pos_b']).drop_duplicates(subset=['pos_a', 'pos_b'])
+    distancia = (pares['valor'] - pares['valor_b']).abs()
+    if eh_data:
+        distancia, tolerancia = distancia.dt.total_seconds(), tolerancia.total_seconds()
+    similaridade = 1.0 - (distancia / tolerancia) if tolerancia else pd.Series(1.0, index=pares.index)
+    return pd.DataFrame({'pos_a': pares['pos_a'].astype(np.int64),
+                         'pos_b': pares['pos_b'].astype(np.int64),
+                         'similaridade': similaridade.astype(float)})
+
+
+def _aplicar_restricoes(candidatos: pd.DataFrame, df_a: pd.DataFrame, df_b: pd.DataFrame, restricoes: list) -> pd.DataFrame:
+    """Descarta candidatos cujos valores não respeitam as janelas de tolerância informadas."""
+    for coluna_a, coluna_b, tolerancia in restricoes:
+        if coluna_a not in df_a.columns or coluna_b not in df_b.columns or candidatos.empty:
+            continue
+        serie_a = df_a[coluna_a].iloc[candidatos['pos_a'].to_numpy()].reset_index(drop=True)
+        serie_b = df_b[coluna_b].iloc[candidatos['pos_b'].to_numpy()].reset_index(drop=True)
+        if pd.api.types.is_datetime64_any_dtype(serie_a) or pd.api.types.is_datetime64_any_dtype(serie_b):
+            distancia = (pd.to_datetime(serie_a, errors='coerce') - pd.to_datetime(serie_b, errors='coerce')).abs().dt.days
+        else:
+            distancia = (pd.to_numeric(serie_a, errors='coerce') - pd.to_numeric(serie_b, errors='coerce')).abs()
+        candidatos = candidatos[(distancia <= float(tolerancia)).fillna(False).to_numpy()]
+    return candidatos
+
+
+def _selecionar_um_para_um(candidatos: pd.DataFrame) -> pd.DataFrame:
+    """Escolhe pares sem repetição de A ou B, priorizando as maiores similaridades."""
+    if candidatos.empty:
+        return candidatos
+    ordenados = candidatos.sort_values('similaridade', ascending=False, kind='stable')
+    usados_a, usados_b, escolhidos = set(), set(), []
+    for pos_a, pos_b, similaridade in ordenados.itertuples(index=False):
+        if pos_a in usados_a or pos_b in usados_b:
+            continue
+        usados_a.add(pos_a); usados_b.add(pos_b)
+        escolhidos.append((pos_a, pos_b, similaridade))
+    return pd.DataFrame(escolhidos, columns=['pos_a', 'pos_b', 'similaridade'])
+
+
+def casar_registros_aproximados(df_a: pd.DataFrame, df_b: pd.DataFrame,
+                                coluna_a: str, coluna_b: str,
+                                config: dict | None = None) -> pd.DataFrame:
+    """
+    Casa registros de A e B que não casaram de forma exata, por similaridade de texto
+    ou por proximidade de valores numéricos/datas.
+
+    Args:
+        df_a (pd.DataFrame): Registros de A sem par exato.
+        df_b (pd.DataFrame): Registros de B sem par exato.
+        coluna_a (str): Coluna de A usada no casamento.
+        coluna_b (str): Coluna de B usada no casamento.
+        config (dict, optional): Sobrescreve CONFIG_PADRAO_CASAMENTO.
+
+    Returns:
+        pd.DataFrame: Colunas 'pos_a', 'pos_b' (posições em df_a/df_b) e 'similaridade',
+                      com no máximo um par por registro de cada lado.
+    """
+    cfg = {**CONFIG_PADRAO_CASAMENTO, **(config or {})}
+    if df_a.empty or df_b.empty:
+        return pd.DataFrame({'pos_a': [], 'pos_b': [], 'similaridade': []})
+
+    serie_a, serie_b = df_a[coluna_a], df_b[coluna_b]
+    if cfg['tolerancia_chave'] is not None:
+        candidatos = _candidatos_tolerancia(serie_a, serie_b, cfg['tolerancia_chave'])
+    else:
+        textos_a = normalizar_texto_chave(serie_a.fillna('')).tolist()
+        textos_b = normalizar_texto_chave(serie_b.fillna('')).tolist()
+        candidatos = _candidatos_texto(textos_a, textos_b, cfg)
+
+    candidatos = _aplicar_restricoes(candidatos, df_a, df_b, cfg['restricoes'])
+    return _selecionar_um_para_um(candidatos)
+
+
+if __name__ == '__main__':
+    # Teste rápido com os nomes usados em testes/criar_arquivos_testes.py
+    df_vendas = pd.DataFrame({'Nome_Produto': ['Teclado Mecânico', 'Mouse Gamer RGB', 'Monitor 24"', 'Webcam 4K'],
+                              'Valor_Venda': [350.50, 180.00, 950.99, 620.00]})
+    df_estoque = pd.DataFrame({'Produto_Estoque': ['Teclado Mec.', 'Monitor 24 Pol', 'SSD 1TB', 'Mouse RGB'],
+                               'Preco_Custo': [280.00, 899.00, 480.00, 150.50]})
+    print(casar_registros_aproximados(df_vendas, df_estoque, 'Nome_Produto', 'Produto_Estoque', {'limiar': 0.7}))
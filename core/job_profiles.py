@@ -0,0 +1,140 @@
+# core/job_profiles.py
+#
+# Perfis de trabalho: a configuração completa de um confronto (arquivos, chaves, pares,
+# filtros e opções) e o esquema em cache de cada arquivo, salvos em JSON. Carregar um
+# perfil restaura a interface sem ler os arquivos; a conferência com os arquivos reais
+# só acontece quando o confronto começa (validar_perfil).
+#
+# Só usa a biblioteca padrão: a janela carrega perfis antes de pandas estar importado.
+
+import json
+import os
+from datetime import datetime
+
+VERSAO_PERFIL = 1
+
+
+def salvar_perfil(caminho_json: str, config: dict, esquemas: dict) -> bool:
+    """
+    Salva a configuração do confronto e os esquemas dos arquivos em um JSON.
+
+    Args:
+        caminho_json (str): Onde salvar o perfil.
+        config (dict): A configuração do ConfrontoWorker.
+        esquemas (dict): {'A': esquema, 'B': esquema}, no formato de ler_esquema.
+
+    Returns:
+        bool: True se o perfil foi salvo.
+    """
+    perfil = {
+        'versao': VERSAO_PERFIL,
+        'salvo_em': datetime.now().isoformat(timespec='seconds'),
+        'config': config,
+        'esquemas': esquemas,
+    }
+    try:
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(perfil, f, ensure_ascii=False, indent=2)
+        return True
+    except (OSError, TypeError, ValueError):
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def carregar_perfil(caminho_json: str) -> dict | None:
+    """
+    Lê um perfil salvo por salvar_perfil, sem abrir os arquivos de dados.
+
+    Returns:
+        dict | None: {'versao', 'salvo_em', 'config', 'esquemas'} ou None se o arquivo
+            não for um perfil válido. Os pares voltam como tuplas, como na interface.
+    """
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            perfil = json.load(f)
+        if not isinstance(perfil, dict) or 'config' not in perfil or 'esquemas' not in perfil:
+            return None
+        if perfil.get('versao', 0) > VERSAO_PERFIL:
+            print(f"Aviso JobProfiles: perfil da versão {perfil['versao']}, mais nova que a suportada.")
+        config = perfil['config']
+        config['pares_mapeados'] = [tuple(par) for par in config.get('pares_mapeados') or []]
+        return perfil
+    except (OSError, ValueError):
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def colunas_usadas(config: dict, lado: str) -> list[str]:
+    """Colunas do arquivo de um lado ('A' ou 'B') que a configuração referencia."""
+    sufixo, indice_par = ('a', 0) if lado == 'A' else ('b', 1)
+    usadas = list(config.get(f'colunas_chave_{sufixo}') or [])
+    usadas += [par[indice_par] for par in config.get('pares_mapeados') or []]
+    filtro_info = config.get(f'filtro_{sufixo}')
+    if filtro_info: usadas.append(filtro_info['coluna'])
+    casamento = config.get('casamento_aproximado') or {}
+    if casamento.get(f'coluna_{sufixo}'): usadas.append(casamento[f'coluna_{sufixo}'])
+    usadas += [dimensao.partition(':')[0] for dimensao in config.get('dimensoes_agrupamento') or []]
+    return list(dict.fromkeys(usadas))
+
+
+def validar_perfil(config: dict, esquemas: dict | None, leitor_esquema=None) -> tuple[list[str], list[str]]:
+    """
+    Confere a configuração com os arquivos atuais, lendo só o cabeçalho de cada um.
+
+    Args:
+        config (dict): A configuração do confronto.
+        esquemas (dict, optional): Os esquemas em cache ({'A': ..., 'B': ...}), usados
+            para avisar se o arquivo mudou desde que o perfil foi salvo.
+        leitor_esquema (callable, optional): Substitui ler_esquema (ex: o do cache do
+            serviço, core/service.py). Defaults to None.
+
+    Returns:
+        tuple[list[str], list[str]]: (erros, avisos). Com erros o confronto não deve começar:
+            arquivo inexistente ou colunas da configuração ausentes. Os avisos apontam
+            arquivos alterados, colunas com outro tipo e dimensões sem coluna.
+    """
+    try:
+        from .excel_parser import ler_esquema
+    except ImportError:
+        from core.excel_parser import ler_esquema
+    ler_esquema = leitor_esquema or ler_esquema
+
+    erros, avisos = [], []
+    colunas_atuais = set()
+    # Colunas usadas por dimensões podem existir em um só dos lados (conferidas no fim)
+    colunas_dimensoes = {dimensao.partition(':')[0] for dimensao in config.get('dimensoes_agrupamento') or []}
+    for lado in ['A', 'B']:
+        caminho = config.get(f'caminho_{lado.lower()}')
+        if not caminho or not os.path.exists(caminho):
+            erros.append(f"Arquivo {lado} não encontrado: {caminho}")
+            continue
+        esquema_atual = ler_esquema(caminho)
+        if esquema_atual is None:
+            erros.append(f"Não foi possível ler o cabeçalho do Arquivo {lado}: {caminho}")
+            continue
+        colunas_atuais.update(esquema_atual['colunas'])
+
+        faltantes = [c for c in colunas_usadas(config, lado)
+                     if c not in esquema_atual['colunas'] and c not in colunas_dimensoes]
+        if faltantes:
+            erros.append(f"Arquivo {lado} não tem as colunas: {', '.join(faltantes)}")
+
+        esquema_salvo = (esquemas or {}).get(lado)
+        if not esquema_salvo:
+            continue
+        if (esquema_salvo.get('tamanho_bytes') != esquema_atual['tamanho_bytes']
+                or esquema_salvo.get('modificado_em') != esquema_atual['modificado_em']):
+            avisos.append(f"Arquivo {lado} foi alterado desde que suas colunas foram lidas.")
+        tipos_salvos = esquema_salvo.get('tipos') or {}
+        tipos_alterados = [c for c in colunas_usadas(config, lado)
+                           if c in tipos_salvos and c in esquema_atual['tipos']
+                           and tipos_salvos[c] != esquema_atual['tipos'][c]]
+        if tipos_alterados:
+            avisos.append(f"Arquivo {lado}: colunas com tipo diferente do perfil: {', '.join(tipos_alterados)}")
+
+    dimensoes_ausentes = sorted(colunas_dimensoes - colunas_atuais)
+    if dimensoes_ausentes and not erros:
+        avisos.append(f"Dimensões sem coluna em nenhum dos arquivos (serão ignoradas): {', '.join(dimensoes_ausentes)}")
+    return erros, avisos
@@ -0,0 +1,230 @@
+# core/multi_compare.py
+#
+# Confronto de N lados (ex: pedidos x faturamento x extrato bancário) em uma única passada.
+# Em vez de um merge por par de arquivos, as chaves de todos os lados recebem um número
+# em um índice de chaves compartilhado (a mesma chave tem o mesmo número em todos os
+# lados) e cada lado é juntado uma vez a esse índice. Daí saem a matriz de presença (em
+# quais sistemas cada chave existe) e as diferenças de cada par de lados, linha a linha.
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .data_comparator import (_como_numero, _diferenca_percentual, _escalar_para_inteiros, _total_exato,
+                                  _totais_para_float)
+    from .performance_monitor import etapa_monitorada
+except ImportError:
+    from core.data_comparator import (_como_numero, _diferenca_percentual, _escalar_para_inteiros, _total_exato,
+                                      _totais_para_float)
+    from core.performance_monitor import etapa_monitorada
+
+TIPOS_JOIN_N_LADOS = ['outer', 'inner', 'left']
+_ID_CHAVE = '_id_chave'
+
+
+def _indice_chaves(lados: dict[str, pd.DataFrame], colunas_chave: dict[str, list[str]],
+                   nomes_chave: list[str]) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+    """
+    Índice de chaves compartilhado: numera as chaves distintas de todos os lados juntos, na
+    ordem em que aparecem (primeiro lado, depois as novas do segundo...). Chaves nulas casam
+    entre si, como no pd.merge.
+
+    Returns:
+        tuple[pd.DataFrame, dict[str, np.ndarray]]: Os valores de cada chave (a linha i é a
+            chave de número i) e o número da chave de cada linha de cada lado.
+    """
+    chaves = pd.concat([df[colunas_chave[lado]].set_axis(nomes_chave, axis=1) for lado, df in lados.items()],
+                       ignore_index=True)
+    ids = chaves.groupby(nomes_chave, dropna=False, sort=False).ngroup().to_numpy(dtype=np.int64)
+    # Primeira ocorrência de cada número, que já vem na ordem 0, 1, 2...
+    primeiras = pd.Series(ids).drop_duplicates().index
+    tabela_chaves = chaves.take(primeiras).reset_index(drop=True)
+    ids_por_lado, inicio = {}, 0
+    for lado, df in lados.items():
+        ids_por_lado[lado] = ids[inicio:inicio + len(df)]
+        inicio += len(df)
+    return tabela_chaves, ids_por_lado
+
+
+def _resumo_presenca(presenca: np.ndarray, nomes_lados: list[str]) -> pd.DataFrame:
+    """Quantidade de chaves por combinação de lados em que aparecem, da mais comum para a menos."""
+    codigos = (presenca * (1 << np.arange(presenca.shape[1]))).sum(axis=1)
+    contagens = np.bincount(codigos, minlength=1 << presenca.shape[1])
+    linhas = []
+    for codigo in np.flatnonzero(contagens):
+        linha = {lado: bool(codigo >> indice & 1) for indice, lado in enumerate(nomes_lados)}
+        linha['Presente em'] = " + ".join(lado for lado in nomes_lados if linha[lado])
+        linha['Chaves'] = int(contagens[codigo])
+        linhas.append(linha)
+    resumo = pd.DataFrame(linhas, columns=nomes_lados + ['Presente em', 'Chaves'])
+    resumo['% das Chaves'] = resumo['Chaves'] / max(len(presenca), 1) * 100
+    return resumo.sort_values('Chaves', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def comparar_n_lados(lados: dict[str, pd.DataFrame],
+                     colunas_chave: dict[str, list[str]],
+                     grupos_valores: dict[str, dict[str, str]],
+                     tipo_join: str = 'outer',
+                     monitor=None,
+                     apenas_divergencias: bool = True,
+                     tolerancia_divergencia: float = 0.0,
+                     casas_decimais: int | None = None) -> dict | None:
+    """
+    Confronta três ou mais lados de uma vez, pela chave, com cada DataFrame lido e juntado
+    uma única vez.
+
+    Args:
+        lados (dict): {nome do lado: DataFrame}, na ordem do relatório (ex: {'Pedidos': df_p,
+            'Faturamento': df_f, 'Banco': df_b}). Os nomes viram sufixos das colunas.
+        colunas_chave (dict): {nome do lado: colunas chave}, com o mesmo número de colunas em
+            todos os lados. No resultado, as chaves têm os nomes das do primeiro lado.
+        grupos_valores (dict): {nome do valor: {nome do lado: coluna}}, ex: {'Valor':
+            {'Pedidos': 'Vl_Pedido', 'Faturamento': 'Vl_NF', 'Banco': 'Credito'}}. Cada
+            valor é comparado entre todos os pares de lados em que aparece.
+        tipo_join (str): 'outer' (chaves de qualquer lado), 'inner' (só chaves presentes em
+            todos os lados) ou 'left' (chaves do primeiro lado). Defaults to 'outer'.
+        monitor (MonitorDesempenho, optional): Mede as etapas, como em comparar_dataframes.
+        apenas_divergencias (bool): Mantém no detalhe só as linhas com a chave ausente de algum
+            lado ou com diferença acima de 'tolerancia_divergencia' em algum par; as demais
+            entram só nas contagens e totais conciliados do resumo. Defaults to True.
+        tolerancia_divergencia (float): Como em comparar_dataframes. Defaults to 0.0.
+        casas_decimais (int, optional): Modo monetário exato, como em comparar_dataframes.
+
+    Returns:
+        dict | None: Como comparar_dataframes ('resumo_por_par' com um item por valor e par de
+            lados, ex: 'Valor: Pedidos vs Banco'; 'dataframe_merged' com as chaves, as colunas
+            'Presente_<lado>', as colunas de cada lado com o sufixo '_<lado>' e as diferenças
+            por linha de cada par), mais 'matriz_presenca' (uma linha por chave, com as chaves,
+            uma coluna por lado com o número de linhas da chave nele e 'Lados'),
+            'resumo_presenca' (chaves por combinação de lados) e 'lados'. None em caso de erro.
+
+    Duplicatas de uma chave em mais de um lado geram todas as combinações de linhas, como
+    merges encadeados.
+    """
+    try:
+        nomes_lados = list(lados)
+        if len(nomes_lados) < 2:
+            raise ValueError("Informe pelo menos dois lados.")
+        if tipo_join not in TIPOS_JOIN_N_LADOS:
+            raise ValueError(f"Tipo de join '{tipo_join}' inválido (use {', '.join(TIPOS_JOIN_N_LADOS)}).")
+        nomes_chave = list(colunas_chave[nomes_lados[0]])
+        if any(len(colunas_chave[lado]) != len(nomes_chave) for lado in nomes_lados):
+            raise ValueError("Todos os lados precisam do mesmo número de colunas chave.")
+
+        total_linhas = sum(len(df) for df in lados.values())
+        with etapa_monitorada(monitor, f"Índice de chaves ({len(nomes_lados)} lados)", total_linhas) as registro:
+            tabela_chaves, ids_por_lado = _indice_chaves(lados, colunas_chave, nomes_chave)
+            contagens = np.column_stack([np.bincount(ids_por_lado[lado], minlength=len(tabela_chaves))
+                                         for lado in nomes_lados])
+            presenca = contagens > 0
+            if tipo_join == 'inner': selecionadas = presenca.all(axis=1)
+            elif tipo_join == 'left': selecionadas = presenca[:, 0]
+            else: selecionadas = np.ones(len(tabela_chaves), dtype=bool)
+            registro['linhas_saida'] = int(selecionadas.sum())
+
+        matriz_presenca = tabela_chaves[selecionadas].reset_index(drop=True)
+        for indice, lado in enumerate(nomes_lados):
+            matriz_presenca[lado] = contagens[selecionadas, indice]
+        matriz_presenca['Lados'] = presenca[selecionadas].sum(axis=1)
+        resumo_presenca = _resumo_presenca(presenca[selecionadas], nomes_lados)
+
+        with etapa_monitorada(monitor, "Merge (join) dos lados", total_linhas) as registro:
+            # Cada lado é juntado ao índice pelo número da chave (inteiro), um de cada vez
+            df_merged = tabela_chaves[selecionadas].copy()
+            df_merged.insert(0, _ID_CHAVE, np.flatnonzero(selecionadas))
+            colunas_por_lado = {}
+            for lado in nomes_lados:
+                df_lado = lados[lado].drop(columns=colunas_chave[lado])
+                colunas_por_lado[lado] = {coluna: f"{coluna}_{lado}" for coluna in df_lado.columns}
+                df_lado = df_lado.rename(columns=colunas_por_lado[lado])
+                df_lado.insert(0, _ID_CHAVE, ids_por_lado[lado])
+                df_lado = df_lado[selecionadas[ids_por_lado[lado]]]
+                df_merged = df_merged.merge(df_lado, on=_ID_CHAVE, how='left', sort=False)
+            ids_linhas = df_merged.pop(_ID_CHAVE).to_numpy()
+            presenca_linhas = presenca[ids_linhas]
+            for indice, lado in enumerate(nomes_lados):
+                df_merged.insert(len(nomes_chave) + indice, f"Presente_{lado}", presenca_linhas[:, indice])
+            registro['linhas_saida'] = len(df_merged)
+
+        resumo_pares, divergente_linha = [], ~presenca_linhas.all(axis=1)
+        with etapa_monitorada(monitor, "Cálculo de diferenças", len(df_merged)) as registro:
+            for nome_valor, colunas_do_valor in grupos_valores.items():
+                lados_do_valor = [lado for lado in nomes_lados if lado in colunas_do_valor]
+                numeros, inteiros = {}, {}
+                for lado in lados_do_valor:
+                    coluna = colunas_por_lado[lado].get(colunas_do_valor[lado])
+                    if coluna is None:
+                        raise KeyError(f"Coluna '{colunas_do_valor[lado]}' não encontrada no lado '{lado}'.")
+                    numeros[lado] = _como_numero(df_merged[coluna]).fillna(0).to_numpy(dtype=float, na_value=np.nan)
+                    inteiros[lado] = (_escalar_para_inteiros(numeros[lado], casas_decimais)
+                                      if casas_decimais is not None else None)
+                    if casas_decimais is not None and inteiros[lado] is None:
+                        print(f"Aviso MultiCompare: '{colunas_do_valor[lado]}' ({lado}) tem valores com mais de "
+                              f"{casas_decimais} casas decimais; totais somados em ponto flutuante (math.fsum).")
+
+                for lado_a, lado_b in combinations(lados_do_valor, 2):
+                    indice_a, indice_b = nomes_lados.index(lado_a), nomes_lados.index(lado_b)
+                    presente_a, presente_b = presenca_linhas[:, indice_a], presenca_linhas[:, indice_b]
+                    # Linhas de chaves que não existem em nenhum dos dois não contam para o par
+                    relevante = presente_a | presente_b
+                    exato = inteiros[lado_a] is not None and inteiros[lado_b] is not None
+                    if exato:
+                        diferenca_unidades = inteiros[lado_a] - inteiros[lado_b]
+                        diferenca = diferenca_unidades / 10**casas_decimais
+                        divergente_valor = np.abs(diferenca_unidades) > round(tolerancia_divergencia * 10**casas_decimais)
+                    else:
+                        diferenca = numeros[lado_a] - numeros[lado_b]
+                        divergente_valor = ~(np.abs(diferenca) <= tolerancia_divergencia)
+                    valores_b = numeros[lado_b]
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        percentual = np.where(valores_b != 0, diferenca / np.where(valores_b != 0, valores_b, 1) * 100,
+                                              np.where(numeros[lado_a] != 0, np.inf * np.sign(numeros[lado_a]), 0))
+                    base_nome = f"{nome_valor}_{lado_a}_vs_{lado_b}"
+                    df_merged[f"{base_nome}_DiffAbs_Linha"] = np.where(relevante, diferenca, np.nan)
+                    df_merged[f"{base_nome}_DiffPerc_Linha(%)"] = np.where(relevante, np.round(percentual, 2), np.nan)
+
+                    total_a = _total_exato(numeros[lado_a], inteiros[lado_a], casas_decimais)
+                    total_b = _total_exato(numeros[lado_b], inteiros[lado_b], casas_decimais)
+                    item = {'par_comparado': f"{nome_valor}: {lado_a} vs {lado_b}",
+                            'total_lado_a': total_a, 'total_lado_b': total_b,
+                            'diferenca_absoluta_total': total_a - total_b,
+                            'diferenca_percentual_total': _diferenca_percentual(total_a, total_b)}
+                    divergente_par = relevante & ((presente_a != presente_b) | divergente_valor)
+                    divergente_linha |= divergente_par
+                    if apenas_divergencias:
+                        conciliado = relevante & ~divergente_par
+                        item['linhas_divergentes'] = int(divergente_par.sum())
+                        item['linhas_conciliadas'] = int(conciliado.sum())
+                        item['total_conciliado_a'] = _total_exato(
+                            numeros[lado_a][conciliado], inteiros[lado_a][conciliado] if exato else None, casas_decimais)
+                        item['total_conciliado_b'] = _total_exato(
+                            numeros[lado_b][conciliado], inteiros[lado_b][conciliado] if exato else None, casas_decimais)
+                    resumo_pares.append(item)
+            registro['linhas_saida'] = len(df_merged)
+
+        total_linhas_merge = len(df_merged)
+        if apenas_divergencias and resumo_pares:
+            with etapa_monitorada(monitor, "Filtro de divergências", total_linhas_merge) as registro:
+                df_merged = df_merged[divergente_linha].reset_index(drop=True)
+                registro['linhas_saida'] = len(df_merged)
+
+        return {
+            'resumo_por_par': _totais_para_float(resumo_pares),
+            'resumo_por_dimensao': {},
+            'dataframe_merged': df_merged,
+            'total_linhas_merge': total_linhas_merge,
+            'matriz_presenca': matriz_presenca,
+            'resumo_presenca': resumo_presenca,
+            'lados': nomes_lados,
+            # Mesmo formato do confronto de dois lados (ex: índices do SQLite em result_sinks)
+            'colunas_chave_a': nomes_chave,
+            'colunas_chave_b': nomes_chave,
+        }
+
+    except MemoryError:
+        raise # Sem memória: quem chamou decide como avisar (ver ConfrontoWorker)
+    except Exception:
+        import traceback; traceback.print_exc()
+        return None
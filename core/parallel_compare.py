@@ -0,0 +1,318 @@
+# core/parallel_compare.py
+#
+# Confronto em memória usando vários núcleos. Os dois lados são particionados pelo hash da
+# chave (o mesmo do semi-join, core/bloom_filter.py) em fatias: linhas com a mesma chave
+# caem na fatia de mesmo número nos dois lados, então cada par de fatias é cruzado sozinho.
+# As fatias são gravadas em arquivos Arrow IPC em memória compartilhada (/dev/shm, quando
+# houver espaço) e os processos do pool as mapeiam sem copiar e sem pickle. Merge,
+# diferenças, somas por dimensão e filtro de divergências de cada fatia rodam no pool
+# (data_comparator._processar_parte); os resumos das fatias são combinados de forma exata
+# e o detalhe é devolvido na mesma ordem de linhas do pd.merge.
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .bloom_filter import hash_chaves, _tipos_compativeis
+    from .data_comparator import (comparar_dataframes, _renomear_colunas_dos_pares, _processar_parte,
+                                  _combinar_resumos, _combinar_somas_dimensoes, _maiores_divergencias,
+                                  MAIORES_DIVERGENCIAS_POR_PAR)
+    from .performance_monitor import etapa_monitorada
+except ImportError:
+    from core.bloom_filter import hash_chaves, _tipos_compativeis
+    from core.data_comparator import (comparar_dataframes, _renomear_colunas_dos_pares, _processar_parte,
+                                      _combinar_resumos, _combinar_somas_dimensoes, _maiores_divergencias,
+                                      MAIORES_DIVERGENCIAS_POR_PAR)
+    from core.performance_monitor import etapa_monitorada
+
+# Abaixo disso (linhas de A + B), iniciar os processos custa mais do que se ganha
+LINHAS_MINIMAS_PARALELO = 200_000
+# Mais fatias que processos: uma fatia com chaves muito repetidas não segura os demais
+FATIAS_POR_PROCESSO = 2
+DIRETORIO_MEMORIA_COMPARTILHADA = '/dev/shm'
+# Posição original de cada linha, para devolver o detalhe na ordem do pd.merge
+_POSICAO_A, _POSICAO_B = '_posicao_a', '_posicao_b'
+_SUFIXOS_DIFERENCA = ('_DiffAbs_Linha', '_DiffPerc_Linha(%)')
+
+
+def processos_automaticos() -> int:
+    """Número de processos quando o usuário escolhe 'Automático' (um por núcleo)."""
+    return os.cpu_count() or 1
+
+
+def _criar_pasta_fatias(bytes_estimados: int) -> str:
+    """Pasta temporária das fatias: em memória compartilhada se couber, senão no temporário do sistema."""
+    if os.path.isdir(DIRETORIO_MEMORIA_COMPARTILHADA):
+        try:
+            if shutil.disk_usage(DIRETORIO_MEMORIA_COMPARTILHADA).free > 2 * bytes_estimados:
+                return tempfile.mkdtemp(prefix='confronto_paralelo_', dir=DIRETORIO_MEMORIA_COMPARTILHADA)
+        except OSError:
+            pass
+    return tempfile.mkdtemp(prefix='confronto_paralelo_')
+
+
+def _gravar_arrow(tabela, caminho: str) -> None:
+    import pyarrow as pa
+    with pa.OSFile(caminho, 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+
+
+def _gravar_fatias(df: pd.DataFrame, fatias: np.ndarray, num_fatias: int, pasta: str, lado: str) -> list[str]:
+    """
+    Grava cada fatia do DataFrame em um arquivo Arrow IPC, mantendo a ordem original das
+    linhas dentro da fatia.
+
+    Raises:
+        pyarrow.ArrowInvalid, pyarrow.ArrowTypeError: Colunas object com tipos misturados.
+    """
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    ordem = np.argsort(fatias, kind='stable')
+    limites = np.searchsorted(fatias[ordem], np.arange(num_fatias + 1))
+    caminhos = []
+    for indice in range(num_fatias):
+        caminho = os.path.join(pasta, f"{lado}_{indice:03d}.arrow")
+        _gravar_arrow(tabela.take(ordem[limites[indice]:limites[indice + 1]]), caminho)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def _tabela_para_pandas(tabela) -> pd.DataFrame:
+    """Tabela Arrow de uma fatia em pandas, com os tipos originais do pandas."""
+    df = tabela.to_pandas()
+    # Colunas object (ex: lidas do Excel) voltam do Arrow como texto, ou com None se a fatia
+    # só tiver vazios; o resultado deve ser igual ao serial (object, vazios como NaN)
+    tipos_originais = {c['name']: c['numpy_type'] for c in (tabela.schema.pandas_metadata or {}).get('columns', [])}
+    for coluna in df.columns:
+        if tipos_originais.get(coluna) == 'object':
+            valores = df[coluna].astype(object)
+            df[coluna] = valores.where(valores.notna(), np.nan)
+    return df
+
+
+def _ler_fatia(caminho: str) -> pd.DataFrame:
+    """Lê um arquivo Arrow IPC mapeado em memória, com os tipos originais do pandas."""
+    import pyarrow as pa
+
+    tabela = pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+    # Fatia sem linhas: o arquivo não tem lotes e as colunas viriam sem blocos, o que faz o
+    # merge do pandas falhar nas chaves de texto; uma tabela vazia tem um bloco por coluna
+    return _tabela_para_pandas(tabela if tabela.num_rows else tabela.schema.empty_table())
+
+
+def _cruzar_fatia(df_a: pd.DataFrame, df_b: pd.DataFrame, tarefa: dict) -> tuple[pd.DataFrame, dict]:
+    """
+    Merge, diferenças, somas por dimensão e filtro de divergências de um par de fatias
+    (também usado pelos trabalhadores de core/distributed.py).
+
+    Returns:
+        tuple: (detalhe da fatia, {'resumo_por_par', 'somas_dimensoes', 'linhas_merge'}).
+    """
+    pares_mapeados = tarefa['pares_mapeados']
+    df_a, mapa_a = _renomear_colunas_dos_pares(df_a, [par[0] for par in pares_mapeados],
+                                               tarefa['colunas_chave_a'], "_A")
+    df_b, mapa_b = _renomear_colunas_dos_pares(df_b, [par[1] for par in pares_mapeados],
+                                               tarefa['colunas_chave_b'], "_B")
+    df_merged = pd.merge(df_a, df_b, left_on=tarefa['colunas_chave_a'], right_on=tarefa['colunas_chave_b'],
+                         how=tarefa['tipo_join'], suffixes=('_dfA', '_dfB'), indicator='_origem_merge')
+    del df_a, df_b
+    parte, resumo_parte, somas_parte = _processar_parte(
+        df_merged, pares_mapeados, mapa_a, mapa_b, tarefa['apenas_divergencias'],
+        tarefa['tolerancia_divergencia'], tarefa['dimensoes_agrupamento'], tarefa['casas_decimais'])
+    return parte, {'resumo_por_par': resumo_parte, 'somas_dimensoes': somas_parte, 'linhas_merge': len(df_merged)}
+
+
+def _comparar_fatia(tarefa: dict) -> dict:
+    """Executado no pool: cruza um par de fatias e grava o detalhe (já filtrado) da fatia."""
+    import pyarrow as pa
+
+    parte, retorno = _cruzar_fatia(_ler_fatia(tarefa['caminho_a']), _ler_fatia(tarefa['caminho_b']), tarefa)
+    _gravar_arrow(pa.Table.from_pandas(parte, preserve_index=False), tarefa['caminho_saida'])
+    return retorno
+
+
+def _ordenar_como_merge(df: pd.DataFrame, colunas_chave_a: list[str], colunas_chave_b: list[str],
+                        tipo_join: str) -> pd.DataFrame:
+    """
+    Ordem de linhas do pd.merge: a de A (inner/left), a de B (right) ou, no outer, as chaves
+    em ordem crescente (nulas no fim). Empates seguem a ordem original de A e depois a de B.
+    """
+    posicoes = [_POSICAO_B, _POSICAO_A] if tipo_join == 'right' else [_POSICAO_A, _POSICAO_B]
+    criterios = df[posicoes]
+    if tipo_join == 'outer':
+        # Linhas só de B têm a chave nas colunas de B (se os nomes forem diferentes)
+        so_b = df[_POSICAO_A].isna()
+        chaves = pd.DataFrame({f"_chave_{i}": df[coluna_a] if coluna_a == coluna_b else df[coluna_a].where(~so_b, df[coluna_b])
+                               for i, (coluna_a, coluna_b) in enumerate(zip(colunas_chave_a, colunas_chave_b))})
+        criterios = pd.concat([chaves, criterios], axis=1)
+    try:
+        ordem = criterios.reset_index(drop=True).sort_values(list(criterios.columns), kind='stable',
+                                                             na_position='last').index
+    except TypeError:
+        # Chaves de tipos misturados não se ordenam: fica a ordem original das linhas
+        ordem = criterios[posicoes].reset_index(drop=True).sort_values(posicoes, kind='stable').index
+    return df.take(ordem).drop(columns=[_POSICAO_A, _POSICAO_B]).reset_index(drop=True)
+
+
+def _combinar_fatias(retornos: list[dict], partes, vazio_a: pd.DataFrame, vazio_b: pd.DataFrame,
+                     colunas_chave_a: list[str], colunas_chave_b: list[str], pares_mapeados: list[tuple[str, str]],
+                     tipo_join: str, apenas_divergencias: bool, tolerancia_divergencia: float,
+                     casas_decimais: int | None, maiores_divergencias: int, monitor=None) -> dict:
+    """
+    Junta os retornos de _cruzar_fatia no resultado de comparar_dataframes: totais somados
+    sem erro adicional, somas por dimensão, detalhe na ordem do pd.merge e maiores divergências.
+
+    Args:
+        retornos (list[dict]): Os retornos de _cruzar_fatia, um por fatia.
+        partes (iterable[pd.DataFrame]): O detalhe de cada fatia, com as colunas de posição.
+        vazio_a, vazio_b (pd.DataFrame): As colunas de A e de B (sem linhas), para os nomes das colunas dos pares.
+    """
+    total_linhas_merge = sum(retorno['linhas_merge'] for retorno in retornos)
+    with etapa_monitorada(monitor, "Combinar fatias") as registro:
+        somas_dimensoes = {}
+        for retorno in retornos:
+            for dimensao, somas in retorno['somas_dimensoes'].items():
+                somas_dimensoes.setdefault(dimensao, []).append(somas)
+        df_merged = pd.concat(list(partes), ignore_index=True)
+        df_merged = _ordenar_como_merge(df_merged, colunas_chave_a, colunas_chave_b, tipo_join)
+        registro['linhas_saida'] = len(df_merged)
+
+    if not total_linhas_merge:
+        print(f"Aviso DataComparator: O merge (tipo '{tipo_join}') resultou em um DataFrame vazio.")
+        return {'resumo_por_par': [],
+                'dataframe_merged': df_merged[[c for c in df_merged.columns if not c.endswith(_SUFIXOS_DIFERENCA)]],
+                'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b)}
+    resumo_por_par = _combinar_resumos([retorno['resumo_por_par'] for retorno in retornos])
+    maiores = pd.DataFrame()
+    if maiores_divergencias and resumo_por_par:
+        # O detalhe já está na ordem do merge: a seleção sai igual à de um processo
+        with etapa_monitorada(monitor, "Maiores divergências", len(df_merged)) as registro:
+            _, mapa_a = _renomear_colunas_dos_pares(vazio_a, [par[0] for par in pares_mapeados],
+                                                    colunas_chave_a, "_A")
+            _, mapa_b = _renomear_colunas_dos_pares(vazio_b, [par[1] for par in pares_mapeados],
+                                                    colunas_chave_b, "_B")
+            maiores = _maiores_divergencias(df_merged, pares_mapeados, mapa_a, mapa_b,
+                                            colunas_chave_a + colunas_chave_b,
+                                            tolerancia_divergencia if apenas_divergencias else 0.0,
+                                            maiores_divergencias)
+            registro['linhas_saida'] = len(maiores)
+    return {
+        'resumo_por_par': resumo_por_par,
+        'resumo_por_dimensao': _combinar_somas_dimensoes(somas_dimensoes, casas_decimais),
+        'maiores_divergencias': maiores,
+        'dataframe_merged': df_merged,
+        'total_linhas_merge': total_linhas_merge,
+        'colunas_chave_a': list(colunas_chave_a),
+        'colunas_chave_b': list(colunas_chave_b)
+    }
+
+
+def comparar_em_paralelo(df_lado_a: pd.DataFrame,
+                         df_lado_b: pd.DataFrame,
+                         colunas_chave_a: list[str],
+                         colunas_chave_b: list[str],
+                         pares_mapeados: list[tuple[str, str]],
+                         tipo_join: str = 'inner',
+                         monitor=None,
+                         apenas_divergencias: bool = True,
+                         tolerancia_divergencia: float = 0.0,
+                         dimensoes_agrupamento: list[str] | None = None,
+                         casas_decimais: int | None = None,
+                         num_processos: int | None = None,
+                         maiores_divergencias: int = MAIORES_DIVERGENCIAS_POR_PAR) -> dict | None:
+    """
+    comparar_dataframes repartido por chave entre 'num_processos' processos.
+
+    O resultado é o mesmo de comparar_dataframes: mesmas colunas, valores e ordem de linhas
+    no detalhe (com índice novo, 0..n-1) e os mesmos resumos, com os totais das fatias
+    somados sem erro de arredondamento adicional (Decimal no modo monetário, math.fsum no
+    float). Vazios em colunas object voltam como NaN (None vira NaN). Casamento aproximado
+    não é suportado (use comparar_dataframes).
+
+    Compara em um único processo (comparar_dataframes) quando não compensa ou não é
+    possível repartir: poucas linhas, um só processo, pyarrow ausente, chaves de tipos
+    diferentes em A e B ou colunas com tipos misturados.
+
+    Args:
+        num_processos (int, optional): Processos do pool. Defaults to None (um por núcleo).
+        Os demais, como em comparar_dataframes.
+
+    Returns:
+        dict | None: Mesmo formato de comparar_dataframes.
+    """
+    num_processos = num_processos or processos_automaticos()
+    total_linhas = len(df_lado_a) + len(df_lado_b)
+
+    def em_um_processo(motivo: str | None = None):
+        if motivo:
+            print(f"Aviso ParallelCompare: {motivo}; comparando em um único processo.")
+        return comparar_dataframes(
+            df_lado_a, df_lado_b, colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join,
+            monitor=monitor, apenas_divergencias=apenas_divergencias,
+            tolerancia_divergencia=tolerancia_divergencia, dimensoes_agrupamento=dimensoes_agrupamento,
+            casas_decimais=casas_decimais, maiores_divergencias=maiores_divergencias)
+
+    if num_processos < 2 or total_linhas < LINHAS_MINIMAS_PARALELO:
+        return em_um_processo()
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return em_um_processo("o confronto paralelo requer o pacote pyarrow")
+
+    pasta = None
+    try:
+        num_fatias = num_processos * FATIAS_POR_PROCESSO
+        with etapa_monitorada(monitor, "Particionar por chave", total_linhas) as registro:
+            tipos_a, hashes_a = hash_chaves(df_lado_a, colunas_chave_a)
+            tipos_b, hashes_b = hash_chaves(df_lado_b, colunas_chave_b)
+            if tipos_a is None or tipos_b is None or not _tipos_compativeis(tipos_a, tipos_b):
+                return em_um_processo("as colunas chave de A e B têm tipos que não se comparam")
+            pasta = _criar_pasta_fatias(int(df_lado_a.memory_usage(deep=True).sum()
+                                            + df_lado_b.memory_usage(deep=True).sum()))
+            try:
+                caminhos_a = _gravar_fatias(df_lado_a.assign(**{_POSICAO_A: np.arange(len(df_lado_a))}),
+                                            (hashes_a % np.uint64(num_fatias)).astype(np.int64), num_fatias, pasta, 'A')
+                caminhos_b = _gravar_fatias(df_lado_b.assign(**{_POSICAO_B: np.arange(len(df_lado_b))}),
+                                            (hashes_b % np.uint64(num_fatias)).astype(np.int64), num_fatias, pasta, 'B')
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                return em_um_processo(f"colunas com tipos misturados não podem ser repartidas ({e})")
+            del hashes_a, hashes_b
+            registro['linhas_saida'] = num_fatias
+
+        tarefas = [{'caminho_a': caminho_a, 'caminho_b': caminho_b,
+                    'caminho_saida': os.path.join(pasta, f"resultado_{indice:03d}.arrow"),
+                    'colunas_chave_a': list(colunas_chave_a), 'colunas_chave_b': list(colunas_chave_b),
+                    'pares_mapeados': list(pares_mapeados), 'tipo_join': tipo_join,
+                    'apenas_divergencias': apenas_divergencias, 'tolerancia_divergencia': tolerancia_divergencia,
+                    'dimensoes_agrupamento': dimensoes_agrupamento, 'casas_decimais': casas_decimais}
+                   for indice, (caminho_a, caminho_b) in enumerate(zip(caminhos_a, caminhos_b))]
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with etapa_monitorada(monitor, f"Merge e diferenças em paralelo ({num_processos} processos, "
+                                       f"{num_fatias} fatias)", total_linhas) as registro:
+            # 'spawn', como o processo de cálculo: os processos do pool não herdam o estado da interface Qt
+            with ProcessPoolExecutor(max_workers=num_processos,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                retornos = list(pool.map(_comparar_fatia, tarefas))
+            registro['linhas_saida'] = sum(retorno['linhas_merge'] for retorno in retornos)
+
+        return _combinar_fatias(retornos, (_ler_fatia(tarefa['caminho_saida']) for tarefa in tarefas),
+                                df_lado_a.head(0), df_lado_b.head(0), colunas_chave_a, colunas_chave_b,
+                                pares_mapeados, tipo_join, apenas_divergencias, tolerancia_divergencia,
+                                casas_decimais, maiores_divergencias, monitor)
+
+    except MemoryError:
+        raise # Sem memória: quem chamou decide como avisar (ver ConfrontoWorker)
+    except Exception as e:
+        # print(f"Ocorreu um erro inesperado durante a comparação paralela: {e}")
+        import traceback; traceback.print_exc()
+        return None
+    finally:
+        if pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,133 @@
+# core/performance_monitor.py
+
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def _rss_atual_mb() -> float | None:
+    """Memória residente (RSS) atual do processo em MB, se for possível obtê-la."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024**2
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _pico_rss_mb() -> float | None:
+    """Pico de memória residente do processo (desde o início) em MB."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB; macOS em bytes
+        return pico / 1024**2 if sys.platform == 'darwin' else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024**2  # peak_wset existe no Windows
+    except ImportError:
+        return None
+
+
+class MonitorDesempenho:
+    """
+    Registra tempo, linhas de entrada/saída e memória de cada etapa de um confronto.
+
+    Uso:
+        monitor = MonitorDesempenho(callback_log=print)
+        with monitor.etapa("Carregar A") as registro:
+            df = carregar_dados_excel(caminho)
+            registro['linhas_saida'] = len(df)
+    """
+
+    def __init__(self, perfilar: bool = False, callback_log=None):
+        self.etapas = []
+        self.perfilar = perfilar
+        self.callback_log = callback_log
+        self._perfil = None
+        if perfilar:
+            import cProfile
+            self._perfil = cProfile.Profile()
+
+    @contextmanager
+    def etapa(self, nome: str, linhas_entrada: int | None = None):
+        registro = {'etapa': nome, 'linhas_entrada': linhas_entrada, 'linhas_saida': None}
+        rss_inicial = _rss_atual_mb()
+        if self._perfil: self._perfil.enable()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['tempo_s'] = round(time.perf_counter() - inicio, 4)
+            if self._perfil: self._perfil.disable()
+            rss_final = _rss_atual_mb()
+            registro['rss_final_mb'] = round(rss_final, 1) if rss_final is not None else None
+            registro['delta_rss_mb'] = round(rss_final - rss_inicial, 1) if None not in (rss_final, rss_inicial) else None
+            pico = _pico_rss_mb()
+            registro['pico_rss_mb'] = round(pico, 1) if pico is not None else None
+            self.etapas.append(registro)
+            if self.callback_log:
+                self.callback_log(self.formatar_etapa(registro))
+
+    @staticmethod
+    def formatar_etapa(registro: dict) -> str:
+        """Linha legível de uma etapa para o console."""
+        partes = [f"[Desempenho] {registro['etapa']}: {registro['tempo_s']:.3f} s"]
+        if registro['linhas_entrada'] is not None or registro['linhas_saida'] is not None:
+            entrada = f"{registro['linhas_entrada']:,}" if registro['linhas_entrada'] is not None else "-"
+            saida = f"{registro['linhas_saida']:,}" if registro['linhas_saida'] is not None else "-"
+            partes.append(f"linhas {entrada} -> {saida}")
+        if registro.get('pico_rss_mb') is not None:
+            partes.append(f"pico RSS {registro['pico_rss_mb']:,.0f} MB")
+        return " | ".join(partes)
+
+    def tempo_total(self) -> float:
+        return round(sum(r['tempo_s'] for r in self.etapas), 4)
+
+    def texto_perfil(self, limite: int = 30) -> str:
+        """Funções mais custosas (cProfile) acumuladas em todas as etapas."""
+        if not self._perfil:
+            return ""
+        import pstats
+        saida = io.StringIO()
+        pstats.Stats(self._perfil, stream=saida).sort_stats('cumulative').print_stats(limite)
+        return saida.getvalue()
+
+    def para_dataframe(self):
+        import pandas as pd
+        colunas = ['etapa', 'tempo_s', 'linhas_entrada', 'linhas_saida', 'delta_rss_mb', 'rss_final_mb', 'pico_rss_mb']
+        df = pd.DataFrame(self.etapas, columns=colunas)
+        return df.rename(columns={
+            'etapa': 'Etapa', 'tempo_s': 'Tempo (s)', 'linhas_entrada': 'Linhas Entrada',
+            'linhas_saida': 'Linhas Saída', 'delta_rss_mb': 'Variação RSS (MB)',
+            'rss_final_mb': 'RSS Final (MB)', 'pico_rss_mb': 'Pico RSS (MB)'
+        })
+
+    def salvar_json(self, caminho: str) -> bool:
+        """Salva as medições (e o perfil, se capturado) em um arquivo JSON."""
+        try:
+            conteudo = {'tempo_total_s': self.tempo_total(), 'etapas': self.etapas}
+            if self._perfil:
+                conteudo['perfil_cprofile'] = self.texto_perfil()
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(conteudo, f, indent=2, ensure_ascii=False)
+            return True
+        except OSError:
+            return False
+
+
+def etapa_monitorada(monitor: MonitorDesempenho | None, nome: str, linhas_entrada: int | None = None):
+    """Atalho: mede a etapa se houver monitor; caso contrário, não faz nada."""
+    if monitor is None:
+        return nullcontext({})
+    return monitor.etapa(nome, linhas_entrada)
@@ -0,0 +1,614 @@
+# core/process_runner.py
+#
+# Execução de um confronto completo (validação, cache, plano, leitura e comparação) a
+# partir da configuração do ConfrontoWorker, na mesma thread ou em um processo separado.
+#
+# No processo separado, o cálculo não disputa o GIL com a interface e uma falta de
+# memória derruba só o processo filho. O resultado detalhado não volta por pickle: o
+# filho o grava em um arquivo Arrow IPC e o processo da interface o mapeia em memória
+# (memory map), sem copiar os dados; só os resumos, pequenos, passam pela fila. Colunas
+# object de tipos misturados, que o Arrow não representa, vão no arquivo como um pickle
+# por valor e voltam com os mesmos valores da execução na mesma thread.
+
+import atexit
+import os
+import queue
+import tempfile
+
+try:
+    from .performance_monitor import MonitorDesempenho
+except ImportError:
+    from core.performance_monitor import MonitorDesempenho
+
+TOTAL_ETAPAS = 5
+# Linhas convertidas para Arrow por vez ao gravar o resultado
+TAMANHO_LOTE_ARROW = 200_000
+# Metadado do campo Arrow das colunas object de tipos misturados, gravadas valor a valor com pickle
+METADADO_VALORES_PICKLE = {b'dataanalyzer_valores': b'pickle'}
+
+
+class ErroConfiguracao(Exception):
+    """A configuração não confere com os arquivos (colunas ausentes, arquivo inexistente...)."""
+
+
+def executar_confronto(config: dict, callback_log=None, callback_progresso=None, cancelado=None,
+                       cache_dados=None) -> dict | None:
+    """
+    Executa o confronto descrito pela configuração do ConfrontoWorker.
+
+    Args:
+        config (dict): Caminhos, chaves, pares, filtros e opções do confronto.
+        callback_log (callable, optional): Recebe as mensagens para o console. Defaults to print.
+        callback_progresso (callable, optional): Recebe (etapa, mensagem) a cada etapa.
+        cancelado (callable, optional): Consultado entre as etapas; True interrompe o confronto.
+        cache_dados (CacheDados, optional): Cache de arquivos e esquemas do serviço
+            (core/service.py), usado no lugar de carregar_dados_excel e ler_esquema na
+            leitura dos arquivos inteiros. Defaults to None.
+
+    Returns:
+        dict | None: Os resultados de comparar_dataframes, com o monitor em 'desempenho',
+            ou None se o confronto foi cancelado.
+
+    Raises:
+        ErroConfiguracao: Se a configuração não confere com os arquivos atuais.
+        MemoryError: Se faltar memória (quem chamou decide como avisar).
+
+    Uma configuração com 'lados' (três ou mais arquivos) é executada por
+    executar_confronto_n_lados.
+    """
+    if config.get('lados'):
+        return executar_confronto_n_lados(config, callback_log, callback_progresso, cancelado, cache_dados)
+    try:
+        from .excel_parser import carregar_dados_excel, carregar_dados_em_blocos, FORMATO_NUMERO_BR
+        from .data_comparator import comparar_dataframes, comparar_blocos_ordenados, MAIORES_DIVERGENCIAS_POR_PAR
+        from .parallel_compare import comparar_em_paralelo, processos_automaticos
+        from .distributed import comparar_distribuido
+        from .bloom_filter import construir_filtro_chaves
+        from .compute_backends import comparar_arquivos, motivo_incompativel
+        from .execution_planner import planejar_execucao, formatar_plano
+        from .sorted_join import EntradaForaDeOrdem
+        from .job_profiles import validar_perfil
+        from .result_cache import chave_cache, buscar_resultado, guardar_resultado
+    except ImportError:
+        from core.excel_parser import carregar_dados_excel, carregar_dados_em_blocos, FORMATO_NUMERO_BR
+        from core.data_comparator import comparar_dataframes, comparar_blocos_ordenados, MAIORES_DIVERGENCIAS_POR_PAR
+        from core.parallel_compare import comparar_em_paralelo, processos_automaticos
+        from core.distributed import comparar_distribuido
+        from core.bloom_filter import construir_filtro_chaves
+        from core.compute_backends import comparar_arquivos, motivo_incompativel
+        from core.execution_planner import planejar_execucao, formatar_plano
+        from core.sorted_join import EntradaForaDeOrdem
+        from core.job_profiles import validar_perfil
+        from core.result_cache import chave_cache, buscar_resultado, guardar_resultado
+
+    log = callback_log or print
+    progresso = callback_progresso or (lambda etapa, mensagem: log(mensagem))
+    cancelado = cancelado or (lambda: False)
+    if cache_dados is not None:
+        carregar_dados_excel = cache_dados.carregar
+
+    # Desempacotar a configuração
+    caminho_a = config['caminho_a']
+    caminho_b = config['caminho_b']
+    colunas_chave_a = config['colunas_chave_a']
+    colunas_chave_b = config['colunas_chave_b']
+    pares_mapeados = config['pares_mapeados']
+    tipo_join = config['tipo_join']
+    casamento_aproximado = config.get('casamento_aproximado')
+    dtype_backend = config.get('dtype_backend')
+    apenas_divergencias = config.get('apenas_divergencias', True)
+    tolerancia_divergencia = config.get('tolerancia_divergencia', 0.0)
+    dimensoes_agrupamento = config.get('dimensoes_agrupamento')
+    casas_decimais = config.get('casas_decimais')
+    processos_calculo = config.get('processos_calculo', 1) # 0 = um por núcleo
+    maiores_divergencias = config.get('maiores_divergencias', MAIORES_DIVERGENCIAS_POR_PAR) # Por par e critério
+    filtro_a_info = config['filtro_a']
+    filtro_b_info = config['filtro_b']
+
+    # Dicas de tipo por coluna (ver carregar_dados_excel): as do perfil e, com números no
+    # formato brasileiro, as colunas dos pares lidas como 1.234,56
+    esquemas_colunas = {}
+    for lado, indice_par in [('A', 0), ('B', 1)]:
+        esquema = {par[indice_par]: FORMATO_NUMERO_BR for par in pares_mapeados} if config.get('formato_numeros') == 'br' else {}
+        esquema.update((config.get('esquema_colunas') or {}).get(lado) or {})
+        esquemas_colunas[lado] = esquema or None
+
+    # Medições de tempo/memória de cada etapa, exibidas no console da GUI
+    monitor = MonitorDesempenho(perfilar=config.get('perfilar', False), callback_log=log)
+
+    # Confere a configuração (que pode vir de um perfil salvo) com os arquivos atuais
+    erros, avisos = validar_perfil(config, config.get('esquemas'), cache_dados.ler_esquema if cache_dados else None)
+    for aviso in avisos: log(f"[Perfil] Aviso: {aviso}")
+    if erros:
+        raise ErroConfiguracao("A configuração não confere com os arquivos:\n" + "\n".join(erros))
+
+    # Plano de execução: estima a memória antes de carregar e escolhe a estratégia
+    plano = None
+    try:
+        plano = planejar_execucao(config, config.get('orcamento_memoria_mb'))
+        for linha in formatar_plano(plano).splitlines(): log(linha)
+    except Exception as e:
+        log(f"[Plano] Não foi possível estimar a memória ({e}); carregando os arquivos inteiros.")
+    colunas_a = plano['colunas_a'] if plano else None
+    colunas_b = plano['colunas_b'] if plano else None
+    em_blocos = config.get('entradas_ordenadas') or (plano and plano['estrategia'] == 'em_blocos')
+
+    # Mesmos arquivos (pelo conteúdo), mesma configuração e mesmas colunas carregadas (o plano
+    # pode deixar colunas de fora): reaproveita o resultado guardado
+    chave = None
+    if config.get('usar_cache', True):
+        with monitor.etapa("Consultar cache de resultados") as registro:
+            chave = chave_cache(config, {'A': colunas_a, 'B': colunas_b})
+            resultados = buscar_resultado(chave) if chave else None
+            registro['linhas_saida'] = len(resultados['dataframe_merged']) if resultados else None
+        if resultados is not None:
+            log("[Cache] Resultado reaproveitado de uma execução anterior com os mesmos arquivos e configuração.")
+            resultados['desempenho'] = monitor
+            progresso(TOTAL_ETAPAS, "Processamento concluído. Pronto para gerar relatório.")
+            return resultados
+
+    def concluir(resultados):
+        if resultados is None:
+            raise RuntimeError("Erro desconhecido durante a comparação dos dados.")
+        # Colunas que o plano deixou de carregar (só as colunas usadas): não estão no detalhe
+        if plano and any(plano['colunas_omitidas'].values()):
+            resultados['colunas_omitidas'] = plano['colunas_omitidas']
+        if chave:
+            with monitor.etapa("Guardar no cache de resultados", len(resultados['dataframe_merged'])):
+                guardar_resultado(chave, resultados, callback_log=log)
+        resultados['desempenho'] = monitor
+        progresso(TOTAL_ETAPAS, "Processamento concluído. Pronto para gerar relatório.")
+        return resultados
+
+    # DuckDB/Polars: leitura, filtros, merge e totais no motor, que lê o CSV direto do disco
+    motor = config.get('motor_calculo') or 'pandas'
+    motivo = motivo_incompativel(config) if motor != 'pandas' else None
+    if motivo:
+        log(f"[Motor] {motor} não suporta {motivo}; usando pandas.")
+    elif motor != 'pandas':
+        progresso(1, f"Lendo e comparando os arquivos com {motor}...")
+        if cancelado(): return None
+        resultados = comparar_arquivos(
+            motor, caminho_a, caminho_b, colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join,
+            filtro_a=filtro_a_info, filtro_b=filtro_b_info, colunas_a=colunas_a, colunas_b=colunas_b,
+            apenas_divergencias=apenas_divergencias, tolerancia_divergencia=tolerancia_divergencia,
+            dtype_backend=dtype_backend, memoria_mb=config.get('orcamento_memoria_mb'), monitor=monitor,
+            maiores_divergencias=maiores_divergencias)
+        if resultados is not None:
+            return concluir(resultados)
+        log(f"[Motor] Falha no {motor}; refazendo o confronto com pandas.")
+
+    def linhas_lidas(etapa: int, lado: str):
+        # Progresso da carga (xlsx e leituras em blocos): linhas do arquivo lidas até agora
+        return lambda linhas: progresso(etapa, f"Carregando Arquivo {lado}: {linhas:,} linhas lidas...")
+
+    if config.get('trabalhadores') and not casamento_aproximado:
+        # Confronto distribuído: os arquivos são lidos em blocos e repartidos por chave entre
+        # os trabalhadores (core/distributed.py); erros de um trabalhador interrompem o confronto
+        progresso(1, f"Lendo e repartindo os arquivos entre {len(config['trabalhadores'])} trabalhador(es)...")
+        if cancelado(): return None
+        tamanho_bloco = plano['tamanho_bloco'] if plano else None
+        falhas_a, falhas_b = {}, {}
+        resultados = comparar_distribuido(
+            _somando_falhas(carregar_dados_em_blocos(caminho_a, colunas_a, dtype_backend=dtype_backend,
+                                                     filtros=[filtro_a_info] if filtro_a_info else None,
+                                                     tamanho_bloco=tamanho_bloco,
+                                                     esquema_colunas=esquemas_colunas['A'],
+                                                     callback_linhas=linhas_lidas(1, 'A')), falhas_a),
+            _somando_falhas(carregar_dados_em_blocos(caminho_b, colunas_b, dtype_backend=dtype_backend,
+                                                     filtros=[filtro_b_info] if filtro_b_info else None,
+                                                     tamanho_bloco=tamanho_bloco,
+                                                     esquema_colunas=esquemas_colunas['B'],
+                                                     callback_linhas=linhas_lidas(3, 'B')), falhas_b),
+            colunas_chave_a, colunas_chave_b, pares_mapeados, config['trabalhadores'], tipo_join,
+            monitor=monitor,
+            apenas_divergencias=apenas_divergencias,
+            tolerancia_divergencia=tolerancia_divergencia,
+            dimensoes_agrupamento=dimensoes_agrupamento,
+            casas_decimais=casas_decimais,
+            maiores_divergencias=maiores_divergencias
+        )
+        _avisar_falhas_conversao(falhas_a, 'A', log)
+        _avisar_falhas_conversao(falhas_b, 'B', log)
+        return concluir(resultados)
+
+    if em_blocos and not casamento_aproximado:
+        # Arquivos ordenados: leitura em blocos e junção por intercalação em uma passada
+        progresso(1, "Lendo e comparando os arquivos ordenados em blocos...")
+        tamanho_bloco = plano['tamanho_bloco'] if plano else None
+        falhas_a, falhas_b = {}, {}
+        try:
+            resultados = comparar_blocos_ordenados(
+                _somando_falhas(carregar_dados_em_blocos(caminho_a, colunas_a, dtype_backend=dtype_backend,
+                                                         filtros=[filtro_a_info] if filtro_a_info else None,
+                                                         tamanho_bloco=tamanho_bloco,
+                                                         esquema_colunas=esquemas_colunas['A'],
+                                                         callback_linhas=linhas_lidas(1, 'A')), falhas_a),
+                _somando_falhas(carregar_dados_em_blocos(caminho_b, colunas_b, dtype_backend=dtype_backend,
+                                                         filtros=[filtro_b_info] if filtro_b_info else None,
+                                                         tamanho_bloco=tamanho_bloco,
+                                                         esquema_colunas=esquemas_colunas['B'],
+                                                         callback_linhas=linhas_lidas(1, 'B')), falhas_b),
+                colunas_chave_a, colunas_chave_b, pares_mapeados, tipo_join,
+                monitor=monitor,
+                apenas_divergencias=apenas_divergencias,
+                tolerancia_divergencia=tolerancia_divergencia,
+                dimensoes_agrupamento=dimensoes_agrupamento,
+                casas_decimais=casas_decimais,
+                maiores_divergencias=maiores_divergencias
+            )
+        except EntradaForaDeOrdem as e:
+            # A amostra do plano parecia ordenada, mas o arquivo não está: sem a opção
+            # marcada pelo usuário, refaz carregando os arquivos (com as colunas do plano)
+            if config.get('entradas_ordenadas'): raise
+            log(f"[Plano] {e} A amostra do início do arquivo parecia ordenada; carregando "
+                f"{'só as colunas usadas' if colunas_a is not None else 'os arquivos inteiros'} em vez de ler em blocos.")
+        else:
+            _avisar_falhas_conversao(falhas_a, 'A', log)
+            _avisar_falhas_conversao(falhas_b, 'B', log)
+            return concluir(resultados)
+
+    # Etapas 1-4: Carregar A e B, com os filtros aplicados já na leitura
+    # (em CSV, linhas que não passam no filtro nunca ficam em memória)
+    progresso(1, "Carregando e filtrando Arquivo A...")
+    if cancelado(): return None
+    with monitor.etapa("Carregar e filtrar Arquivo A") as registro:
+        df_a = carregar_dados_excel(caminho_a, colunas_a, dtype_backend=dtype_backend,
+                                    filtros=[filtro_a_info] if filtro_a_info else None,
+                                    esquema_colunas=esquemas_colunas['A'], callback_linhas=linhas_lidas(1, 'A'))
+        if df_a is None: raise RuntimeError("Falha ao carregar Arquivo A.")
+        registro['linhas_saida'] = len(df_a)
+    _avisar_falhas_conversao(df_a.attrs.get('falhas_conversao'), 'A', log)
+    progresso(2, "Arquivo A carregado.")
+
+    # Semi-join: com join inner/left, as linhas de B sem chave em A seriam descartadas pelo
+    # merge; com um filtro das chaves de A elas são descartadas já na leitura de B
+    filtro_chaves = None
+    if tipo_join in ['inner', 'left'] and not casamento_aproximado:
+        with monitor.etapa("Filtro das chaves de A (semi-join)", len(df_a)) as registro:
+            filtro_chaves = construir_filtro_chaves(df_a, colunas_chave_a, colunas_chave_b)
+            registro['linhas_saida'] = filtro_chaves.chaves_distintas if filtro_chaves else None
+
+    if cancelado(): return None
+    progresso(3, "Carregando e filtrando Arquivo B...")
+    with monitor.etapa("Carregar e filtrar Arquivo B") as registro:
+        df_b = carregar_dados_excel(caminho_b, colunas_b, dtype_backend=dtype_backend,
+                                    filtros=[filtro_b_info] if filtro_b_info else None,
+                                    esquema_colunas=esquemas_colunas['B'], filtro_chaves=filtro_chaves,
+                                    callback_linhas=linhas_lidas(3, 'B'))
+        if df_b is None: raise RuntimeError("Falha ao carregar Arquivo B.")
+        registro['linhas_saida'] = len(df_b)
+    _avisar_falhas_conversao(df_b.attrs.get('falhas_conversao'), 'B', log)
+    if filtro_chaves is not None and filtro_chaves.linhas_consultadas:
+        log(f"[Semi-join] Arquivo B: {filtro_chaves.linhas_mantidas:,} de {filtro_chaves.linhas_consultadas:,} "
+            f"linhas podem casar com as {filtro_chaves.descricao()} de A; as demais foram descartadas na leitura.")
+    progresso(4, "Arquivo B carregado.")
+
+    # Etapa 5: Comparar DataFrames
+    if cancelado(): return None
+    progresso(5, "Realizando a comparação dos dados...")
+    if processos_calculo != 1 and not casamento_aproximado:
+        return concluir(comparar_em_paralelo(
+            df_lado_a=df_a, df_lado_b=df_b,
+            colunas_chave_a=colunas_chave_a, colunas_chave_b=colunas_chave_b,
+            pares_mapeados=pares_mapeados, tipo_join=tipo_join,
+            monitor=monitor,
+            apenas_divergencias=apenas_divergencias,
+            tolerancia_divergencia=tolerancia_divergencia,
+            dimensoes_agrupamento=dimensoes_agrupamento,
+            casas_decimais=casas_decimais,
+            num_processos=processos_calculo or processos_automaticos(),
+            maiores_divergencias=maiores_divergencias
+        ))
+    return concluir(comparar_dataframes(
+        df_lado_a=df_a, df_lado_b=df_b,
+        colunas_chave_a=colunas_chave_a, colunas_chave_b=colunas_chave_b,
+        pares_mapeados=pares_mapeados, tipo_join=tipo_join,
+        casamento_aproximado=casamento_aproximado,
+        monitor=monitor,
+        apenas_divergencias=apenas_divergencias,
+        tolerancia_divergencia=tolerancia_divergencia,
+        dimensoes_agrupamento=dimensoes_agrupamento,
+        casas_decimais=casas_decimais,
+        maiores_divergencias=maiores_divergencias
+    ))
+
+
+def executar_confronto_n_lados(config: dict, callback_log=None, callback_progresso=None, cancelado=None,
+                               cache_dados=None) -> dict | None:
+    """
+    Confronto de N lados (core/multi_compare.py), com cada arquivo lido uma única vez.
+    Mesmos callbacks e retorno de executar_confronto; o cache de resultados e o plano de
+    memória valem só para o confronto de dois lados.
+
+    Args:
+        config (dict): 'lados' ([{'nome', 'caminho', 'colunas_chave', 'filtro' (opcional),
+            'esquema_colunas' (opcional)}, ...]), 'grupos_valores' ({valor: {lado: coluna}}),
+            'tipo_join' ('outer', 'inner' ou 'left') e as opções apenas_divergencias,
+            tolerancia_divergencia, casas_decimais, dtype_backend, formato_numeros e perfilar.
+
+    Raises:
+        ErroConfiguracao: Se faltar algum campo, um arquivo não existir ou uma coluna não
+            estiver no arquivo.
+    """
+    try:
+        from .excel_parser import carregar_dados_excel, ler_esquema, FORMATO_NUMERO_BR
+        from .multi_compare import comparar_n_lados
+    except ImportError:
+        from core.excel_parser import carregar_dados_excel, ler_esquema, FORMATO_NUMERO_BR
+        from core.multi_compare import comparar_n_lados
+
+    log = callback_log or print
+    progresso = callback_progresso or (lambda etapa, mensagem: log(mensagem))
+    cancelado = cancelado or (lambda: False)
+
+    if cache_dados is not None:
+        carregar_dados_excel, ler_esquema = cache_dados.carregar, cache_dados.ler_esquema
+
+    lados = config['lados']
+    grupos_valores = config.get('grupos_valores') or {}
+    monitor = MonitorDesempenho(perfilar=config.get('perfilar', False), callback_log=log)
+
+    # Confere nomes, arquivos e colunas antes de ler qualquer arquivo inteiro
+    erros = []
+    nomes = [lado.get('nome') for lado in lados]
+    if len(lados) < 2: erros.append("Informe pelo menos dois lados.")
+    if None in nomes or len(set(nomes)) != len(nomes): erros.append("Cada lado precisa de um nome único.")
+    for lado in lados:
+        esquema = ler_esquema(lado['caminho']) if os.path.exists(lado.get('caminho') or '') else None
+        if esquema is None:
+            erros.append(f"Lado '{lado.get('nome')}': arquivo '{lado.get('caminho')}' não encontrado ou ilegível.")
+            continue
+        usadas = list(lado.get('colunas_chave') or []) + [colunas[lado['nome']] for colunas in grupos_valores.values()
+                                                         if lado['nome'] in colunas]
+        if lado.get('filtro'): usadas.append(lado['filtro']['coluna'])
+        faltando = [coluna for coluna in usadas if coluna not in esquema['colunas']]
+        if faltando: erros.append(f"Lado '{lado['nome']}': colunas não encontradas: {', '.join(faltando)}.")
+        if not lado.get('colunas_chave'): erros.append(f"Lado '{lado['nome']}': informe as colunas chave.")
+    if erros:
+        raise ErroConfiguracao("A configuração não confere com os arquivos:\n" + "\n".join(erros))
+
+    # Cada arquivo é lido uma vez, com os filtros e as dicas de tipo aplicados na leitura
+    dataframes = {}
+    for indice, lado in enumerate(lados):
+        if cancelado(): return None
+        etapa = 1 + indice * (TOTAL_ETAPAS - 2) // len(lados)
+        progresso(etapa, f"Carregando e filtrando {lado['nome']}...")
+        esquema = {coluna: FORMATO_NUMERO_BR for colunas in grupos_valores.values()
+                   for nome, coluna in colunas.items() if nome == lado['nome']} if config.get('formato_numeros') == 'br' else {}
+        esquema.update(lado.get('esquema_colunas') or {})
+        with monitor.etapa(f"Carregar e filtrar {lado['nome']}") as registro:
+            df = carregar_dados_excel(lado['caminho'], dtype_backend=config.get('dtype_backend'),
+                                      filtros=[lado['filtro']] if lado.get('filtro') else None,
+                                      esquema_colunas=esquema or None,
+                                      callback_linhas=lambda linhas, nome=lado['nome'], etapa=etapa: progresso(
+                                          etapa, f"Carregando {nome}: {linhas:,} linhas lidas..."))
+            if df is None: raise RuntimeError(f"Falha ao carregar {lado['nome']}.")
+            registro['linhas_saida'] = len(df)
+        _avisar_falhas_conversao(df.attrs.get('falhas_conversao'), lado['nome'], log)
+        dataframes[lado['nome']] = df
+
+    if cancelado(): return None
+    progresso(TOTAL_ETAPAS - 1, f"Comparando {len(lados)} lados...")
+    resultados = comparar_n_lados(dataframes, {lado['nome']: lado['colunas_chave'] for lado in lados}, grupos_valores,
+                                  tipo_join=config.get('tipo_join') or 'outer', monitor=monitor,
+                                  apenas_divergencias=config.get('apenas_divergencias', True),
+                                  tolerancia_divergencia=config.get('tolerancia_divergencia', 0.0),
+                                  casas_decimais=config.get('casas_decimais'))
+    if resultados is None:
+        raise RuntimeError("Erro desconhecido durante a comparação dos dados.")
+    resumo_presenca = resultados['resumo_presenca']
+    for presente_em, chaves in zip(resumo_presenca['Presente em'], resumo_presenca['Chaves']):
+        log(f"[Presença] {presente_em}: {chaves:,} chave(s)")
+    resultados['desempenho'] = monitor
+    progresso(TOTAL_ETAPAS, "Processamento concluído. Pronto para gerar relatório.")
+    return resultados
+
+
+def _somando_falhas(blocos, falhas: dict):
+    """Repassa os blocos de carregar_dados_em_blocos somando em 'falhas' as falhas de conversão de cada um."""
+    try:
+        from .excel_parser import _somar_falhas
+    except ImportError:
+        from core.excel_parser import _somar_falhas
+    for bloco in blocos:
+        _somar_falhas(falhas, bloco.attrs.get('falhas_conversao') or {})
+        yield bloco
+
+
+def _avisar_falhas_conversao(falhas: dict | None, lado: str, log) -> None:
+    """Informa no console os valores que o esquema de colunas não conseguiu converter (viraram nulos)."""
+    for coluna, falha in (falhas or {}).items():
+        exemplos = ", ".join(repr(v) for v in falha['exemplos'])
+        log(f"[Tipos] Arquivo {lado}: {falha['quantidade']:,} valor(es) de '{coluna}' não convertido(s), "
+            f"tratado(s) como vazio(s). Ex.: {exemplos}")
+
+
+def colunas_misturadas(df) -> list[str]:
+    """Colunas object que o Arrow não converte (tipos misturados, ex: chave com números e textos)."""
+    import pyarrow as pa
+    misturadas = []
+    for coluna in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[coluna], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            misturadas.append(coluna)
+    return misturadas
+
+
+def tabela_arrow(lote, esquema=None, misturadas: list[str] = ()):
+    """
+    Converte o DataFrame em tabela Arrow. As colunas em 'misturadas' (de colunas_misturadas)
+    vão como binário, um pickle por valor, marcadas com METADADO_VALORES_PICKLE, e voltam
+    iguais (mesmos valores e tipos Python) com restaurar_colunas_misturadas.
+    """
+    import pickle
+    import pyarrow as pa
+    if misturadas:
+        lote = lote.copy(deep=False)
+        for coluna in misturadas:
+            lote[coluna] = [pickle.dumps(valor) for valor in lote[coluna]]
+    tabela = pa.Table.from_pandas(lote, schema=esquema, preserve_index=False)
+    if esquema is None and misturadas:
+        for coluna in misturadas:
+            indice = tabela.schema.get_field_index(coluna)
+            tabela = tabela.cast(tabela.schema.set(indice, tabela.schema.field(indice).with_metadata(METADADO_VALORES_PICKLE)))
+    return tabela
+
+
+def restaurar_colunas_misturadas(df, esquema):
+    """Desfaz o pickle das colunas que tabela_arrow gravou marcadas com METADADO_VALORES_PICKLE."""
+    import pickle
+    import pandas as pd
+    for campo in esquema:
+        if (campo.metadata or {}).get(b'dataanalyzer_valores') == b'pickle':
+            df[campo.name] = pd.Series([pickle.loads(valor) for valor in df[campo.name]], index=df.index, dtype=object)
+    return df
+
+
+def escrever_arrow_ipc(df, caminho: str, tamanho_lote: int = TAMANHO_LOTE_ARROW) -> None:
+    """Grava o DataFrame em um arquivo Arrow IPC (formato de arquivo), em lotes."""
+    import pyarrow as pa
+
+    misturadas = colunas_misturadas(df)
+    esquema = tabela_arrow(df.iloc[0:tamanho_lote], misturadas=misturadas).schema
+    with pa.OSFile(caminho, 'wb') as destino, pa.ipc.new_file(destino, esquema) as escritor:
+        for inicio in range(0, max(len(df), 1), tamanho_lote):
+            escritor.write_table(tabela_arrow(df.iloc[inicio:inicio + tamanho_lote], esquema, misturadas))
+
+
+def mapear_arrow_ipc(caminho: str):
+    """
+    Abre um arquivo Arrow IPC mapeado em memória, sem copiar os dados.
+
+    Returns:
+        pd.DataFrame: Colunas com tipos Arrow (pd.ArrowDtype) apoiadas no arquivo mapeado;
+            as colunas de tipos misturados voltam como object (ver tabela_arrow).
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    tabela = pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+    return restaurar_colunas_misturadas(tabela.to_pandas(types_mapper=pd.ArrowDtype), tabela.schema)
+
+
+def _executar_no_filho(config: dict, caminho_arrow: str, fila, evento_cancelar) -> None:
+    """Ponto de entrada do processo filho: as mensagens voltam pela fila."""
+    try:
+        resultados = executar_confronto(config, lambda texto: fila.put(('log', texto)),
+                                        lambda etapa, texto: fila.put(('progresso', etapa, texto)),
+                                        evento_cancelar.is_set)
+        if resultados is None:
+            fila.put(('cancelado',))
+            return
+        monitor = resultados.pop('desempenho')
+        df_merged = resultados.pop('dataframe_merged')
+        with monitor.etapa("Gravar resultado (Arrow IPC)", len(df_merged)):
+            escrever_arrow_ipc(df_merged, caminho_arrow)
+        del df_merged
+        resultados['etapas_desempenho'] = monitor.etapas
+        fila.put(('resultado', resultados))
+    except ErroConfiguracao as e:
+        fila.put(('erro', 'configuracao', str(e)))
+    except MemoryError:
+        fila.put(('erro', 'memoria', ""))
+    except Exception as e:
+        import traceback
+        fila.put(('erro', 'outro', f"{e}\n{traceback.format_exc()}"))
+
+
+def executar_em_processo(config: dict, callback_log=None, callback_progresso=None, cancelado=None,
+                         diretorio_temporario: str | None = None) -> dict | None:
+    """
+    Executa o confronto em um processo separado (mesmos argumentos e retorno de
+    executar_confronto). O 'dataframe_merged' devolvido é mapeado do arquivo Arrow IPC
+    gravado pelo filho; chame liberar_resultado quando não precisar mais dele.
+
+    Raises:
+        ErroConfiguracao, MemoryError: Como em executar_confronto.
+        RuntimeError: Se o processo filho falhar ou terminar sem resultado.
+    """
+    import multiprocessing
+
+    log = callback_log or print
+    progresso = callback_progresso or (lambda etapa, mensagem: log(mensagem))
+    cancelado = cancelado or (lambda: False)
+
+    descritor, caminho_arrow = tempfile.mkstemp(prefix='confronto_', suffix='.arrow', dir=diretorio_temporario)
+    os.close(descritor)
+    # 'spawn' em todas as plataformas: o filho não herda o estado da interface Qt
+    contexto = multiprocessing.get_context('spawn')
+    fila, evento_cancelar = contexto.Queue(), contexto.Event()
+    # Não daemônico para poder abrir o pool do confronto paralelo (processos_calculo); o
+    # atexit faz o papel do daemon se a interface fechar com o cálculo em andamento
+    processo = contexto.Process(target=_executar_no_filho, args=(config, caminho_arrow, fila, evento_cancelar),
+                                daemon=False)
+    processo.start()
+    atexit.register(processo.terminate)
+
+    mensagem = None
+    try:
+        while True:
+            try:
+                mensagem = fila.get(timeout=0.2)
+            except queue.Empty:
+                if cancelado() and not evento_cancelar.is_set():
+                    evento_cancelar.set()
+                if not processo.is_alive():
+                    try: # Última mensagem ainda a caminho quando o filho terminou
+                        mensagem = fila.get(timeout=1.0)
+                    except queue.Empty:
+                        # Código negativo: morto por sinal (no Linux, em geral o OOM killer)
+                        motivo = ", possivelmente por falta de memória" if (processo.exitcode or 0) < 0 else ""
+                        raise RuntimeError(f"O processo de cálculo terminou inesperadamente "
+                                           f"(código {processo.exitcode}){motivo}.")
+                else:
+                    continue
+            if mensagem[0] == 'log':
+                log(mensagem[1])
+            elif mensagem[0] == 'progresso':
+                progresso(mensagem[1], mensagem[2])
+            else:
+                break
+        processo.join()
+
+        if mensagem[0] == 'cancelado':
+            return None
+        if mensagem[0] == 'erro':
+            _, tipo, texto = mensagem
+            if tipo == 'configuracao': raise ErroConfiguracao(texto)
+            if tipo == 'memoria': raise MemoryError()
+            raise RuntimeError(f"Erro no processo de cálculo: {texto}")
+
+        resultados = mensagem[1]
+        monitor = MonitorDesempenho(callback_log=log)
+        monitor.etapas = resultados.pop('etapas_desempenho')
+        with monitor.etapa("Mapear resultado (Arrow IPC)") as registro:
+            resultados['dataframe_merged'] = mapear_arrow_ipc(caminho_arrow)
+            registro['linhas_saida'] = len(resultados['dataframe_merged'])
+        resultados['desempenho'] = monitor
+        resultados['arquivo_resultado'] = caminho_arrow
+        return resultados
+    finally:
+        atexit.unregister(processo.terminate)
+        if processo.is_alive():
+            processo.terminate()
+        if mensagem is None or mensagem[0] != 'resultado':
+            _remover_arquivo(caminho_arrow)
+
+
+def _remover_arquivo(caminho: str) -> None:
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass # No Windows, um arquivo ainda mapeado não pode ser apagado
+
+
+def liberar_resultado(resultados: dict) -> None:
+    """Solta o resultado detalhado e apaga o arquivo Arrow IPC de executar_em_processo, se houver."""
+    resultados.pop('dataframe_merged', None)
+    caminho = resultados.pop('arquivo_resultado', None)
+    if caminho:
+        import gc
+        gc.collect() # Fecha o mapeamento antes de apagar o arquivo
+        _remover_arquivo(caminho)
@@ -7,10 +7,14 @@ import sys
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
+# Limite de linhas de uma planilha xlsx (1.048.576), descontando o cabeçalho
+LIMITE_LINHAS_PLANILHA = 1_048_575
+
 # Para usar as funções dos nossos outros módulos para teste
 try:
     from .excel_parser import carregar_dados_excel
     from .data_comparator import comparar_dataframes # Importado para o teste __main__
+    from .performance_monitor import etapa_monitorada
 except ImportError:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     parent_dir = os.path.dirname(current_dir)
@@ -18,6 +22,7 @@ except ImportError:
         sys.path.append(parent_dir)
     from core.excel_parser import carregar_dados_excel
     from core.data_comparator import comparar_dataframes
+    from core.performance_monitor import etapa_monitorada
 
 
 def aplicar_estilos_planilha(writer, sheet_name, df_para_estilo):
@@ -58,11 +63,37 @@ def aplicar_estilos_planilha(writer, sheet_name, df_para_estilo):
             if sheet_name == "Resumo_Comparacao":
                 if col_name == 'Diferença Percentual Total (%)':
                     cell.number_format = '0.00%'
-                elif col_name in ['Total Lado A', 'Total Lado B', 'Diferença Absoluta Total']:
+                elif col_name in ['Total Lado A', 'Total Lado B', 'Diferença Absoluta Total', 'Total Conciliado A', 'Total Conciliado B']:
                     cell.number_format = '#,##0.00'
+                elif col_name in ['Linhas Divergentes', 'Linhas Conciliadas']:
+                    cell.number_format = '#,##0'
                 if isinstance(cell.value, (int, float)):
                     cell.alignment = Alignment(horizontal="right", vertical="center")
             
+            elif sheet_name.startswith("Resumo_por_"):
+                if col_name.endswith(" - Diferença %"):
+                    cell.number_format = '0.00%'
+                elif col_name.endswith((" - Total A", " - Total B", " - Diferença")):
+                    cell.number_format = '#,##0.00'
+                elif col_name == 'Linhas':
+                    cell.number_format = '#,##0'
+                if isinstance(cell.value, (int, float)):
+                    cell.alignment = Alignment(horizontal="right", vertical="center")
+
+            elif sheet_name == "Maiores_Divergencias":
+                if col_name == 'Diferença %' and isinstance(cell.value, (int, float)):
+                    cell.number_format = '0.00%'
+                elif col_name in ['Valor A', 'Valor B', 'Diferença Absoluta'] and isinstance(cell.value, (int, float)):
+                    cell.number_format = '#,##0.00'
+                if isinstance(cell.value, (int, float)) or cell.value in ['INF', '-INF']:
+                    cell.alignment = Alignment(horizontal="right", vertical="center")
+
+            elif sheet_name == "Presenca_por_Sistema":
+                if col_name == '% das Chaves':
+                    cell.number_format = '0.00%'
+                elif col_name == 'Chaves':
+                    cell.number_format = '#,##0'
+
             elif sheet_name == "Dados_Detalhados":
                 if col_name.endswith("_DiffPerc_Linha(%)"):
                     if isinstance(cell.value, (int, float)):
@@ -114,10 +145,32 @@ def aplicar_estilos_planilha(writer, sheet_name, df_para_estilo):
     worksheet.freeze_panes = worksheet['A2']
 
 
-def gerar_relatorio_excel(dados_comparacao: dict, caminho_saida: str, nome_planilha_resumo: str = "Resumo_Comparacao", nome_planilha_detalhes: str = "Dados_Detalhados"):
+def _nome_planilha_dimensao(dimensao: str, nomes_usados: set) -> str:
+    """Nome de aba válido (até 31 caracteres, sem []:*?/\\) e único para uma dimensão."""
+    base = "Resumo_por_" + "".join("_" if c in '[]:*?/\\' else c for c in dimensao)
+    nome, numero = base[:31], 2
+    while nome in nomes_usados:
+        sufixo = f"_{numero}"
+        nome, numero = base[:31 - len(sufixo)] + sufixo, numero + 1
+    nomes_usados.add(nome)
+    return nome
+
+
+def gerar_relatorio_excel(dados_comparacao: dict, caminho_saida: str, nome_planilha_resumo: str = "Resumo_Comparacao", nome_planilha_detalhes: str = "Dados_Detalhados",
+                          incluir_detalhes: bool = True):
+    """
+    Gera o relatório Excel do confronto/cruzamento.
+
+    Se os dados detalhados passarem do limite de linhas de uma planilha, são divididos
+    em abas numeradas (ex: Dados_Detalhados_2). Cada dimensão de 'resumo_por_dimensao'
+    ganha uma aba compacta própria (ex: Resumo_por_Regiao). Com incluir_detalhes=False, gera apenas
+    o resumo (usado quando os detalhes são salvos em outro formato, ver core/result_sinks.py).
+    """
     if not dados_comparacao or 'dataframe_merged' not in dados_comparacao:
         # print("Erro: Dados de comparação ('dataframe_merged') ausentes.")
         return False
+    # Se a comparação foi monitorada, a escrita do relatório entra nas mesmas medições
+    monitor = dados_comparacao.get('desempenho')
     try:
         with pd.ExcelWriter(caminho_saida, engine='openpyxl') as writer:
             # Só cria a aba de resumo se houver dados para ela
@@ -145,34 +198,87 @@ def gerar_relatorio_excel(dados_comparacao: dict, caminho_saida: str, nome_plani
                     df_resumo_para_escrita.rename(columns={
                         'par_comparado': 'Par Comparado', 'total_lado_a': 'Total Lado A',
                         'total_lado_b': 'Total Lado B', 'diferenca_absoluta_total': 'Diferença Absoluta Total',
-                        'diferenca_percentual_total': 'Diferença Percentual Total (%)'
+                        'diferenca_percentual_total': 'Diferença Percentual Total (%)',
+                        'linhas_divergentes': 'Linhas Divergentes', 'linhas_conciliadas': 'Linhas Conciliadas',
+                        'total_conciliado_a': 'Total Conciliado A', 'total_conciliado_b': 'Total Conciliado B'
                     }, inplace=True)
 
                 df_resumo_para_escrita.to_excel(writer, sheet_name=nome_planilha_resumo, index=False)
                 aplicar_estilos_planilha(writer, nome_planilha_resumo, df_resumo_para_escrita)
+
+            # Linhas de maior diferença absoluta e percentual de cada par, da maior para a menor
+            df_maiores = dados_comparacao.get('maiores_divergencias')
+            if df_maiores is not None and not df_maiores.empty:
+                df_maiores_para_escrita = df_maiores.copy()
+                percentuais = (df_maiores_para_escrita['Diferença %'] / 100.0).astype(object)
+                percentuais[percentuais == np.inf] = 'INF'
+                percentuais[percentuais == -np.inf] = '-INF'
+                df_maiores_para_escrita['Diferença %'] = percentuais
+                df_maiores_para_escrita.to_excel(writer, sheet_name="Maiores_Divergencias", index=False)
+                aplicar_estilos_planilha(writer, "Maiores_Divergencias", df_maiores_para_escrita)
+
+            # Uma aba por dimensão de agrupamento, com os totais e diferenças de cada par
+            nomes_usados = {nome_planilha_resumo}
+            for dimensao, df_dimensao in (dados_comparacao.get('resumo_por_dimensao') or {}).items():
+                df_dimensao_para_escrita = df_dimensao.copy()
+                for col_name in df_dimensao_para_escrita.columns:
+                    if col_name.endswith(" - Diferença %"):
+                        df_dimensao_para_escrita[col_name] = df_dimensao_para_escrita[col_name] / 100.0
+                nome_aba = _nome_planilha_dimensao(dimensao, nomes_usados)
+                df_dimensao_para_escrita.to_excel(writer, sheet_name=nome_aba, index=False)
+                aplicar_estilos_planilha(writer, nome_aba, df_dimensao_para_escrita)
             
-            # A aba de detalhes é sempre gerada
-            df_detalhes_original = dados_comparacao['dataframe_merged']
-            df_detalhes_para_escrita = df_detalhes_original.copy()
-            
-            # O código original para processar e salvar os detalhes vem aqui
-            for col_name in df_detalhes_para_escrita.columns:
-                if col_name.endswith("_DiffPerc_Linha(%)"):
-                    col_data = df_detalhes_para_escrita[col_name].copy()
-                    is_inf = (col_data == np.inf)
-                    is_neg_inf = (col_data == -np.inf)
-                    is_finite = np.isfinite(col_data)
-                    col_data[is_finite] = col_data[is_finite] / 100.0
-                    if is_inf.any() or is_neg_inf.any():
-                        col_data = col_data.astype(object)
-                        col_data[is_inf] = 'INF'
-                        col_data[is_neg_inf] = '-INF'
-                    df_detalhes_para_escrita[col_name] = col_data
-
-            # Define o nome da planilha de detalhes com base no modo
-            nome_planilha = "Resultado_Cruzamento" if not dados_comparacao.get('resumo_por_par') else nome_planilha_detalhes
-            df_detalhes_para_escrita.to_excel(writer, sheet_name=nome_planilha, index=False)
-            aplicar_estilos_planilha(writer, nome_planilha, df_detalhes_para_escrita)
+            # Confronto de N lados: quantas chaves existem em cada combinação de sistemas
+            df_presenca = dados_comparacao.get('resumo_presenca')
+            if df_presenca is not None and not df_presenca.empty:
+                df_presenca_para_escrita = df_presenca.copy()
+                df_presenca_para_escrita['% das Chaves'] = df_presenca_para_escrita['% das Chaves'] / 100.0
+                df_presenca_para_escrita.to_excel(writer, sheet_name="Presenca_por_Sistema", index=False)
+                aplicar_estilos_planilha(writer, "Presenca_por_Sistema", df_presenca_para_escrita)
+
+            # A aba de detalhes é gerada, a menos que os detalhes tenham ido para outro formato
+            if incluir_detalhes:
+                df_detalhes_original = dados_comparacao['dataframe_merged']
+                # Cópia rasa: só as colunas de percentual são substituídas abaixo; as demais
+                # (inclusive colunas Arrow) são lidas direto do resultado, sem duplicar memória
+                df_detalhes_para_escrita = df_detalhes_original.copy(deep=False)
+                
+                # O código original para processar e salvar os detalhes vem aqui
+                for col_name in df_detalhes_para_escrita.columns:
+                    if col_name.endswith("_DiffPerc_Linha(%)"):
+                        col_data = df_detalhes_para_escrita[col_name].copy()
+                        is_inf = (col_data == np.inf)
+                        is_neg_inf = (col_data == -np.inf)
+                        is_finite = np.isfinite(col_data)
+                        col_data[is_finite] = col_data[is_finite] / 100.0
+                        if is_inf.any() or is_neg_inf.any():
+                            col_data = col_data.astype(object)
+                            col_data[is_inf] = 'INF'
+                            col_data[is_neg_inf] = '-INF'
+                        df_detalhes_para_escrita[col_name] = col_data
+
+                # Define o nome da planilha de detalhes com base no modo
+                nome_planilha = "Resultado_Cruzamento" if not dados_comparacao.get('resumo_por_par') else nome_planilha_detalhes
+                # Acima do limite de linhas do Excel, os detalhes são divididos em várias abas
+                for numero_parte, inicio in enumerate(range(0, max(len(df_detalhes_para_escrita), 1), LIMITE_LINHAS_PLANILHA), 1):
+                    df_parte = df_detalhes_para_escrita.iloc[inicio:inicio + LIMITE_LINHAS_PLANILHA]
+                    nome_parte = nome_planilha if numero_parte == 1 else f"{nome_planilha}_{numero_parte}"
+                    with etapa_monitorada(monitor, f"Relatório: escrita dos dados ({nome_parte})", len(df_parte)):
+                        df_parte.to_excel(writer, sheet_name=nome_parte, index=False)
+                    with etapa_monitorada(monitor, f"Relatório: estilos ({nome_parte})", len(df_parte)):
+                        aplicar_estilos_planilha(writer, nome_parte, df_parte)
+            elif not dados_comparacao.get('resumo_por_par'):
+                # Cruzamento sem pares: o Excel só informa onde estão os dados
+                df_status = pd.DataFrame([{"Status": f"Resultado salvo em arquivo separado "
+                                                     f"({len(dados_comparacao['dataframe_merged'])} linhas)."}])
+                df_status.to_excel(writer, sheet_name=nome_planilha_resumo, index=False)
+                aplicar_estilos_planilha(writer, nome_planilha_resumo, df_status)
+
+            # Aba de desempenho com as etapas medidas até aqui
+            if monitor is not None and monitor.etapas:
+                df_desempenho = monitor.para_dataframe()
+                df_desempenho.to_excel(writer, sheet_name="Performance", index=False)
+                aplicar_estilos_planilha(writer, "Performance", df_desempenho)
 
         # print(f"Relatório gerado com sucesso em: {caminho_saida}")
         return True
@@ -0,0 +1,216 @@
+# core/result_cache.py
+#
+# Cache de resultados de confronto endereçado pelo conteúdo: a chave é o hash dos dois
+# arquivos de entrada mais o hash canônico da configuração que afeta o resultado
+# (chaves, pares, join, filtros, tolerâncias...). Repetir o mesmo confronto, por exemplo
+# só para salvar o relatório em outro lugar, devolve o resultado guardado sem recalcular.
+#
+# Cada entrada é uma pasta com os detalhes, os resumos por dimensão e as maiores
+# divergências em Parquet e o resumo por par em JSON. O tamanho total é limitado; as entradas usadas há mais tempo
+# são removidas primeiro (LRU, pela data de último uso).
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+try:
+    from .excel_parser import pyarrow_disponivel
+except ImportError:
+    from core.excel_parser import pyarrow_disponivel
+
+VERSAO_CACHE = 3 # 2: maiores divergências por par; 3: colunas carregadas na chave
+DIRETORIO_CACHE_PADRAO = os.path.join(os.path.expanduser('~'), '.dataanalyzer', 'cache')
+TAMANHO_MAXIMO_CACHE_MB = 2048
+TAMANHO_LEITURA_HASH = 1024 * 1024
+
+# Itens da configuração que não mudam o resultado: ficam fora da chave. Os caminhos
+# também ficam de fora, pois o conteúdo dos arquivos já entra pelo hash.
+CONFIG_FORA_DA_CHAVE = {'caminho_a', 'caminho_b', 'perfilar', 'orcamento_memoria_mb', 'esquemas',
+                        'entradas_ordenadas', 'usar_cache', 'processo_separado', 'motor_calculo',
+                        'processos_calculo', 'usar_servico', 'trabalhadores'}
+
+# Hashes já calculados nesta sessão, por (caminho, tamanho, data de modificação)
+_impressoes_calculadas = {}
+
+
+def impressao_arquivo(caminho_arquivo: str) -> str:
+    """Hash (BLAKE2b) do conteúdo do arquivo, lido em blocos de 1 MB."""
+    informacoes = os.stat(caminho_arquivo)
+    identificacao = (os.path.abspath(caminho_arquivo), informacoes.st_size, informacoes.st_mtime_ns)
+    if identificacao not in _impressoes_calculadas:
+        resumo = hashlib.blake2b(digest_size=20)
+        with open(caminho_arquivo, 'rb') as f:
+            while bloco := f.read(TAMANHO_LEITURA_HASH):
+                resumo.update(bloco)
+        _impressoes_calculadas[identificacao] = resumo.hexdigest()
+    return _impressoes_calculadas[identificacao]
+
+
+def chave_cache(config: dict, colunas_carregadas: dict | None = None) -> str | None:
+    """
+    Chave do cache para uma configuração do ConfrontoWorker.
+
+    Args:
+        config (dict): A configuração do confronto.
+        colunas_carregadas (dict, optional): {'A': [...], 'B': [...]}, as colunas carregadas
+            de cada arquivo (None = todas), como no plano de execução. O orçamento de memória
+            fica fora da chave, mas as colunas que ele deixa de fora mudam o detalhe.
+
+    Returns:
+        str | None: O hash dos arquivos de entrada e da configuração canônica (JSON com
+            chaves ordenadas), ou None se os arquivos não puderem ser lidos.
+    """
+    try:
+        config_canonica = {k: v for k, v in config.items() if k not in CONFIG_FORA_DA_CHAVE}
+        conteudo = {
+            'versao': VERSAO_CACHE,
+            'arquivo_a': impressao_arquivo(config['caminho_a']),
+            'arquivo_b': impressao_arquivo(config['caminho_b']),
+            'config': config_canonica,
+            'colunas_carregadas': colunas_carregadas or {'A': None, 'B': None},
+        }
+        texto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=20).hexdigest()
+    except (OSError, KeyError):
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _valor_json(valor):
+    # Escalares NumPy (totais do resumo) viram números Python
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+
+def _tamanho_entrada(pasta: str) -> int:
+    return sum(entrada.stat().st_size for entrada in os.scandir(pasta) if entrada.is_file())
+
+
+def _remover_excedentes(diretorio: str, tamanho_maximo_mb: float) -> None:
+    """Remove as entradas usadas há mais tempo até o cache caber no tamanho máximo."""
+    entradas = []
+    for entrada in os.scandir(diretorio):
+        caminho_meta = os.path.join(entrada.path, 'meta.json')
+        if entrada.is_dir() and os.path.exists(caminho_meta):
+            entradas.append((os.path.getmtime(caminho_meta), _tamanho_entrada(entrada.path), entrada.path))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, pasta in sorted(entradas):
+        if total <= tamanho_maximo_mb * 1024**2:
+            break
+        shutil.rmtree(pasta, ignore_errors=True)
+        total -= tamanho
+
+
+def _gravar_parquet(df: pd.DataFrame, caminho: str) -> None:
+    """Grava o DataFrame em Parquet; colunas de tipos misturados vão como no arquivo Arrow do resultado."""
+    import pyarrow.parquet as pq
+    try:
+        from .process_runner import colunas_misturadas, tabela_arrow
+    except ImportError:
+        from core.process_runner import colunas_misturadas, tabela_arrow
+    pq.write_table(tabela_arrow(df, misturadas=colunas_misturadas(df)), caminho)
+
+
+def _ler_parquet(caminho: str) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+    try:
+        from .process_runner import restaurar_colunas_misturadas
+    except ImportError:
+        from core.process_runner import restaurar_colunas_misturadas
+    tabela = pq.read_table(caminho)
+    return restaurar_colunas_misturadas(tabela.to_pandas(), tabela.schema)
+
+
+def buscar_resultado(chave: str, diretorio: str | None = None) -> dict | None:
+    """
+    Devolve o resultado guardado para a chave (no formato de comparar_dataframes, sem
+    'desempenho'), ou None se não houver. Marca a entrada como usada agora.
+    """
+    pasta = os.path.join(diretorio or DIRETORIO_CACHE_PADRAO, chave)
+    caminho_meta = os.path.join(pasta, 'meta.json')
+    if not os.path.exists(caminho_meta):
+        return None
+    try:
+        with open(caminho_meta, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        resultados = meta['resultados']
+        resultados['dataframe_merged'] = _ler_parquet(os.path.join(pasta, 'detalhes.parquet'))
+        resultados['resumo_por_dimensao'] = {
+            dimensao: _ler_parquet(os.path.join(pasta, arquivo))
+            for dimensao, arquivo in meta['arquivos_dimensoes'].items()
+        }
+        resultados['maiores_divergencias'] = (_ler_parquet(os.path.join(pasta, meta['arquivo_maiores']))
+                                              if meta.get('arquivo_maiores') else pd.DataFrame())
+        os.utime(caminho_meta) # Último uso, para a remoção LRU
+        return resultados
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def guardar_resultado(chave: str, resultados: dict, diretorio: str | None = None,
+                      tamanho_maximo_mb: float = TAMANHO_MAXIMO_CACHE_MB, callback_log=None) -> bool:
+    """
+    Guarda o resultado de um confronto no cache e remove as entradas excedentes.
+
+    Args:
+        chave (str): A chave de chave_cache.
+        resultados (dict): O retorno de comparar_dataframes / comparar_blocos_ordenados.
+        diretorio (str, optional): Pasta do cache. Defaults to DIRETORIO_CACHE_PADRAO.
+        tamanho_maximo_mb (float, optional): Tamanho máximo do cache em MB.
+        callback_log (callable, optional): Recebe a mensagem com o motivo quando o
+            resultado não é guardado.
+
+    Returns:
+        bool: True se o resultado foi guardado. Sem pyarrow (necessário para o Parquet),
+            o cache fica desativado e retorna False.
+    """
+    log = callback_log or (lambda texto: None)
+    if not pyarrow_disponivel():
+        log("[Cache] Resultado não guardado: o cache requer pyarrow.")
+        return False
+    diretorio = diretorio or DIRETORIO_CACHE_PADRAO
+    pasta = os.path.join(diretorio, chave)
+    if os.path.exists(os.path.join(pasta, 'meta.json')):
+        return True
+    # Escreve em uma pasta temporária e renomeia no fim: uma entrada nunca fica pela metade
+    pasta_temporaria = f"{pasta}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(pasta_temporaria, exist_ok=True)
+        _gravar_parquet(resultados['dataframe_merged'], os.path.join(pasta_temporaria, 'detalhes.parquet'))
+        arquivos_dimensoes = {}
+        for indice, (dimensao, df_dimensao) in enumerate((resultados.get('resumo_por_dimensao') or {}).items()):
+            arquivos_dimensoes[dimensao] = f"dimensao_{indice}.parquet"
+            _gravar_parquet(df_dimensao, os.path.join(pasta_temporaria, arquivos_dimensoes[dimensao]))
+        arquivo_maiores = None
+        df_maiores = resultados.get('maiores_divergencias')
+        if df_maiores is not None and not df_maiores.empty:
+            arquivo_maiores = 'maiores_divergencias.parquet'
+            _gravar_parquet(df_maiores, os.path.join(pasta_temporaria, arquivo_maiores))
+        meta = {
+            'versao': VERSAO_CACHE,
+            'criado_em': time.time(),
+            'arquivos_dimensoes': arquivos_dimensoes,
+            'arquivo_maiores': arquivo_maiores,
+            'resultados': {k: v for k, v in resultados.items()
+                           if k not in ['dataframe_merged', 'resumo_por_dimensao', 'maiores_divergencias', 'desempenho']},
+        }
+        with open(os.path.join(pasta_temporaria, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=_valor_json)
+        os.replace(pasta_temporaria, pasta)
+        _remover_excedentes(diretorio, tamanho_maximo_mb)
+        return True
+    except Exception as e:
+        log(f"[Cache] Resultado não guardado: {type(e).__name__}: {e}")
+        shutil.rmtree(pasta_temporaria, ignore_errors=True)
+        return False
+
+
+def limpar_cache(diretorio: str | None = None) -> None:
+    """Apaga todas as entradas do cache."""
+    shutil.rmtree(diretorio or DIRETORIO_CACHE_PADRAO, ignore_errors=True)
@@ -0,0 +1,121 @@
+# core/result_sinks.py
+
+import gzip
+import os
+import sqlite3
+
+import pandas as pd
+
+try:
+    from .report_generator import gerar_relatorio_excel
+    from .performance_monitor import etapa_monitorada
+except ImportError:
+    from core.report_generator import gerar_relatorio_excel
+    from core.performance_monitor import etapa_monitorada
+
+# Linhas escritas por vez: limita a memória extra durante a escrita
+TAMANHO_LOTE_PADRAO = 200_000
+
+
+def _colunas_divergencia(df: pd.DataFrame) -> list[str]:
+    return [c for c in df.columns if str(c).endswith('_DiffAbs_Linha')]
+
+
+def escrever_parquet(df: pd.DataFrame, caminho: str, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> None:
+    """Escreve o DataFrame em Parquet, um row group por lote (requer pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.Schema.from_pandas(df.iloc[0:0], preserve_index=False)
+    with pq.ParquetWriter(caminho, esquema, compression='zstd') as escritor:
+        for inicio in range(0, max(len(df), 1), tamanho_lote):
+            lote = df.iloc[inicio:inicio + tamanho_lote]
+            escritor.write_table(pa.Table.from_pandas(lote, schema=esquema, preserve_index=False))
+
+
+def escrever_csv_gz(df: pd.DataFrame, caminho: str, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> None:
+    """Escreve o DataFrame em CSV compactado com gzip, em lotes (separador ';', decimal ',')."""
+    with gzip.open(caminho, 'wt', encoding='utf-8', newline='') as arquivo:
+        for inicio in range(0, max(len(df), 1), tamanho_lote):
+            df.iloc[inicio:inicio + tamanho_lote].to_csv(
+                arquivo, index=False, header=(inicio == 0), sep=';', decimal=','
+            )
+
+
+def escrever_sqlite(df: pd.DataFrame, caminho: str, colunas_indice: list[str] | None = None,
+                    resumo: list[dict] | None = None, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> None:
+    """
+    Escreve o resultado em um banco SQLite (tabela 'dados_detalhados'), com índices
+    nas colunas chave e nas colunas de divergência, e o resumo na tabela 'resumo_comparacao'.
+    """
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute("PRAGMA journal_mode = OFF")
+        conexao.execute("PRAGMA synchronous = OFF")
+        for inicio in range(0, max(len(df), 1), tamanho_lote):
+            df.iloc[inicio:inicio + tamanho_lote].to_sql(
+                'dados_detalhados', conexao, index=False, if_exists='replace' if inicio == 0 else 'append'
+            )
+        # Índices criados depois da carga (bem mais rápido que manter durante os inserts)
+        for i, coluna in enumerate(c for c in (colunas_indice or []) + _colunas_divergencia(df) if c in df.columns):
+            conexao.execute(f'CREATE INDEX IF NOT EXISTS idx_detalhes_{i} ON dados_detalhados ("{coluna}")')
+        if resumo:
+            pd.DataFrame(resumo).to_sql('resumo_comparacao', conexao, index=False, if_exists='replace')
+
+
+# Formatos de saída suportados para os dados detalhados, por extensão do arquivo
+DESTINOS_DETALHES = {
+    '.parquet': escrever_parquet,
+    '.csv.gz': escrever_csv_gz,
+    '.sqlite': escrever_sqlite,
+}
+
+
+def extensao_destino(caminho: str) -> str | None:
+    """Retorna a extensão de destino reconhecida ('.xlsx', '.parquet', '.csv.gz', '.sqlite') ou None."""
+    caminho_min = caminho.lower()
+    for extensao in ['.xlsx', *DESTINOS_DETALHES]:
+        if caminho_min.endswith(extensao):
+            return extensao
+    return None
+
+
+def caminho_resumo_excel(caminho_detalhes: str) -> str:
+    """Caminho do resumo em Excel que acompanha um arquivo de detalhes não-Excel."""
+    extensao = extensao_destino(caminho_detalhes) or os.path.splitext(caminho_detalhes)[1]
+    return caminho_detalhes[:len(caminho_detalhes) - len(extensao)] + "_resumo.xlsx"
+
+
+def salvar_resultados(dados_comparacao: dict, caminho_saida: str) -> bool:
+    """
+    Salva o resultado da comparação no formato indicado pela extensão de 'caminho_saida'.
+
+    Para '.xlsx', gera o relatório completo (abas de detalhes divididas se passarem do
+    limite de linhas do Excel). Para '.parquet', '.csv.gz' ou '.sqlite', os dados
+    detalhados vão para esse arquivo e o resumo continua em um Excel pequeno ao lado
+    ('<nome>_resumo.xlsx').
+
+    Returns:
+        bool: True se tudo foi salvo com sucesso.
+    """
+    extensao = extensao_destino(caminho_saida)
+    if extensao == '.xlsx':
+        return gerar_relatorio_excel(dados_comparacao, caminho_saida)
+    if extensao not in DESTINOS_DETALHES or not dados_comparacao or 'dataframe_merged' not in dados_comparacao:
+        return False
+
+    try:
+        df_detalhes = dados_comparacao['dataframe_merged']
+        with etapa_monitorada(dados_comparacao.get('desempenho'), f"Relatório: detalhes em {extensao}", len(df_detalhes)):
+            if extensao == '.sqlite':
+                colunas_chave = dados_comparacao.get('colunas_chave_a', []) + dados_comparacao.get('colunas_chave_b', [])
+                escrever_sqlite(df_detalhes, caminho_saida, list(dict.fromkeys(colunas_chave)),
+                                dados_comparacao.get('resumo_por_par'))
+            else:
+                DESTINOS_DETALHES[extensao](df_detalhes, caminho_saida)
+        return gerar_relatorio_excel(dados_comparacao, caminho_resumo_excel(caminho_saida), incluir_detalhes=False)
+    except Exception as e:
+        # print(f"Ocorreu um erro ao salvar os resultados em '{caminho_saida}': {e}")
+        import traceback; traceback.print_exc()
+        return False
@@ -0,0 +1,591 @@
+# core/service.py
+#
+# Modo serviço: um processo de longa duração que já tem pandas, openpyxl e o core
+# importados e guarda em memória os arquivos lidos e os esquemas (cabeçalhos), para que
+# uma sequência de confrontos (ex: a automação do fechamento do mês) não pague a
+# inicialização do Python, as importações e a leitura dos mesmos arquivos a cada job.
+#
+# O serviço fala HTTP/JSON só em 127.0.0.1, com a biblioteca padrão. Ao iniciar, grava a
+# porta e um token aleatório em ARQUIVO_SERVICO (legível só pelo usuário); os clientes
+# (a GUI e a linha de comando abaixo) leem o arquivo e mandam o token em cada requisição.
+#
+#   GET  /status     -> confrontos executados e ocupação do cache
+#   POST /esquema    {'caminho'} -> esquema do arquivo (ler_esquema), do cache se não mudou
+#   POST /confronto  {'config', 'saida'} -> linhas JSON com o log, o progresso e o resultado
+#   POST /encerrar   -> encerra o serviço
+#
+# Os confrontos rodam um por vez (os pedidos seguintes esperam na fila). Com 'saida', o
+# próprio serviço grava o relatório; sem ela (GUI), as tabelas do resultado voltam em
+# arquivos Arrow IPC, como em executar_em_processo.
+#
+# Linha de comando:
+#   python -m core.service iniciar [--porta 8765] [--memoria-mb 2048]
+#   python -m core.service confronto perfil.json relatorio.xlsx
+#   python -m core.service status | encerrar
+
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from .process_runner import ErroConfiguracao, _remover_arquivo
+except ImportError:
+    from core.process_runner import ErroConfiguracao, _remover_arquivo
+
+ARQUIVO_SERVICO = os.path.join(os.path.expanduser('~'), '.dataanalyzer', 'servico.json')
+TAMANHO_CACHE_DADOS_MB = 2048
+# Importados ao iniciar o serviço, para o primeiro confronto não pagar por eles
+MODULOS_PRE_CARREGADOS = ['pandas', 'numpy', 'openpyxl', 'pyarrow', 'core.excel_parser', 'core.data_comparator',
+                          'core.report_generator', 'core.result_sinks', 'core.process_runner']
+
+
+class ServicoIndisponivel(Exception):
+    """Nenhum serviço respondendo no endereço de ARQUIVO_SERVICO."""
+
+
+class CacheDados:
+    """
+    Cache em memória dos arquivos já carregados e dos esquemas, com remoção dos usados há
+    mais tempo (LRU) quando o total passa de tamanho_maximo_mb.
+
+    Uma entrada vale para o arquivo com o mesmo tamanho e data de modificação, lido com as
+    mesmas colunas, tipos, filtros e esquema de colunas. O semi-join (filtro_chaves) muda a
+    cada confronto, por isso é aplicado sobre a cópia guardada, e não na leitura.
+    """
+
+    def __init__(self, tamanho_maximo_mb: float = TAMANHO_CACHE_DADOS_MB):
+        self.tamanho_maximo = tamanho_maximo_mb * 1024**2
+        self._dados = OrderedDict() # chave -> (parâmetros, DataFrame, bytes)
+        self._esquemas = {}
+        self._lock = threading.Lock()
+        self.acertos, self.faltas, self.descartes = 0, 0, 0
+
+    @staticmethod
+    def _identidade(caminho: str) -> tuple:
+        info = os.stat(caminho)
+        return (os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+
+    def ler_esquema(self, caminho: str) -> dict | None:
+        """ler_esquema do excel_parser, lido de novo só se o arquivo mudou."""
+        try:
+            from .excel_parser import ler_esquema
+        except ImportError:
+            from core.excel_parser import ler_esquema
+        identidade = self._identidade(caminho)
+        with self._lock:
+            esquema = self._esquemas.get(identidade)
+        if esquema is None:
+            esquema = ler_esquema(caminho)
+            if esquema is not None:
+                with self._lock:
+                    self._esquemas[identidade] = esquema
+        return esquema
+
+    def _procurar(self, identidade, colunas, demais) -> 'pd.DataFrame | None':
+        # A mesma leitura, ou uma com todas as colunas pedidas (ex: o arquivo inteiro)
+        with self._lock:
+            for chave, (parametros, df, _) in reversed(self._dados.items()):
+                if parametros[0] != identidade or parametros[2] != demais:
+                    continue
+                if parametros[1] == colunas or parametros[1] is None or (colunas and set(colunas) <= set(parametros[1])):
+                    self._dados.move_to_end(chave)
+                    if colunas is not None and list(df.columns) != list(colunas):
+                        df = df[[coluna for coluna in df.columns if coluna in set(colunas)]]
+                    return df
+        return None
+
+    def _guardar(self, parametros, df) -> None:
+        tamanho = int(df.memory_usage(deep=True).sum())
+        if tamanho > self.tamanho_maximo:
+            return
+        chave = json.dumps(parametros, default=str)
+        with self._lock:
+            self._dados[chave] = (parametros, df, tamanho)
+            self._dados.move_to_end(chave)
+            while sum(entrada[2] for entrada in self._dados.values()) > self.tamanho_maximo:
+                self._dados.popitem(last=False)
+                self.descartes += 1
+
+    def carregar(self, caminho_arquivo: str, colunas_para_ler: list = None, dtype_backend: str | None = None,
+                 filtros: list[dict] | None = None, tamanho_bloco: int | None = None,
+                 esquema_colunas: dict | None = None, filtro_chaves=None, callback_linhas=None):
+        """
+        Mesmos argumentos e retorno de carregar_dados_excel, devolvendo a leitura guardada
+        quando houver. O DataFrame devolvido é uma cópia rasa: com o Copy-on-Write do
+        pandas, alterações feitas pelo confronto não chegam à cópia guardada.
+        """
+        try:
+            from .excel_parser import carregar_dados_excel
+        except ImportError:
+            from core.excel_parser import carregar_dados_excel
+
+        identidade = self._identidade(caminho_arquivo)
+        colunas = list(colunas_para_ler) if colunas_para_ler is not None else None
+        demais = json.loads(json.dumps([dtype_backend, filtros, esquema_colunas], sort_keys=True, default=str))
+        df = self._procurar(identidade, colunas, demais)
+        if df is None:
+            self.faltas += 1
+            df = carregar_dados_excel(caminho_arquivo, colunas, dtype_backend=dtype_backend, filtros=filtros,
+                                      tamanho_bloco=tamanho_bloco, esquema_colunas=esquema_colunas,
+                                      callback_linhas=callback_linhas)
+            if df is None:
+                return None
+            self._guardar([identidade, colunas, demais], df)
+        else:
+            self.acertos += 1
+        if filtro_chaves is not None:
+            return df[filtro_chaves.mascara(df)]
+        return df.copy(deep=False)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {'arquivos': len(self._dados), 'esquemas': len(self._esquemas),
+                    'memoria_mb': round(sum(entrada[2] for entrada in self._dados.values()) / 1024**2, 1),
+                    'limite_mb': round(self.tamanho_maximo / 1024**2, 1),
+                    'acertos': self.acertos, 'faltas': self.faltas, 'descartes': self.descartes}
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._dados.clear()
+            self._esquemas.clear()
+
+
+def _valor_json(valor):
+    # Escalares NumPy (totais do resumo) viram números Python
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+
+def _linha_json(mensagem: dict) -> bytes:
+    return (json.dumps(mensagem, ensure_ascii=False, default=_valor_json) + "\n").encode('utf-8')
+
+
+def _gravar_tabelas(resultados: dict, prefixo: str) -> dict:
+    """
+    Grava em arquivos Arrow IPC ('<prefixo><item>.arrow') os DataFrames do resultado (e os
+    dicionários de DataFrames, como os resumos por dimensão), tirando-os de 'resultados'.
+
+    Returns:
+        dict: {item: caminho} ou {item: {nome: caminho}}, para _ler_tabelas.
+    """
+    import pandas as pd
+    try:
+        from .process_runner import escrever_arrow_ipc
+    except ImportError:
+        from core.process_runner import escrever_arrow_ipc
+
+    tabelas = {}
+    for item, valor in list(resultados.items()):
+        if isinstance(valor, pd.DataFrame):
+            tabelas[item] = f"{prefixo}{item}.arrow"
+            escrever_arrow_ipc(resultados.pop(item), tabelas[item])
+        elif isinstance(valor, dict) and valor and all(isinstance(v, pd.DataFrame) for v in valor.values()):
+            tabelas[item] = {}
+            for indice, (nome, df) in enumerate(resultados.pop(item).items()):
+                tabelas[item][nome] = f"{prefixo}{item}_{indice}.arrow"
+                escrever_arrow_ipc(df, tabelas[item][nome])
+    return tabelas
+
+
+def _caminhos_tabelas(tabelas: dict) -> list[str]:
+    return [caminho for valor in tabelas.values() for caminho in (valor.values() if isinstance(valor, dict) else [valor])]
+
+
+def _ler_tabelas(tabelas: dict, resultados: dict) -> None:
+    """Devolve a 'resultados' as tabelas de _gravar_tabelas: o detalhe mapeado em memória, as demais lidas e apagadas."""
+    import pyarrow as pa
+    try:
+        from .process_runner import mapear_arrow_ipc, restaurar_colunas_misturadas
+    except ImportError:
+        from core.process_runner import mapear_arrow_ipc, restaurar_colunas_misturadas
+
+    def ler(caminho):
+        with pa.memory_map(caminho, 'r') as origem:
+            tabela = pa.ipc.open_file(origem).read_all()
+            df = restaurar_colunas_misturadas(tabela.to_pandas(), tabela.schema)
+        _remover_arquivo(caminho)
+        return df
+
+    for item, caminho in tabelas.items():
+        if item == 'dataframe_merged':
+            resultados[item] = mapear_arrow_ipc(caminho)
+            resultados['arquivo_resultado'] = caminho # Apagado por liberar_resultado
+        elif isinstance(caminho, dict):
+            resultados[item] = {nome: ler(caminho_tabela) for nome, caminho_tabela in caminho.items()}
+        else:
+            resultados[item] = ler(caminho)
+
+
+class Servico:
+    """Estado do serviço: o cache de dados e a fila (um confronto por vez)."""
+
+    def __init__(self, memoria_mb: float = TAMANHO_CACHE_DADOS_MB, diretorio_temporario: str | None = None):
+        self.cache = CacheDados(memoria_mb)
+        self.diretorio_temporario = diretorio_temporario
+        self.iniciado_em = time.time()
+        self.confrontos = 0
+        self.em_andamento = False
+        self._lock_confronto = threading.Lock()
+
+    def status(self) -> dict:
+        return {'pid': os.getpid(), 'iniciado_em': self.iniciado_em, 'confrontos': self.confrontos,
+                'em_andamento': self.em_andamento, 'cache': self.cache.estatisticas()}
+
+    def confronto(self, config: dict, saida: str | None, enviar, cancelado) -> None:
+        """
+        Executa um confronto e manda cada mensagem (log, progresso, resultado ou erro) por
+        'enviar', na forma das mensagens de executar_em_processo.
+        """
+        try:
+            from .process_runner import executar_confronto
+            from .result_sinks import salvar_resultados, extensao_destino, caminho_resumo_excel
+        except ImportError:
+            from core.process_runner import executar_confronto
+            from core.result_sinks import salvar_resultados, extensao_destino, caminho_resumo_excel
+
+        config['pares_mapeados'] = [tuple(par) for par in config.get('pares_mapeados') or []]
+        if not self._lock_confronto.acquire(blocking=False):
+            enviar({'tipo': 'log', 'texto': "[Serviço] Aguardando o confronto anterior terminar..."})
+            self._lock_confronto.acquire()
+        self.em_andamento = True
+        try:
+            resultados = executar_confronto(config, lambda texto: enviar({'tipo': 'log', 'texto': texto}),
+                                            lambda etapa, texto: enviar({'tipo': 'progresso', 'etapa': etapa,
+                                                                         'texto': texto}),
+                                            cancelado, cache_dados=self.cache)
+            if resultados is None:
+                enviar({'tipo': 'cancelado'})
+                return
+            self.confrontos += 1
+            monitor = resultados.pop('desempenho')
+            if saida:
+                resultados['desempenho'] = monitor
+                if not salvar_resultados(resultados, saida):
+                    raise RuntimeError(f"Falha ao gerar o relatório em '{saida}'.")
+                extensao = extensao_destino(saida) or ''
+                monitor.salvar_json(saida[:len(saida) - len(extensao)] + ".desempenho.json")
+                enviar({'tipo': 'resultado', 'caminho': saida,
+                        'caminho_resumo': caminho_resumo_excel(saida) if extensao != '.xlsx' else None,
+                        'linhas_detalhe': len(resultados['dataframe_merged']),
+                        'resumo_por_par': resultados.get('resumo_por_par'), 'tempo_total': monitor.tempo_total()})
+                return
+            prefixo = os.path.join(self.diretorio_temporario or tempfile.gettempdir(),
+                                   f"confronto_servico_{uuid.uuid4().hex[:12]}_")
+            with monitor.etapa("Gravar resultado (Arrow IPC)", len(resultados['dataframe_merged'])):
+                tabelas = _gravar_tabelas(resultados, prefixo)
+            enviar({'tipo': 'resultado', 'resultados': resultados, 'tabelas': tabelas,
+                    'etapas_desempenho': monitor.etapas})
+            if cancelado(): # O cliente desistiu: ninguém vai ler (nem apagar) os arquivos
+                for caminho in _caminhos_tabelas(tabelas): _remover_arquivo(caminho)
+        except ErroConfiguracao as e:
+            enviar({'tipo': 'erro', 'categoria': 'configuracao', 'texto': str(e)})
+        except MemoryError:
+            enviar({'tipo': 'erro', 'categoria': 'memoria', 'texto': ""})
+        except Exception as e:
+            import traceback
+            enviar({'tipo': 'erro', 'categoria': 'outro', 'texto': f"{e}\n{traceback.format_exc()}"})
+        finally:
+            self.em_andamento = False
+            self._lock_confronto.release()
+
+
+class _ManipuladorServico(BaseHTTPRequestHandler):
+    """Uma requisição HTTP ao serviço; self.server.servico e self.server.token vêm de iniciar_servico."""
+
+    def log_message(self, formato, *args):
+        print(f"[Serviço] {self.address_string()} {formato % args}")
+
+    def log_request(self, codigo='-', tamanho='-'):
+        # Requisições atendidas (ex.: o /status consultado pela GUI) só com --detalhado; erros sempre
+        if self.server.detalhado or not isinstance(codigo, int) or codigo >= 400:
+            super().log_request(codigo, tamanho)
+
+    def _responder_json(self, dados: dict, codigo: int = 200) -> None:
+        corpo = _linha_json(dados)
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _autorizado(self) -> bool:
+        if hmac.compare_digest(self.headers.get('X-Token', ''), self.server.token):
+            return True
+        self._responder_json({'erro': "Token inválido."}, 403)
+        return False
+
+    def do_GET(self):
+        if not self._autorizado(): return
+        if self.path == '/status':
+            return self._responder_json(self.server.servico.status())
+        self._responder_json({'erro': f"Rota desconhecida: {self.path}"}, 404)
+
+    def do_POST(self):
+        if not self._autorizado(): return
+        try:
+            pedido = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        except ValueError:
+            return self._responder_json({'erro': "Corpo da requisição não é um JSON válido."}, 400)
+
+        if self.path == '/esquema':
+            caminho = pedido.get('caminho') or ''
+            esquema = self.server.servico.cache.ler_esquema(caminho) if os.path.exists(caminho) else None
+            return self._responder_json({'esquema': esquema})
+        if self.path == '/encerrar':
+            self._responder_json({'encerrando': True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != '/confronto':
+            return self._responder_json({'erro': f"Rota desconhecida: {self.path}"}, 404)
+        if not isinstance(pedido.get('config'), dict):
+            return self._responder_json({'erro': "Informe a configuração do confronto em 'config'."}, 400)
+
+        # Resposta em linhas JSON, enviadas à medida que o confronto avança; se o cliente
+        # fechar a conexão (cancelou), a próxima escrita falha e o confronto é interrompido
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        desconectado = threading.Event()
+
+        def enviar(mensagem):
+            if desconectado.is_set(): return
+            try:
+                self.wfile.write(_linha_json(mensagem))
+                self.wfile.flush()
+            except OSError:
+                desconectado.set()
+
+        self.server.servico.confronto(pedido['config'], pedido.get('saida'), enviar, desconectado.is_set)
+
+
+def iniciar_servico(porta: int = 0, memoria_mb: float = TAMANHO_CACHE_DADOS_MB,
+                    arquivo_servico: str = ARQUIVO_SERVICO, callback_pronto=None, detalhado: bool = False) -> None:
+    """
+    Inicia o serviço em 127.0.0.1 e atende até receber /encerrar (ou Ctrl+C).
+
+    Args:
+        porta (int, optional): Porta TCP; 0 escolhe uma livre. Defaults to 0.
+        memoria_mb (float, optional): Limite do cache de dados em memória.
+        arquivo_servico (str, optional): Onde gravar a porta e o token para os clientes.
+        callback_pronto (callable, optional): Chamado com a porta quando o serviço começa a atender.
+        detalhado (bool, optional): Registra no console todas as requisições, não só as com erro.
+            Defaults to False.
+    """
+    import importlib
+    import secrets
+
+    inicio = time.perf_counter()
+    for nome_modulo in MODULOS_PRE_CARREGADOS:
+        try:
+            importlib.import_module(nome_modulo)
+        except ImportError:
+            pass # O erro real aparecerá (e será tratado) no primeiro uso
+    print(f"[Serviço] Bibliotecas carregadas em {time.perf_counter() - inicio:.1f} s.")
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), _ManipuladorServico)
+    servidor.daemon_threads = True
+    servidor.servico = Servico(memoria_mb)
+    servidor.token = secrets.token_hex(16)
+    servidor.detalhado = detalhado
+    porta = servidor.server_address[1]
+
+    os.makedirs(os.path.dirname(arquivo_servico), exist_ok=True)
+    descritor = os.open(arquivo_servico, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+        json.dump({'porta': porta, 'token': servidor.token, 'pid': os.getpid()}, f)
+    print(f"[Serviço] Atendendo em http://127.0.0.1:{porta} (cache de dados de até {memoria_mb:,.0f} MB).")
+    if callback_pronto: callback_pronto(porta)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        try:
+            with open(arquivo_servico, 'r', encoding='utf-8') as f:
+                if json.load(f).get('pid') == os.getpid():
+                    os.remove(arquivo_servico)
+        except (OSError, ValueError):
+            pass
+        print("[Serviço] Encerrado.")
+
+
+def _abrir(rota: str, dados: dict | None = None, arquivo_servico: str = ARQUIVO_SERVICO, timeout: float | None = None):
+    """Faz a requisição ao serviço (POST com 'dados', senão GET) e devolve a resposta aberta."""
+    import urllib.error
+    import urllib.request
+
+    try:
+        with open(arquivo_servico, 'r', encoding='utf-8') as f:
+            endereco = json.load(f)
+    except (OSError, ValueError):
+        raise ServicoIndisponivel(f"Serviço não iniciado ({arquivo_servico} não encontrado).")
+    corpo = json.dumps(dados, ensure_ascii=False, default=_valor_json).encode('utf-8') if dados is not None else None
+    requisicao = urllib.request.Request(f"http://127.0.0.1:{endereco['porta']}{rota}", data=corpo,
+                                        headers={'X-Token': endereco['token'], 'Content-Type': 'application/json'})
+    try:
+        return urllib.request.urlopen(requisicao, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Serviço respondeu {e.code}: {e.read().decode('utf-8', 'replace')}")
+    except OSError as e:
+        raise ServicoIndisponivel(f"Serviço não responde na porta {endereco['porta']} ({e}).")
+
+
+def consultar_servico(rota: str, dados: dict | None = None, arquivo_servico: str = ARQUIVO_SERVICO,
+                      timeout: float | None = 5.0) -> dict:
+    """
+    Requisição simples ao serviço (/status, /esquema, /encerrar).
+
+    Raises:
+        ServicoIndisponivel: Se o serviço não estiver rodando.
+    """
+    with _abrir(rota, dados, arquivo_servico, timeout) as resposta:
+        return json.loads(resposta.read())
+
+
+def executar_no_servico(config: dict, callback_log=None, callback_progresso=None, cancelado=None,
+                        saida: str | None = None, arquivo_servico: str = ARQUIVO_SERVICO) -> dict | None:
+    """
+    Executa o confronto no serviço (mesmos argumentos e retorno de executar_em_processo).
+
+    Args:
+        saida (str, optional): Se informado, o serviço grava o relatório nesse caminho e o
+            retorno é só o resumo: {'caminho', 'caminho_resumo', 'linhas_detalhe',
+            'resumo_por_par', 'tempo_total'}. Sem ele, o resultado completo volta com o
+            'dataframe_merged' mapeado de um arquivo Arrow IPC; chame liberar_resultado
+            quando não precisar mais dele.
+
+    Raises:
+        ServicoIndisponivel: Se o serviço não estiver rodando (nada foi executado).
+        ErroConfiguracao, MemoryError, RuntimeError: Como em executar_em_processo.
+    """
+    try:
+        from .performance_monitor import MonitorDesempenho
+    except ImportError:
+        from core.performance_monitor import MonitorDesempenho
+
+    log = callback_log or print
+    progresso = callback_progresso or (lambda etapa, mensagem: log(mensagem))
+    cancelado = cancelado or (lambda: False)
+
+    # O serviço tem outro diretório de trabalho: caminhos relativos viram absolutos
+    config = dict(config)
+    for item in ['caminho_a', 'caminho_b']:
+        if config.get(item): config[item] = os.path.abspath(config[item])
+    if config.get('lados'):
+        config['lados'] = [dict(lado, caminho=os.path.abspath(lado['caminho'])) for lado in config['lados']]
+    pedido = {'config': config, 'saida': os.path.abspath(saida) if saida else None}
+
+    mensagem = None
+    with _abrir('/confronto', pedido, arquivo_servico) as resposta:
+        for linha in resposta:
+            mensagem = json.loads(linha)
+            if mensagem['tipo'] == 'log':
+                log(mensagem['texto'])
+            elif mensagem['tipo'] == 'progresso':
+                progresso(mensagem['etapa'], mensagem['texto'])
+            else:
+                break
+            if cancelado():
+                return None # Fechar a conexão interrompe o confronto no serviço
+
+    if mensagem is None or mensagem['tipo'] == 'cancelado':
+        return None
+    if mensagem['tipo'] == 'erro':
+        if mensagem['categoria'] == 'configuracao': raise ErroConfiguracao(mensagem['texto'])
+        if mensagem['categoria'] == 'memoria': raise MemoryError()
+        raise RuntimeError(f"Erro no serviço: {mensagem['texto']}")
+    if mensagem['tipo'] != 'resultado':
+        raise RuntimeError("O serviço encerrou a conexão sem devolver o resultado.")
+    if saida:
+        return {item: valor for item, valor in mensagem.items() if item != 'tipo'}
+
+    resultados = mensagem['resultados']
+    monitor = MonitorDesempenho(callback_log=log)
+    monitor.etapas = mensagem['etapas_desempenho']
+    with monitor.etapa("Mapear resultado (Arrow IPC)") as registro:
+        _ler_tabelas(mensagem['tabelas'], resultados)
+        registro['linhas_saida'] = len(resultados['dataframe_merged'])
+    resultados['desempenho'] = monitor
+    return resultados
+
+
+def _carregar_config(caminho_json: str) -> dict | None:
+    """Configuração de um perfil salvo pela GUI (com os esquemas) ou de um JSON só com a configuração."""
+    try:
+        from .job_profiles import carregar_perfil
+    except ImportError:
+        from core.job_profiles import carregar_perfil
+    perfil = carregar_perfil(caminho_json)
+    if perfil is not None:
+        return dict(perfil['config'], esquemas=perfil['esquemas'])
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def main(argumentos: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m core.service', description="Serviço local de confrontos.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    iniciar = comandos.add_parser('iniciar', help="Inicia o serviço e atende até 'encerrar'.")
+    iniciar.add_argument('--porta', type=int, default=0, help="Porta em 127.0.0.1 (padrão: uma livre).")
+    iniciar.add_argument('--memoria-mb', type=float, default=TAMANHO_CACHE_DADOS_MB,
+                         help=f"Limite do cache de arquivos em memória (padrão: {TAMANHO_CACHE_DADOS_MB} MB).")
+    iniciar.add_argument('--detalhado', '--verbose', action='store_true',
+                         help="Registra todas as requisições (padrão: só as que terminam em erro).")
+    confronto = comandos.add_parser('confronto', help="Executa um perfil de trabalho e grava o relatório.")
+    confronto.add_argument('perfil', help="Perfil salvo pela GUI (.json) ou JSON com a configuração.")
+    confronto.add_argument('saida', help="Relatório (.xlsx, .parquet, .csv.gz ou .sqlite).")
+    esquema = comandos.add_parser('esquema', help="Mostra as colunas e os tipos de um arquivo.")
+    esquema.add_argument('caminho')
+    comandos.add_parser('status', help="Mostra os confrontos executados e o uso do cache.")
+    comandos.add_parser('encerrar', help="Encerra o serviço.")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'iniciar':
+        iniciar_servico(args.porta, args.memoria_mb, detalhado=args.detalhado)
+        return 0
+    try:
+        if args.comando == 'confronto':
+            config = _carregar_config(args.perfil)
+            if config is None:
+                print(f"Perfil inválido: {args.perfil}")
+                return 1
+            resumo = executar_no_servico(config, saida=args.saida,
+                                         callback_progresso=lambda etapa, texto: print(f"[{etapa}/5] {texto}"))
+            if resumo is None:
+                print("Confronto cancelado.")
+                return 1
+            print(f"Relatório gerado em {resumo['caminho']} ({resumo['linhas_detalhe']:,} linhas de detalhe, "
+                  f"{resumo['tempo_total']:.2f} s no serviço).")
+            if resumo.get('caminho_resumo'): print(f"Resumo: {resumo['caminho_resumo']}")
+        elif args.comando == 'esquema':
+            print(json.dumps(consultar_servico('/esquema', {'caminho': os.path.abspath(args.caminho)})['esquema'],
+                             ensure_ascii=False, indent=2))
+        else:
+            rota = '/status' if args.comando == 'status' else '/encerrar'
+            print(json.dumps(consultar_servico(rota, {} if rota == '/encerrar' else None), ensure_ascii=False, indent=2))
+        return 0
+    except ServicoIndisponivel as e:
+        print(f"{e} Inicie com: python -m core.service iniciar")
+        return 2
+    except (ErroConfiguracao, RuntimeError) as e:
+        print(e)
+        return 1
+    except MemoryError:
+        print("Memória insuficiente no serviço para este confronto.")
+        return 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
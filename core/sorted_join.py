@@ -0,0 +1,263 @@
+# core/sorted_join.py
+#
+# Junção por intercalação (merge-join) para entradas já ordenadas pela chave.
+# Em vez das tabelas hash do pd.merge, as posições de cada chave no outro lado são
+# encontradas com np.searchsorted; a versão em fluxo processa os arquivos bloco a
+# bloco, guardando entre um bloco e outro só as linhas da última chave ainda aberta.
+
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+SUFIXOS_PADRAO = ('_dfA', '_dfB')
+CATEGORIAS_ORIGEM = ['left_only', 'right_only', 'both']  # mesmas do indicator do pd.merge
+
+
+class EntradaForaDeOrdem(ValueError):
+    """Um bloco da leitura em fluxo está fora da ordem da chave."""
+
+
+def chaves_ordenadas(df: pd.DataFrame, colunas_chave: list[str]) -> bool:
+    """
+    Indica se o DataFrame está em ordem crescente pelas colunas chave (ordem lexicográfica
+    quando há mais de uma coluna). Chaves nulas ou de tipos misturados retornam False.
+    """
+    if len(df) < 2:
+        return True
+    if df[colunas_chave].isna().to_numpy().any():
+        return False
+    try:
+        if len(colunas_chave) == 1:
+            return bool(df[colunas_chave[0]].is_monotonic_increasing)
+        empatadas = np.ones(len(df) - 1, dtype=bool)  # linhas iguais ao vizinho nas colunas anteriores
+        for coluna in colunas_chave:
+            valores = df[coluna].to_numpy()
+            anterior, seguinte = valores[:-1], valores[1:]
+            if (empatadas & (anterior > seguinte)).any():
+                return False
+            empatadas &= (anterior == seguinte)
+        return True
+    except TypeError:
+        return False
+
+
+def _valores_ordenaveis(serie: pd.Series) -> np.ndarray:
+    """
+    Valores da coluna como array NumPy. Texto vira array de largura fixa ('<U'), que o
+    np.searchsorted compara em C, em vez de comparar objetos Python um a um.
+    """
+    valores = serie.to_numpy()
+    if valores.dtype == object and len(valores) and pd.api.types.is_string_dtype(serie):
+        return valores.astype(str)
+    return valores
+
+
+def _codigos_chave(df_a: pd.DataFrame, df_b: pd.DataFrame,
+                   chaves_a: list[str], chaves_b: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Valores comparáveis da chave de cada lado. Chaves compostas viram um único int64
+    que preserva a ordem lexicográfica (posto de cada coluna nos valores dos dois lados).
+    """
+    if len(chaves_a) == 1:
+        return _valores_ordenaveis(df_a[chaves_a[0]]), _valores_ordenaveis(df_b[chaves_b[0]])
+
+    codigos_a = np.zeros(len(df_a), dtype=np.int64)
+    codigos_b = np.zeros(len(df_b), dtype=np.int64)
+    combinacoes = 1
+    for coluna_a, coluna_b in zip(chaves_a, chaves_b):
+        valores_a, valores_b = _valores_ordenaveis(df_a[coluna_a]), _valores_ordenaveis(df_b[coluna_b])
+        unicos = np.unique(np.concatenate([valores_a, valores_b]))
+        combinacoes *= max(len(unicos), 1)
+        if combinacoes >= 2**62:
+            raise OverflowError("Chave composta com combinações demais para codificar em int64.")
+        codigos_a = codigos_a * len(unicos) + np.searchsorted(unicos, valores_a)
+        codigos_b = codigos_b * len(unicos) + np.searchsorted(unicos, valores_b)
+    return codigos_a, codigos_b
+
+
+def _expandir_pares(chaves_base: np.ndarray, chaves_outro: np.ndarray,
+                    manter_sem_par: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Para cada linha da base (em ordem), as posições das linhas do outro lado com a mesma
+    chave. Linhas sem par recebem -1 se 'manter_sem_par'; caso contrário são descartadas.
+
+    Returns:
+        tuple: (idx_base, idx_outro, inicio, contagens), sendo [inicio, inicio + contagens)
+            o intervalo do outro lado com a chave de cada linha da base.
+    """
+    inicio = np.searchsorted(chaves_outro, chaves_base, side='left')
+    if len(chaves_outro) < 2 or (chaves_outro[1:] != chaves_outro[:-1]).all():
+        # Outro lado sem chaves repetidas (o caso comum): basta conferir a posição encontrada
+        posicao = np.minimum(inicio, max(len(chaves_outro) - 1, 0))
+        contagens = ((inicio < len(chaves_outro)) & (chaves_outro[posicao] == chaves_base)).astype(np.int64) \
+            if len(chaves_outro) else np.zeros(len(chaves_base), dtype=np.int64)
+    else:
+        contagens = np.searchsorted(chaves_outro, chaves_base, side='right') - inicio
+    linhas_saida = np.maximum(contagens, 1) if manter_sem_par else contagens
+
+    idx_base = np.repeat(np.arange(len(chaves_base)), linhas_saida)
+    deslocamento = np.arange(len(idx_base)) - np.repeat(np.cumsum(linhas_saida) - linhas_saida, linhas_saida)
+    idx_outro = np.repeat(inicio, linhas_saida) + deslocamento
+    if manter_sem_par:
+        idx_outro[np.repeat(contagens == 0, linhas_saida)] = -1
+    return idx_base, idx_outro, inicio, contagens
+
+
+def _indices_juncao(chaves_a: np.ndarray, chaves_b: np.ndarray, tipo_join: str) -> tuple[np.ndarray, np.ndarray]:
+    """Posições (A, B) de cada linha do resultado; -1 marca o lado sem par."""
+    if tipo_join == 'right':
+        idx_b, idx_a, _, _ = _expandir_pares(chaves_b, chaves_a, manter_sem_par=True)
+        return idx_a, idx_b
+    idx_a, idx_b, inicio, contagens = _expandir_pares(chaves_a, chaves_b, manter_sem_par=tipo_join in ['left', 'outer'])
+    if tipo_join != 'outer':
+        return idx_a, idx_b
+
+    # Outer: intercala as linhas só de B antes da primeira linha de A com chave maior
+    com_par = contagens > 0
+    # B casado = união dos intervalos [inicio, fim) das linhas de A com par (soma de prefixos, linear)
+    cobertura = np.cumsum(np.bincount(inicio[com_par], minlength=len(chaves_b) + 1)
+                          - np.bincount((inicio + contagens)[com_par], minlength=len(chaves_b) + 1))[:len(chaves_b)]
+    so_b = np.flatnonzero(cobertura == 0)
+    if len(so_b):
+        posicao_a = np.searchsorted(chaves_a, chaves_b[so_b], side='left')
+        posicao_saida = np.searchsorted(idx_a, posicao_a, side='left')  # idx_a é crescente
+        idx_a = np.insert(idx_a, posicao_saida, -1)
+        idx_b = np.insert(idx_b, posicao_saida, so_b)
+    return idx_a, idx_b
+
+
+def _tomar_linhas(df: pd.DataFrame, posicoes: np.ndarray) -> pd.DataFrame:
+    """Linhas nas posições informadas; posição -1 vira uma linha vazia (NaN)."""
+    if (posicoes >= 0).all():
+        return df.take(posicoes).reset_index(drop=True)
+    return pd.DataFrame({coluna: pd.api.extensions.take(df[coluna].array, posicoes, allow_fill=True)
+                         for coluna in df.columns}, columns=df.columns)
+
+
+def juntar_ordenado(df_a: pd.DataFrame, df_b: pd.DataFrame,
+                    chaves_a: list[str], chaves_b: list[str],
+                    tipo_join: str = 'inner', sufixos: tuple[str, str] = SUFIXOS_PADRAO,
+                    indicador: str | None = '_origem_merge') -> pd.DataFrame:
+    """
+    Equivalente a pd.merge(df_a, df_b, left_on=chaves_a, right_on=chaves_b, how=tipo_join,
+    suffixes=sufixos, indicator=indicador) para entradas ordenadas pelas chaves.
+
+    As duas entradas DEVEM estar ordenadas (ver chaves_ordenadas); a ordem não é verificada.
+    O resultado sai ordenado pela chave, como o do pd.merge para entradas ordenadas.
+
+    Raises:
+        TypeError: Se as chaves dos dois lados não forem comparáveis entre si.
+        OverflowError: Se uma chave composta tiver combinações demais para codificar.
+    """
+    codigos_a, codigos_b = _codigos_chave(df_a, df_b, chaves_a, chaves_b)
+    idx_a, idx_b = _indices_juncao(codigos_a, codigos_b, tipo_join)
+
+    # Colunas como no pd.merge: chave com o mesmo nome nos dois lados aparece uma vez só
+    chaves_comuns = [ca for ca, cb in zip(chaves_a, chaves_b) if ca == cb]
+    sobrepostas = (set(df_a.columns) & set(df_b.columns)) - set(chaves_comuns)
+    parte_a = _tomar_linhas(df_a, idx_a).rename(columns={c: f"{c}{sufixos[0]}" for c in sobrepostas})
+    parte_b = _tomar_linhas(df_b.drop(columns=chaves_comuns), idx_b).rename(columns={c: f"{c}{sufixos[1]}" for c in sobrepostas})
+
+    sem_a = idx_a < 0
+    if sem_a.any():
+        for coluna in chaves_comuns:
+            coluna_completa = parte_a[coluna].where(~sem_a, _tomar_linhas(df_b[[coluna]], idx_b)[coluna])
+            if df_a[coluna].dtype == df_b[coluna].dtype and not coluna_completa.isna().any():
+                coluna_completa = coluna_completa.astype(df_a[coluna].dtype)
+            parte_a[coluna] = coluna_completa
+
+    resultado = pd.concat([parte_a, parte_b], axis=1)
+    if indicador:
+        codigos_origem = np.where(sem_a, 1, np.where(idx_b < 0, 0, 2))
+        resultado[indicador] = pd.Categorical.from_codes(codigos_origem, categories=CATEGORIAS_ORIGEM)
+    return resultado
+
+
+def _chave_da_linha(df: pd.DataFrame, colunas_chave: list[str], posicao: int) -> tuple:
+    return tuple(df[coluna].iat[posicao] for coluna in colunas_chave)
+
+
+def _linhas_antes_de(df: pd.DataFrame, colunas_chave: list[str], limite: tuple) -> int:
+    """Quantas linhas (do início de um DataFrame ordenado) têm chave menor que 'limite'."""
+    if len(colunas_chave) == 1:
+        return int(np.searchsorted(df[colunas_chave[0]].to_numpy(), limite[0], side='left'))
+    menor = np.zeros(len(df), dtype=bool)
+    empatada = np.ones(len(df), dtype=bool)
+    for coluna, valor in zip(colunas_chave, limite):
+        valores = df[coluna].to_numpy()
+        menor |= empatada & (valores < valor)
+        empatada &= (valores == valor)
+    return int(menor.sum())
+
+
+def _puxar_bloco(iterador: Iterator[pd.DataFrame], buffer: pd.DataFrame | None,
+                 colunas_chave: list[str], estado: dict, nome_lado: str) -> tuple[pd.DataFrame | None, bool]:
+    """
+    Lê o próximo bloco não vazio, confere se ele continua a ordem da chave e o anexa
+    ao buffer. Retorna (buffer, esgotado).
+    """
+    for bloco in iterador:
+        if len(bloco) == 0:
+            continue
+        primeira = _chave_da_linha(bloco, colunas_chave, 0)
+        if not chaves_ordenadas(bloco, colunas_chave) or (estado['ultima'] is not None and primeira < estado['ultima']):
+            raise EntradaForaDeOrdem(f"O {nome_lado} não está ordenado pelas colunas chave {colunas_chave}.")
+        estado['ultima'] = _chave_da_linha(bloco, colunas_chave, -1)
+        return (bloco if buffer is None or len(buffer) == 0 else pd.concat([buffer, bloco], ignore_index=True)), False
+    return buffer, True
+
+
+def juntar_ordenado_em_fluxo(blocos_a: Iterable[pd.DataFrame], blocos_b: Iterable[pd.DataFrame],
+                             chaves_a: list[str], chaves_b: list[str], tipo_join: str = 'inner',
+                             sufixos: tuple[str, str] = SUFIXOS_PADRAO,
+                             indicador: str | None = '_origem_merge') -> Iterator[pd.DataFrame]:
+    """
+    Junção por intercalação de duas sequências de blocos ordenados pela chave (ex: o
+    retorno de pd.read_csv(..., chunksize=N)), em uma única passada.
+
+    A cada passo, só as chaves menores que a última chave lida no lado mais atrasado
+    estão completas; elas são juntadas e devolvidas, e as linhas restantes ficam no
+    buffer para o próximo bloco. A memória usada é a de um bloco de cada lado mais as
+    linhas repetidas da chave que ficou aberta, independente do tamanho dos arquivos.
+
+    Yields:
+        pd.DataFrame: Partes do resultado, em ordem de chave, com as colunas do pd.merge.
+
+    Raises:
+        EntradaForaDeOrdem: Se algum bloco estiver fora da ordem da chave.
+    """
+    iter_a, iter_b = iter(blocos_a), iter(blocos_b)
+    estado_a, estado_b = {'ultima': None}, {'ultima': None}
+    buffer_a, fim_a = _puxar_bloco(iter_a, None, chaves_a, estado_a, "Arquivo A")
+    buffer_b, fim_b = _puxar_bloco(iter_b, None, chaves_b, estado_b, "Arquivo B")
+    if buffer_a is None: buffer_a = pd.DataFrame(columns=chaves_a)
+    if buffer_b is None: buffer_b = pd.DataFrame(columns=chaves_b)
+
+    while True:
+        if fim_a and fim_b:
+            if len(buffer_a) or len(buffer_b):
+                resultado = juntar_ordenado(buffer_a, buffer_b, chaves_a, chaves_b, tipo_join, sufixos, indicador)
+                if len(resultado): yield resultado
+            return
+
+        # Limite: a menor "última chave lida" entre os lados que ainda têm blocos
+        ultimas = {}
+        if not fim_a: ultimas['a'] = estado_a['ultima']
+        if not fim_b: ultimas['b'] = estado_b['ultima']
+        limite = min(ultimas.values())
+        corte_a = _linhas_antes_de(buffer_a, chaves_a, limite) if len(buffer_a) else 0
+        corte_b = _linhas_antes_de(buffer_b, chaves_b, limite) if len(buffer_b) else 0
+
+        if corte_a == 0 and corte_b == 0:
+            # Nada completo ainda: lê mais do(s) lado(s) parado(s) na chave limite
+            if ultimas.get('a') == limite:
+                buffer_a, fim_a = _puxar_bloco(iter_a, buffer_a, chaves_a, estado_a, "Arquivo A")
+            if ultimas.get('b') == limite:
+                buffer_b, fim_b = _puxar_bloco(iter_b, buffer_b, chaves_b, estado_b, "Arquivo B")
+            continue
+
+        resultado = juntar_ordenado(buffer_a.iloc[:corte_a], buffer_b.iloc[:corte_b],
+                                    chaves_a, chaves_b, tipo_join, sufixos, indicador)
+        buffer_a, buffer_b = buffer_a.iloc[corte_a:], buffer_b.iloc[corte_b:]
+        if len(resultado): yield resultado
@@ -6,21 +6,31 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFileDialog, QComboBox, QMessageBox,
     QGroupBox, QGridLayout, QProgressBar, QTextEdit, QScrollArea, 
-    QLineEdit, QListWidget, QAbstractItemView, QRadioButton
+    QLineEdit, QListWidget, QAbstractItemView, QRadioButton, QDoubleSpinBox, QCheckBox, QSpinBox
 )
 from PyQt6.QtCore import Qt, QDateTime, pyqtSignal, QObject, QThread
 from functools import partial
 
-# Importar funções do nosso módulo core
+# Importar funções do nosso módulo core.
+# Os módulos que dependem de pandas/numpy/openpyxl são importados só no primeiro uso
+# (dentro dos métodos), para a janela abrir rápido; o AquecimentoWorker os pré-carrega.
 try:
-    from core.excel_parser import carregar_dados_excel
-    from core.data_comparator import comparar_dataframes, _aplicar_filtro_df
-    from core.report_generator import gerar_relatorio_excel
+    from core.performance_monitor import MonitorDesempenho
 except ModuleNotFoundError:
     sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-    from core.excel_parser import carregar_dados_excel
-    from core.data_comparator import comparar_dataframes, _aplicar_filtro_df
-    from core.report_generator import gerar_relatorio_excel
+    from core.performance_monitor import MonitorDesempenho
+
+# Formatos de saída oferecidos ao salvar (filtro do diálogo -> extensão)
+FILTROS_SAIDA = {
+    "Excel (*.xlsx)": ".xlsx",
+    "Parquet + resumo Excel (*.parquet)": ".parquet",
+    "CSV compactado + resumo Excel (*.csv.gz)": ".csv.gz",
+    "SQLite + resumo Excel (*.sqlite)": ".sqlite",
+}
+
+# Módulos pesados pré-carregados em segundo plano após a janela aparecer
+MODULOS_AQUECIMENTO = ['numpy', 'pandas', 'openpyxl', 'core.excel_parser', 'core.data_comparator',
+                       'core.report_generator', 'core.result_sinks']
 
 class MappingPairWidget(QWidget):
     remove_pair_requested = pyqtSignal(QWidget)
@@ -57,10 +67,51 @@ class MappingPairWidget(QWidget):
         self.combo_b.clear(); self.combo_b.addItems([""] + cols_b)
         if current_b in [""] + cols_b: self.combo_b.setCurrentText(current_b)
 
+class AquecimentoWorker(QObject):
+    """Importa as dependências pesadas em segundo plano enquanto o usuário configura o confronto."""
+    finished = pyqtSignal(float)
+
+    def run(self):
+        import importlib, time
+        inicio = time.perf_counter()
+        for nome_modulo in MODULOS_AQUECIMENTO:
+            try:
+                importlib.import_module(nome_modulo)
+            except ImportError:
+                pass # O erro real aparecerá (e será tratado) no primeiro uso
+        self.finished.emit(time.perf_counter() - inicio)
+
+
+class EstatisticasWorker(QObject):
+    """Estatísticas das colunas de um arquivo (core/data_profiler.py), em uma passada e em segundo plano."""
+    finished = pyqtSignal(str, object) # lado, perfil (None em caso de erro)
+    progress = pyqtSignal(str)
+
+    def __init__(self, lado: str, caminho: str, colunas_chave: list, esquema_colunas: dict | None):
+        super().__init__()
+        self.lado, self.caminho = lado, caminho
+        self.colunas_chave, self.esquema_colunas = colunas_chave, esquema_colunas
+
+    def run(self):
+        from core.data_profiler import perfilar_arquivo
+        nome, avisadas = os.path.basename(self.caminho), [0]
+
+        def linhas_lidas(n):
+            if n - avisadas[0] >= 1_000_000: # Um aviso por milhão de linhas
+                avisadas[0] = n
+                self.progress.emit(f"[Estatísticas] {nome}: {n:,} linhas lidas...")
+
+        perfil = perfilar_arquivo(self.caminho, colunas_chave=self.colunas_chave or None,
+                                  esquema_colunas=self.esquema_colunas, callback_linhas=linhas_lidas)
+        if perfil is not None: perfil['colunas_chave'] = self.colunas_chave
+        self.finished.emit(self.lado, perfil)
+
+
 class ConfrontoWorker(QObject):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(int, str)
+    log = pyqtSignal(str)
 
     def __init__(self, config: dict):
         super().__init__()
@@ -68,60 +119,46 @@ class ConfrontoWorker(QObject):
         self.is_cancelled = False
 
     def run(self):
-        """O método que executa o trabalho pesado, agora com toda a lógica."""
+        """Executa o confronto (core/process_runner.py), em um processo separado se configurado."""
         try:
-            total_steps = 5
-            # Desempacotar a configuração
-            caminho_a = self.config['caminho_a']
-            caminho_b = self.config['caminho_b']
-            colunas_chave_a = self.config['colunas_chave_a']
-            colunas_chave_b = self.config['colunas_chave_b']
-            pares_mapeados = self.config['pares_mapeados']
-            tipo_join = self.config['tipo_join']
-            filtro_a_info = self.config['filtro_a']
-            filtro_b_info = self.config['filtro_b']
-            
-            # Etapa 1: Carregar Arquivo A
-            self.progress.emit(1, f"Carregando Arquivo A...")
-            if self.is_cancelled: return
-            df_a_original = carregar_dados_excel(caminho_a) # Carrega todas as colunas inicialmente
-            if df_a_original is None: raise RuntimeError("Falha ao carregar Arquivo A.")
-            
-            # Etapa 2: Aplicar Filtro em A
-            self.progress.emit(2, f"Aplicando filtro no Arquivo A...")
-            df_a = _aplicar_filtro_df(df_a_original, filtro_a_info) if filtro_a_info else df_a_original
-            self.log_message(f"Dados de A preparados ({len(df_a)} linhas).")
-            
-            # Etapa 3: Carregar Arquivo B
-            if self.is_cancelled: return
-            self.progress.emit(3, f"Carregando Arquivo B...")
-            df_b_original = carregar_dados_excel(caminho_b)
-            if df_b_original is None: raise RuntimeError("Falha ao carregar Arquivo B.")
-            
-            # Etapa 4: Aplicar Filtro em B
-            self.progress.emit(4, f"Aplicando filtro no Arquivo B...")
-            df_b = _aplicar_filtro_df(df_b_original, filtro_b_info) if filtro_b_info else df_b_original
-            self.log_message(f"Dados de B preparados ({len(df_b)} linhas).")
-
-            # Etapa 5: Comparar DataFrames
-            if self.is_cancelled: return
-            self.progress.emit(5, "Realizando a comparação dos dados...")
-            resultados = comparar_dataframes(
-                df_lado_a=df_a, df_lado_b=df_b,
-                colunas_chave_a=colunas_chave_a, colunas_chave_b=colunas_chave_b,
-                pares_mapeados=pares_mapeados, tipo_join=tipo_join
-            )
+            from core.process_runner import executar_confronto, executar_em_processo, ErroConfiguracao
+
+            argumentos = (self.config, self.log.emit, self.progress.emit, lambda: self.is_cancelled)
+            if self.config.get('usar_servico') and self._servico_disponivel():
+                from core.service import executar_no_servico
+                self.log.emit("Enviando o confronto ao serviço local (arquivos já lidos ficam em memória).")
+                resultados = executar_no_servico(*argumentos)
+            # O cProfile só enxerga o próprio processo: com perfil detalhado, o cálculo fica nesta thread
+            elif self.config.get('processo_separado') and not self.config.get('perfilar'):
+                self.log.emit("Calculando em um processo separado; o resultado volta por um arquivo Arrow mapeado.")
+                resultados = executar_em_processo(*argumentos)
+            else:
+                resultados = executar_confronto(*argumentos)
             if resultados is None:
-                raise RuntimeError("Erro desconhecido durante a comparação dos dados.")
-            
-            self.progress.emit(total_steps, "Processamento concluído. Pronto para gerar relatório.")
+                self.log_message("Confronto cancelado.")
+                return
             self.finished.emit(resultados)
 
+        except ErroConfiguracao as e:
+            self.error.emit(str(e))
+        except MemoryError:
+            # Sem memória: avisa em vez de derrubar a aplicação (o trabalho pode ser refeito com outro plano)
+            self.error.emit("Memória insuficiente para este confronto. Reduza o orçamento de memória, aplique "
+                            "filtros ou use arquivos ordenados pela chave para a leitura em blocos.")
         except Exception as e:
             import traceback
             error_msg = f"Erro na thread de processamento: {e}\n{traceback.format_exc()}"
             self.error.emit(error_msg)
 
+    def _servico_disponivel(self) -> bool:
+        from core.service import consultar_servico, ServicoIndisponivel
+        try:
+            consultar_servico('/status')
+            return True
+        except ServicoIndisponivel as e:
+            self.log.emit(f"[Serviço] {e} Calculando sem o serviço.")
+            return False
+
     def request_cancel(self):
         self.is_cancelled = True
         self.log_message("Worker recebeu solicitação de cancelamento.")
@@ -137,22 +174,44 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("DataAnalyzer - Confronto e Cruzamento de Dados")
         self.setGeometry(100, 100, 950, 950)
         self.setMinimumSize(850, 700)
-        self.df_a_carregado, self.df_b_carregado = None, None
+        self.esquema_a, self.esquema_b = None, None # Colunas e tipos lidos do cabeçalho (ou de um perfil)
+        self.esquema_colunas = None # Dicas de tipo por coluna ({'A': {...}, 'B': {...}}), vindas de um perfil
         self.arquivo_a_path, self.arquivo_b_path = None, None
         self.df_a_cols, self.df_b_cols = [], []
         self.mapping_pair_widgets_list = []
         self.thread, self.worker = None, None
+        self.thread_aquecimento, self.worker_aquecimento = None, None
+        self.threads_estatisticas = {} # lado -> (thread, worker) das estatísticas em andamento
+        self.estatisticas = {'A': None, 'B': None} # Perfil das colunas de cada lado (core/data_profiler.py)
         self._init_ui()
         self.log_message("Aplicação inicializada.")
         self._add_mapping_pair_ui()
     
+    def iniciar_aquecimento(self):
+        """Pré-carrega pandas/openpyxl e o core em uma thread, sem travar a janela."""
+        self.thread_aquecimento = QThread()
+        self.worker_aquecimento = AquecimentoWorker()
+        self.worker_aquecimento.moveToThread(self.thread_aquecimento)
+        self.thread_aquecimento.started.connect(self.worker_aquecimento.run)
+        self.worker_aquecimento.finished.connect(self._on_aquecimento_finished)
+        self.thread_aquecimento.start()
+
+    def _on_aquecimento_finished(self, duracao):
+        self.log_message(f"Bibliotecas de dados carregadas em segundo plano ({duracao:.1f} s).")
+        self.thread_aquecimento.quit()
+        self.thread_aquecimento.wait()
+        self.worker_aquecimento.deleteLater()
+        self.thread_aquecimento, self.worker_aquecimento = None, None
+
     def _create_filter_group(self, side_label):
         group_box = QGroupBox(f"Filtro Lado {side_label}")
         group_box.setCheckable(True); group_box.setChecked(False)
         layout = QGridLayout(group_box)
         label_coluna, combo_coluna = QLabel("Coluna:"), QComboBox()
         label_operador, combo_operador = QLabel("Operador:"), QComboBox()
-        combo_operador.addItems(['=', '!=', '>', '<', '>=', '<=', 'contém', 'não contém', 'começa com', 'termina com', 'é nulo', 'não é nulo'])
+        combo_operador.addItems(['=', '!=', '>', '<', '>=', '<=', 'entre', 'mês =', 'ano =', 'contém', 'não contém', 'começa com', 'termina com', 'é nulo', 'não é nulo'])
+        combo_operador.setToolTip("'>', '<', '>=', '<=' e 'entre' aceitam números ou datas (2024-03-10 ou 10/03/2024).\n"
+                                  "'entre' usa 'início;fim' (inclusivo). 'mês =' aceita 2024-03, 03/2024 ou 3; 'ano =' aceita 2024.")
         label_valor, edit_valor = QLabel("Valor:"), QLineEdit()
 
         def toggle_valor_edit():
@@ -213,6 +272,15 @@ class MainWindow(QMainWindow):
         lado_a_layout.addWidget(self.label_arquivo_a)
         lado_a_layout.addWidget(QLabel("Coluna(s) Chave A:"))
         lado_a_layout.addWidget(self.list_chaves_a)
+        self.btn_estatisticas_a = QPushButton("Estatísticas das Colunas A")
+        self.btn_estatisticas_a.setToolTip("Lê o arquivo uma vez, em blocos, e mostra nulos, valores distintos, repetidos\n"
+                                           "e quantis de cada coluna (passe o mouse sobre a coluna) e da chave selecionada.")
+        self.btn_estatisticas_a.clicked.connect(lambda: self._calcular_estatisticas('A'))
+        self.label_estatisticas_a = QLabel("")
+        self.label_estatisticas_a.setWordWrap(True)
+        self.list_chaves_a.itemSelectionChanged.connect(lambda: self._atualizar_rotulo_estatisticas('A'))
+        lado_a_layout.addWidget(self.btn_estatisticas_a)
+        lado_a_layout.addWidget(self.label_estatisticas_a)
         top_section_layout.addWidget(group_box_a)
         
         # Lado B
@@ -227,6 +295,15 @@ class MainWindow(QMainWindow):
         lado_b_layout.addWidget(self.label_arquivo_b)
         lado_b_layout.addWidget(QLabel("Coluna(s) Chave B:"))
         lado_b_layout.addWidget(self.list_chaves_b)
+        self.btn_estatisticas_b = QPushButton("Estatísticas das Colunas B")
+        self.btn_estatisticas_b.setToolTip("Lê o arquivo uma vez, em blocos, e mostra nulos, valores distintos, repetidos\n"
+                                           "e quantis de cada coluna (passe o mouse sobre a coluna) e da chave selecionada.")
+        self.btn_estatisticas_b.clicked.connect(lambda: self._calcular_estatisticas('B'))
+        self.label_estatisticas_b = QLabel("")
+        self.label_estatisticas_b.setWordWrap(True)
+        self.list_chaves_b.itemSelectionChanged.connect(lambda: self._atualizar_rotulo_estatisticas('B'))
+        lado_b_layout.addWidget(self.btn_estatisticas_b)
+        lado_b_layout.addWidget(self.label_estatisticas_b)
         top_section_layout.addWidget(group_box_b)
         main_layout.addLayout(top_section_layout)
 
@@ -258,7 +335,114 @@ class MainWindow(QMainWindow):
         self.combo_tipo_join.addItems(['inner', 'left', 'right', 'outer'])
         opcoes_layout.addWidget(QLabel("Tipo de Junção (Join):"))
         opcoes_layout.addWidget(self.combo_tipo_join); opcoes_layout.addStretch(1)
+        self.check_apenas_divergencias = QCheckBox("Detalhar só linhas divergentes")
+        self.check_apenas_divergencias.setChecked(True)
+        self.check_apenas_divergencias.setToolTip("Linhas conciliadas entram apenas como contagens e totais no resumo.")
+        self.spin_tolerancia_divergencia = QDoubleSpinBox()
+        self.spin_tolerancia_divergencia.setRange(0.0, 1e9); self.spin_tolerancia_divergencia.setDecimals(2)
+        self.spin_tolerancia_divergencia.setToolTip("Diferenças absolutas até este valor são consideradas conciliadas.")
+        self.check_apenas_divergencias.toggled.connect(self.spin_tolerancia_divergencia.setEnabled)
+        opcoes_layout.addWidget(self.check_apenas_divergencias)
+        opcoes_layout.addWidget(QLabel("Tolerância:")); opcoes_layout.addWidget(self.spin_tolerancia_divergencia)
+        self.spin_maiores_divergencias = QSpinBox()
+        self.spin_maiores_divergencias.setRange(0, 100_000); self.spin_maiores_divergencias.setValue(100)
+        self.spin_maiores_divergencias.setSpecialValueText("Nenhuma")
+        self.spin_maiores_divergencias.setToolTip("Linhas de maior diferença absoluta e de maior diferença percentual\n"
+                                                  "de cada par, na aba Maiores_Divergencias do relatório.")
+        opcoes_layout.addWidget(QLabel("Maiores:")); opcoes_layout.addWidget(self.spin_maiores_divergencias)
+        # Modo monetário exato: somas e diferenças em inteiros na menor unidade (centavos)
+        self.check_valores_exatos = QCheckBox("Valores monetários exatos")
+        self.check_valores_exatos.setToolTip("Soma e compara os valores em inteiros na escala das casas decimais\n"
+                                             "(centavos com 2), sem diferenças falsas por arredondamento do float.")
+        self.spin_casas_decimais = QSpinBox()
+        self.spin_casas_decimais.setRange(0, 6); self.spin_casas_decimais.setValue(2)
+        self.spin_casas_decimais.setSuffix(" casas"); self.spin_casas_decimais.setEnabled(False)
+        self.check_valores_exatos.toggled.connect(self.spin_casas_decimais.setEnabled)
+        opcoes_layout.addWidget(self.check_valores_exatos); opcoes_layout.addWidget(self.spin_casas_decimais)
+        self.check_numeros_br = QCheckBox("Números no formato 1.234,56")
+        self.check_numeros_br.setToolTip("Converte as colunas dos pares na leitura, com vírgula decimal e ponto de milhar.\n"
+                                         "Valores que não puderem ser lidos são contados e informados no console.")
+        opcoes_layout.addWidget(self.check_numeros_br)
+        self.check_tipos_arrow = QCheckBox("Tipos Arrow (menos memória)")
+        self.check_tipos_arrow.setToolTip("Carrega as colunas com tipos pyarrow. Requer o pacote pyarrow.")
+        opcoes_layout.addWidget(self.check_tipos_arrow)
+        from core.compute_backends import motores_disponiveis
+        self.combo_motor_calculo = QComboBox()
+        self.combo_motor_calculo.addItems(motores_disponiveis())
+        self.combo_motor_calculo.setToolTip("DuckDB e Polars leem o CSV direto do disco e usam todos os núcleos.\n"
+                                            "Casamento aproximado, resumo por dimensão, valores exatos e Excel usam o pandas.")
+        opcoes_layout.addWidget(QLabel("Motor:")); opcoes_layout.addWidget(self.combo_motor_calculo)
+        self.spin_processos_calculo = QSpinBox()
+        self.spin_processos_calculo.setRange(0, 256); self.spin_processos_calculo.setValue(1)
+        self.spin_processos_calculo.setSpecialValueText("Automático")
+        self.spin_processos_calculo.setToolTip("Processos do confronto no motor pandas. Com mais de um, os arquivos são\n"
+                                               "repartidos pela chave e cada parte é cruzada em um núcleo.\n"
+                                               "Automático = um por núcleo. Não vale para o casamento aproximado.")
+        opcoes_layout.addWidget(QLabel("Processos:")); opcoes_layout.addWidget(self.spin_processos_calculo)
+        self.edit_trabalhadores = QLineEdit()
+        self.edit_trabalhadores.setPlaceholderText("host:porta, host:porta")
+        self.edit_trabalhadores.setToolTip("Reparte o confronto pela chave entre trabalhadores iniciados com\n"
+                                           "'python -m core.distributed trabalhador' (mesma DATAANALYZER_CHAVE_CLUSTER).\n"
+                                           "Vazio = confronto nesta máquina. Não vale para o casamento aproximado.")
+        opcoes_layout.addWidget(QLabel("Trabalhadores:")); opcoes_layout.addWidget(self.edit_trabalhadores)
+        self.check_entradas_ordenadas = QCheckBox("Arquivos já ordenados pela chave")
+        self.check_entradas_ordenadas.setToolTip("Lê os arquivos em blocos e junta por intercalação, em uma única passada.\n"
+                                                 "Indicado para arquivos grandes exportados em ordem de chave.")
+        opcoes_layout.addWidget(self.check_entradas_ordenadas)
+        self.spin_orcamento_memoria = QSpinBox()
+        self.spin_orcamento_memoria.setRange(0, 1_000_000); self.spin_orcamento_memoria.setSingleStep(512)
+        self.spin_orcamento_memoria.setSuffix(" MB"); self.spin_orcamento_memoria.setSpecialValueText("Automático")
+        self.spin_orcamento_memoria.setToolTip("Memória máxima para o confronto. Acima dela, arquivos ordenados são lidos\n"
+                                               "em blocos. Automático = a memória disponível no momento.")
+        opcoes_layout.addWidget(QLabel("Memória:")); opcoes_layout.addWidget(self.spin_orcamento_memoria)
+        self.check_projetar_colunas = QCheckBox("Só as colunas usadas se faltar memória")
+        self.check_projetar_colunas.setToolTip("Acima do orçamento, carrega só chaves, pares, filtros e dimensões.\n"
+                                               "As demais colunas ficam fora de Dados_Detalhados (listadas no console).")
+        opcoes_layout.addWidget(self.check_projetar_colunas)
+        self.check_usar_cache = QCheckBox("Reaproveitar resultados (cache)")
+        self.check_usar_cache.setChecked(True)
+        self.check_usar_cache.setToolTip("Com os mesmos arquivos (pelo conteúdo) e a mesma configuração, usa o resultado\n"
+                                         "guardado da execução anterior em vez de recalcular.")
+        opcoes_layout.addWidget(self.check_usar_cache)
+        self.check_processo_separado = QCheckBox("Calcular em processo separado")
+        self.check_processo_separado.setChecked(True)
+        self.check_processo_separado.setToolTip("A leitura e a comparação rodam em outro processo, sem travar a janela;\n"
+                                                "o resultado volta por um arquivo Arrow mapeado em memória, sem cópia.")
+        opcoes_layout.addWidget(self.check_processo_separado)
+        self.check_usar_servico = QCheckBox("Enviar ao serviço local")
+        self.check_usar_servico.setToolTip("Executa no serviço iniciado com 'python -m core.service iniciar', que mantém\n"
+                                           "as bibliotecas e os arquivos já lidos em memória entre os confrontos.\n"
+                                           "Se o serviço não estiver rodando, o confronto é feito aqui mesmo.")
+        opcoes_layout.addWidget(self.check_usar_servico)
+        self.check_perfilar = QCheckBox("Capturar perfil detalhado (cProfile)")
+        opcoes_layout.addWidget(self.check_perfilar)
         main_layout.addWidget(group_box_opcoes)
+
+        # RESUMO POR DIMENSÃO (totais por Regiao, Status, mês...)
+        group_box_dimensoes = QGroupBox("Resumo por Dimensão")
+        dimensoes_layout = QHBoxLayout(group_box_dimensoes)
+        self.edit_dimensoes = QLineEdit()
+        self.edit_dimensoes.setPlaceholderText("Ex: Regiao, Status, Data:mes")
+        self.edit_dimensoes.setToolTip("Colunas separadas por vírgula. Cada uma gera uma aba com os totais e\n"
+                                       "diferenças de todos os pares por valor. Use Coluna:mes ou Coluna:ano para datas.")
+        dimensoes_layout.addWidget(QLabel("Agrupar resumo por:")); dimensoes_layout.addWidget(self.edit_dimensoes)
+        main_layout.addWidget(group_box_dimensoes)
+
+        # CASAMENTO APROXIMADO (registros que não casaram pela chave exata)
+        self.group_box_aproximado = QGroupBox("Casamento Aproximado dos Registros sem Par")
+        self.group_box_aproximado.setCheckable(True); self.group_box_aproximado.setChecked(False)
+        aproximado_layout = QGridLayout(self.group_box_aproximado)
+        self.combo_coluna_aprox_a, self.combo_coluna_aprox_b = QComboBox(), QComboBox()
+        self.spin_limiar_aprox = QDoubleSpinBox()
+        self.spin_limiar_aprox.setRange(0.5, 1.0); self.spin_limiar_aprox.setSingleStep(0.05); self.spin_limiar_aprox.setValue(0.8)
+        self.spin_tolerancia_aprox = QDoubleSpinBox()
+        self.spin_tolerancia_aprox.setRange(0.0, 1e9); self.spin_tolerancia_aprox.setDecimals(2)
+        self.spin_tolerancia_aprox.setToolTip("Janela para colunas numéricas ou de data (em dias). 0 = casar por texto.")
+        aproximado_layout.addWidget(QLabel("Coluna A:"), 0, 0); aproximado_layout.addWidget(self.combo_coluna_aprox_a, 0, 1)
+        aproximado_layout.addWidget(QLabel("Coluna B:"), 0, 2); aproximado_layout.addWidget(self.combo_coluna_aprox_b, 0, 3)
+        aproximado_layout.addWidget(QLabel("Similaridade mínima:"), 1, 0); aproximado_layout.addWidget(self.spin_limiar_aprox, 1, 1)
+        aproximado_layout.addWidget(QLabel("Tolerância (núm./dias):"), 1, 2); aproximado_layout.addWidget(self.spin_tolerancia_aprox, 1, 3)
+        main_layout.addWidget(self.group_box_aproximado)
         
         # PROGRESSO E CONSOLE
         self.progress_bar = QProgressBar(); self.progress_bar.setRange(0, 5)
@@ -274,6 +458,15 @@ class MainWindow(QMainWindow):
         self.btn_cancelar_operacao.setObjectName("btn_cancelar_operacao")
         self.btn_iniciar_confronto.clicked.connect(self._iniciar_confronto)
         self.btn_cancelar_operacao.clicked.connect(self._solicitar_cancelamento)
+        # Perfis de trabalho: configuração completa + colunas dos arquivos em um JSON
+        self.btn_salvar_perfil = QPushButton("Salvar Perfil")
+        self.btn_carregar_perfil = QPushButton("Carregar Perfil")
+        self.btn_salvar_perfil.setToolTip("Salva arquivos, chaves, pares, filtros e opções para reutilizar depois.")
+        self.btn_carregar_perfil.setToolTip("Restaura um perfil salvo sem ler os arquivos; eles são conferidos ao iniciar.")
+        self.btn_salvar_perfil.clicked.connect(self._salvar_perfil)
+        self.btn_carregar_perfil.clicked.connect(self._carregar_perfil)
+        action_buttons_layout.addWidget(self.btn_carregar_perfil)
+        action_buttons_layout.addWidget(self.btn_salvar_perfil)
         action_buttons_layout.addStretch(1)
         action_buttons_layout.addWidget(self.btn_iniciar_confronto)
         action_buttons_layout.addWidget(self.btn_cancelar_operacao)
@@ -299,33 +492,113 @@ class MainWindow(QMainWindow):
             items = list_chaves.findItems(item_text, Qt.MatchFlag.MatchExactly)
             if items: items[0].setSelected(True)
         
+        self._aplicar_estatisticas(lado)
+
         current_filtro = combo_filtro.currentText()
         combo_filtro.clear(); combo_filtro.addItems([""] + cols)
         if current_filtro in cols: combo_filtro.setCurrentText(current_filtro)
+
+        combo_aprox = self.combo_coluna_aprox_a if lado == 'A' else self.combo_coluna_aprox_b
+        current_aprox = combo_aprox.currentText()
+        combo_aprox.clear(); combo_aprox.addItems([""] + cols)
+        if current_aprox in cols: combo_aprox.setCurrentText(current_aprox)
         self._update_all_mapping_combos()
 
     def _selecionar_arquivo(self, lado):
         caminho, _ = QFileDialog.getOpenFileName(self, f"Selecionar Arquivo {lado}", "", "*.xlsx *.xls *.csv")
         if not caminho: return
         
-        self.log_message(f"Carregando arquivo para o Lado {lado}: {os.path.basename(caminho)}")
-        df = carregar_dados_excel(caminho)
-        if df is None or df.empty:
+        self.log_message(f"Lendo as colunas do arquivo para o Lado {lado}: {os.path.basename(caminho)}")
+        # Só o cabeçalho e algumas linhas: o arquivo inteiro é lido apenas no confronto
+        from core.excel_parser import ler_esquema
+        esquema = ler_esquema(caminho)
+        if esquema is None or not esquema['colunas']:
             msg = "Falha ao ler o arquivo ou o arquivo está vazio."
             self.log_message(msg, is_error=True)
             QMessageBox.warning(self, "Erro de Leitura", msg)
             return
         
-        cols = [str(col) for col in df.columns]
+        self._definir_arquivo(lado, esquema)
+        self.log_message(f"Arquivo {os.path.basename(caminho)} selecionado com {len(esquema['colunas'])} colunas.")
+
+    def _definir_arquivo(self, lado, esquema, rotulo_extra=""):
+        """Guarda o arquivo e o esquema de um lado e atualiza as listas de colunas."""
+        caminho, cols = esquema['caminho'], list(esquema['colunas'])
         if lado == 'A':
-            self.df_a_carregado, self.df_a_cols, self.arquivo_a_path = df, cols, caminho
-            self.label_arquivo_a.setText(f"Arquivo A: {os.path.basename(caminho)}")
+            self.esquema_a, self.df_a_cols, self.arquivo_a_path = esquema, cols, caminho
+            self.label_arquivo_a.setText(f"Arquivo A: {os.path.basename(caminho)}{rotulo_extra}")
         else:
-            self.df_b_carregado, self.df_b_cols, self.arquivo_b_path = df, cols, caminho
-            self.label_arquivo_b.setText(f"Arquivo B: {os.path.basename(caminho)}")
-        
+            self.esquema_b, self.df_b_cols, self.arquivo_b_path = esquema, cols, caminho
+            self.label_arquivo_b.setText(f"Arquivo B: {os.path.basename(caminho)}{rotulo_extra}")
+        self.estatisticas[lado] = None
         self._update_all_column_widgets(lado)
-        self.log_message(f"Arquivo {os.path.basename(caminho)} carregado com {len(cols)} colunas.")
+
+    def _calcular_estatisticas(self, lado):
+        """Calcula as estatísticas das colunas do arquivo de um lado em segundo plano."""
+        caminho = self.arquivo_a_path if lado == 'A' else self.arquivo_b_path
+        if not caminho:
+            self.show_error_and_log(f"Selecione o arquivo do Lado {lado}.")
+            return
+        if lado in self.threads_estatisticas: return
+        list_chaves = self.list_chaves_a if lado == 'A' else self.list_chaves_b
+        colunas_chave = [item.text() for item in list_chaves.selectedItems()]
+        (self.btn_estatisticas_a if lado == 'A' else self.btn_estatisticas_b).setEnabled(False)
+        self.log_message(f"[Estatísticas] Lendo {os.path.basename(caminho)} (Lado {lado})...")
+
+        thread = QThread()
+        worker = EstatisticasWorker(lado, caminho, colunas_chave, (self.esquema_colunas or {}).get(lado))
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self.log_message)
+        worker.finished.connect(self._on_estatisticas_finished)
+        self.threads_estatisticas[lado] = (thread, worker)
+        thread.start()
+
+    def _on_estatisticas_finished(self, lado, perfil):
+        thread, worker = self.threads_estatisticas.pop(lado)
+        thread.quit()
+        thread.wait()
+        worker.deleteLater()
+        (self.btn_estatisticas_a if lado == 'A' else self.btn_estatisticas_b).setEnabled(True)
+        if perfil is None:
+            self.show_error_and_log(f"Falha ao calcular as estatísticas do Lado {lado}. Verifique o console.")
+            return
+        if perfil['caminho'] != (self.arquivo_a_path if lado == 'A' else self.arquivo_b_path):
+            return # O arquivo do lado foi trocado durante a leitura
+        self.estatisticas[lado] = perfil
+        self._aplicar_estatisticas(lado)
+        self.log_message(f"[Estatísticas] Lado {lado}: {perfil['linhas']:,} linhas, {len(perfil['colunas'])} colunas. "
+                         "Passe o mouse sobre as colunas chave para ver os detalhes.")
+
+    def _aplicar_estatisticas(self, lado):
+        """Põe as estatísticas de cada coluna na dica do item da lista de chaves e atualiza o resumo."""
+        perfil = self.estatisticas[lado]
+        if perfil is not None:
+            from core.data_profiler import descrever_perfil
+            list_chaves = self.list_chaves_a if lado == 'A' else self.list_chaves_b
+            for i in range(list_chaves.count()):
+                item = list_chaves.item(i)
+                perfil_coluna = perfil['colunas'].get(item.text())
+                item.setToolTip(descrever_perfil(perfil_coluna) if perfil_coluna else "")
+        self._atualizar_rotulo_estatisticas(lado)
+
+    def _atualizar_rotulo_estatisticas(self, lado):
+        """Resumo das colunas chave selecionadas (e da chave composta, se calculada para essa seleção)."""
+        label = self.label_estatisticas_a if lado == 'A' else self.label_estatisticas_b
+        perfil = self.estatisticas[lado]
+        if perfil is None:
+            label.setText("")
+            return
+        from core.data_profiler import resumir_perfil
+        list_chaves = self.list_chaves_a if lado == 'A' else self.list_chaves_b
+        selecionadas = [item.text() for item in list_chaves.selectedItems()]
+        linhas = [resumir_perfil(perfil['colunas'][c]) for c in selecionadas if c in perfil['colunas']]
+        if len(selecionadas) > 1:
+            if perfil['chave'] is not None and set(perfil['colunas_chave']) == set(selecionadas):
+                linhas.append("Chave " + resumir_perfil(perfil['chave']))
+            else:
+                linhas.append("Recalcule as estatísticas para avaliar a chave composta.")
+        label.setText("\n".join(linhas) if linhas else f"{perfil['linhas']:,} linhas. Selecione as colunas chave.")
     
     def _iniciar_confronto(self):
         
@@ -335,8 +608,29 @@ class MainWindow(QMainWindow):
         
         self.console_output.clear()
         self.log_message("Iniciando validações...")
+        config = self._coletar_config()
+        if config is None: return
+        # Os esquemas (do cabeçalho ou de um perfil) são conferidos com os arquivos pelo worker
+        config["esquemas"] = {'A': self.esquema_a, 'B': self.esquema_b}
+        
+        self.set_ui_for_processing(True)
+        self.thread = QThread()
+        self.worker = ConfrontoWorker(config)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self._on_confronto_finished)
+        self.worker.error.connect(self._on_confronto_error)
+        self.worker.progress.connect(self._on_progress_update)
+        self.worker.log.connect(self.log_message)
+        # BUGFIX: Limpa a referência ao worker/thread quando eles terminam
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.error.connect(self.thread.quit)
+        self.thread.finished.connect(self.clean_up_thread)
+        self.thread.start()
+        self.log_message("Validações concluídas. Iniciando processamento...")
 
-        # Validações da UI
+    def _coletar_config(self):
+        """Valida os widgets e monta a configuração do ConfrontoWorker (None se inválida)."""
         if not all([self.arquivo_a_path, self.arquivo_b_path]):
             return self.show_error_and_log("Selecione os arquivos para Lado A e Lado B.")
         colunas_chave_a = [item.text() for item in self.list_chaves_a.selectedItems()]
@@ -374,28 +668,127 @@ class MainWindow(QMainWindow):
         filtro_b = get_filter_info(gb_filtro_b, self.combo_coluna_filtro_b, self.combo_operador_filtro_b, self.edit_valor_filtro_b)
         if "INVALID" in [filtro_a, filtro_b]: return
 
-        # Configuração e início da Thread
+        # Casamento aproximado: colunas vazias usam a primeira chave de cada lado
+        casamento_aproximado = None
+        if self.group_box_aproximado.isChecked():
+            casamento_aproximado = {
+                'coluna_a': self.combo_coluna_aprox_a.currentText() or None,
+                'coluna_b': self.combo_coluna_aprox_b.currentText() or None,
+                'limiar': self.spin_limiar_aprox.value(),
+                'tolerancia_chave': self.spin_tolerancia_aprox.value() or None
+            }
+
         config = {
             "caminho_a": self.arquivo_a_path, "caminho_b": self.arquivo_b_path,
             "colunas_chave_a": colunas_chave_a, "colunas_chave_b": colunas_chave_b,
             "pares_mapeados": pares_mapeados, "tipo_join": self.combo_tipo_join.currentText(),
-            "filtro_a": filtro_a, "filtro_b": filtro_b
+            "filtro_a": filtro_a, "filtro_b": filtro_b,
+            "casamento_aproximado": casamento_aproximado,
+            "perfilar": self.check_perfilar.isChecked(),
+            "dtype_backend": 'pyarrow' if self.check_tipos_arrow.isChecked() else None,
+            "motor_calculo": self.combo_motor_calculo.currentText(),
+            "processos_calculo": self.spin_processos_calculo.value(),
+            "trabalhadores": [t.strip() for t in self.edit_trabalhadores.text().split(',') if t.strip()] or None,
+            "apenas_divergencias": self.check_apenas_divergencias.isChecked(),
+            "tolerancia_divergencia": self.spin_tolerancia_divergencia.value(),
+            "maiores_divergencias": self.spin_maiores_divergencias.value(),
+            "casas_decimais": self.spin_casas_decimais.value() if self.check_valores_exatos.isChecked() else None,
+            "formato_numeros": 'br' if self.check_numeros_br.isChecked() else None,
+            "esquema_colunas": self.esquema_colunas,
+            "entradas_ordenadas": self.check_entradas_ordenadas.isChecked(),
+            "orcamento_memoria_mb": self.spin_orcamento_memoria.value() or None,
+            "projetar_colunas": self.check_projetar_colunas.isChecked(),
+            "usar_cache": self.check_usar_cache.isChecked(),
+            "processo_separado": self.check_processo_separado.isChecked(),
+            "usar_servico": self.check_usar_servico.isChecked(),
+            "dimensoes_agrupamento": [d.strip() for d in self.edit_dimensoes.text().split(',') if d.strip()]
         }
-        
-        self.set_ui_for_processing(True)
-        self.thread = QThread()
-        self.worker = ConfrontoWorker(config)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self._on_confronto_finished)
-        self.worker.error.connect(self._on_confronto_error)
-        self.worker.progress.connect(self._on_progress_update)
-        # BUGFIX: Limpa a referência ao worker/thread quando eles terminam
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.error.connect(self.thread.quit)
-        self.thread.finished.connect(self.clean_up_thread)
-        self.thread.start()
-        self.log_message("Validações concluídas. Iniciando processamento...")
+        return config
+
+    def _salvar_perfil(self):
+        """Salva a configuração atual e os esquemas dos arquivos em um perfil JSON."""
+        config = self._coletar_config()
+        if config is None: return
+        caminho, _ = QFileDialog.getSaveFileName(self, "Salvar Perfil de Trabalho", "perfil_confronto.json", "*.json")
+        if not caminho: return
+        if not caminho.lower().endswith(".json"): caminho += ".json"
+        from core.job_profiles import salvar_perfil
+        if salvar_perfil(caminho, config, {'A': self.esquema_a, 'B': self.esquema_b}):
+            self.log_message(f"Perfil salvo em: {caminho}")
+        else:
+            self.show_error_and_log("Falha ao salvar o perfil.")
+
+    def _carregar_perfil(self):
+        """Restaura a interface a partir de um perfil, sem ler os arquivos de dados."""
+        caminho, _ = QFileDialog.getOpenFileName(self, "Carregar Perfil de Trabalho", "", "*.json")
+        if not caminho: return
+        from core.job_profiles import carregar_perfil
+        perfil = carregar_perfil(caminho)
+        if perfil is None or not all((perfil['esquemas'] or {}).get(lado) for lado in ['A', 'B']):
+            return self.show_error_and_log("Arquivo de perfil inválido.")
+        self._aplicar_config(perfil['config'], perfil['esquemas'])
+        self.log_message(f"Perfil {os.path.basename(caminho)} carregado (salvo em {perfil.get('salvo_em', '?')}). "
+                         "Os arquivos serão conferidos ao iniciar o confronto.")
+
+    def _aplicar_config(self, config, esquemas):
+        """Preenche os widgets com uma configuração no formato de _coletar_config."""
+        self._definir_arquivo('A', esquemas['A'], " (perfil)")
+        self._definir_arquivo('B', esquemas['B'], " (perfil)")
+
+        for list_chaves, chaves in [(self.list_chaves_a, config.get('colunas_chave_a') or []),
+                                    (self.list_chaves_b, config.get('colunas_chave_b') or [])]:
+            list_chaves.clearSelection()
+            for chave in chaves:
+                items = list_chaves.findItems(chave, Qt.MatchFlag.MatchExactly)
+                if items: items[0].setSelected(True)
+
+        pares = config.get('pares_mapeados') or []
+        (self.radio_modo_confronto if pares else self.radio_modo_cruzamento).setChecked(True)
+        for pair_widget in list(self.mapping_pair_widgets_list):
+            self._remove_mapping_pair_ui(pair_widget)
+        for col_a, col_b in pares:
+            self._add_mapping_pair_ui(col_a, col_b)
+        if not pares: self._add_mapping_pair_ui()
+
+        for filtro_info, combo_col, combo_op, edit_val in [
+                (config.get('filtro_a'), self.combo_coluna_filtro_a, self.combo_operador_filtro_a, self.edit_valor_filtro_a),
+                (config.get('filtro_b'), self.combo_coluna_filtro_b, self.combo_operador_filtro_b, self.edit_valor_filtro_b)]:
+            combo_col.parentWidget().setChecked(bool(filtro_info))
+            if filtro_info:
+                combo_col.setCurrentText(filtro_info['coluna'])
+                combo_op.setCurrentText(filtro_info['operador'])
+                edit_val.setText(str(filtro_info.get('valor') or ""))
+
+        casamento = config.get('casamento_aproximado')
+        self.group_box_aproximado.setChecked(bool(casamento))
+        if casamento:
+            self.combo_coluna_aprox_a.setCurrentText(casamento.get('coluna_a') or "")
+            self.combo_coluna_aprox_b.setCurrentText(casamento.get('coluna_b') or "")
+            self.spin_limiar_aprox.setValue(casamento.get('limiar', 0.8))
+            self.spin_tolerancia_aprox.setValue(casamento.get('tolerancia_chave') or 0.0)
+
+        self.combo_tipo_join.setCurrentText(config.get('tipo_join', 'inner'))
+        self.check_apenas_divergencias.setChecked(config.get('apenas_divergencias', True))
+        self.spin_tolerancia_divergencia.setValue(config.get('tolerancia_divergencia') or 0.0)
+        self.spin_maiores_divergencias.setValue(int(config.get('maiores_divergencias', 100)))
+        self.check_valores_exatos.setChecked(config.get('casas_decimais') is not None)
+        if config.get('casas_decimais') is not None: self.spin_casas_decimais.setValue(config['casas_decimais'])
+        self.check_numeros_br.setChecked(config.get('formato_numeros') == 'br')
+        self.esquema_colunas = config.get('esquema_colunas')
+        self.check_tipos_arrow.setChecked(config.get('dtype_backend') == 'pyarrow')
+        if self.combo_motor_calculo.findText(config.get('motor_calculo') or 'pandas') < 0:
+            self.log_message(f"Motor '{config['motor_calculo']}' não instalado; usando pandas.")
+        self.combo_motor_calculo.setCurrentText(config.get('motor_calculo') or 'pandas')
+        self.spin_processos_calculo.setValue(int(config.get('processos_calculo', 1)))
+        self.edit_trabalhadores.setText(", ".join(config.get('trabalhadores') or []))
+        self.check_entradas_ordenadas.setChecked(bool(config.get('entradas_ordenadas')))
+        self.spin_orcamento_memoria.setValue(int(config.get('orcamento_memoria_mb') or 0))
+        self.check_projetar_colunas.setChecked(bool(config.get('projetar_colunas')))
+        self.check_usar_cache.setChecked(config.get('usar_cache', True))
+        self.check_processo_separado.setChecked(config.get('processo_separado', True))
+        self.check_usar_servico.setChecked(bool(config.get('usar_servico')))
+        self.check_perfilar.setChecked(bool(config.get('perfilar')))
+        self.edit_dimensoes.setText(", ".join(config.get('dimensoes_agrupamento') or []))
 
     def clean_up_thread(self):
         """Zera as referências da thread e do worker para a próxima execução."""
@@ -408,24 +801,50 @@ class MainWindow(QMainWindow):
 
     def _on_confronto_finished(self, resultados):
         self.log_message("Processamento concluído. Solicitando local para salvar o relatório.")
+        # O worker será destruído; as medições do relatório passam a ser logadas pela janela
+        if resultados.get('desempenho') is not None:
+            resultados['desempenho'].callback_log = self.log_message
         is_cruzamento = not bool(resultados.get('resumo_por_par'))
         filename = "Resultado_Cruzamento.xlsx" if is_cruzamento else "Relatorio_Confronto.xlsx"
-        caminho_salvar, _ = QFileDialog.getSaveFileName(self, "Salvar Relatório", filename, "*.xlsx")
+        caminho_salvar, filtro_escolhido = QFileDialog.getSaveFileName(self, "Salvar Relatório", filename, ";;".join(FILTROS_SAIDA))
         
         if caminho_salvar:
-            if not caminho_salvar.lower().endswith(".xlsx"): caminho_salvar += ".xlsx"
+            from core.result_sinks import salvar_resultados, extensao_destino, caminho_resumo_excel
+            from core.report_generator import LIMITE_LINHAS_PLANILHA
+            extensao = extensao_destino(caminho_salvar)
+            if extensao is None:
+                extensao = FILTROS_SAIDA.get(filtro_escolhido, ".xlsx")
+                caminho_salvar += extensao
+            total_linhas = len(resultados['dataframe_merged'])
+            if extensao == ".xlsx" and total_linhas > LIMITE_LINHAS_PLANILHA:
+                self.log_message(f"Resultado com {total_linhas:,} linhas: os detalhes serão divididos em várias abas. "
+                                 "Para volumes assim, prefira Parquet, CSV.gz ou SQLite.")
             self.log_message(f"Gerando relatório em: {caminho_salvar}...")
-            if gerar_relatorio_excel(resultados, caminho_salvar):
-                QMessageBox.information(self, "Sucesso", f"Relatório gerado com sucesso!\n{caminho_salvar}")
+            if salvar_resultados(resultados, caminho_salvar):
+                caminho_base = caminho_salvar[:len(caminho_salvar) - len(extensao)]
+                self._salvar_desempenho(resultados.get('desempenho'), caminho_base)
+                mensagem = f"Relatório gerado com sucesso!\n{caminho_salvar}"
+                if extensao != ".xlsx": mensagem += f"\nResumo: {caminho_resumo_excel(caminho_salvar)}"
+                QMessageBox.information(self, "Sucesso", mensagem)
                 self.log_message("Relatório gerado com sucesso!")
                 self.set_ui_for_processing(False)
             else:
-                self.show_error_and_log("Falha ao gerar o arquivo de relatório Excel.")
+                self.show_error_and_log("Falha ao gerar o arquivo de relatório.")
         else:
             self.log_message("Geração de relatório cancelada pelo usuário.")
         
+        # Solta o resultado (e o arquivo Arrow, se veio de um processo separado)
+        from core.process_runner import liberar_resultado
+        liberar_resultado(resultados)
         self.set_ui_for_processing(False)
 
+    def _salvar_desempenho(self, monitor, caminho_base):
+        """Grava as medições de desempenho em um JSON ao lado do relatório (caminho sem extensão)."""
+        if monitor is None: return
+        caminho_json = caminho_base + ".desempenho.json"
+        if monitor.salvar_json(caminho_json):
+            self.log_message(f"[Desempenho] Tempo total: {monitor.tempo_total():.2f} s. Detalhes em: {caminho_json}")
+
     def _on_confronto_error(self, error_message):
         self.show_error_and_log(f"Ocorreu um erro crítico:\n{error_message}", show_box=False)
         QMessageBox.critical(self, "Erro na Operação", f"Ocorreu um erro crítico durante o processamento.\nVerifique o console para mais detalhes.")
@@ -444,6 +863,7 @@ class MainWindow(QMainWindow):
 
     def set_ui_for_processing(self, is_processing):
         self.btn_iniciar_confronto.setEnabled(not is_processing)
+        self.btn_carregar_perfil.setEnabled(not is_processing)
         self.btn_cancelar_operacao.setEnabled(is_processing)
         if not is_processing:
             self.progress_bar.setValue(0)
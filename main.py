@@ -1,8 +1,10 @@
 # main.py
 
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
-from gui.main_window import MainWindow
+from PyQt6.QtCore import QTimer
+from gui.main_window import MainWindow # Leve: pandas/openpyxl só são importados no primeiro uso
 
 # ESTILO QSS GLOBAL - TEMA CLARO CORPORATIVO (VERSÃO 2)
 CUSTOM_QSS = """
@@ -142,8 +144,11 @@ CUSTOM_QSS = """
 """
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # Executável congelado: permite iniciar o processo de cálculo
     app = QApplication(sys.argv)
     app.setStyleSheet(CUSTOM_QSS)
     window = MainWindow()
     window.show()
+    # Depois que a janela aparecer, pré-carrega as bibliotecas de dados em segundo plano
+    QTimer.singleShot(0, window.iniciar_aquecimento)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,201 @@
+# testes/benchmark_confronto.py
+#
+# Suíte de benchmark com geração de dados sintéticos em escala.
+# Mede tempo de parede e pico de memória de cada etapa do confronto
+# e salva os resultados em JSON para comparar versões.
+#
+# Exemplos:
+#   python testes/benchmark_confronto.py --linhas 10000 100000
+#   python testes/benchmark_confronto.py --linhas 1000000 --taxa-divergencia 0.02 --saida bench_v2.json
+#   python testes/benchmark_confronto.py --linhas 100000 --comparar-com bench_v1.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from core.excel_parser import carregar_dados_excel
+    from core.data_comparator import comparar_dataframes, _aplicar_filtro_df
+    from core.report_generator import gerar_relatorio_excel
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core.excel_parser import carregar_dados_excel
+    from core.data_comparator import comparar_dataframes, _aplicar_filtro_df
+    from core.report_generator import gerar_relatorio_excel
+
+
+def gerar_dados_sinteticos(n_linhas: int, cardinalidade_chave: int | None = None,
+                           taxa_duplicatas: float = 0.0, taxa_divergencia: float = 0.02,
+                           taxa_ausentes: float = 0.01, n_colunas_texto: int = 2,
+                           semente: int = 42) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Gera um par de DataFrames A/B sintéticos para o confronto.
+
+    Args:
+        n_linhas (int): Número de linhas de cada lado.
+        cardinalidade_chave (int, optional): Quantidade de chaves distintas. Defaults to n_linhas.
+        taxa_duplicatas (float): Fração das linhas de A que repetem uma chave já existente.
+        taxa_divergencia (float): Fração das linhas de B com valor diferente de A.
+        taxa_ausentes (float): Fração das chaves que existem só em A (e, na mesma proporção, só em B).
+        n_colunas_texto (int): Colunas de texto extras (largura do arquivo).
+        semente (int): Semente do gerador aleatório, para resultados reproduzíveis.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: (df_a, df_b)
+    """
+    rng = np.random.default_rng(semente)
+    cardinalidade = min(cardinalidade_chave or n_linhas, n_linhas)
+
+    # Chaves de A: todas as chaves distintas, completadas com repetições até n_linhas
+    chaves_a = np.resize(rng.permutation(cardinalidade), n_linhas)
+    n_duplicadas = int(n_linhas * taxa_duplicatas)
+    if n_duplicadas:
+        posicoes = rng.choice(n_linhas, n_duplicadas, replace=False)
+        chaves_a[posicoes] = rng.choice(chaves_a, n_duplicadas)
+
+    categorias = np.array([f"CAT_{i:02d}" for i in range(20)])
+    datas = np.datetime64('2023-01-01') + rng.integers(0, 730, n_linhas).astype('timedelta64[D]')
+    valores = np.round(rng.gamma(2.0, 250.0, n_linhas), 2)
+    df_a = pd.DataFrame({
+        'ID': chaves_a,
+        'Valor': valores,
+        'Categoria': categorias[rng.integers(0, len(categorias), n_linhas)],
+        'Data': datas,
+    })
+    for i in range(n_colunas_texto):
+        df_a[f'Texto_{i + 1}'] = pd.Series(rng.integers(0, 10**6, n_linhas)).map(lambda x: f"Descricao item {x:06d}")
+
+    # B: mesmas linhas com divergências de valor, chaves ausentes e chaves novas
+    df_b = df_a.rename(columns={'ID': 'Chave_B', 'Valor': 'Valor_B'}).copy()
+    divergentes = rng.random(n_linhas) < taxa_divergencia
+    df_b.loc[divergentes, 'Valor_B'] = np.round(df_b.loc[divergentes, 'Valor_B'] * rng.uniform(0.9, 1.1, divergentes.sum()), 2)
+    so_em_a = rng.random(n_linhas) < taxa_ausentes
+    df_b.loc[so_em_a, 'Chave_B'] = df_b.loc[so_em_a, 'Chave_B'] + cardinalidade  # chaves que não existem em A
+    df_b = df_b.sample(frac=1.0, random_state=semente).reset_index(drop=True)
+    return df_a, df_b
+
+
+def _medir_etapa(resultados_etapas: dict, nome: str, funcao, *args, **kwargs):
+    """
+    Executa uma etapa medindo tempo de parede e, se o tracemalloc estiver ativo,
+    o pico de memória alocada durante a etapa.
+    """
+    medir_memoria = tracemalloc.is_tracing()
+    if medir_memoria:
+        tracemalloc.reset_peak()
+        memoria_inicial, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    retorno = funcao(*args, **kwargs)
+    duracao = time.perf_counter() - inicio
+    medida = {'tempo_s': round(duracao, 4), 'pico_memoria_mb': None}
+    if medir_memoria:
+        _, pico = tracemalloc.get_traced_memory()
+        medida['pico_memoria_mb'] = round((pico - memoria_inicial) / 1024**2, 2)
+    resultados_etapas[nome] = medida
+    texto_memoria = f"{medida['pico_memoria_mb']:>10.1f} MB" if medir_memoria else "         - MB"
+    print(f"  {nome:<25} {duracao:>9.3f} s  {texto_memoria}")
+    return retorno
+
+
+def executar_cenario(n_linhas: int, args, pasta_trabalho: str) -> dict:
+    """Gera os arquivos de um cenário e mede cada etapa do pipeline."""
+    print(f"\n--- Cenário: {n_linhas:,} linhas ---")
+    df_a, df_b = gerar_dados_sinteticos(
+        n_linhas, args.cardinalidade, args.taxa_duplicatas, args.taxa_divergencia,
+        args.taxa_ausentes, args.colunas_texto, args.semente
+    )
+    extensao = '.xlsx' if args.formato == 'xlsx' else '.csv'
+    caminho_a = os.path.join(pasta_trabalho, f'bench_A_{n_linhas}{extensao}')
+    caminho_b = os.path.join(pasta_trabalho, f'bench_B_{n_linhas}{extensao}')
+    for df, caminho in [(df_a, caminho_a), (df_b, caminho_b)]:
+        if extensao == '.xlsx': df.to_excel(caminho, index=False)
+        else: df.to_csv(caminho, index=False)
+    del df_a, df_b
+
+    etapas = {}
+    # O tracemalloc deixa o código Python puro (openpyxl) bem mais lento; --sem-memoria mede só o tempo
+    if not args.sem_memoria: tracemalloc.start()
+    try:
+        df_a = _medir_etapa(etapas, 'carregar_dados_excel_A', carregar_dados_excel, caminho_a)
+        df_b = _medir_etapa(etapas, 'carregar_dados_excel_B', carregar_dados_excel, caminho_b)
+        filtro = {'coluna': 'Valor', 'operador': '>', 'valor': '0'}
+        df_a = _medir_etapa(etapas, '_aplicar_filtro_df', _aplicar_filtro_df, df_a, filtro)
+        resultados = _medir_etapa(etapas, 'comparar_dataframes', comparar_dataframes,
+                                  df_a, df_b, ['ID'], ['Chave_B'], [('Valor', 'Valor_B')], args.tipo_join)
+        linhas_resultado = len(resultados['dataframe_merged']) if resultados else 0
+        if resultados and linhas_resultado <= args.max_linhas_relatorio:
+            caminho_relatorio = os.path.join(pasta_trabalho, f'bench_relatorio_{n_linhas}.xlsx')
+            _medir_etapa(etapas, 'gerar_relatorio_excel', gerar_relatorio_excel, resultados, caminho_relatorio)
+        else:
+            print(f"  gerar_relatorio_excel     ignorado ({linhas_resultado:,} linhas > --max-linhas-relatorio)")
+    finally:
+        tracemalloc.stop()
+
+    return {'linhas': n_linhas, 'linhas_resultado': linhas_resultado, 'etapas': etapas}
+
+
+def comparar_com_referencia(resultado_atual: dict, caminho_referencia: str):
+    """Imprime a razão de tempo (atual / referência) de cada etapa em comum."""
+    with open(caminho_referencia, encoding='utf-8') as f:
+        referencia = json.load(f)
+    cenarios_ref = {c['linhas']: c for c in referencia.get('cenarios', [])}
+    print(f"\n--- Comparação com '{os.path.basename(caminho_referencia)}' (tempo atual / referência) ---")
+    for cenario in resultado_atual['cenarios']:
+        cenario_ref = cenarios_ref.get(cenario['linhas'])
+        if not cenario_ref: continue
+        for etapa, medida in cenario['etapas'].items():
+            medida_ref = cenario_ref['etapas'].get(etapa)
+            if not medida_ref or not medida_ref['tempo_s']: continue
+            razao = medida['tempo_s'] / medida_ref['tempo_s']
+            alerta = "  <-- REGRESSÃO" if razao > 1.2 else ""
+            print(f"  {cenario['linhas']:>10,} {etapa:<25} {razao:>6.2f}x{alerta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de confronto com dados sintéticos.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000], help="Tamanhos a medir (10k a 10M).")
+    parser.add_argument('--cardinalidade', type=int, default=None, help="Chaves distintas (padrão: igual ao número de linhas).")
+    parser.add_argument('--taxa-duplicatas', type=float, default=0.0)
+    parser.add_argument('--taxa-divergencia', type=float, default=0.02)
+    parser.add_argument('--taxa-ausentes', type=float, default=0.01)
+    parser.add_argument('--colunas-texto', type=int, default=2, help="Colunas de texto extras (largura).")
+    parser.add_argument('--formato', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--tipo-join', choices=['inner', 'left', 'right', 'outer'], default='outer')
+    parser.add_argument('--max-linhas-relatorio', type=int, default=50_000, help="Acima disso o relatório Excel não é medido.")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede memória (tempos sem a sobrecarga do tracemalloc).")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída.")
+    parser.add_argument('--comparar-com', default=None, help="JSON de uma execução anterior para detectar regressões.")
+    args = parser.parse_args()
+
+    resultado = {
+        'data_execucao': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {'python': platform.python_version(), 'pandas': pd.__version__,
+                     'numpy': np.__version__, 'plataforma': platform.platform()},
+        'parametros': {k: v for k, v in vars(args).items() if k not in ['saida', 'comparar_com']},
+        'cenarios': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='bench_dataanalyzer_') as pasta_trabalho:
+        for n_linhas in args.linhas:
+            resultado['cenarios'].append(executar_cenario(n_linhas, args, pasta_trabalho))
+
+    caminho_saida = args.saida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em: {os.path.abspath(caminho_saida)}")
+
+    if args.comparar_com:
+        comparar_com_referencia(resultado, args.comparar_com)
+
+
+if __name__ == '__main__':
+    main()
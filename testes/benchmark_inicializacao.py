@@ -0,0 +1,86 @@
+# testes/benchmark_inicializacao.py
+#
+# Mede o custo de importação da aplicação com `python -X importtime` e garante
+# que as dependências pesadas (pandas, numpy, openpyxl) não voltem a ser
+# importadas antes da janela aparecer.
+#
+# Exemplos:
+#   python testes/benchmark_inicializacao.py
+#   python testes/benchmark_inicializacao.py --limite-ms 800 --saida inicializacao.json
+#
+# Sai com código 1 se algum módulo proibido for importado ou se o limite for excedido.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PASTA_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_PROIBIDOS = ['pandas', 'numpy', 'openpyxl', 'pyarrow']
+
+
+def medir_importacao(modulo: str) -> list[dict]:
+    """
+    Importa 'modulo' em um interpretador novo com -X importtime.
+
+    Returns:
+        list[dict]: Uma entrada por módulo importado, com 'modulo', 'proprio_us' e 'acumulado_us'.
+    """
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=PASTA_RAIZ, capture_output=True, text=True
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar '{modulo}':\n{processo.stderr}")
+
+    entradas = []
+    for linha in processo.stderr.splitlines():
+        # Formato: "import time:      self [us] | cumulative | imported package"
+        if not linha.startswith('import time:') or 'imported package' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        entradas.append({'modulo': nome.strip(), 'proprio_us': int(proprio), 'acumulado_us': int(acumulado),
+                         'nivel': (len(nome) - len(nome.lstrip())) // 2})
+    return entradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de importação da aplicação.")
+    parser.add_argument('--modulo', default='main', help="Módulo importado na medição (padrão: main).")
+    parser.add_argument('--limite-ms', type=float, default=None, help="Falha se o tempo total passar deste limite.")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Medições; vale a menor (descarta ruído de cache).")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com o resultado.")
+    args = parser.parse_args()
+
+    medicoes = [medir_importacao(args.modulo) for _ in range(args.repeticoes)]
+    totais_ms = [sum(e['acumulado_us'] for e in m if e['nivel'] == 0) / 1000 for m in medicoes]
+    melhor = medicoes[totais_ms.index(min(totais_ms))]
+    total_ms = min(totais_ms)
+
+    print(f"Importação de '{args.modulo}': {total_ms:.1f} ms (melhor de {args.repeticoes})")
+    print("\nMódulos de primeiro nível mais lentos:")
+    for entrada in sorted((e for e in melhor if e['nivel'] == 0), key=lambda e: -e['acumulado_us'])[:10]:
+        print(f"  {entrada['acumulado_us'] / 1000:>8.1f} ms  {entrada['modulo']}")
+
+    importados = {e['modulo'].split('.')[0] for e in melhor}
+    proibidos_encontrados = sorted(set(MODULOS_PROIBIDOS) & importados)
+    falhou = False
+    if proibidos_encontrados:
+        print(f"\nERRO: módulos pesados importados na inicialização: {', '.join(proibidos_encontrados)}")
+        falhou = True
+    if args.limite_ms is not None and total_ms > args.limite_ms:
+        print(f"\nERRO: tempo de importação {total_ms:.1f} ms acima do limite de {args.limite_ms:.1f} ms")
+        falhou = True
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'modulo': args.modulo, 'total_ms': round(total_ms, 1),
+                       'proibidos_importados': proibidos_encontrados, 'importacoes': melhor}, f, indent=2)
+        print(f"\nResultado salvo em: {os.path.abspath(args.saida)}")
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# testes/benchmark_servico.py
+#
+# Benchmark do modo serviço (core/service.py): o mesmo confronto é executado algumas vezes
+# sem o serviço (cada execução lê os arquivos de novo) e enviado ao serviço, que guarda os
+# arquivos lidos em memória. Mede o tempo de cada execução e confere se o resultado do
+# serviço é igual ao do confronto local.
+#
+# Exemplos:
+#   python testes/benchmark_servico.py
+#   python testes/benchmark_servico.py --linhas 200000 --repeticoes 5 --formato csv
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+try:
+    from core import service
+    from core.process_runner import executar_confronto, liberar_resultado
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core import service
+    from core.process_runner import executar_confronto, liberar_resultado
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+
+
+def _diferencas(resultado: dict, referencia: dict) -> list[str]:
+    """Diferenças entre o resultado do serviço e o local (os tipos do detalhe mapeado são Arrow)."""
+    diferencas = []
+    if resultado['resumo_por_par'] != referencia['resumo_por_par']:
+        diferencas.append("resumo por par diferente")
+    for item in ['dataframe_merged', 'maiores_divergencias']:
+        try:
+            pd.testing.assert_frame_equal(resultado[item].reset_index(drop=True),
+                                          referencia[item].reset_index(drop=True), check_dtype=False)
+        except AssertionError as e:
+            diferencas.append(f"{item} diferente: {str(e).strip().splitlines()[0]}")
+    return diferencas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede confrontos repetidos com e sem o serviço local.")
+    parser.add_argument('--linhas', type=int, default=50_000, help="Linhas de cada arquivo.")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções de cada modo.")
+    parser.add_argument('--formato', choices=['xlsx', 'csv'], default='xlsx', help="Formato dos arquivos.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        df_a, df_b = gerar_dados_sinteticos(args.linhas, taxa_divergencia=0.05, taxa_ausentes=0.02)
+        caminhos = []
+        for nome, df in [('A', df_a), ('B', df_b)]:
+            caminho = os.path.join(pasta, f"sintetico_{nome}.{args.formato}")
+            if args.formato == 'xlsx': df.to_excel(caminho, index=False)
+            else: df.to_csv(caminho, index=False)
+            caminhos.append(caminho)
+        config = {'caminho_a': caminhos[0], 'caminho_b': caminhos[1],
+                  'colunas_chave_a': ['ID'], 'colunas_chave_b': ['Chave_B'],
+                  'pares_mapeados': [('Valor', 'Valor_B')], 'tipo_join': 'inner',
+                  'filtro_a': None, 'filtro_b': None, 'usar_cache': False}
+        sem_log = lambda texto: None
+
+        tempos_locais = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            referencia = executar_confronto(dict(config), sem_log)
+            tempos_locais.append(time.perf_counter() - inicio)
+
+        # O serviço roda em uma thread deste processo, com o endereço em um arquivo temporário
+        arquivo_servico = os.path.join(pasta, 'servico.json')
+        pronto = threading.Event()
+        threading.Thread(target=service.iniciar_servico, daemon=True,
+                         kwargs={'arquivo_servico': arquivo_servico, 'callback_pronto': lambda porta: pronto.set()}).start()
+        pronto.wait()
+        tempos_servico, falhas = [], 0
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            resultado = service.executar_no_servico(dict(config), sem_log, arquivo_servico=arquivo_servico)
+            tempos_servico.append(time.perf_counter() - inicio)
+            for diferenca in _diferencas(resultado, referencia):
+                falhas += 1
+                print(f"FALHOU  {diferenca}")
+            liberar_resultado(resultado)
+        status = service.consultar_servico('/status', arquivo_servico=arquivo_servico)
+        service.consultar_servico('/encerrar', {}, arquivo_servico=arquivo_servico)
+
+    print(f"\n{args.linhas:,} linhas por arquivo ({args.formato}), {args.repeticoes} execução(ões) de cada modo")
+    print(f"Sem o serviço: {', '.join(f'{t:.2f}s' for t in tempos_locais)}")
+    print(f"Com o serviço: {', '.join(f'{t:.2f}s' for t in tempos_servico)}")
+    cache = status['cache']
+    print(f"Cache do serviço: {cache['acertos']} acerto(s), {cache['faltas']} leitura(s), {cache['memoria_mb']} MB")
+    print(f"\n{falhas} falha(s)." if falhas else "\nO resultado do serviço confere com o confronto local.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
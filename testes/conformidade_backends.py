@@ -0,0 +1,174 @@
+# testes/conformidade_backends.py
+#
+# Teste de conformidade dos motores de cálculo (core/compute_backends.py): o mesmo
+# confronto (chaves, pares, tipo de join, filtros e tolerância) é executado em cada motor
+# instalado e comparado com o motor de referência (pandas). 'resumo_por_par' deve ser igual
+# (totais com tolerância só para a ordem da soma em ponto flutuante) e o detalhe e as
+# maiores divergências devem ter as mesmas colunas, tipos, valores e ordem de linhas.
+#
+# Exemplos:
+#   python testes/conformidade_backends.py
+#   python testes/conformidade_backends.py --linhas 200000 --motores duckdb
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from core.compute_backends import comparar_arquivos, motores_disponiveis
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core.compute_backends import comparar_arquivos, motores_disponiveis
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+
+
+def gerar_casos_limite(pasta: str) -> tuple[str, str]:
+    """
+    Arquivos pequenos com os casos difíceis: chave composta de mesmo nome nos dois lados,
+    chaves nulas e duplicadas, coluna repetida fora dos pares, textos na coluna de valor e
+    células vazias.
+    """
+    df_a = pd.DataFrame({
+        'Filial': ['SP', 'SP', 'RJ', 'RJ', None, 'MG', 'SP', 'BA'],
+        'Doc': [1, 2, 1, 3, 4, 5, 2, 9],
+        'Status': ['ok', 'ok', 'pendente', 'ok', 'ok', 'erro', 'ok', 'ok'],
+        'Valor': ['10.5', '20', 'abc', '', '7.25', '3', '1e3', '0'],
+    })
+    df_b = pd.DataFrame({
+        'Filial': ['RJ', 'SP', 'SP', None, 'MG', 'PR', 'RJ'],
+        'Doc': [1, 2, 1, 4, 5, 6, 3],
+        'Status': ['ok', 'ok', 'ok', 'erro', 'erro', 'ok', 'ok'],
+        'Total': [0.0, 20.0, 10.5, 7.0, None, 8.0, 12.0],
+    })
+    caminho_a, caminho_b = os.path.join(pasta, 'limite_A.csv'), os.path.join(pasta, 'limite_B.csv')
+    df_a.to_csv(caminho_a, index=False, sep=';')
+    df_b.to_csv(caminho_b, index=False, sep=';')
+    return caminho_a, caminho_b
+
+
+def _diferencas_resumo(resumo_motor: list[dict], resumo_referencia: list[dict]) -> list[str]:
+    if len(resumo_motor) != len(resumo_referencia):
+        return [f"{len(resumo_motor)} pares no resumo, esperado {len(resumo_referencia)}"]
+    diferencas = []
+    for item, esperado in zip(resumo_motor, resumo_referencia):
+        if set(item) != set(esperado):
+            diferencas.append(f"campos {sorted(item)} != {sorted(esperado)}")
+            continue
+        for campo, valor_esperado in esperado.items():
+            valor = item[campo]
+            if isinstance(valor_esperado, str) or campo.startswith('linhas_'):
+                igual = valor == valor_esperado
+            else:
+                igual = math.isclose(float(valor), float(valor_esperado), rel_tol=1e-9, abs_tol=1e-6)
+            if not igual:
+                diferencas.append(f"{esperado['par_comparado']}: {campo} = {valor!r}, esperado {valor_esperado!r}")
+    return diferencas
+
+
+def comparar_com_referencia(resultado: dict | None, referencia: dict) -> list[str]:
+    """Diferenças entre o resultado de um motor e o do pandas (lista vazia: conforme)."""
+    if resultado is None:
+        return ["o motor retornou None"]
+    diferencas = _diferencas_resumo(resultado['resumo_por_par'], referencia['resumo_por_par'])
+    if resultado.get('total_linhas_merge') != referencia.get('total_linhas_merge'):
+        diferencas.append(f"total_linhas_merge = {resultado.get('total_linhas_merge')}, "
+                          f"esperado {referencia.get('total_linhas_merge')}")
+    try:
+        # O índice do pandas guarda a posição no merge; o conteúdo e a ordem é que contam
+        pd.testing.assert_frame_equal(resultado['dataframe_merged'].reset_index(drop=True),
+                                      referencia['dataframe_merged'].reset_index(drop=True))
+    except AssertionError as e:
+        diferencas.append(f"detalhe diferente: {str(e).strip().splitlines()[0]}")
+    if 'maiores_divergencias' in referencia:
+        try:
+            pd.testing.assert_frame_equal(resultado.get('maiores_divergencias', pd.DataFrame()),
+                                          referencia['maiores_divergencias'])
+        except AssertionError as e:
+            diferencas.append(f"maiores divergências diferentes: {str(e).strip().splitlines()[0]}")
+    return diferencas
+
+
+def montar_cenarios(pasta: str, n_linhas: int) -> list[dict]:
+    df_a, df_b = gerar_dados_sinteticos(n_linhas, taxa_duplicatas=0.05, taxa_divergencia=0.05, taxa_ausentes=0.02)
+    df_b.loc[df_b.sample(frac=0.01, random_state=1).index, 'Valor_B'] = np.nan
+    sintetico_a, sintetico_b = os.path.join(pasta, 'sintetico_A.csv'), os.path.join(pasta, 'sintetico_B.csv')
+    df_a.to_csv(sintetico_a, index=False)
+    df_b.to_csv(sintetico_b, index=False)
+    limite_a, limite_b = gerar_casos_limite(pasta)
+
+    cenarios = []
+    for tipo_join in ['inner', 'left', 'right', 'outer']:
+        for apenas_divergencias, tolerancia in [(True, 0.0), (True, 5.0), (False, 0.0)]:
+            cenarios.append({'nome': f"sintético {tipo_join} divergencias={apenas_divergencias} tol={tolerancia}",
+                             'caminho_a': sintetico_a, 'caminho_b': sintetico_b,
+                             'colunas_chave_a': ['ID'], 'colunas_chave_b': ['Chave_B'],
+                             'pares_mapeados': [('Valor', 'Valor_B')], 'tipo_join': tipo_join,
+                             'apenas_divergencias': apenas_divergencias, 'tolerancia_divergencia': tolerancia})
+        cenarios.append({'nome': f"casos limite {tipo_join}",
+                         'caminho_a': limite_a, 'caminho_b': limite_b,
+                         'colunas_chave_a': ['Filial', 'Doc'], 'colunas_chave_b': ['Filial', 'Doc'],
+                         'pares_mapeados': [('Valor', 'Total')], 'tipo_join': tipo_join})
+    filtros = [
+        ({'coluna': 'Valor', 'operador': '>', 'valor': '500'}, {'coluna': 'Valor_B', 'operador': 'entre', 'valor': '100;900'}),
+        ({'coluna': 'Categoria', 'operador': '=', 'valor': 'cat_03'}, {'coluna': 'Categoria', 'operador': '!=', 'valor': 'CAT_07'}),
+        ({'coluna': 'Texto_1', 'operador': 'contém', 'valor': 'ITEM 0'}, {'coluna': 'Texto_2', 'operador': 'termina com', 'valor': '7'}),
+        ({'coluna': 'Valor', 'operador': 'não é nulo', 'valor': ''}, {'coluna': 'Valor_B', 'operador': 'é nulo', 'valor': ''}),
+    ]
+    for filtro_a, filtro_b in filtros:
+        cenarios.append({'nome': f"filtros {filtro_a['operador']} / {filtro_b['operador']}",
+                         'caminho_a': sintetico_a, 'caminho_b': sintetico_b,
+                         'colunas_chave_a': ['ID'], 'colunas_chave_b': ['Chave_B'],
+                         'pares_mapeados': [('Valor', 'Valor_B')], 'tipo_join': 'outer',
+                         'filtro_a': filtro_a, 'filtro_b': filtro_b})
+    cenarios.append({'nome': "só colunas usadas, tipos Arrow",
+                     'caminho_a': sintetico_a, 'caminho_b': sintetico_b,
+                     'colunas_chave_a': ['ID'], 'colunas_chave_b': ['Chave_B'],
+                     'pares_mapeados': [('Valor', 'Valor_B')], 'tipo_join': 'left',
+                     'colunas_a': ['ID', 'Valor', 'Categoria'], 'colunas_b': ['Chave_B', 'Valor_B', 'Categoria'],
+                     'dtype_backend': 'pyarrow'})
+    return cenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere se os motores de cálculo produzem o mesmo resultado do pandas.")
+    parser.add_argument('--linhas', type=int, default=20_000, help="Linhas do cenário sintético.")
+    parser.add_argument('--motores', nargs='+', default=None, help="Motores a conferir (padrão: todos os instalados).")
+    args = parser.parse_args()
+
+    motores = [m for m in (args.motores or motores_disponiveis()) if m != 'pandas']
+    if not motores:
+        print("Nenhum motor além do pandas instalado (pip install duckdb polars).")
+        return 0
+
+    falhas = 0
+    with tempfile.TemporaryDirectory(prefix='conformidade_dataanalyzer_') as pasta:
+        for cenario in montar_cenarios(pasta, args.linhas):
+            nome = cenario.pop('nome')
+            inicio = time.perf_counter()
+            referencia = comparar_arquivos('pandas', **cenario)
+            tempos = [f"pandas {time.perf_counter() - inicio:.2f}s"]
+            conforme = True
+            for motor in motores:
+                inicio = time.perf_counter()
+                resultado = comparar_arquivos(motor, **cenario)
+                tempos.append(f"{motor} {time.perf_counter() - inicio:.2f}s")
+                diferencas = comparar_com_referencia(resultado, referencia)
+                if diferencas:
+                    falhas += 1; conforme = False
+                    print(f"FALHOU  {nome} [{motor}]")
+                    for diferenca in diferencas: print(f"        {diferenca}")
+            print(f"{'ok' if conforme else '':<8}{nome:<55} ({', '.join(tempos)})")
+
+    print(f"\n{falhas} falha(s)." if falhas else "\nTodos os motores conferem com o pandas.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# testes/conformidade_distribuido.py
+#
+# Teste de conformidade do confronto distribuído (core/distributed.py): inicia alguns
+# trabalhadores em processos separados, em localhost, e compara cada cenário do teste do
+# confronto paralelo feito em um processo (comparar_dataframes) e repartido entre os
+# trabalhadores, com os lados enviados em vários blocos. Resumo por par, resumo por
+# dimensão e detalhe devem ser iguais. Confere também que uma chave errada é recusada.
+#
+# Exemplos:
+#   python testes/conformidade_distribuido.py
+#   python testes/conformidade_distribuido.py --linhas 1000000 --trabalhadores 4 --bloco 100000
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import time
+
+try:
+    from core import distributed
+    from core.data_comparator import comparar_dataframes
+    from testes.conformidade_backends import comparar_com_referencia
+    from testes.conformidade_paralelo import montar_cenarios, _diferencas_dimensoes
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core import distributed
+    from core.data_comparator import comparar_dataframes
+    from testes.conformidade_backends import comparar_com_referencia
+    from testes.conformidade_paralelo import montar_cenarios, _diferencas_dimensoes
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def iniciar_trabalhadores(quantidade: int) -> tuple[list, list[str]]:
+    """Inicia os trabalhadores em portas livres e devolve (processos, endereços)."""
+    processos, enderecos = [], []
+    for _ in range(quantidade):
+        processo = subprocess.Popen([sys.executable, '-u', '-m', 'core.distributed', 'trabalhador', '--porta', '0'],
+                                    cwd=RAIZ, stdout=subprocess.PIPE, text=True)
+        linha = processo.stdout.readline() # "[Trabalhador] Atendendo em host:porta (...)"
+        enderecos.append(linha.split(' em ')[1].split(' ')[0])
+        processos.append(processo)
+    return processos, enderecos
+
+
+def em_blocos(df, tamanho_bloco: int):
+    for inicio in range(0, max(len(df), 1), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere se o confronto distribuído produz o mesmo resultado do serial.")
+    parser.add_argument('--linhas', type=int, default=50_000, help="Linhas do cenário sintético.")
+    parser.add_argument('--trabalhadores', type=int, default=3, help="Trabalhadores iniciados em localhost.")
+    parser.add_argument('--bloco', type=int, default=20_000, help="Linhas por bloco enviado.")
+    args = parser.parse_args()
+
+    os.environ.setdefault(distributed.VARIAVEL_CHAVE, secrets.token_hex(16)) # Herdada pelos trabalhadores
+    processos, enderecos = iniciar_trabalhadores(args.trabalhadores)
+    falhas = 0
+    try:
+        print(f"Trabalhadores: {', '.join(enderecos)}\n")
+        for cenario in montar_cenarios(args.linhas):
+            nome = cenario.pop('nome')
+            inicio = time.perf_counter()
+            referencia = comparar_dataframes(**cenario)
+            tempo_serial = time.perf_counter() - inicio
+            df_a, df_b = cenario.pop('df_lado_a'), cenario.pop('df_lado_b')
+            inicio = time.perf_counter()
+            resultado = distributed.comparar_distribuido(em_blocos(df_a, args.bloco), em_blocos(df_b, args.bloco),
+                                                         trabalhadores=enderecos, **cenario)
+            tempo_distribuido = time.perf_counter() - inicio
+            diferencas = comparar_com_referencia(resultado, referencia)
+            if resultado is not None:
+                diferencas += _diferencas_dimensoes(resultado, referencia)
+            if diferencas:
+                falhas += 1
+                print(f"FALHOU  {nome}")
+                for diferenca in diferencas: print(f"        {diferenca}")
+            else:
+                print(f"ok      {nome:<65} (serial {tempo_serial:.2f}s, distribuído {tempo_distribuido:.2f}s)")
+
+        try:
+            distributed.comparar_distribuido([df_a], [df_b], ['Filial', 'Doc'], ['Filial', 'Doc'], [('Valor', 'Total')],
+                                             enderecos, chave='chave errada')
+            falhas += 1
+            print("FALHOU  chave errada foi aceita")
+        except distributed.ErroDistribuido as e:
+            print(f"ok      chave errada recusada ({e})")
+    finally:
+        for processo in processos:
+            processo.terminate()
+            processo.wait()
+
+    print(f"\n{falhas} falha(s)." if falhas else "\nO confronto distribuído confere com o serial.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
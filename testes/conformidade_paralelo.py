@@ -0,0 +1,120 @@
+# testes/conformidade_paralelo.py
+#
+# Teste de conformidade do confronto paralelo (core/parallel_compare.py): cada cenário é
+# comparado em um processo (comparar_dataframes) e repartido entre processos
+# (comparar_em_paralelo), e os dois resultados devem ser iguais: resumo por par, resumo
+# por dimensão e detalhe com as mesmas colunas, tipos, valores e ordem de linhas.
+#
+# Exemplos:
+#   python testes/conformidade_paralelo.py
+#   python testes/conformidade_paralelo.py --linhas 1000000 --processos 8
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from core import parallel_compare
+    from core.data_comparator import comparar_dataframes
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+    from testes.conformidade_backends import comparar_com_referencia
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core import parallel_compare
+    from core.data_comparator import comparar_dataframes
+    from testes.benchmark_confronto import gerar_dados_sinteticos
+    from testes.conformidade_backends import comparar_com_referencia
+
+
+def gerar_casos_limite() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Chave composta com nulos e repetidas, coluna object com vazios (NaN, como o read_excel
+    entrega) e valores com mais casas que a escala do modo monetário.
+    """
+    df_a = pd.DataFrame({
+        'Filial': ['SP', 'SP', 'RJ', 'RJ', None, 'MG', 'SP', 'BA', 'RJ'],
+        'Doc': [1, 2, 1, 3, 4, 5, 2, 9, 1],
+        'Status': pd.Series(['ok', 'ok', 'pendente', 'ok', 'ok', 'erro', 'ok', 'ok', np.nan], dtype=object),
+        'Valor': [10.5, 20, np.nan, 7.125, 7.25, 3, 1e3, 0, 0.1],
+    })
+    df_b = pd.DataFrame({
+        'Filial': ['RJ', 'SP', 'SP', None, 'MG', 'PR', 'RJ', 'AM'],
+        'Doc': [1, 2, 1, 4, 5, 6, 3, 1],
+        'Status': pd.Series(['ok', 'ok', 'ok', 'erro', 'erro', 'ok', 'ok', 'ok'], dtype=object),
+        'Total': [0.2, 20.0, 10.5, 7.0, None, 8.0, 7.125, 1.0],
+    })
+    return df_a, df_b
+
+
+def _diferencas_dimensoes(resultado: dict, referencia: dict) -> list[str]:
+    diferencas = []
+    dimensoes, esperadas = resultado.get('resumo_por_dimensao', {}), referencia.get('resumo_por_dimensao', {})
+    if set(dimensoes) != set(esperadas):
+        return [f"dimensões {sorted(dimensoes)}, esperado {sorted(esperadas)}"]
+    for dimensao, esperado in esperadas.items():
+        try:
+            pd.testing.assert_frame_equal(dimensoes[dimensao], esperado, check_exact=False, rtol=1e-9)
+        except AssertionError as e:
+            diferencas.append(f"dimensão {dimensao}: {str(e).strip().splitlines()[0]}")
+    return diferencas
+
+
+def montar_cenarios(n_linhas: int) -> list[dict]:
+    df_a, df_b = gerar_dados_sinteticos(n_linhas, taxa_duplicatas=0.05, taxa_divergencia=0.05, taxa_ausentes=0.02)
+    df_b.loc[df_b.sample(frac=0.01, random_state=1).index, 'Valor_B'] = np.nan
+    limite_a, limite_b = gerar_casos_limite()
+
+    cenarios = []
+    for tipo_join in ['inner', 'left', 'right', 'outer']:
+        for apenas_divergencias, tolerancia, casas in [(True, 0.0, None), (True, 5.0, 2), (False, 0.0, None)]:
+            cenarios.append({'nome': f"sintético {tipo_join} divergencias={apenas_divergencias} tol={tolerancia} casas={casas}",
+                             'df_lado_a': df_a, 'df_lado_b': df_b,
+                             'colunas_chave_a': ['ID'], 'colunas_chave_b': ['Chave_B'],
+                             'pares_mapeados': [('Valor', 'Valor_B')], 'tipo_join': tipo_join,
+                             'apenas_divergencias': apenas_divergencias, 'tolerancia_divergencia': tolerancia,
+                             'casas_decimais': casas, 'dimensoes_agrupamento': ['Categoria']})
+        cenarios.append({'nome': f"casos limite {tipo_join}",
+                         'df_lado_a': limite_a, 'df_lado_b': limite_b,
+                         'colunas_chave_a': ['Filial', 'Doc'], 'colunas_chave_b': ['Filial', 'Doc'],
+                         'pares_mapeados': [('Valor', 'Total')], 'tipo_join': tipo_join,
+                         'casas_decimais': 2, 'dimensoes_agrupamento': ['Status']})
+    return cenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere se o confronto paralelo produz o mesmo resultado do serial.")
+    parser.add_argument('--linhas', type=int, default=50_000, help="Linhas do cenário sintético.")
+    parser.add_argument('--processos', type=int, default=4, help="Processos do confronto paralelo.")
+    args = parser.parse_args()
+
+    # Cenários pequenos também são repartidos, para exercitar fatias vazias e chaves nulas
+    parallel_compare.LINHAS_MINIMAS_PARALELO = 0
+    falhas = 0
+    for cenario in montar_cenarios(args.linhas):
+        nome = cenario.pop('nome')
+        inicio = time.perf_counter()
+        referencia = comparar_dataframes(**cenario)
+        tempo_serial = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        resultado = parallel_compare.comparar_em_paralelo(**cenario, num_processos=args.processos)
+        tempo_paralelo = time.perf_counter() - inicio
+        diferencas = comparar_com_referencia(resultado, referencia)
+        if resultado is not None:
+            diferencas += _diferencas_dimensoes(resultado, referencia)
+        if diferencas:
+            falhas += 1
+            print(f"FALHOU  {nome}")
+            for diferenca in diferencas: print(f"        {diferenca}")
+        else:
+            print(f"ok      {nome:<65} (serial {tempo_serial:.2f}s, paralelo {tempo_paralelo:.2f}s)")
+
+    print(f"\n{falhas} falha(s)." if falhas else "\nO confronto paralelo confere com o serial.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
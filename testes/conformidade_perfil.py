@@ -0,0 +1,104 @@
+# testes/conformidade_perfil.py
+#
+# Teste de conformidade das estatísticas das colunas (core/data_profiler.py): o perfil feito
+# em blocos, com HyperLogLog, Misra-Gries e t-digest, é comparado com os valores exatos do
+# pandas sobre o DataFrame inteiro. Nulos e linhas devem bater exatamente; distintos e
+# quantis, dentro das tolerâncias dos resumos; e os mais repetidos exibidos devem ser de fato
+# os mais frequentes, com a contagem real dentro da faixa informada.
+#
+# Exemplos:
+#   python testes/conformidade_perfil.py
+#   python testes/conformidade_perfil.py --linhas 5000000 --bloco 250000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from core import data_profiler
+except ModuleNotFoundError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core import data_profiler
+
+ERRO_MAXIMO_DISTINTOS = 0.04   # ~5 desvios-padrão do HyperLogLog com 2^14 registradores
+ERRO_MAXIMO_QUANTIL = 0.005    # Em posição (quantil), não em valor
+
+
+def gerar_dados(n_linhas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'ID': np.arange(n_linhas),
+        'Cliente': pd.Series(rng.zipf(1.3, n_linhas) % 2_000_000).astype(str),
+        'Categoria': rng.choice(['A', 'B', 'C', 'D'], n_linhas),
+        'Valor': rng.lognormal(4, 1.5, n_linhas).round(2),
+        'Data': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, n_linhas), unit='D'),
+    })
+    df.loc[rng.random(n_linhas) < 0.03, 'Valor'] = np.nan
+    df.loc[rng.random(n_linhas) < 0.01, 'Cliente'] = None
+    return df
+
+
+def conferir(df: pd.DataFrame, perfil: dict) -> list[str]:
+    falhas = []
+    if perfil['linhas'] != len(df):
+        falhas.append(f"linhas {perfil['linhas']}, esperado {len(df)}")
+    for coluna in df.columns:
+        p, serie = perfil['colunas'][coluna], df[coluna]
+        if p['nulos'] != serie.isna().sum():
+            falhas.append(f"{coluna}: nulos {p['nulos']}, esperado {serie.isna().sum()}")
+        distintos = serie.nunique()
+        erro = abs(p['distintos'] - distintos) / max(distintos, 1)
+        if erro > (0 if p['distintos_exatos'] else ERRO_MAXIMO_DISTINTOS):
+            falhas.append(f"{coluna}: {p['distintos']} distintos, esperado {distintos} (erro {erro:.2%})")
+        contagens = serie.value_counts()
+        encontrados = {item['valor']: item for item in p['mais_frequentes']}
+        for valor, item in encontrados.items():
+            if not item['contagem'] <= contagens.get(valor, 0) <= item['contagem_maxima']:
+                falhas.append(f"{coluna}: {valor!r} aparece {contagens.get(valor, 0)} vezes, fora da faixa "
+                              f"{item['contagem']}-{item['contagem_maxima']}")
+        # Um valor mais frequente que o limite superior do último exibido (e acima do limite
+        # do Misra-Gries) não pode ter ficado de fora
+        if len(encontrados) == data_profiler.MAIS_FREQUENTES_EXIBIDOS:
+            corte = max(min(item['contagem_maxima'] for item in encontrados.values()),
+                        len(df) / (data_profiler.CAPACIDADE_FREQUENTES + 1))
+            for valor in contagens[contagens > corte].index:
+                if valor not in encontrados:
+                    falhas.append(f"{coluna}: valor frequente {valor!r} ({contagens[valor]}) ausente")
+        if 'quantis' in p:
+            numeros = serie.dropna()
+            numeros = numeros.astype('datetime64[ns]').astype('int64') if pd.api.types.is_datetime64_any_dtype(numeros) else numeros
+            ordenados = np.sort(numeros.to_numpy(dtype=np.float64))
+            for q, valor in p['quantis'].items():
+                valor = valor.as_unit('ns').value if isinstance(valor, pd.Timestamp) else valor
+                posicao = np.searchsorted(ordenados, valor) / len(ordenados)
+                posicao_fim = np.searchsorted(ordenados, valor, side='right') / len(ordenados)
+                if not posicao - ERRO_MAXIMO_QUANTIL <= q <= posicao_fim + ERRO_MAXIMO_QUANTIL:
+                    falhas.append(f"{coluna}: quantil {q} = {valor} está na posição {posicao:.4f}")
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere as estatísticas em blocos contra os valores exatos do pandas.")
+    parser.add_argument('--linhas', type=int, default=1_000_000, help="Linhas dos dados sintéticos.")
+    parser.add_argument('--bloco', type=int, default=100_000, help="Linhas por bloco.")
+    args = parser.parse_args()
+
+    df = gerar_dados(args.linhas)
+    inicio = time.perf_counter()
+    perfil = data_profiler.perfilar_blocos(df.iloc[i:i + args.bloco] for i in range(0, len(df), args.bloco))
+    print(f"Perfil de {len(df):,} linhas em {time.perf_counter() - inicio:.2f} s")
+    for coluna in df.columns:
+        print("  " + data_profiler.resumir_perfil(perfil['colunas'][coluna]))
+
+    falhas = conferir(df, perfil)
+    for falha in falhas: print(f"FALHOU  {falha}")
+    print(f"\n{len(falhas)} falha(s)." if falhas else "\nAs estatísticas conferem com os valores exatos.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())